@@ -14,8 +14,10 @@ except ImportError:
 from typing import Dict
 from datetime import datetime, timezone
 
-from database import get_db
+from database import get_db, db_execute, get_ultimos_mensajes
 from config import get_settings
+from utils.session_cache import get_session_cache
+from utils.telegram_sender import get_telegram_sender, PRIORIDAD_ALERTA
 
 
 class AdminBotHandler:
@@ -55,7 +57,7 @@ class AdminBotHandler:
         self.settings = get_settings()
         
         # Lista de chat_ids autorizados
-        admin_ids_str = self.settings.telegram_admin_chat_ids or ""
+        admin_ids_str = self.settings["telegram_admin_chat_ids"] or ""
         self.admin_chat_ids = set(
             id.strip() for id in admin_ids_str.split(",") if id.strip()
         )
@@ -67,7 +69,7 @@ class AdminBotHandler:
         return str(chat_id) in self.admin_chat_ids
 
     async def _rechazar_acceso(self, bot: Bot, chat_id: str):
-        await bot.send_message(
+        await get_telegram_sender(bot).enviar(
             chat_id=chat_id,
             text=(
                 "⛔ *Acceso denegado*\n\n"
@@ -115,7 +117,7 @@ class AdminBotHandler:
             print(f"❌ [AdminBotHandler] Error: {e}")
             if chat_id:
                 try:
-                    await bot.send_message(
+                    await get_telegram_sender(bot).enviar(
                         chat_id=chat_id,
                         text=f"Error procesando tu solicitud: {str(e)[:100]}"
                     )
@@ -141,7 +143,7 @@ class AdminBotHandler:
         await handler_fn(text, chat_id, bot)
 
     async def _cmd_start(self, text: str, chat_id: str, bot: Bot):
-        await bot.send_message(
+        await get_telegram_sender(bot).enviar(
             chat_id=chat_id,
             text=(
                 "🛸 *ORBITA — Panel de Control*\n\n"
@@ -158,7 +160,7 @@ class AdminBotHandler:
         lineas = ["📋 *COMANDOS DISPONIBLES*\n"]
         for cmd, desc in self.COMANDOS.items():
             lineas.append(f"`{cmd}` — {desc}")
-        await bot.send_message(
+        await get_telegram_sender(bot).enviar(
             chat_id=chat_id,
             text="\n".join(lineas),
             parse_mode=ParseMode.MARKDOWN
@@ -167,20 +169,20 @@ class AdminBotHandler:
     async def _cmd_leads(self, text: str, chat_id: str, bot: Bot):
         """Muestra los últimos 5 leads con botones de acción."""
         try:
-            result = self.db.table("leads").select(
+            result = await db_execute(self.db.table("leads").select(
                 "id, nombre, empresa_nombre, etapa_funnel, prioridad, estado, ultimo_contacto"
-            ).order("created_at", desc=True).limit(5).execute()
+            ).order("created_at", desc=True).limit(5))
 
             leads = result.data or []
 
             if not leads:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="📭 No hay leads registrados aún."
                 )
                 return
 
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"📊 *Últimos {len(leads)} leads:*",
                 parse_mode=ParseMode.MARKDOWN
@@ -226,7 +228,7 @@ class AdminBotHandler:
                     ]
                 ])
                 
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text=texto,
                     parse_mode=ParseMode.MARKDOWN,
@@ -234,7 +236,7 @@ class AdminBotHandler:
                 )
 
         except Exception as e:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"❌ Error consultando leads: {str(e)[:100]}"
             )
@@ -247,24 +249,24 @@ class AdminBotHandler:
             ).isoformat()
 
             # Leads hoy
-            leads_hoy = self.db.table("leads").select(
+            leads_hoy = await db_execute(self.db.table("leads").select(
                 "id", count="exact"
-            ).gte("created_at", inicio_hoy).execute()
+            ).gte("created_at", inicio_hoy))
 
             # Cotizaciones pendientes
-            cots_pendientes = self.db.table("cotizaciones").select(
+            cots_pendientes = await db_execute(self.db.table("cotizaciones").select(
                 "id", count="exact"
-            ).eq("estado", "pendiente").execute()
+            ).eq("estado", "pendiente"))
 
             # Reuniones hoy
-            reuniones_hoy = self.db.table("reuniones").select(
+            reuniones_hoy = await db_execute(self.db.table("reuniones").select(
                 "id", count="exact"
-            ).gte("fecha_hora", inicio_hoy).execute()
+            ).gte("fecha_hora", inicio_hoy))
 
             # Logs de agentes hoy
-            logs_hoy = self.db.table("agent_logs").select(
+            logs_hoy = await db_execute(self.db.table("agent_logs").select(
                 "id", count="exact"
-            ).gte("created_at", inicio_hoy).execute()
+            ).gte("created_at", inicio_hoy))
 
             texto = (
                 f"📊 *RESUMEN DE HOY*\n"
@@ -288,7 +290,7 @@ class AdminBotHandler:
                 ]
             ])
             
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=texto,
                 parse_mode=ParseMode.MARKDOWN,
@@ -296,22 +298,22 @@ class AdminBotHandler:
             )
 
         except Exception as e:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"❌ Error obteniendo stats: {str(e)[:100]}"
             )
 
     async def _cmd_alertas(self, text: str, chat_id: str, bot: Bot):
         """Corre el Agente Analítico y muestra las alertas actuales."""
-        await bot.send_message(
+        await get_telegram_sender(bot).enviar(
             chat_id=chat_id,
             text="🔍 Analizando CRM... espera un momento."
         )
         
         try:
-            from agents.analitico import AnaliticoAgent
+            from agents.registry import get_agent
             
-            analitico = AnaliticoAgent()
+            analitico = get_agent("analitico")
             resultado = await analitico.process_message(
                 message="Generar alertas del sistema",
                 session_id="admin_bot",
@@ -321,7 +323,7 @@ class AdminBotHandler:
             # Extraer alertas del resultado
             alertas = resultado.get("alertas", [])
             if not alertas:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text=(
                         "✅ *Sin alertas activas*\n\n"
@@ -345,14 +347,14 @@ class AdminBotHandler:
                     f"💡 _{alerta.get('accion_recomendada', '')}_"
                 )
                 
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text=texto,
                     parse_mode=ParseMode.MARKDOWN
                 )
 
         except Exception as e:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"❌ Error: {str(e)[:100]}"
             )
@@ -361,7 +363,7 @@ class AdminBotHandler:
         """Busca leads por nombre."""
         partes = text.split(maxsplit=1)
         if len(partes) < 2 or not partes[1].strip():
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="Uso: `/buscar nombre` | Ej: `/buscar Carlos`",
                 parse_mode=ParseMode.MARKDOWN
@@ -370,20 +372,20 @@ class AdminBotHandler:
 
         termino = partes[1].strip()
         try:
-            result = self.db.table("leads").select(
+            result = await db_execute(self.db.table("leads").select(
                 "id, nombre, empresa_nombre, etapa_funnel, estado, prioridad"
-            ).ilike("nombre", f"%{termino}%").limit(5).execute()
+            ).ilike("nombre", f"%{termino}%").limit(5))
 
             leads = result.data or []
             if not leads:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text=f"🔍 No encontré leads con el nombre *{termino}*.",
                     parse_mode=ParseMode.MARKDOWN
                 )
                 return
 
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"🔍 Encontré *{len(leads)}* resultado(s) para _{termino}_:",
                 parse_mode=ParseMode.MARKDOWN
@@ -413,7 +415,7 @@ class AdminBotHandler:
                     ]
                 ])
                 
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text=texto,
                     parse_mode=ParseMode.MARKDOWN,
@@ -421,7 +423,7 @@ class AdminBotHandler:
                 )
                 
         except Exception as e:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"❌ Error buscando: {str(e)[:100]}"
             )
@@ -430,7 +432,7 @@ class AdminBotHandler:
         """Muestra detalle completo de un lead por ID corto."""
         partes = text.split(maxsplit=1)
         if len(partes) < 2:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="Uso: `/lead abc12345`",
                 parse_mode=ParseMode.MARKDOWN
@@ -439,12 +441,12 @@ class AdminBotHandler:
 
         id_corto = partes[1].strip()
         try:
-            result = self.db.table("leads").select("*").ilike(
+            result = await db_execute(self.db.table("leads").select("*").ilike(
                 "id", f"{id_corto}%"
-            ).limit(1).execute()
+            ).limit(1))
 
             if not result.data:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text=f"🔍 No encontré lead con ID `{id_corto}`.",
                     parse_mode=ParseMode.MARKDOWN
@@ -454,9 +456,9 @@ class AdminBotHandler:
             lead = result.data[0]
             
             # Obtener cotizaciones del lead
-            cotizaciones = self.db.table("cotizaciones").select(
+            cotizaciones = (await db_execute(self.db.table("cotizaciones").select(
                 "plan_nombre, valor, estado"
-            ).eq("lead_id", lead["id"]).execute().data or []
+            ).eq("lead_id", lead["id"]))).data or []
 
             cots_str = "\n".join([
                 f"  • {c['plan_nombre']} — ${c['valor']:,.0f} [{c['estado']}]"
@@ -497,7 +499,7 @@ class AdminBotHandler:
                 ]
             ])
             
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=texto,
                 parse_mode=ParseMode.MARKDOWN,
@@ -505,7 +507,7 @@ class AdminBotHandler:
             )
             
         except Exception as e:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"❌ Error: {str(e)[:100]}"
             )
@@ -514,7 +516,7 @@ class AdminBotHandler:
         """Pausa las respuestas automáticas del bot de leads para un lead."""
         partes = text.split(maxsplit=1)
         if len(partes) < 2:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="Uso: `/pausa abc12345`",
                 parse_mode=ParseMode.MARKDOWN
@@ -523,12 +525,12 @@ class AdminBotHandler:
 
         id_corto = partes[1].strip()
         try:
-            lead = self.db.table("leads").select(
+            lead = (await db_execute(self.db.table("leads").select(
                 "id, nombre, telegram_chat_id"
-            ).ilike("id", f"{id_corto}%").limit(1).execute().data
+            ).ilike("id", f"{id_corto}%").limit(1))).data
             
             if not lead:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="🔍 Lead no encontrado."
                 )
@@ -539,13 +541,15 @@ class AdminBotHandler:
             # Pausar la sesión del bot de leads para este chat_id
             if lead.get("telegram_chat_id"):
                 # Crear o actualizar sesión
-                self.db.table("telegram_bot_sessions").upsert({
+                await db_execute(self.db.table("telegram_bot_sessions").upsert({
                     "telegram_chat_id": lead["telegram_chat_id"],
                     "estado_bot": "pausado",
                     "updated_at": datetime.now(timezone.utc).isoformat()
-                }).execute()
+                }))
+                # El bot de leads (quizá en otro proceso) debe ver la pausa ya, no al expirar el TTL
+                await get_session_cache().invalidar(lead["telegram_chat_id"])
 
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=(
                     f"⏸ *Bot pausado para {lead['nombre']}*\n\n"
@@ -557,13 +561,13 @@ class AdminBotHandler:
             )
             
         except Exception as e:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"❌ Error: {str(e)[:100]}"
             )
 
     async def _cmd_desconocido(self, text: str, chat_id: str, bot: Bot):
-        await bot.send_message(
+        await get_telegram_sender(bot).enviar(
             chat_id=chat_id,
             text=f"❓ Comando no reconocido. Escribe /ayuda para ver opciones.",
         )
@@ -593,18 +597,19 @@ class AdminBotHandler:
 
             elif data.startswith("admin_pausa_"):
                 lead_id = data.replace("admin_pausa_", "")
-                lead = self.db.table("leads").select(
+                lead = (await db_execute(self.db.table("leads").select(
                     "nombre, telegram_chat_id"
-                ).eq("id", lead_id).maybe_single().execute().data
+                ).eq("id", lead_id).maybe_single())).data
                 
                 if lead and lead.get("telegram_chat_id"):
-                    self.db.table("telegram_bot_sessions").upsert({
+                    await db_execute(self.db.table("telegram_bot_sessions").upsert({
                         "telegram_chat_id": lead["telegram_chat_id"],
                         "estado_bot": "pausado",
                         "updated_at": datetime.now(timezone.utc).isoformat()
-                    }).execute()
+                    }))
+                    await get_session_cache().invalidar(lead["telegram_chat_id"])
                     
-                    await bot.send_message(
+                    await get_telegram_sender(bot).enviar(
                         chat_id=chat_id,
                         text=f"⏸ Bot pausado para *{lead['nombre']}*.",
                         parse_mode=ParseMode.MARKDOWN
@@ -612,15 +617,17 @@ class AdminBotHandler:
 
             elif data.startswith("admin_convertir_"):
                 lead_id = data.replace("admin_convertir_", "")
-                self.db.table("leads").update(
+                await db_execute(self.db.table("leads").update(
                     {"estado": "convertido", "etapa_funnel": "cliente"}
-                ).eq("id", lead_id).execute()
+                ).eq("id", lead_id))
                 
-                lead = self.db.table("leads").select("nombre").eq(
+                lead = (await db_execute(self.db.table("leads").select("nombre, telegram_chat_id").eq(
                     "id", lead_id
-                ).maybe_single().execute().data
+                ).maybe_single())).data
+                if lead and lead.get("telegram_chat_id"):
+                    await get_session_cache().invalidar(lead["telegram_chat_id"], "lead")
                 
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text=f"✅ *{lead.get('nombre', 'Lead')}* marcado como *CLIENTE*. 🎉",
                     parse_mode=ParseMode.MARKDOWN
@@ -636,7 +643,7 @@ class AdminBotHandler:
                 
         except Exception as e:
             print(f"❌ Error en callback: {e}")
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"Error procesando acción: {str(e)[:100]}"
             )
@@ -644,27 +651,23 @@ class AdminBotHandler:
     async def _mostrar_ultimos_mensajes(self, lead_id: str, chat_id: str, bot: Bot):
         """Muestra los últimos 5 mensajes de la conversación con el lead."""
         try:
-            msgs = self.db.table("conversations").select(
-                "role, content, agente, content_type, created_at"
-            ).eq("lead_id", lead_id).order(
-                "created_at", desc=True
-            ).limit(5).execute().data or []
+            msgs = await get_ultimos_mensajes(lead_id, 5)
 
             if not msgs:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="📭 Sin mensajes registrados para este lead."
                 )
                 return
 
-            lead = self.db.table("leads").select(
+            lead = (await db_execute(self.db.table("leads").select(
                 "nombre"
-            ).eq("id", lead_id).maybe_single().execute().data
+            ).eq("id", lead_id).maybe_single())).data
 
             header = f"💬 *Últimos mensajes — {lead.get('nombre', 'Lead') if lead else 'Lead'}*\n\n"
             lineas = [header]
             
-            for msg in reversed(msgs):
+            for msg in msgs:
                 role_emoji = "👤" if msg["role"] == "user" else "🤖"
                 tipo = " 🎙️" if msg.get("content_type") == "voice" else ""
                 agente = f" _{msg.get('agente', '')}_" if msg["role"] == "assistant" else ""
@@ -679,14 +682,14 @@ class AdminBotHandler:
                     f"{content}\n"
                 )
 
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="\n".join(lineas),
                 parse_mode=ParseMode.MARKDOWN
             )
             
         except Exception as e:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=f"❌ Error: {str(e)[:100]}"
             )
@@ -706,12 +709,13 @@ class AdminBotHandler:
         
         texto = f"{prioridad_emoji} *ALERTA DEL SISTEMA*\n\n{mensaje}"
         
-        for admin_chat_id in self.admin_chat_ids:
-            try:
-                await bot.send_message(
-                    chat_id=admin_chat_id,
-                    text=texto,
-                    parse_mode=ParseMode.MARKDOWN
-                )
-            except Exception as e:
-                print(f"❌ [AdminNotifier] Error enviando a {admin_chat_id}: {e}")
+        # Todos los admins a la vez; las respuestas a comandos van por delante
+        resultados = await get_telegram_sender(bot).difundir(
+            self.admin_chat_ids,
+            texto,
+            prioridad=PRIORIDAD_ALERTA,
+            parse_mode=ParseMode.MARKDOWN
+        )
+        for admin_chat_id, error in resultados.items():
+            if error:
+                print(f"❌ [AdminNotifier] Error enviando a {admin_chat_id}: {error}")
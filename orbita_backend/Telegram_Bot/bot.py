@@ -5,12 +5,17 @@
 from telegram import Bot
 from telegram.ext import Application
 from config import get_settings
+from utils.update_dispatcher import UpdateDispatcher, create_update_dispatcher
 
 # ─── Singletons ───────────────────────────────────────────────
 _leads_bot: Bot | None = None
 _admin_bot: Bot | None = None
 _leads_application: Application | None = None
 _admin_application: Application | None = None
+_leads_handler = None
+_leads_dispatcher: UpdateDispatcher | None = None
+_admin_handler = None
+_admin_dispatcher: UpdateDispatcher | None = None
 
 
 # ─── BOT DE LEADS ─────────────────────────────────────────────
@@ -36,6 +41,23 @@ def get_leads_application() -> Application:
     return _leads_application
 
 
+def get_leads_handler():
+    """LeadsBotHandler compartido por el polling y el webhook."""
+    global _leads_handler
+    if not _leads_handler:
+        from Telegram_Bot.leads_handler import LeadsBotHandler
+        _leads_handler = LeadsBotHandler()
+    return _leads_handler
+
+
+def get_leads_dispatcher() -> UpdateDispatcher:
+    """Cola de updates del bot de leads: en orden por chat, concurrente entre chats."""
+    global _leads_dispatcher
+    if not _leads_dispatcher:
+        _leads_dispatcher = create_update_dispatcher(get_leads_handler().handle_update)
+    return _leads_dispatcher
+
+
 async def setup_leads_webhook():
     """Registra el webhook del bot de leads."""
     settings = get_settings()
@@ -95,6 +117,38 @@ async def delete_admin_webhook():
     await get_admin_bot().delete_webhook()
 
 
+def get_admin_handler():
+    """AdminBotHandler compartido por el webhook."""
+    global _admin_handler
+    if not _admin_handler:
+        from Telegram_Bot.admin_bot_handler import AdminBotHandler
+        _admin_handler = AdminBotHandler()
+    return _admin_handler
+
+
+def get_admin_dispatcher() -> UpdateDispatcher:
+    """Cola de updates del bot de admin: en orden por chat, concurrente entre chats."""
+    global _admin_dispatcher
+    if not _admin_dispatcher:
+        _admin_dispatcher = create_update_dispatcher(get_admin_handler().handle_update)
+    return _admin_dispatcher
+
+
+def get_dispatchers_stats() -> dict:
+    """Estadísticas de los dispatchers ya creados (None si aún no existe); no crea ninguno."""
+    return {
+        "leads": _leads_dispatcher.get_stats() if _leads_dispatcher else None,
+        "admin": _admin_dispatcher.get_stats() if _admin_dispatcher else None
+    }
+
+
+async def drain_dispatchers():
+    """Procesa los updates pendientes antes de apagar (solo dispatchers ya creados)."""
+    for dispatcher in (_leads_dispatcher, _admin_dispatcher):
+        if dispatcher:
+            await dispatcher.drain()
+
+
 # ─── INFO COMBINADA ───────────────────────────────────────────
 
 async def get_both_bots_info() -> dict:
@@ -4,23 +4,25 @@
 
 from telegram import Update, Bot, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any
 from datetime import datetime, timezone
 import json
-import os
-import tempfile
 import httpx
-import asyncio
 
-from database import get_db, create_cotizacion, update_lead_status
+from database import (
+    get_db, db_execute, create_cotizacion, update_lead_status,
+    add_conversation_message, get_ultimos_mensajes
+)
 from config import get_settings
-from agents.orchestrator import OrchestratorAgent
-from agents.captador import CaptadorAgent
-from agents.conversacional import ConversacionalAgent
-from agents.comunicacion import ComunicacionAgent
+from agents.registry import get_agent
 from utils.groq_client import get_groq_client
 from utils.cotizacion_renderer import render_cotizacion_markdown
+from utils.cotizacion_pdf import generar_pdf_cotizacion
 from utils.quick_estimate import get_quick_estimator
+from utils.conversation_summary import get_conversation_summarizer
+from utils.transcription import get_voice_transcriber
+from utils.session_cache import get_session_cache
+from utils.telegram_sender import RespuestaProgresiva, get_telegram_sender
 
 
 class LeadsBotHandler:
@@ -47,14 +49,35 @@ class LeadsBotHandler:
         self.settings = get_settings()
         self.groq_client = get_groq_client()
         
-        # Agentes principales
-        self.orchestrator = OrchestratorAgent()
-        self.captador = CaptadorAgent()
-        self.conversacional = ConversacionalAgent()
-        self.comunicacion = ComunicacionAgent()
-        
         # Estimador de precios rápido
         self.quick_estimator = get_quick_estimator()
+        
+        # Resumen incremental de conversaciones largas (None si está desactivado)
+        self.summarizer = get_conversation_summarizer()
+        
+        # Transcripción de notas de voz (en memoria, con caché por file_unique_id)
+        self.transcriber = get_voice_transcriber()
+        
+        # Fila del lead y estado de pausa por chat (el bot de admin invalida)
+        self.session_cache = get_session_cache()
+    
+    # Agentes principales (compartidos por proceso, creados al primer uso)
+    
+    @property
+    def orchestrator(self):
+        return get_agent("orchestrator")
+    
+    @property
+    def captador(self):
+        return get_agent("captador")
+    
+    @property
+    def conversacional(self):
+        return get_agent("conversacional")
+    
+    @property
+    def comunicacion(self):
+        return get_agent("comunicacion")
     
     # ─── ROUTER PRINCIPAL ──────────────────────────────────────
     
@@ -79,7 +102,7 @@ class LeadsBotHandler:
             # Intentar enviar mensaje de error al usuario
             if update.message:
                 try:
-                    await bot.send_message(
+                    await get_telegram_sender(bot).enviar(
                         chat_id=update.message.chat_id,
                         text="Disculpa, hubo un problema técnico. Por favor intenta de nuevo en un momento."
                     )
@@ -110,14 +133,14 @@ class LeadsBotHandler:
             texto = await self._transcribir_voz(message.voice, bot)
             content_type = "voice"
             if not texto:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="No pude procesar tu nota de voz. ¿Podrías escribir tu mensaje?"
                 )
                 return
         else:
             # Otro tipo de mensaje no soportado
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="Por ahora solo puedo procesar mensajes de texto y notas de voz. 😊"
             )
@@ -131,7 +154,7 @@ class LeadsBotHandler:
         # Obtener o crear lead
         lead = await self._get_or_create_lead(chat_id, user)
         if not lead:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="Hubo un problema registrando tu información. Por favor intenta de nuevo."
             )
@@ -142,14 +165,26 @@ class LeadsBotHandler:
         # Guardar mensaje del usuario en conversaciones
         await self._guardar_mensaje(lead_id, "user", texto, content_type)
         
-        # Obtener contexto de conversación
+        # Obtener contexto de conversación (más el estado y los datos ya recopilados del lead)
         contexto = await self._obtener_contexto(lead_id)
+        contexto["estado_conversacion"] = lead.get("estado_conversacion")
+        contexto["datos_lead"] = self._datos_recopilados(lead)
         
         # Procesar con el Orquestador
-        typing_task = None
+        progresiva = None
         try:
-            # Indicar que el bot está escribiendo
-            await bot.send_chat_action(chat_id=chat_id, action="typing")
+            if self.settings["telegram_streaming_enabled"]:
+                # Mensaje provisional que se edita mientras el LLM genera la respuesta
+                progresiva = RespuestaProgresiva(
+                    get_telegram_sender(bot), chat_id,
+                    intervalo=self.settings["telegram_stream_edit_interval"],
+                    primer_intervalo=self.settings["telegram_stream_first_edit_delay"],
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                await progresiva.iniciar()
+            else:
+                # Indicar que el bot está escribiendo
+                await bot.send_chat_action(chat_id=chat_id, action="typing")
             
             # Llamar al orquestador con el mensaje y contexto
             resultado = await self._procesar_con_agentes(
@@ -157,7 +192,8 @@ class LeadsBotHandler:
                 lead_id=lead_id,
                 chat_id=chat_id,
                 contexto=contexto,
-                content_type=content_type
+                content_type=content_type,
+                al_recibir=progresiva.actualizar if progresiva else None
             )
             
             respuesta = resultado.get("respuesta", "¿En qué más puedo ayudarte?")
@@ -167,44 +203,26 @@ class LeadsBotHandler:
             agente_usado = resultado.get("agente", "conversacional")
             await self._guardar_mensaje(lead_id, "assistant", respuesta, "text", agente_usado)
             
-            # Enviar respuesta (intentar con Markdown, si falla enviar como texto plano)
-            try:
-                if botones:
-                    keyboard = InlineKeyboardMarkup(botones)
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=respuesta,
-                        parse_mode=ParseMode.MARKDOWN,
-                        reply_markup=keyboard
-                    )
-                else:
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=respuesta,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-            except Exception as markdown_error:
-                # Si falla el Markdown, enviar como texto plano
-                print(f"⚠️ Error con Markdown, enviando como texto plano: {markdown_error}")
-                if botones:
-                    keyboard = InlineKeyboardMarkup(botones)
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=respuesta,
-                        reply_markup=keyboard
-                    )
-                else:
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=respuesta
-                    )
+            # Enviar respuesta (el sender reintenta como texto plano si el Markdown falla)
+            reply_markup = InlineKeyboardMarkup(botones) if botones else None
+            if progresiva:
+                await progresiva.finalizar(respuesta, reply_markup=reply_markup)
+            else:
+                await get_telegram_sender(bot).enviar(
+                    chat_id=chat_id,
+                    text=respuesta,
+                    parse_mode=ParseMode.MARKDOWN,
+                    reply_markup=reply_markup
+                )
             
         except Exception as e:
             print(f"❌ Error procesando mensaje: {e}")
-            await bot.send_message(
-                chat_id=chat_id,
-                text="Disculpa, tuve un problema procesando tu mensaje. ¿Podrías reformularlo?"
-            )
+            error = "Disculpa, tuve un problema procesando tu mensaje. ¿Podrías reformularlo?"
+            if progresiva and progresiva.mensaje is not None:
+                progresiva.parse_mode = None
+                await progresiva.finalizar(error)
+            else:
+                await get_telegram_sender(bot).enviar(chat_id=chat_id, text=error)
     
     # ─── PROCESAMIENTO CON AGENTES ─────────────────────────────
     
@@ -213,8 +231,9 @@ class LeadsBotHandler:
         mensaje: str,
         lead_id: str,
         chat_id: str,
-        contexto: list,
-        content_type: str
+        contexto: Dict[str, Any],
+        content_type: str,
+        al_recibir: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         """
         Procesa el mensaje usando el sistema de agentes.
@@ -223,6 +242,9 @@ class LeadsBotHandler:
         2. Detecta automáticamente si el usuario está pidiendo un servicio
         3. Si hay servicio detectado, genera estimado de precio
         4. Genera botones apropiados basados en contexto
+        
+        Con al_recibir, la respuesta del orquestador se genera en streaming y se
+        llama con el texto acumulado cada vez que llega un fragmento.
         """
         try:
             # Construir el input para el orquestador
@@ -230,18 +252,34 @@ class LeadsBotHandler:
                 "mensaje": mensaje,
                 "lead_id": lead_id,
                 "chat_id": chat_id,
-                "contexto": contexto[-10:] if contexto else [],  # Últimos 10 mensajes
+                "resumen": contexto.get("resumen"),  # Turnos antiguos ya resumidos
+                "contexto": contexto.get("mensajes", []),  # Turnos recientes sin resumir
+                "estado_conversacion": contexto.get("estado_conversacion"),
+                "datos_lead": contexto.get("datos_lead") or {},
                 "content_type": content_type,
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
             
             # El orquestador decide qué agentes activar
             # y coordina la respuesta
-            resultado_orchestrator = await self.orchestrator.process_message(
-                message=mensaje,
-                session_id=lead_id,
-                context=input_data
-            )
+            if al_recibir is None:
+                resultado_orchestrator = await self.orchestrator.process_message(
+                    message=mensaje,
+                    session_id=lead_id,
+                    context=input_data
+                )
+            else:
+                resultado_orchestrator, acumulado = {}, ""
+                async for evento in self.orchestrator.stream_message(
+                    message=mensaje,
+                    session_id=lead_id,
+                    context=input_data
+                ):
+                    if evento["tipo"] == "token":
+                        acumulado += evento["texto"]
+                        al_recibir(acumulado)
+                    elif evento["tipo"] == "fin":
+                        resultado_orchestrator = evento["resultado"]
             
             # Extraer la respuesta generada
             respuesta = resultado_orchestrator.get(
@@ -303,17 +341,7 @@ class LeadsBotHandler:
     
     def _detectar_complejidad(self, mensaje: str) -> str:
         """Detecta el nivel de complejidad basado en el mensaje."""
-        mensaje_lower = mensaje.lower()
-        
-        # Palabras de baja complejidad
-        if any(w in mensaje_lower for w in ["simple", "básico", "sencillo", "pequeño"]):
-            return "simple"
-        
-        # Palabras de alta complejidad
-        if any(w in mensaje_lower for w in ["complejo", "avanzado", "múltiples", "integraciones", "customizado"]):
-            return "complejo"
-        
-        return "standard"
+        return self.quick_estimator.detectar_complejidad(mensaje)
     
     # ─── COMANDOS ──────────────────────────────────────────────
     
@@ -322,7 +350,7 @@ class LeadsBotHandler:
         cmd = texto.split()[0].lower()
         
         if cmd == "/start":
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=(
                     f"👋 ¡Hola {user.first_name}!\n\n"
@@ -360,14 +388,14 @@ class LeadsBotHandler:
                 await self._handle_plan_callback(data, chat_id, message_id, bot)
             
             else:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="Opción no reconocida. Por favor intenta de nuevo."
                 )
                 
         except Exception as e:
             print(f"❌ Error en callback: {e}")
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="Hubo un problema procesando tu solicitud."
             )
@@ -408,7 +436,7 @@ class LeadsBotHandler:
             
             # Recuperar servicio guardado en BD
             try:
-                lead_result = self.db.table("leads").select("interes").eq("id", lead_id).execute()
+                lead_result = await db_execute(self.db.table("leads").select("interes").eq("id", lead_id))
                 servicio = None
                 if lead_result.data:
                     servicio = lead_result.data[0].get("interes")
@@ -422,7 +450,7 @@ class LeadsBotHandler:
                 )
             except Exception as e:
                 print(f"❌ Error en cot_int: {e}")
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="Hubo un error procesando tu solicitud. Por favor intenta de nuevo."
                 )
@@ -431,7 +459,7 @@ class LeadsBotHandler:
         # ★ NUEVO: Manejo del callback "cot_env" (cotización enviar)
         if accion_corta == "cot_env":
             print(f"⭐ Usuario solicita enviar detalles (lead {lead_id})")
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=(
                     "📧 ¿A qué correo quieres que envíe los detalles?\\n\\n"
@@ -442,7 +470,7 @@ class LeadsBotHandler:
         
         # Legacy: formatos antiguos
         if "aceptar" in data:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=(
                     "¡Excelente! 🎉\\n\\n"
@@ -450,12 +478,13 @@ class LeadsBotHandler:
                 ),
                 parse_mode=ParseMode.MARKDOWN
             )
-            self.db.table("leads").update(
+            await db_execute(self.db.table("leads").update(
                 {"status": "cotizado"}
-            ).eq("id", lead_id).execute()
+            ).eq("id", lead_id))
+            await self.session_cache.invalidar(chat_id, "lead")
         
         elif "rechazar" in data:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=(
                     "Entiendo. ¿Hay algo específico que no se ajusta a tus necesidades? "
@@ -481,7 +510,7 @@ class LeadsBotHandler:
             # Obtener lead del chat_id
             lead = await self._get_or_create_lead(chat_id, None)
             if not lead:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="❌ No pude identificar tu información. Por favor intenta de nuevo."
                 )
@@ -489,9 +518,9 @@ class LeadsBotHandler:
             
             # Obtener datos del lead
             lead_id_int = lead.get("id") or int(lead_id)
-            lead_result = self.db.table("leads").select("*").eq("id", lead_id_int).execute()
+            lead_result = await db_execute(self.db.table("leads").select("*").eq("id", lead_id_int))
             if not lead_result.data:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="❌ No encontré tu información. Por favor intenta de nuevo."
                 )
@@ -506,7 +535,7 @@ class LeadsBotHandler:
             )
             
             if not estimado:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="❌ No pude procesar tu solicitud. Por favor intenta de nuevo."
                 )
@@ -515,7 +544,7 @@ class LeadsBotHandler:
             # Enviar estimado al usuario
             mensaje_estimado = self.quick_estimator.formatear_estimado(estimado)
             
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=mensaje_estimado,
                 parse_mode=ParseMode.MARKDOWN
@@ -532,7 +561,7 @@ class LeadsBotHandler:
                 ]
             ])
             
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="¿Qué te gustaría hacer?",
                 reply_markup=keyboard
@@ -540,11 +569,12 @@ class LeadsBotHandler:
             
             # Actualizar status del lead
             await update_lead_status(lead_id_int, "cotizado")
+            await self.session_cache.invalidar(chat_id, "lead")
             print(f"✅ Cotización rápida enviada a lead {lead_id_int}")
             
         except Exception as e:
             print(f"❌ Error generando cotización de interés: {e}")
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="Hubo un problema. Un asesor te contactará pronto."
             )
@@ -552,7 +582,7 @@ class LeadsBotHandler:
     async def _handle_reunion_callback(self, data: str, chat_id: str, bot: Bot):
         """Maneja solicitudes de reunión."""
         # data = "reunion_agendar_<lead_id>"
-        await bot.send_message(
+        await get_telegram_sender(bot).enviar(
             chat_id=chat_id,
             text=(
                 "📅 Perfecto, vamos a agendar una reunión.\n\n"
@@ -583,7 +613,7 @@ class LeadsBotHandler:
         # Obtener lead del chat_id
         lead = await self._get_or_create_lead(chat_id, None)
         if not lead:
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="❌ No pude identificar tu información. Por favor intenta de nuevo."
             )
@@ -612,9 +642,9 @@ class LeadsBotHandler:
         """
         try:
             # Obtener datos del lead de la BD
-            lead_result = self.db.table("leads").select("*").eq("id", lead_id).execute()
+            lead_result = await db_execute(self.db.table("leads").select("*").eq("id", lead_id))
             if not lead_result.data:
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="❌ No encontré tu información. Por favor intenta de nuevo."
                 )
@@ -641,7 +671,7 @@ class LeadsBotHandler:
             )
             
             if not resultado_cotizacion.get("success"):
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text=resultado_cotizacion.get("fallback_message", 
                         "Hubo un problema generando la cotización. Un asesor te contactará pronto.")
@@ -657,7 +687,7 @@ class LeadsBotHandler:
             
             if not nueva_cotizacion.get("id"):
                 print("❌ Error al guardar cotización en BD")
-                await bot.send_message(
+                await get_telegram_sender(bot).enviar(
                     chat_id=chat_id,
                     text="Hubo un problema guardando la cotización. Por favor intenta de nuevo."
                 )
@@ -667,9 +697,9 @@ class LeadsBotHandler:
             
             # Actualizar estado del lead a "cotizado"
             await update_lead_status(lead_id, "cotizado")
+            await self.session_cache.invalidar(chat_id, "lead")
             print(f"✅ Lead {lead_id} actualizado a status 'cotizado'")
             
-            # Renderizar cotización en Markdown
             # Obtener datos de empresa (dummy para demo)
             empresa_data = {
                 "nombre": "ORBITA",
@@ -680,28 +710,26 @@ class LeadsBotHandler:
                 "pais": "Global"
             }
             
-            markdown_content = render_cotizacion_markdown(
-                cotizacion_data=nueva_cotizacion,
-                lead_data=lead_data,
-                empresa_data=empresa_data
-            )
-            
-            # Enviar cotización al usuario
+            # Enviar cotización al usuario como un único PDF
             print(f"📤 Enviando cotización a chat {chat_id}")
-            
-            # Dividir en mensajes si es muy largo
-            if len(markdown_content) > 4096:
-                # Telegram tiene límite de 4096 caracteres por mensaje
-                chunks = [markdown_content[i:i+4000] for i in range(0, len(markdown_content), 4000)]
-                for chunk in chunks:
-                    await bot.send_message(
-                        chat_id=chat_id,
-                        text=chunk,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-                    await asyncio.sleep(0.5)  # Pequeña pausa entre mensajes
-            else:
-                await bot.send_message(
+            codigo = nueva_cotizacion.get("numero_cotizacion") or f"COT-{cotizacion_id}"
+            try:
+                pdf = await generar_pdf_cotizacion(nueva_cotizacion, lead_data, empresa_data)
+                await get_telegram_sender(bot).enviar_documento(
+                    chat_id=chat_id,
+                    documento=pdf,
+                    filename=f"{codigo}.pdf",
+                    caption=f"📄 Propuesta {codigo} · Total ${float(nueva_cotizacion.get('total') or 0):,.2f}"
+                )
+            except Exception as e:
+                # Sin PDF: la misma propuesta en Markdown, dividida si supera el límite de Telegram
+                print(f"⚠️ No se pudo enviar el PDF, se envía en Markdown: {e}")
+                markdown_content = render_cotizacion_markdown(
+                    cotizacion_data=nueva_cotizacion,
+                    lead_data=lead_data,
+                    empresa_data=empresa_data
+                )
+                await get_telegram_sender(bot).enviar_largo(
                     chat_id=chat_id,
                     text=markdown_content,
                     parse_mode=ParseMode.MARKDOWN
@@ -718,7 +746,7 @@ class LeadsBotHandler:
                 ]
             ]
             
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text="¿Qué te parece la propuesta?",
                 reply_markup=InlineKeyboardMarkup(keyboard)
@@ -731,7 +759,7 @@ class LeadsBotHandler:
             import traceback
             traceback.print_exc()
             
-            await bot.send_message(
+            await get_telegram_sender(bot).enviar(
                 chat_id=chat_id,
                 text=(
                     "Disculpa, tuve un problema generando la cotización automáticamente. "
@@ -745,59 +773,33 @@ class LeadsBotHandler:
         """
         Transcribe nota de voz usando Whisper de Groq.
         [CRITERIO 3] Whisper transcribe notas de voz en tiempo real.
+        
+        El audio va de Telegram a Whisper en memoria (sin archivos temporales);
+        las notas reenviadas se resuelven desde la caché por file_unique_id.
         """
-        temp_file = None
-        try:
-            # Descargar el archivo de voz desde Telegram
+        async def descargar(buffer):
             file = await bot.get_file(voice.file_id)
-            file_bytes = await file.download_as_bytearray()
-            
-            # Crear archivo temporal con extensión .ogg (formato de Telegram)
-            with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as tmp:
-                tmp.write(file_bytes)
-                temp_file = tmp.name
-            
-            # Transcribir con Whisper API de Groq
-            with open(temp_file, "rb") as audio_file:
-                transcript = self.groq_client.client.audio.transcriptions.create(
-                    file=(os.path.basename(temp_file), audio_file, "audio/ogg"),
-                    model="whisper-large-v3-turbo",
-                    language="es"  # Detecta español automáticamente
-                )
-            
-            texto = transcript.text
+            await file.download_to_memory(buffer)
+        
+        texto = await self.transcriber.transcribir(voice.file_unique_id, descargar)
+        if texto:
             duracion = voice.duration or "desconocida"
-            tam_bytes = len(file_bytes)
-            
-            print(f"✅ Nota de voz transcrita ({duracion}s, {tam_bytes} bytes)")
+            print(f"✅ Nota de voz transcrita ({duracion}s, {voice.file_size or '?'} bytes)")
             print(f"   Texto: {texto[:100]}...")
-            
-            return texto
-            
-        except Exception as e:
-            print(f"❌ Error transcribiendo voz: {e}")
-            return None
-            
-        finally:
-            # Limpiar archivo temporal
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except Exception as e:
-                    print(f"⚠️ No se pudo borrar archivo temporal: {e}")
+        return texto
     
     # ─── GESTIÓN DE LEADS ──────────────────────────────────────
     
     async def _get_or_create_lead(self, chat_id: str, user) -> Optional[Dict]:
-        """Obtiene o crea un lead basado en el chat_id de Telegram."""
+        """Obtiene o crea un lead basado en el chat_id de Telegram (lectura desde la caché de sesión)."""
         try:
             # Buscar lead existente
-            result = self.db.table("leads").select("*").eq(
-                "telegram_chat_id", chat_id
-            ).execute()
+            lead = await self.session_cache.get_or_load("lead", chat_id, lambda: self._buscar_lead(chat_id))
+            if lead:
+                return lead
             
-            if result.data and len(result.data) > 0:
-                return result.data[0]
+            if user is None:
+                return None
             
             # Crear nuevo lead
             nombre = user.first_name
@@ -819,15 +821,33 @@ class LeadsBotHandler:
                 "interes": "inicial"
             }
             
-            result = self.db.table("leads").insert(nuevo_lead).execute()
-            return result.data[0] if result.data else None
+            result = await db_execute(self.db.table("leads").insert(nuevo_lead))
+            lead = result.data[0] if result.data else None
+            if lead:
+                self.session_cache.set("lead", chat_id, lead)
+            return lead
             
         except Exception as e:
             print(f"❌ Error gestionando lead: {e}")
             return None
     
+    async def _buscar_lead(self, chat_id: str) -> Optional[Dict]:
+        result = await db_execute(self.db.table("leads").select("*").eq(
+            "telegram_chat_id", chat_id
+        ))
+        return result.data[0] if result.data else None
+    
     # ─── MEMORIA Y CONTEXTO ────────────────────────────────────
     
+    @staticmethod
+    def _datos_recopilados(lead: Dict[str, Any]) -> Dict[str, Any]:
+        """Datos del lead capturados durante la conversación (los que no trae el alta por Telegram)."""
+        return {
+            campo: lead[campo]
+            for campo in ("telefono", "empresa", "cargo", "presupuesto", "timeline")
+            if lead.get(campo)
+        }
+    
     async def _guardar_mensaje(
         self,
         lead_id: str,
@@ -836,76 +856,93 @@ class LeadsBotHandler:
         content_type: str = "text",
         agente: str = None
     ):
-        """Guarda un mensaje en el historial de la conversación."""
+        """
+        Guarda un mensaje como una fila de conversation_messages.
+        La fila de conversations solo se toca al crearla o cuando interviene un agente nuevo.
+        """
         try:
             # Buscar conversación activa o crear una nueva
-            result = self.db.table("conversations").select("*").eq(
-                "lead_id", lead_id
-            ).eq("estado", "en_progreso").execute()
-            
-            mensaje_nuevo = {
-                "role": role,
-                "content": content,
-                "content_type": content_type,
-                "agente": agente,
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            }
+            result = await db_execute(self.db.table("conversations").select(
+                "id, agentes_intervenidos"
+            ).eq("lead_id", lead_id).eq(
+                "estado", "en_progreso"
+            ).order("created_at", desc=True).limit(1))
             
             if result.data and len(result.data) > 0:
-                # Actualizar conversación existente
                 conversation = result.data[0]
-                historial = conversation.get("historial", []) or []
-                historial.append(mensaje_nuevo)
                 
                 # Actualizar agentes intervenidos
                 agentes_intervenidos = conversation.get("agentes_intervenidos", []) or []
                 if agente and agente not in agentes_intervenidos:
-                    agentes_intervenidos.append(agente)
-                
-                self.db.table("conversations").update({
-                    "historial": historial,
-                    "agentes_intervenidos": agentes_intervenidos
-                }).eq("id", conversation["id"]).execute()
+                    await db_execute(self.db.table("conversations").update({
+                        "agentes_intervenidos": agentes_intervenidos + [agente]
+                    }).eq("id", conversation["id"]))
             else:
                 # Crear nueva conversación
-                self.db.table("conversations").insert({
+                result = await db_execute(self.db.table("conversations").insert({
                     "lead_id": lead_id,
                     "session_id": lead_id,
                     "tipo_comunicacion": "telegram",
-                    "historial": [mensaje_nuevo],
                     "agentes_intervenidos": [agente] if agente else [],
                     "estado": "en_progreso"
-                }).execute()
+                }))
+                conversation = result.data[0]
+            
+            await add_conversation_message(
+                conversation["id"], lead_id, role, content, content_type, agente
+            )
         except Exception as e:
             print(f"❌ Error guardando mensaje: {e}")
     
-    async def _obtener_contexto(self, lead_id: str) -> list:
-        """Obtiene el historial de conversación."""
+    async def _obtener_contexto(self, lead_id: str) -> Dict[str, Any]:
+        """
+        Obtiene el contexto de conversación: resumen acumulado de los turnos
+        antiguos y los mensajes recientes que aún no cubre el resumen.
+        """
         try:
-            result = self.db.table("conversations").select(
-                "historial"
+            result = await db_execute(self.db.table("conversations").select(
+                "id, resumen, resumen_hasta_at, resumen_hasta_id"
             ).eq("lead_id", lead_id).eq(
                 "estado", "en_progreso"
-            ).order("created_at", desc=True).limit(1).execute()
+            ).order("created_at", desc=True).limit(1))
+            
+            conversation = result.data[0] if result.data else {}
+            resumen = conversation.get("resumen")
+            # Cursor (created_at, id) del último mensaje cubierto por el resumen
+            resumen_hasta = None
+            if conversation.get("resumen_hasta_at") and conversation.get("resumen_hasta_id") is not None:
+                resumen_hasta = (conversation["resumen_hasta_at"], conversation["resumen_hasta_id"])
+            
+            if self.summarizer:
+                # Solo lo que el resumen aún no cubre, como máximo una ventana
+                mensajes = await get_ultimos_mensajes(
+                    lead_id, self.summarizer.ventana, despues_de=resumen_hasta if resumen else None
+                )
+                # Plegar turnos antiguos en el resumen (en segundo plano)
+                if conversation:
+                    self.summarizer.programar(
+                        conversation["id"], lead_id, len(mensajes), resumen, resumen_hasta
+                    )
+            else:
+                mensajes = await get_ultimos_mensajes(lead_id, 20)  # Últimos 20 mensajes
             
-            if result.data and len(result.data) > 0:
-                historial = result.data[0].get("historial", [])
-                return historial[-20:] if historial else []  # Últimos 20 mensajes
-            return []
+            return {"resumen": resumen, "mensajes": mensajes}
         except Exception as e:
             print(f"❌ Error obteniendo contexto: {e}")
-            return []
+            return {"resumen": None, "mensajes": []}
     
     async def _esta_pausado(self, chat_id: str) -> bool:
-        """Verifica si el bot está pausado para este chat."""
-        try:
-            result = self.db.table("telegram_bot_sessions").select(
+        """Verifica si el bot está pausado para este chat (lectura desde la caché de sesión)."""
+        async def cargar():
+            result = await db_execute(self.db.table("telegram_bot_sessions").select(
                 "estado_bot"
-            ).eq("telegram_chat_id", chat_id).execute()
-            
+            ).eq("telegram_chat_id", chat_id))
             if result.data and len(result.data) > 0:
                 return result.data[0].get("estado_bot") == "pausado"
             return False
+        
+        try:
+            return await self.session_cache.get_or_load("pausado", chat_id, cargar)
         except Exception as e:
             print(f"⚠️ Error verificando estado pausado: {e}")
             return False
@@ -934,9 +971,9 @@ class LeadsBotHandler:
         if servicio_detectado and estimado:
             # Guardar servicio detectado en la BD para recuperarlo después
             try:
-                self.db.table("leads").update(
+                await db_execute(self.db.table("leads").update(
                     {"interes": servicio_detectado}
-                ).eq("id", lead_id).execute()
+                ).eq("id", lead_id))
             except Exception as e:
                 print(f"⚠️ No se pudo guardar servicio en BD: {e}")
             
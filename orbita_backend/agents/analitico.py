@@ -8,6 +8,7 @@ import statistics
 from collections import defaultdict, Counter
 from .base_agent import BaseAgent
 from config import GROQ_MODELS, EMPRESA_NOMBRE, EMPRESA_DESCRIPCION
+from utils.json_extract import parse_llm_json
 
 class AnaliticoAgent(BaseAgent):
     """
@@ -144,7 +145,7 @@ class AnaliticoAgent(BaseAgent):
         Interpreta la siguiente solicitud de análisis y determina qué tipo de análisis realizar.
 
         SOLICITUD: "{message}"
-        CONTEXTO DISPONIBLE: {context or "Datos generales del sistema"}
+        CONTEXTO DISPONIBLE: {self.compact_context(context) or "Datos generales del sistema"}
 
         Determina:
         1. Tipo de análisis (performance, trends, segmentation, conversion, behavioral, predictive, comparative, diagnostic)
@@ -185,7 +186,9 @@ class AnaliticoAgent(BaseAgent):
         response = await self.generate_response(interpretation_prompt, f"interpret_{message[:50]}")
         
         try:
-            request_analysis = json.loads(response.get("response", "{}"))
+            request_analysis = parse_llm_json(response.get("response"), "analitico.interpretacion")
+            if request_analysis is None:
+                return self._simple_request_interpretation(message, context)
             
             # Valores por defecto si faltan campos
             defaults = {
@@ -709,7 +712,9 @@ class AnaliticoAgent(BaseAgent):
         response = await self.generate_response(insights_prompt, f"insights_{session_id}")
         
         try:
-            insights_result = json.loads(response.get("response", "{}"))
+            insights_result = parse_llm_json(response.get("response"), "analitico.insights")
+            if insights_result is None:
+                return self._generate_simple_insights(analysis_results, analysis_request)
             
             # Agregar metadatos de insights
             insights_result["generation_timestamp"] = datetime.utcnow().isoformat()
@@ -822,7 +827,7 @@ class AnaliticoAgent(BaseAgent):
         - Proporcionar recomendaciones estratégicas basadas en evidencia
         - Crear visualizaciones y reportes efectivos
 
-        CONTEXTO ACTUAL: {context or "Nuevo análisis solicitado"}
+        CONTEXTO ACTUAL: {self.compact_context(context) or "Nuevo análisis solicitado"}
 
         TIPOS DE ANÁLISIS QUE REALIZAS:
         {', '.join(self.analysis_types.keys())}
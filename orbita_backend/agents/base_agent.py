@@ -2,13 +2,15 @@
 # [CRITERIO 3] - Base común para todos los agentes con integración a Groq
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List, Tuple
 from datetime import datetime
 import json
 import asyncio
-from utils.groq_client import GroqClient
-from utils.memory import MemoryManager
+from utils.groq_client import get_groq_client
+from utils.memory import get_memory_manager, render_history_window
+from utils.tokens import estimate_tokens, estimate_message_tokens, truncate_to_tokens
 from database import log_agent_action
+from config import HISTORY_TOKEN_BUDGETS
 
 class BaseAgent(ABC):
     """
@@ -19,8 +21,9 @@ class BaseAgent(ABC):
     def __init__(self, agent_name: str, model: str = "llama-3.3-70b-versatile"):
         self.agent_name = agent_name
         self.model = model
-        self.groq_client = GroqClient()
-        self.memory_manager = MemoryManager()
+        # Cliente LLM y memoria compartidos por todos los agentes del proceso
+        self.groq_client = get_groq_client()
+        self.memory_manager = get_memory_manager()
         self.active = True
         self.created_at = datetime.utcnow()
         
@@ -77,31 +80,9 @@ class BaseAgent(ABC):
         start_time = datetime.utcnow()
         
         try:
-            # Obtener historial de conversación
-            conversation_history = await self.memory_manager.get_conversation_context(session_id)
-            
-            # Construir prompt del sistema
-            system_prompt = self.get_system_prompt(context)
-            
-            # Preparar mensajes para Groq
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            # Agregar historial si existe
-            if conversation_history:
-                messages.append({
-                    "role": "system", 
-                    "content": f"Contexto de conversación previa:\n{conversation_history}"
-                })
-            
-            # Agregar mensaje actual
-            messages.append({"role": "user", "content": user_message})
-            
-            # Construir el system message con el contexto si existe
-            system_msg = self.system_prompt
-            if conversation_history:
-                system_msg += f"\n\nContexto de conversación previa:\n{conversation_history}"
+            system_msg, prompt_tokens, history_tokens = await self._preparar_prompt(
+                user_message, session_id, context
+            )
             
             # Llamada a Groq API
             agent_response = await self.groq_client.generate_completion(
@@ -112,53 +93,186 @@ class BaseAgent(ABC):
                 max_tokens=300
             )
             
-            # Calcular tiempo de procesamiento
-            processing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
-            
-            # Guardar en memoria
-            await self.memory_manager.save_message(
-                session_id=session_id,
-                message=user_message,
-                message_type="user"
+            return await self._registrar_respuesta(
+                user_message, agent_response, session_id, start_time, prompt_tokens, history_tokens
             )
-            
-            await self.memory_manager.save_message(
-                session_id=session_id,
-                message=agent_response,
-                message_type="assistant",
-                agent_name=self.agent_name
+                
+        except Exception as e:
+            await self._handle_error("processing_error", str(e), session_id)
+            return {
+                "success": False,
+                "error": f"Error procesando mensaje: {str(e)}",
+                "agent": self.agent_name
+            }
+    
+    async def stream_response(
+        self,
+        user_message: str,
+        session_id: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versión en streaming de generate_response.
+        
+        Emite {"tipo": "token", "texto": ...} por cada fragmento y al final
+        {"tipo": "fin", "resultado": ...} con el mismo dict que generate_response.
+        Memoria y logs se guardan solo si el stream llega al final; si quien
+        consume lo cierra antes, se cierra también la llamada al LLM.
+        """
+        start_time = datetime.utcnow()
+        
+        try:
+            system_msg, prompt_tokens, history_tokens = await self._preparar_prompt(
+                user_message, session_id, context
             )
             
-            # Log de actividad
-            await log_agent_action(
-                agent_name=self.agent_name,
-                action="generate_response",
-                session_id=session_id,
-                details={
-                    "message_length": len(user_message),
-                    "response_length": len(agent_response),
-                    "model_used": self.model,
-                    "processing_time_ms": processing_time
-                }
+            partes = []
+            stream = self.groq_client.stream_completion(
+                prompt=user_message,
+                agent_type=self.agent_name,
+                system_message=system_msg,
+                temperature=0.7,
+                max_tokens=300
             )
+            try:
+                async for fragmento in stream:
+                    partes.append(fragmento)
+                    yield {"tipo": "token", "texto": fragmento}
+            finally:
+                await stream.aclose()
             
-            return {
-                "success": True,
-                "response": agent_response,
-                "agent": self.agent_name,
-                "session_id": session_id,
-                "processing_time_ms": processing_time,
-                "model_used": self.model,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-                
+            resultado = await self._registrar_respuesta(
+                user_message, "".join(partes), session_id, start_time, prompt_tokens, history_tokens
+            )
         except Exception as e:
             await self._handle_error("processing_error", str(e), session_id)
-            return {
+            resultado = {
                 "success": False,
                 "error": f"Error procesando mensaje: {str(e)}",
                 "agent": self.agent_name
             }
+        yield {"tipo": "fin", "resultado": resultado}
+    
+    async def _preparar_prompt(
+        self,
+        user_message: str,
+        session_id: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, int, int]:
+        """System prompt con historial acotado y tokens estimados del prompt."""
+        # System prompt del agente (el orquestador define uno conversacional propio)
+        system_msg = getattr(self, "system_prompt", None) or self.get_system_prompt(context)
+        
+        # Historial reciente acotado al presupuesto de tokens del agente
+        history_block, history_tokens = await self.build_history_block(session_id, context)
+        if history_block:
+            system_msg += history_block
+        
+        prompt_tokens = estimate_message_tokens([
+            {"content": system_msg},
+            {"content": user_message}
+        ])
+        return system_msg, prompt_tokens, history_tokens
+    
+    async def _registrar_respuesta(
+        self,
+        user_message: str,
+        agent_response: str,
+        session_id: str,
+        start_time: datetime,
+        prompt_tokens: int,
+        history_tokens: int
+    ) -> Dict[str, Any]:
+        """Guarda el intercambio en memoria, registra la acción y arma el resultado."""
+        # Calcular tiempo de procesamiento
+        processing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+        
+        # Guardar en memoria
+        await self.memory_manager.save_message(
+            session_id=session_id,
+            message=user_message,
+            message_type="user"
+        )
+        
+        await self.memory_manager.save_message(
+            session_id=session_id,
+            message=agent_response,
+            message_type="assistant",
+            agent_name=self.agent_name
+        )
+        
+        # Log de actividad
+        await log_agent_action(
+            agent_name=self.agent_name,
+            action="generate_response",
+            session_id=session_id,
+            details={
+                "message_length": len(user_message),
+                "response_length": len(agent_response),
+                "model_used": self.model,
+                "processing_time_ms": processing_time,
+                "prompt_tokens": prompt_tokens,
+                "history_tokens": history_tokens
+            }
+        )
+        
+        return {
+            "success": True,
+            "response": agent_response,
+            "agent": self.agent_name,
+            "session_id": session_id,
+            "processing_time_ms": processing_time,
+            "prompt_tokens": prompt_tokens,
+            "model_used": self.model,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    async def build_history_block(
+        self,
+        session_id: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, int]:
+        """
+        Resumen + historial reciente de la sesión, listo para anexar al system
+        message y limitado al presupuesto de tokens del agente.
+        
+        El historial sale de la memoria en proceso; si está vacía (por ejemplo
+        tras un reinicio) se usan los mensajes recientes de context["contexto"].
+        
+        Returns:
+            (bloque de texto o "", tokens estimados del bloque)
+        """
+        budget = HISTORY_TOKEN_BUDGETS.get(self.agent_name, HISTORY_TOKEN_BUDGETS["default"])
+        context = context or {}
+        parts = []
+        used_tokens = 0
+        
+        resumen = context.get("resumen")
+        if resumen:
+            resumen = truncate_to_tokens(" ".join(str(resumen).split()), budget // 3)
+            parts.append(f"Resumen de la conversación:\n{resumen}")
+            used_tokens += estimate_tokens(resumen)
+        
+        history, history_tokens = await self.memory_manager.get_history_window(session_id, budget - used_tokens)
+        if not history and context.get("contexto"):
+            history, history_tokens = render_history_window(context["contexto"], budget - used_tokens)
+        if history:
+            parts.append(f"Conversación reciente:\n{history}")
+            used_tokens += history_tokens
+        
+        if not parts:
+            return "", 0
+        return "\n\n" + "\n\n".join(parts), used_tokens
+    
+    @staticmethod
+    def compact_context(context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Contexto sin el historial ni el resumen (ya viajan en build_history_block),
+        para incrustarlo en prompts sin duplicar la conversación.
+        """
+        if not isinstance(context, dict):
+            return context
+        return {k: v for k, v in context.items() if k not in ("contexto", "resumen", "mensaje")}
     
     async def _handle_error(self, error_type: str, error_message: str, session_id: str):
         """Maneja errores del agente y los registra"""
@@ -7,6 +7,7 @@ import re
 from .base_agent import BaseAgent
 from config import GROQ_MODELS, EMPRESA_NOMBRE, EMPRESA_SERVICIOS
 from database import create_lead, update_lead_status
+from utils.json_extract import parse_llm_json
 
 class CaptadorAgent(BaseAgent):
     """
@@ -160,13 +161,11 @@ class CaptadorAgent(BaseAgent):
         
         response = await self.generate_response(extraction_prompt, f"extraction_{datetime.utcnow().timestamp()}")
         
-        try:
-            import json
-            ai_data = json.loads(response.get("response", "{}"))
-            # Filtrar valores null
-            return {k: v for k, v in ai_data.items() if v and v.lower() != "null"}
-        except:
+        ai_data = parse_llm_json(response.get("response"), "captador.extraccion")
+        if ai_data is None:
             return {}
+        # Filtrar valores null
+        return {k: str(v) for k, v in ai_data.items() if v is not None and str(v).strip().lower() not in ("", "null")}
     
     async def _qualify_lead(self, message: str, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -378,7 +377,7 @@ class CaptadorAgent(BaseAgent):
         SERVICIOS QUE OFRECEMOS:
         {chr(10).join([f"- {servicio}" for servicio in EMPRESA_SERVICIOS])}
 
-        CONTEXTO ACTUAL: {context or "Nueva conversación"}
+        CONTEXTO ACTUAL: {self.compact_context(context) or "Nueva conversación"}
 
         METODOLOGÍA DE CALIFICACIÓN:
         - Presupuesto: ¿Tienen recursos para invertir?
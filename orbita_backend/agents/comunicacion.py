@@ -7,6 +7,8 @@ import json
 from enum import Enum
 from .base_agent import BaseAgent
 from config import GROQ_MODELS, EMPRESA_NOMBRE, EMPRESA_DESCRIPCION
+from utils.json_extract import parse_llm_json
+from utils.quote_skeletons import detectar_nivel_plan, get_quote_skeletons, resolver_servicio
 
 class CommunicationType(Enum):
     """Tipos de comunicación disponibles"""
@@ -225,7 +227,7 @@ class ComunicacionAgent(BaseAgent):
         Analiza la siguiente solicitud de comunicación y determina la estrategia más efectiva.
 
         SOLICITUD: "{message}"
-        CONTEXTO DEL USUARIO: {context or "Usuario general"}
+        CONTEXTO DEL USUARIO: {self.compact_context(context) or "Usuario general"}
 
         Determina:
         1. Objetivo de comunicación (awareness, engagement, conversion, retention, support)
@@ -271,7 +273,9 @@ class ComunicacionAgent(BaseAgent):
         response = await self.generate_response(analysis_prompt, f"comm_analysis_{message[:50]}")
         
         try:
-            request_analysis = json.loads(response.get("response", "{}"))
+            request_analysis = parse_llm_json(response.get("response"), "comunicacion.analisis")
+            if request_analysis is None:
+                return self._simple_communication_analysis(message, context)
             
             # Valores por defecto si faltan campos
             defaults = {
@@ -526,7 +530,9 @@ class ComunicacionAgent(BaseAgent):
         response = await self.generate_response(content_prompt, f"content_{session_id}")
         
         try:
-            content_result = json.loads(response.get("response", "{}"))
+            content_result = parse_llm_json(response.get("response"), "comunicacion.contenido")
+            if content_result is None:
+                return self._generate_simple_content(communication_request, channel_strategy)
             
             # Agregar metadatos de contenido
             content_result["generation_metadata"] = {
@@ -741,7 +747,7 @@ class ComunicacionAgent(BaseAgent):
         - Planificar calendarios de comunicación inteligentes
         - Maximizar engagement y conversiones a través de comunicación estratégica
 
-        CONTEXTO ACTUAL: {context or "Nueva estrategia de comunicación"}
+        CONTEXTO ACTUAL: {self.compact_context(context) or "Nueva estrategia de comunicación"}
 
         CANALES DISPONIBLES:
         {', '.join(self.communication_channels.keys())}
@@ -846,6 +852,10 @@ class ComunicacionAgent(BaseAgent):
         """
         Genera una cotización personalizada con IA para un lead.
         
+        Si el servicio está en el catálogo de estimados, ítems, fases y precios salen
+        del esqueleto cacheado del servicio y el LLM solo redacta el párrafo
+        personalizado. Si no, se genera la propuesta completa con el LLM.
+        
         Args:
             lead_data: Datos del lead (nombre, empresa, email, etc.)
             servicio_solicitado: Tipo de servicio que solicita el lead
@@ -855,8 +865,132 @@ class ComunicacionAgent(BaseAgent):
             Dict con la cotización generada y datos estructurados
         """
         try:
-            # Construir prompt para generar cotización con IA
-            cotizacion_prompt = f"""
+            servicio_catalogo, catalogo = resolver_servicio(
+                lead_data, servicio_solicitado, detalles_adicionales, lead_data.get("empresa_id")
+            )
+            esqueleto = None
+            if servicio_catalogo:
+                nivel = detectar_nivel_plan(f"{servicio_solicitado} {detalles_adicionales or ''}")
+                esqueleto = get_quote_skeletons().obtener(catalogo, servicio_catalogo, nivel)
+            
+            if esqueleto:
+                cotizacion_ia = esqueleto
+                cotizacion_ia["descripcion_personalizada"] = await self._redactar_introduccion(
+                    lead_data, esqueleto, detalles_adicionales
+                )
+            else:
+                cotizacion_ia = await self._generar_propuesta_completa(
+                    lead_data, servicio_solicitado, detalles_adicionales
+                )
+            
+            # Calcular totales
+            subtotal = sum(item.get("precio_unitario", 0) * item.get("cantidad", 1) 
+                          for item in cotizacion_ia.get("items", []))
+            descuento = cotizacion_ia.get("descuento_sugerido", 0)
+            total = subtotal * (1 - descuento / 100)
+            
+            # Estructurar datos completos de cotización
+            from datetime import datetime, timedelta
+            
+            cotizacion_data = {
+                "lead_id": lead_data.get("id"),
+                "titulo": cotizacion_ia.get("titulo"),
+                "descripcion": cotizacion_ia.get("descripcion_personalizada"),
+                "tipo": "automatizacion",  # Mapear según servicio
+                "items": [
+                    {
+                        "descripcion": item.get("nombre"),
+                        "cantidad": item.get("cantidad", 1),
+                        "precio_unitario": item.get("precio_unitario", 0),
+                        "descuento": 0
+                    }
+                    for item in cotizacion_ia.get("items", [])
+                ],
+                "subtotal": subtotal,
+                "descuento_general": descuento,
+                "impuestos": 0,
+                "total": total,
+                "moneda": cotizacion_ia.get("moneda", "USD"),
+                "validez_dias": 30,
+                "status": "borrador",
+                "notas": cotizacion_ia.get("notas"),
+                "terminos_condiciones": "Términos y condiciones estándar de ORBITA",
+                "generada_por_ia": True,
+                "agente_generador": self.agent_name,
+                # Datos adicionales para la plantilla
+                "plan_nombre": cotizacion_ia.get("plan_nombre"),
+                "descripcion_alcance": cotizacion_ia.get("descripcion_alcance"),
+                "fases": cotizacion_ia.get("fases", []),
+                "tiempo_total": cotizacion_ia.get("tiempo_total"),
+                "forma_pago": cotizacion_ia.get("forma_pago"),
+                "created_at": datetime.utcnow().isoformat()
+            }
+            
+            return {
+                "success": True,
+                "cotizacion": cotizacion_data,
+                "agent": self.agent_name,
+                "generada_con_ia": True,
+                "lead_nombre": lead_data.get("nombre"),
+                "servicio": servicio_solicitado,
+                "total_estimado": total,
+                "desde_esqueleto": esqueleto is not None,
+                "catalogo_version": cotizacion_ia.get("catalogo_version"),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+            
+        except Exception as e:
+            await self._handle_error("generate_cotizacion_error", str(e), f"lead_{lead_data.get('id')}")
+            return {
+                "success": False,
+                "error": f"Error generando cotización: {str(e)}",
+                "agent": self.agent_name,
+                "fallback_message": "Lo siento, hubo un problema generando la cotización. Un ejecutivo te contactará pronto."
+            }
+    
+    async def _redactar_introduccion(
+        self,
+        lead_data: Dict[str, Any],
+        esqueleto: Dict[str, Any],
+        detalles_adicionales: Optional[str] = None
+    ) -> str:
+        """
+        Párrafo de entendimiento de la necesidad del lead (única parte que escribe el LLM
+        cuando la propuesta sale de un esqueleto).
+        """
+        nombre = lead_data.get('nombre', 'Cliente')
+        prompt = f"""
+            Escribe el párrafo de introducción de una propuesta comercial de {EMPRESA_NOMBRE}.
+            
+            CLIENTE: {nombre} ({lead_data.get('cargo', 'N/A')} en {lead_data.get('empresa', 'N/A')})
+            PRESUPUESTO: {lead_data.get('presupuesto', 'No especificado')} · TIMELINE: {lead_data.get('timeline', 'No especificado')}
+            PROPUESTA: {esqueleto['plan_nombre']} — {esqueleto['descripcion_alcance']}
+            DETALLES: {detalles_adicionales or 'Ninguno especificado'}
+            
+            Un solo párrafo (máximo 80 palabras), profesional y cercano, que muestre que
+            entendemos su necesidad. Sin precios ni listas. Responde solo con el párrafo.
+            """
+        
+        response = await self.generate_response(
+            prompt,
+            session_id=f"cotizacion_{lead_data.get('id', 'temp')}",
+            context={"lead": lead_data, "servicio": esqueleto["servicio"]}
+        )
+        texto = (response.get("response") or "").strip().strip('"') if response.get("success") else ""
+        return texto or (
+            f"{nombre}, preparamos esta propuesta de {esqueleto['plan_nombre']} "
+            f"pensando en los objetivos de {lead_data.get('empresa') or 'tu negocio'}."
+        )
+    
+    async def _generar_propuesta_completa(
+        self,
+        lead_data: Dict[str, Any],
+        servicio_solicitado: str,
+        detalles_adicionales: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Propuesta completa (ítems, fases, precios y texto) generada por el LLM, para servicios fuera del catálogo."""
+        # Construir prompt para generar cotización con IA
+        cotizacion_prompt = f"""
             Eres un especialista en ventas y elaboración de propuestas comerciales para {EMPRESA_NOMBRE}.
             
             INFORMACIÓN DEL CLIENTE:
@@ -919,106 +1053,42 @@ class ComunicacionAgent(BaseAgent):
             
             Sé profesional, persuasivo y asegúrate de que los precios sean competitivos y realistas.
             """
-            
-            # Generar cotización con IA
-            response = await self.generate_response(
-                cotizacion_prompt,
-                session_id=f"cotizacion_{lead_data.get('id', 'temp')}",
-                context={"lead": lead_data, "servicio": servicio_solicitado}
-            )
-            
-            if not response.get("success"):
-                raise Exception("Error al generar contenido con IA")
-            
-            # Parsear respuesta JSON
-            import json
-            try:
-                cotizacion_ia = json.loads(response["response"])
-            except json.JSONDecodeError:
-                # Si no es JSON válido, usar valores por defecto
-                cotizacion_ia = {
-                    "titulo": f"Propuesta de {servicio_solicitado}",
-                    "descripcion_personalizada": f"Propuesta personalizada para {lead_data.get('nombre', 'cliente')}",
-                    "plan_nombre": "Plan Profesional",
-                    "descripcion_alcance": "Desarrollo completo del servicio solicitado",
-                    "items": [
-                        {
-                            "nombre": servicio_solicitado,
-                            "descripcion": "Implementación completa",
-                            "cantidad": 1,
-                            "precio_unitario": 5000.00
-                        }
-                    ],
-                    "fases": [
-                        {"nombre": "Planeación", "descripcion": "Análisis de requerimientos", "duracion": "1 semana"},
-                        {"nombre": "Desarrollo", "descripcion": "Implementación", "duracion": "4 semanas"},
-                        {"nombre": "Entrega", "descripcion": "Capacitación y despliegue", "duracion": "1 semana"}
-                    ],
-                    "tiempo_total": "6 semanas",
-                    "forma_pago": "50% al inicio, 50% a la entrega",
-                    "notas": "Incluye soporte por 30 días",
-                    "descuento_sugerido": 0
-                }
-            
-            # Calcular totales
-            subtotal = sum(item.get("precio_unitario", 0) * item.get("cantidad", 1) 
-                          for item in cotizacion_ia.get("items", []))
-            descuento = cotizacion_ia.get("descuento_sugerido", 0)
-            total = subtotal * (1 - descuento / 100)
-            
-            # Estructurar datos completos de cotización
-            from datetime import datetime, timedelta
-            
-            cotizacion_data = {
-                "lead_id": lead_data.get("id"),
-                "titulo": cotizacion_ia.get("titulo"),
-                "descripcion": cotizacion_ia.get("descripcion_personalizada"),
-                "tipo": "automatizacion",  # Mapear según servicio
+        
+        # Generar cotización con IA
+        response = await self.generate_response(
+            cotizacion_prompt,
+            session_id=f"cotizacion_{lead_data.get('id', 'temp')}",
+            context={"lead": lead_data, "servicio": servicio_solicitado}
+        )
+        
+        if not response.get("success"):
+            raise Exception("Error al generar contenido con IA")
+        
+        # Parsear respuesta JSON
+        cotizacion_ia = parse_llm_json(response["response"], "comunicacion.cotizacion")
+        if cotizacion_ia is None:
+            # Si no es JSON válido, usar valores por defecto
+            cotizacion_ia = {
+                "titulo": f"Propuesta de {servicio_solicitado}",
+                "descripcion_personalizada": f"Propuesta personalizada para {lead_data.get('nombre', 'cliente')}",
+                "plan_nombre": "Plan Profesional",
+                "descripcion_alcance": "Desarrollo completo del servicio solicitado",
                 "items": [
                     {
-                        "descripcion": item.get("nombre"),
-                        "cantidad": item.get("cantidad", 1),
-                        "precio_unitario": item.get("precio_unitario", 0),
-                        "descuento": 0
+                        "nombre": servicio_solicitado,
+                        "descripcion": "Implementación completa",
+                        "cantidad": 1,
+                        "precio_unitario": 5000.00
                     }
-                    for item in cotizacion_ia.get("items", [])
                 ],
-                "subtotal": subtotal,
-                "descuento_general": descuento,
-                "impuestos": 0,
-                "total": total,
-                "moneda": "USD",
-                "validez_dias": 30,
-                "status": "borrador",
-                "notas": cotizacion_ia.get("notas"),
-                "terminos_condiciones": "Términos y condiciones estándar de ORBITA",
-                "generada_por_ia": True,
-                "agente_generador": self.agent_name,
-                # Datos adicionales para la plantilla
-                "plan_nombre": cotizacion_ia.get("plan_nombre"),
-                "descripcion_alcance": cotizacion_ia.get("descripcion_alcance"),
-                "fases": cotizacion_ia.get("fases", []),
-                "tiempo_total": cotizacion_ia.get("tiempo_total"),
-                "forma_pago": cotizacion_ia.get("forma_pago"),
-                "created_at": datetime.utcnow().isoformat()
-            }
-            
-            return {
-                "success": True,
-                "cotizacion": cotizacion_data,
-                "agent": self.agent_name,
-                "generada_con_ia": True,
-                "lead_nombre": lead_data.get("nombre"),
-                "servicio": servicio_solicitado,
-                "total_estimado": total,
-                "timestamp": datetime.utcnow().isoformat()
+                "fases": [
+                    {"nombre": "Planeación", "descripcion": "Análisis de requerimientos", "duracion": "1 semana"},
+                    {"nombre": "Desarrollo", "descripcion": "Implementación", "duracion": "4 semanas"},
+                    {"nombre": "Entrega", "descripcion": "Capacitación y despliegue", "duracion": "1 semana"}
+                ],
+                "tiempo_total": "6 semanas",
+                "forma_pago": "50% al inicio, 50% a la entrega",
+                "notas": "Incluye soporte por 30 días",
+                "descuento_sugerido": 0
             }
-            
-        except Exception as e:
-            await self._handle_error("generate_cotizacion_error", str(e), f"lead_{lead_data.get('id')}")
-            return {
-                "success": False,
-                "error": f"Error generando cotización: {str(e)}",
-                "agent": self.agent_name,
-                "fallback_message": "Lo siento, hubo un problema generando la cotización. Un ejecutivo te contactará pronto."
-            }
\ No newline at end of file
+        return cotizacion_ia
@@ -6,6 +6,7 @@ from datetime import datetime
 import json
 from .base_agent import BaseAgent
 from config import GROQ_MODELS, EMPRESA_NOMBRE, EMPRESA_DESCRIPCION
+from utils.json_extract import parse_llm_json
 
 class ConversacionalAgent(BaseAgent):
     """
@@ -108,7 +109,7 @@ class ConversacionalAgent(BaseAgent):
         Analiza el siguiente mensaje y determina el tipo de conversación y el contexto emocional.
 
         MENSAJE: "{message}"
-        CONTEXTO PREVIO: {context or "Sin contexto"}
+        CONTEXTO PREVIO: {self.compact_context(context) or "Sin contexto"}
 
         Determina:
         1. Tipo de conversación (greeting, information, support, guidance, engagement, clarification, followup)
@@ -132,7 +133,9 @@ class ConversacionalAgent(BaseAgent):
         response = await self.generate_response(analysis_prompt, f"analysis_{session_id}")
         
         try:
-            analysis_result = json.loads(response.get("response", "{}"))
+            analysis_result = parse_llm_json(response.get("response"), "conversacional.analisis")
+            if analysis_result is None:
+                return self._simple_conversation_analysis(message)
             
             # Validar y proporcionar valores por defecto
             default_analysis = {
@@ -208,7 +211,7 @@ class ConversacionalAgent(BaseAgent):
         - Nivel técnico: {analysis.get("technical_level")}
         - Intención: {analysis.get("main_intent")}
 
-        CONTEXTO: {context or "Nueva conversación"}
+        CONTEXTO: {self.compact_context(context) or "Nueva conversación"}
 
         INSTRUCCIONES PARA TU RESPUESTA:
         1. Adapta tu tono al nivel de formalidad detectado
@@ -366,7 +369,7 @@ class ConversacionalAgent(BaseAgent):
         - Crear una experiencia positiva para el usuario
         - Guiar hacia próximos pasos valiosos
 
-        CONTEXTO ACTUAL: {context or "Nueva conversación"}
+        CONTEXTO ACTUAL: {self.compact_context(context) or "Nueva conversación"}
 
         PRINCIPIOS DE CONVERSACIÓN:
         1. Escucha activamente - responde a lo que realmente dice el usuario
@@ -7,6 +7,7 @@ import json
 import re
 from .base_agent import BaseAgent
 from config import GROQ_MODELS, EMPRESA_NOMBRE, EMPRESA_DESCRIPCION
+from utils.json_extract import parse_llm_json
 
 class IdentidadAgent(BaseAgent):
     """
@@ -170,7 +171,7 @@ class IdentidadAgent(BaseAgent):
         Analiza el siguiente mensaje y el contexto para inferir características del usuario.
 
         MENSAJE: "{message}"
-        CONTEXTO: {context or "Primera interacción"}
+        CONTEXTO: {self.compact_context(context) or "Primera interacción"}
 
         Infiere las siguientes características y da una puntuación de confianza (0.0-1.0):
 
@@ -230,7 +231,9 @@ class IdentidadAgent(BaseAgent):
         response = await self.generate_response(inference_prompt, f"inference_{session_id}")
         
         try:
-            inference_result = json.loads(response.get("response", "{}"))
+            inference_result = parse_llm_json(response.get("response"), "identidad.inferencia")
+            if inference_result is None:
+                return self._simple_profile_inference(message, context)
             return inference_result
         except (json.JSONDecodeError, Exception):
             # Inferencia simple como fallback
@@ -536,7 +539,7 @@ class IdentidadAgent(BaseAgent):
         - Recomendar estrategias de comunicación y engagement
         - Mantener la privacidad y confidencialidad de los datos
 
-        CONTEXTO ACTUAL: {context or "Nuevo perfil por construir"}
+        CONTEXTO ACTUAL: {self.compact_context(context) or "Nuevo perfil por construir"}
 
         TIPOS DE PERFIL QUE IDENTIFICAS:
         {', '.join(self.profile_types.keys())}
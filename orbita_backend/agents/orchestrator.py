@@ -1,10 +1,16 @@
 # Agente Orquestador - Coordinador principal del sistema multi-agente
 # [CRITERIO 2] - Orquestador que coordina todos los agentes
 
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from .base_agent import BaseAgent
-from config import GROQ_MODELS
+from config import GROQ_MODELS, ORCHESTRATOR_MODE
+from database import log_agent_action
+from utils.semantic_cache import get_semantic_cache, es_consulta_generica
+from utils.intent_classifier import get_intent_classifier
+from utils.tokens import estimate_message_tokens
+from utils.groq_client import FALLBACK_RESPONSE
+from utils.json_extract import CampoStreamExtractor, JsonExtractor, extraer_json, parse_llm_json
 
 class OrchestratorAgent(BaseAgent):
     """
@@ -53,6 +59,15 @@ Responde de forma natural y conversacional."""
             "identity": ["empresa", "quienes", "nosotros", "valores", "misión"],
             "analytics": ["reporte", "métricas", "análisis", "estadísticas", "dashboard"]
         }
+        
+        # Caché semántica de preguntas frecuentes (None si está desactivada)
+        self.semantic_cache = get_semantic_cache()
+        
+        # "single_call" (por defecto) o "two_step" (flujo anterior de dos llamadas)
+        self.mode = ORCHESTRATOR_MODE
+        
+        # Clasificador local de intención (None si está desactivado)
+        self.intent_classifier = get_intent_classifier()
     
     async def process_message(
         self, 
@@ -79,45 +94,505 @@ Responde de forma natural y conversacional."""
             }
         
         try:
-            # Analizar el mensaje para determinar intención
-            intention_analysis = await self._analyze_message_intention(message, session_id, context)
+            # Fast-path: si el clasificador local está seguro, no se pide intención al LLM
+            fast_intent = self._fast_intent(message)
+            espacio = self._espacio_cache(context)
             
-            # Seleccionar agente apropiado
-            selected_agent = intention_analysis["selected_agent"]
-            confidence = intention_analysis["confidence"]
+            # Preguntas frecuentes al inicio de la conversación: caché semántica
+            compartida = not fast_intent and await self._es_compartible(message, session_id, context)
+            if compartida:
+                cached_result = await self._lookup_semantic_cache(message, session_id, espacio)
+                if cached_result:
+                    return cached_result
             
-            # SIEMPRE generar una respuesta, ya sea delegando o manejando directamente
-            if confidence < 0.7 or selected_agent == "conversacional":
-                # Manejar directamente con el orchestrator
+            if fast_intent:
+                intention_analysis = fast_intent
                 response_result = await self._handle_directly(message, session_id, context)
+                await self._log_routing(session_id, message, fast_intent, source="intent_classifier")
+            elif self.mode == "two_step":
+                intention_analysis, response_result = await self._process_two_step(
+                    message, session_id, context, compartida=compartida
+                )
             else:
-                # Delegar al agente especializado y luego generar respuesta conversacional
-                # Por ahora, manejamos todo conversacionalmente
-                response_result = await self._handle_directly(message, session_id, context)
+                intention_analysis, response_result = await self._route_and_respond(
+                    message, session_id, context, compartida=compartida
+                )
             
-            # Combinar información de coordinación con la respuesta
-            coordination_result = {
-                "success": True,
-                "response": response_result.get("response", "Gracias por tu mensaje. ¿En qué puedo ayudarte?"),
-                "route_to_agent": selected_agent,
-                "confidence": confidence,
-                "reasoning": intention_analysis["reasoning"],
-                "context_data": intention_analysis.get("extracted_data", {}),
-                "agent": self.agent_name,
-                "session_id": session_id,
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            return self._build_coordination_result(
+                message, session_id, intention_analysis, response_result, espacio
+            )
+            
+        except Exception as e:
+            await self._handle_error("orchestration_error", str(e), session_id)
+            return self._orchestration_error(e)
+    
+    async def stream_message(
+        self,
+        message: str,
+        session_id: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versión en streaming de process_message.
+        
+        Eventos:
+            {"tipo": "enrutamiento", ...}: agente, confianza y fuente en cuanto se conocen
+            {"tipo": "token", "texto": ...}: fragmentos de la respuesta para el usuario
+            {"tipo": "fin", "resultado": ...}: el mismo dict que devuelve process_message
+        
+        En modo single_call solo se emite el campo "response" del sobre JSON.
+        Cerrar el iterador antes del final cierra la llamada al LLM.
+        """
+        if not await self.validate_input(message):
+            yield {"tipo": "fin", "resultado": {
+                "success": False,
+                "error": "Mensaje inválido",
+                "agent": self.agent_name
+            }}
+            return
+        
+        try:
+            fast_intent = self._fast_intent(message)
+            espacio = self._espacio_cache(context)
+            compartida = not fast_intent and await self._es_compartible(message, session_id, context)
+            if compartida:
+                cached_result = await self._lookup_semantic_cache(message, session_id, espacio)
+                if cached_result:
+                    yield self._evento_enrutamiento(cached_result, "semantic_cache")
+                    yield {"tipo": "token", "texto": cached_result["response"]}
+                    yield {"tipo": "fin", "resultado": cached_result}
+                    return
+            
+            # Las respuestas compartibles se generan sin contexto del lead
+            contexto_respuesta = None if compartida else context
+            intention_analysis = None
+            if fast_intent:
+                intention_analysis, source = fast_intent, "intent_classifier"
+            elif self.mode == "two_step":
+                intention_analysis = await self._analyze_message_intention(message, session_id, contexto_respuesta)
+                source = "pattern_matching" if intention_analysis.get("message_type") == "pattern_matched" else "llm"
+            
+            if intention_analysis is not None:
+                await self._log_routing(session_id, message, intention_analysis, source=source)
+                yield self._evento_enrutamiento(intention_analysis, source)
+                etapas = self.stream_response(message, session_id, contexto_respuesta)
+            else:
+                etapas = self._stream_route_and_respond(
+                    message, session_id, context, compartida=compartida
+                )
             
-            return coordination_result
+            response_result: Dict[str, Any] = {}
+            try:
+                async for evento in etapas:
+                    if evento["tipo"] == "fin":
+                        response_result = evento["resultado"]
+                        intention_analysis = evento.get("analisis", intention_analysis)
+                    else:
+                        yield evento
+            finally:
+                await etapas.aclose()
+            response_result.setdefault("compartida", compartida)
             
+            resultado = self._build_coordination_result(
+                message, session_id, intention_analysis, response_result, espacio
+            )
         except Exception as e:
             await self._handle_error("orchestration_error", str(e), session_id)
-            return {
+            resultado = self._orchestration_error(e)
+        yield {"tipo": "fin", "resultado": resultado}
+    
+    def _build_coordination_result(
+        self,
+        message: str,
+        session_id: str,
+        intention_analysis: Dict[str, Any],
+        response_result: Dict[str, Any],
+        espacio: str
+    ) -> Dict[str, Any]:
+        """
+        Combina la decisión de enrutamiento con la respuesta y, si se generó sin
+        historial ni contexto del lead (compartida), la guarda en la caché semántica.
+        """
+        selected_agent = intention_analysis["selected_agent"]
+        confidence = intention_analysis["confidence"]
+        
+        # Combinar información de coordinación con la respuesta
+        coordination_result = {
+            "success": True,
+            "response": response_result.get("response", "Gracias por tu mensaje. ¿En qué puedo ayudarte?"),
+            "route_to_agent": selected_agent,
+            "confidence": confidence,
+            "reasoning": intention_analysis["reasoning"],
+            "context_data": intention_analysis.get("extracted_data", {}),
+            "orchestrator_mode": self.mode,
+            "prompt_tokens": response_result.get("prompt_tokens"),
+            "agent": self.agent_name,
+            "session_id": session_id,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+        if (response_result.get("compartida") and response_result.get("success")
+                and response_result.get("response") != FALLBACK_RESPONSE):
+            self.semantic_cache.store(message, {
+                "response": coordination_result["response"],
+                "route_to_agent": selected_agent,
+                "confidence": confidence,
+                "reasoning": coordination_result["reasoning"]
+            }, espacio=espacio)
+        
+        return coordination_result
+    
+    def _fast_intent(self, message: str) -> Optional[Dict[str, Any]]:
+        """Intención del clasificador local si está seguro."""
+        if not self.intent_classifier:
+            return None
+        intent = self.intent_classifier.classify(message)
+        return intent if intent and self.intent_classifier.is_confident(intent) else None
+    
+    async def _es_compartible(
+        self, message: str, session_id: str, context: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Si la respuesta puede venir de (e ir a) la caché semántica: una pregunta
+        frecuente en una conversación sin estado. Con turnos previos, resumen,
+        un flujo en curso o datos ya recopilados del lead la respuesta depende
+        de la conversación y sigue el camino normal con historial.
+        """
+        if self.semantic_cache is None or not es_consulta_generica(message):
+            return False
+        context = context or {}
+        if context.get("resumen") or context.get("datos_lead"):
+            return False
+        if context.get("estado_conversacion") not in (None, "normal"):
+            return False
+        # context["contexto"] ya incluye el mensaje actual (se guarda antes de leerlo)
+        if any(m.get("content") != message for m in context.get("contexto") or []):
+            return False
+        return not self.memory_manager.conversation_memory.get_conversation_history(session_id, limit=1)
+    
+    @staticmethod
+    def _espacio_cache(context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Espacio de la caché semántica: las respuestas solo se comparten dentro del
+        mismo canal y de la misma empresa (el dashboard es multi-empresa).
+        """
+        context = context or {}
+        canal = context.get("canal") or "leads"
+        empresa_id = context.get("empresa_id")
+        return f"{canal}:{empresa_id}" if empresa_id is not None else canal
+    
+    def _orchestration_error(self, error: Exception) -> Dict[str, Any]:
+        """Respuesta genérica cuando falla la orquestación."""
+        return {
+            "success": False,
+            "error": f"Error en orquestación: {str(error)}",
+            "response": "Disculpa, tuve un problema procesando tu mensaje. ¿Podrías intentar de nuevo?",
+            "agent": self.agent_name
+        }
+    
+    @staticmethod
+    def _evento_enrutamiento(analysis: Dict[str, Any], source: str) -> Dict[str, Any]:
+        """Evento de stream con la decisión de enrutamiento."""
+        agente = analysis.get("selected_agent", analysis.get("route_to_agent"))
+        try:
+            confianza = max(0.0, min(float(analysis.get("confidence", 0.5)), 1.0))
+        except (TypeError, ValueError):
+            confianza = 0.5
+        return {"tipo": "enrutamiento", "agente": agente, "confianza": confianza, "fuente": source}
+    
+    async def _process_two_step(
+        self, 
+        message: str, 
+        session_id: str, 
+        context: Optional[Dict[str, Any]] = None,
+        compartida: bool = False
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Flujo anterior: una llamada para analizar intención y otra para responder.
+        Se conserva detrás de ORCHESTRATOR_MODE=two_step.
+        
+        Con compartida=True ninguna de las dos llamadas lleva el contexto del lead.
+        """
+        if compartida:
+            context = None
+        
+        # Analizar el mensaje para determinar intención
+        intention_analysis = await self._analyze_message_intention(message, session_id, context)
+        await self._log_routing(
+            session_id, message, intention_analysis,
+            source="pattern_matching" if intention_analysis.get("message_type") == "pattern_matched" else "llm"
+        )
+        
+        # SIEMPRE generar una respuesta, ya sea delegando o manejando directamente
+        # Por ahora, manejamos todo conversacionalmente
+        response_result = await self._handle_directly(message, session_id, context)
+        response_result["compartida"] = compartida
+        
+        return intention_analysis, response_result
+    
+    async def _route_and_respond(
+        self, 
+        message: str, 
+        session_id: str, 
+        context: Optional[Dict[str, Any]] = None,
+        compartida: bool = False
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Una sola completion devuelve la decisión de enrutamiento y la respuesta
+        para el usuario dentro de un sobre JSON.
+        
+        Con compartida=True el prompt no lleva historial ni contexto del lead,
+        así la respuesta puede guardarse en la caché semántica.
+        """
+        start_time = datetime.utcnow()
+        
+        system_msg, prompt_tokens = await self._single_call_prompt(message, session_id, context, compartida)
+        
+        raw_response = await self.groq_client.generate_completion(
+            prompt=message,
+            agent_type=self.agent_name,
+            system_message=system_msg,
+            temperature=0.7,
+            max_tokens=500,
+            json_mode=True
+        )
+        
+        return await self._close_envelope(
+            message, session_id, raw_response, start_time, prompt_tokens, compartida
+        )
+    
+    async def _stream_route_and_respond(
+        self,
+        message: str,
+        session_id: str,
+        context: Optional[Dict[str, Any]] = None,
+        compartida: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        _route_and_respond en streaming: emite el campo "response" del sobre
+        mientras se genera y el enrutamiento en cuanto el modelo lo escribió
+        (el sobre pone los campos de clasificación antes de la respuesta).
+        Deja de leer en cuanto el sobre se cierra: cerrar el stream corta la
+        generación de lo que el modelo agregue después.
+        El último evento trae el resultado y el análisis ("analisis").
+        """
+        start_time = datetime.utcnow()
+        
+        system_msg, prompt_tokens = await self._single_call_prompt(message, session_id, context, compartida)
+        
+        extractor = CampoStreamExtractor("response")
+        sobre = JsonExtractor()
+        partes = []
+        stream = self.groq_client.stream_completion(
+            prompt=message,
+            agent_type=self.agent_name,
+            system_message=system_msg,
+            temperature=0.7,
+            max_tokens=500,
+            json_mode=True
+        )
+        try:
+            async for fragmento in stream:
+                partes.append(fragmento)
+                iniciado = extractor.iniciado
+                texto = extractor.feed(fragmento)
+                if extractor.iniciado and not iniciado:
+                    clasificacion, _ = extraer_json(extractor.prefijo)
+                    if isinstance(clasificacion, dict) and clasificacion.get("selected_agent") in self.available_agents:
+                        yield self._evento_enrutamiento(clasificacion, "llm")
+                if texto:
+                    yield {"tipo": "token", "texto": texto}
+                if sobre.feed(fragmento):
+                    break
+        finally:
+            await stream.aclose()
+        
+        envelope, response_result = await self._close_envelope(
+            message, session_id, "".join(partes), start_time, prompt_tokens, compartida
+        )
+        # Sin campo "response" en el sobre: la respuesta sale entera al final
+        if not extractor.iniciado and response_result["success"]:
+            yield {"tipo": "token", "texto": response_result["response"]}
+        yield {"tipo": "fin", "resultado": response_result, "analisis": envelope}
+    
+    async def _single_call_prompt(
+        self,
+        message: str,
+        session_id: str,
+        context: Optional[Dict[str, Any]] = None,
+        compartida: bool = False
+    ) -> Tuple[str, int]:
+        """
+        System prompt del modo single_call y sus tokens estimados. Lleva historial
+        y contexto del lead salvo para respuestas compartidas.
+        """
+        if compartida:
+            system_msg = self._build_single_call_prompt(None)
+        else:
+            history_block, _ = await self.build_history_block(session_id, context)
+            system_msg = self._build_single_call_prompt(context) + history_block
+        prompt_tokens = estimate_message_tokens([{"content": system_msg}, {"content": message}])
+        return system_msg, prompt_tokens
+    
+    async def _close_envelope(
+        self,
+        message: str,
+        session_id: str,
+        raw_response: str,
+        start_time: datetime,
+        prompt_tokens: int,
+        compartida: bool = False
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Interpreta el sobre, guarda el intercambio en memoria y registra el enrutamiento."""
+        if not raw_response or raw_response == FALLBACK_RESPONSE:
+            return self._simple_pattern_matching(message), {
                 "success": False,
-                "error": f"Error en orquestación: {str(e)}",
-                "response": "Disculpa, tuve un problema procesando tu mensaje. ¿Podrías intentar de nuevo?",
+                "error": "No se pudo procesar el mensaje",
                 "agent": self.agent_name
             }
+        
+        envelope = self._parse_envelope(raw_response, message)
+        processing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+        
+        await self.memory_manager.save_message(session_id=session_id, message=message, message_type="user")
+        await self.memory_manager.save_message(
+            session_id=session_id,
+            message=envelope["response"],
+            message_type="assistant",
+            agent_name=self.agent_name
+        )
+        
+        await self._log_routing(
+            session_id, message, envelope,
+            source="llm" if envelope["envelope_valid"] else "pattern_matching",
+            processing_time_ms=processing_time
+        )
+        
+        return envelope, {
+            "success": True,
+            "response": envelope["response"],
+            "agent": self.agent_name,
+            "handled_directly": True,
+            "processing_time_ms": processing_time,
+            "prompt_tokens": prompt_tokens,
+            "compartida": compartida
+        }
+    
+    async def _log_routing(
+        self,
+        session_id: str,
+        message: str,
+        analysis: Dict[str, Any],
+        source: str,
+        processing_time_ms: Optional[float] = None
+    ):
+        """
+        Registra la decisión de enrutamiento en agent_logs.
+        Las filas con source="llm" son las etiquetas que usa train_intent_classifier.py.
+        """
+        await log_agent_action(
+            agent_name=self.agent_name,
+            action="route_message",
+            session_id=session_id,
+            details={
+                "message": message[:500],
+                "selected_agent": analysis["selected_agent"],
+                "confidence": analysis["confidence"],
+                "message_type": analysis.get("message_type"),
+                "source": source,
+                "mode": self.mode,
+                "model_used": self.model,
+                "processing_time_ms": processing_time_ms
+            }
+        )
+    
+    def _parse_envelope(self, raw_response: str, message: str) -> Dict[str, Any]:
+        """
+        Interpreta el sobre JSON del modo single_call.
+        Si el modelo no devolvió JSON válido, usa el texto como respuesta
+        y el análisis por patrones para el enrutamiento.
+        """
+        envelope = parse_llm_json(raw_response, "orchestrator.sobre")
+        
+        if envelope is None or not envelope["response"].strip():
+            fallback = self._simple_pattern_matching(message)
+            fallback["response"] = raw_response.strip()
+            fallback["envelope_valid"] = False
+            return fallback
+        
+        selected_agent = envelope.get("selected_agent")
+        try:
+            confidence = max(0.0, min(float(envelope.get("confidence", 0.5)), 1.0))
+        except (TypeError, ValueError):
+            confidence = 0.5
+        if selected_agent not in self.available_agents:
+            selected_agent, confidence = "conversacional", 0.5
+        
+        extracted_data = envelope.get("extracted_data")
+        return {
+            "selected_agent": selected_agent,
+            "confidence": confidence,
+            "reasoning": str(envelope.get("reasoning", "")),
+            "extracted_data": extracted_data if isinstance(extracted_data, dict) else {},
+            "message_type": envelope.get("message_type", "general"),
+            "response": str(envelope["response"]).strip(),
+            "envelope_valid": True
+        }
+    
+    def _build_single_call_prompt(self, context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        System prompt del modo single_call: personalidad conversacional más
+        las instrucciones de enrutamiento y el formato del sobre JSON.
+        """
+        return f"""{self.system_prompt}
+
+Además de responder, clasifica el mensaje para el agente especializado apropiado:
+{chr(10).join([f"- {name}: {desc}" for name, desc in self.available_agents.items()])}
+
+CONTEXTO: {self.compact_context(context) or "Sin contexto previo"}
+
+Responde SOLO con un objeto JSON con esta forma:
+{{
+    "selected_agent": "nombre_agente",
+    "confidence": 0.0-1.0,
+    "reasoning": "explicación breve",
+    "extracted_data": {{"key": "value"}},
+    "message_type": "tipo_mensaje",
+    "response": "respuesta para el usuario"
+}}"""
+    
+    async def _lookup_semantic_cache(
+        self, message: str, session_id: str, espacio: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Busca una respuesta previa para una pregunta equivalente en el mismo espacio.
+        Si hay hit, registra el intercambio en memoria como si lo hubiera generado el LLM.
+        """
+        cached = self.semantic_cache.lookup(message, espacio=espacio)
+        if not cached:
+            return None
+        
+        answer, similarity = cached
+        await self.memory_manager.save_message(session_id=session_id, message=message, message_type="user")
+        await self.memory_manager.save_message(
+            session_id=session_id,
+            message=answer["response"],
+            message_type="assistant",
+            agent_name=self.agent_name
+        )
+        
+        return {
+            "success": True,
+            "response": answer["response"],
+            "route_to_agent": answer["route_to_agent"],
+            "confidence": answer["confidence"],
+            "reasoning": answer["reasoning"],
+            "context_data": {"semantic_cache_similarity": round(similarity, 3)},
+            "cache_hit": True,
+            "agent": self.agent_name,
+            "session_id": session_id,
+            "timestamp": datetime.utcnow().isoformat()
+        }
     
     async def _analyze_message_intention(
         self, 
@@ -139,7 +614,7 @@ Responde de forma natural y conversacional."""
         - identidad: Preguntas sobre la empresa, valores, servicios, equipo, historia
         - analitico: Solicitudes de reportes, métricas, análisis de datos, insights
 
-        CONTEXTO: {context or "Sin contexto previo"}
+        CONTEXTO: {self.compact_context(context) or "Sin contexto previo"}
 
         Responde en JSON con:
         {{
@@ -154,21 +629,17 @@ Responde de forma natural y conversacional."""
         response = await self.generate_response(analysis_prompt, session_id, context)
         
         if response.get("success"):
-            try:
-                # Intentar parsear como JSON
-                import json
-                analysis_result = json.loads(response["response"])
-                
-                # Validar que el agente seleccionado existe
-                if analysis_result["selected_agent"] not in self.available_agents:
-                    analysis_result["selected_agent"] = "conversacional"
-                    analysis_result["confidence"] = 0.5
-                
-                return analysis_result
-                
-            except (json.JSONDecodeError, KeyError):
+            analysis_result = parse_llm_json(response["response"], "orchestrator.enrutamiento")
+            if analysis_result is None:
                 # Fallback: análisis por patrones simples
                 return self._simple_pattern_matching(message)
+            
+            # Validar que el agente seleccionado existe
+            if analysis_result["selected_agent"] not in self.available_agents:
+                analysis_result["selected_agent"] = "conversacional"
+                analysis_result["confidence"] = 0.5
+            
+            return analysis_result
         else:
             return self._simple_pattern_matching(message)
     
@@ -227,6 +698,7 @@ Responde de forma natural y conversacional."""
                 "response": direct_response["response"],
                 "agent": self.agent_name,
                 "handled_directly": True,
+                "prompt_tokens": direct_response.get("prompt_tokens"),
                 "session_id": session_id,
                 "timestamp": datetime.utcnow().isoformat()
             }
@@ -253,7 +725,7 @@ Responde de forma natural y conversacional."""
         AGENTES BAJO TU COORDINACIÓN:
         {chr(10).join([f"- {name}: {desc}" for name, desc in self.available_agents.items()])}
 
-        CONTEXTO ACTUAL: {context or "Conversación nueva"}
+        CONTEXTO ACTUAL: {self.compact_context(context) or "Conversación nueva"}
 
         INSTRUCCIONES:
         1. Analiza cada mensaje cuidadosamente
@@ -0,0 +1,81 @@
+# Registro de agentes compartidos por proceso
+# [CRITERIO 2] - Una sola instancia de cada agente, cliente LLM y memoria
+
+import importlib
+import threading
+from typing import Dict, Any, List, Optional
+
+from .base_agent import BaseAgent
+
+# Nombre del agente -> (módulo, clase). Se importan al primer uso.
+AGENT_CLASSES = {
+    "orchestrator": ("agents.orchestrator", "OrchestratorAgent"),
+    "captador": ("agents.captador", "CaptadorAgent"),
+    "conversacional": ("agents.conversacional", "ConversacionalAgent"),
+    "identidad": ("agents.identidad", "IdentidadAgent"),
+    "comunicacion": ("agents.comunicacion", "ComunicacionAgent"),
+    "analitico": ("agents.analitico", "AnaliticoAgent")
+}
+
+
+class AgentRegistry:
+    """
+    Construye cada agente una sola vez por proceso, de forma perezosa.
+    
+    Todos los agentes comparten el GroqClient global (un pool HTTP) y el
+    MemoryManager global, así que el contexto de una sesión es el mismo
+    sin importar qué agente la atienda.
+    """
+    
+    def __init__(self):
+        self._agents: Dict[str, BaseAgent] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name: str) -> BaseAgent:
+        """Obtiene el agente, creándolo en el primer uso."""
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+        
+        if name not in AGENT_CLASSES:
+            raise KeyError(f"Agente desconocido: {name}")
+        
+        with self._lock:
+            agent = self._agents.get(name)
+            if agent is None:
+                module_name, class_name = AGENT_CLASSES[name]
+                agent_class = getattr(importlib.import_module(module_name), class_name)
+                agent = agent_class()
+                self._agents[name] = agent
+                print(f"🤖 Agente {name} inicializado")
+        return agent
+    
+    def loaded(self) -> List[str]:
+        """Agentes ya construidos."""
+        return list(self._agents.keys())
+    
+    def reset(self):
+        """Descarta las instancias (se recrean en el próximo uso)."""
+        with self._lock:
+            self._agents.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "disponibles": list(AGENT_CLASSES.keys()),
+            "cargados": self.loaded()
+        }
+
+
+# Instancia global del registro
+_registry: Optional[AgentRegistry] = None
+
+def get_agent_registry() -> AgentRegistry:
+    """Obtiene el registro global de agentes."""
+    global _registry
+    if _registry is None:
+        _registry = AgentRegistry()
+    return _registry
+
+def get_agent(name: str) -> BaseAgent:
+    """Atajo: obtiene un agente compartido por nombre."""
+    return get_agent_registry().get(name)
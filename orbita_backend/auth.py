@@ -8,7 +8,7 @@ from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config import JWT_SECRET_KEY, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-from database import get_db
+from database import get_db, db_execute
 
 # Configuración de seguridad
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -50,7 +50,7 @@ async def authenticate_user(email: str, password: str) -> dict:
     """Autentica un usuario con email y contraseña"""
     try:
         db = get_db()
-        result = db.table("users").select("*").eq("email", email).execute()
+        result = await db_execute(db.table("users").select("*").eq("email", email))
         
         if not result.data:
             return None
@@ -85,7 +85,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     # Obtener usuario de la base de datos
     try:
         db = get_db()
-        result = db.table("users").select("*").eq("id", user_id).execute()
+        result = await db_execute(db.table("users").select("*").eq("id", user_id))
         if not result.data:
             raise credentials_exception
         return result.data[0]
@@ -108,7 +108,7 @@ async def get_current_user_empresa(current_user: dict = Depends(get_current_acti
     
     try:
         db = get_db()
-        result = db.table("empresas").select("*").eq("id", current_user["empresa_id"]).execute()
+        result = await db_execute(db.table("empresas").select("*").eq("id", current_user["empresa_id"]))
         if not result.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -128,7 +128,7 @@ async def create_user(email: str, password: str, nombre: str, empresa_id: int =
     try:
         # Verificar que el email no exista
         db = get_db()
-        existing_user = db.table("users").select("id").eq("email", email).execute()
+        existing_user = await db_execute(db.table("users").select("id").eq("email", email))
         if existing_user.data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -145,7 +145,7 @@ async def create_user(email: str, password: str, nombre: str, empresa_id: int =
             "created_at": datetime.utcnow().isoformat()
         }
         
-        result = db.table("users").insert(user_data).execute()
+        result = await db_execute(db.table("users").insert(user_data))
         if result.data:
             return result.data[0]
         else:
@@ -181,7 +181,7 @@ async def create_empresa_and_admin(
             "created_at": datetime.utcnow().isoformat()
         }
         
-        empresa_result = db.table("empresas").insert(empresa_data).execute()
+        empresa_result = await db_execute(db.table("empresas").insert(empresa_data))
         if not empresa_result.data:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
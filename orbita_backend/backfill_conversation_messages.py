@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Migra conversations.historial (arreglo JSONB) a la tabla conversation_messages.
+
+Recorre las conversaciones por lotes (cursor sobre id) para no cargar toda la
+tabla en memoria, e inserta los mensajes de cada lote en inserts masivos.
+Es idempotente: cada fila guarda su posición en el historial y el par
+(conversation_id, posicion_historial) es único, así que volver a ejecutarlo
+no duplica mensajes.
+
+Requiere la migración 1772209600_create_conversation_messages.sql.
+
+Ejecutar desde orbita_backend/:
+    python backfill_conversation_messages.py              # migra todo
+    python backfill_conversation_messages.py --dry-run    # solo cuenta
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+ROLES_VALIDOS = ("user", "assistant", "system")
+
+
+def _parse_fecha(valor: Optional[str]) -> Optional[datetime]:
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def filas_desde_historial(conversation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Convierte el historial de una conversación en filas de conversation_messages.
+    Los mensajes sin timestamp toman el created_at de la conversación más un
+    desfase de 1 ms por posición, para conservar el orden original.
+    """
+    base = _parse_fecha(conversation.get("created_at")) or datetime.now(timezone.utc)
+    filas = []
+    for posicion, mensaje in enumerate(conversation.get("historial") or []):
+        if not isinstance(mensaje, dict):
+            continue
+        fecha = _parse_fecha(mensaje.get("timestamp"))
+        if fecha is None:
+            fecha = base + timedelta(milliseconds=posicion)
+        role = mensaje.get("role") or ("user" if mensaje.get("type") == "user" else "assistant")
+        filas.append({
+            "conversation_id": conversation["id"],
+            "lead_id": conversation["lead_id"],
+            "role": role if role in ROLES_VALIDOS else "assistant",
+            "content": mensaje.get("content") or "",
+            "content_type": mensaje.get("content_type") or "text",
+            "agente": mensaje.get("agente"),
+            "posicion_historial": posicion,
+            "created_at": fecha.isoformat()
+        })
+    return filas
+
+
+def backfill(lote_conversaciones: int, lote_filas: int, dry_run: bool) -> Dict[str, int]:
+    from database import get_db
+
+    db = get_db()
+    stats = {"conversaciones": 0, "mensajes": 0, "lotes": 0}
+    cursor = None
+    inicio = time.perf_counter()
+
+    while True:
+        query = db.table("conversations")\
+            .select("id, lead_id, historial, created_at")\
+            .not_.is_("historial", "null")\
+            .order("id")\
+            .limit(lote_conversaciones)
+        if cursor:
+            query = query.gt("id", cursor)
+        conversaciones = query.execute().data or []
+        if not conversaciones:
+            break
+        cursor = conversaciones[-1]["id"]
+
+        pendientes: List[Dict[str, Any]] = []
+        for conversation in conversaciones:
+            filas = filas_desde_historial(conversation)
+            pendientes.extend(filas)
+            stats["conversaciones"] += 1
+            stats["mensajes"] += len(filas)
+
+        for i in range(0, len(pendientes), lote_filas):
+            stats["lotes"] += 1
+            if not dry_run:
+                db.table("conversation_messages").upsert(
+                    pendientes[i:i + lote_filas],
+                    on_conflict="conversation_id,posicion_historial",
+                    ignore_duplicates=True,
+                    returning="minimal"
+                ).execute()
+
+        print(
+            f"📦 {stats['conversaciones']} conversaciones, {stats['mensajes']} mensajes "
+            f"({time.perf_counter() - inicio:.1f}s)"
+        )
+
+    return stats
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Migra conversations.historial a conversation_messages")
+    parser.add_argument("--lote-conversaciones", type=int, default=100, help="Conversaciones leídas por página")
+    parser.add_argument("--lote-filas", type=int, default=500, help="Mensajes por insert masivo")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar, sin escribir")
+    args = parser.parse_args()
+
+    try:
+        stats = backfill(args.lote_conversaciones, args.lote_filas, args.dry_run)
+    except Exception as e:
+        print(f"❌ Error en el backfill: {e}")
+        return False
+
+    modo = " (dry-run)" if args.dry_run else ""
+    print(f"✅ Backfill completado{modo}: {stats}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
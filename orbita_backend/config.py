@@ -56,15 +56,122 @@ GROQ_MODELS = {
     "conversacional": os.getenv("GROQ_MODEL_CONVERSACIONAL", "llama-3.1-8b-instant"),
     "identidad": os.getenv("GROQ_MODEL_IDENTIDAD", "llama-3.1-8b-instant"),
     "comunicacion": os.getenv("GROQ_MODEL_COMUNICACION", "llama-3.1-8b-instant"),
-    "analitico": os.getenv("GROQ_MODEL_ANALITICO", "llama-3.1-8b-instant")
+    "analitico": os.getenv("GROQ_MODEL_ANALITICO", "llama-3.1-8b-instant"),
+    "resumen": os.getenv("GROQ_MODEL_RESUMEN", "llama-3.1-8b-instant")
 }
 
+# Presupuesto de tokens del historial de conversación por agente
+# Solo se envían los turnos más recientes que caben en el presupuesto
+HISTORY_TOKEN_BUDGETS = {
+    "orchestrator": int(os.getenv("HISTORY_TOKENS_ORCHESTRATOR", 800)),
+    "captador": int(os.getenv("HISTORY_TOKENS_CAPTADOR", 1200)),
+    "conversacional": int(os.getenv("HISTORY_TOKENS_CONVERSACIONAL", 1200)),
+    "identidad": int(os.getenv("HISTORY_TOKENS_IDENTIDAD", 600)),
+    "analitico": int(os.getenv("HISTORY_TOKENS_ANALITICO", 600)),
+    "comunicacion": int(os.getenv("HISTORY_TOKENS_COMUNICACION", 800)),
+    "default": int(os.getenv("HISTORY_TOKENS_DEFAULT", 800))
+}
+
+# Resumen incremental de conversaciones largas (columna conversations.resumen)
+# Cada SUMMARY_EVERY_N_MESSAGES mensajes fuera de la ventana reciente se pliegan en el resumen
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+SUMMARY_EVERY_N_MESSAGES = int(os.getenv("SUMMARY_EVERY_N_MESSAGES", 10))
+SUMMARY_KEEP_RECENT = int(os.getenv("SUMMARY_KEEP_RECENT", 6))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", 300))
+
+# Sink de logs con escritura diferida (agent_logs en lotes, fuera del camino de la respuesta)
+LOG_SINK_ENABLED = os.getenv("LOG_SINK_ENABLED", "true").lower() == "true"
+LOG_SINK_BATCH_SIZE = int(os.getenv("LOG_SINK_BATCH_SIZE", 100))
+LOG_SINK_FLUSH_INTERVAL = float(os.getenv("LOG_SINK_FLUSH_INTERVAL", 1.0))
+LOG_SINK_MAX_QUEUE = int(os.getenv("LOG_SINK_MAX_QUEUE", 10000))
+LOG_SINK_DROP_POLICY = os.getenv("LOG_SINK_DROP_POLICY", "drop_oldest")  # drop_oldest | drop_newest | block
+LOG_SINK_BLOCK_TIMEOUT = float(os.getenv("LOG_SINK_BLOCK_TIMEOUT", 0.5))
+
+# Pool de hilos para el cliente síncrono de Supabase (db_execute)
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", 16))
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 500))
+
+# Despachador de updates del bot de leads: en orden por chat, concurrente entre chats
+UPDATE_DISPATCHER_MAX_IN_FLIGHT = int(os.getenv("UPDATE_DISPATCHER_MAX_IN_FLIGHT", 32))
+UPDATE_DISPATCHER_MAX_PER_CHAT = int(os.getenv("UPDATE_DISPATCHER_MAX_PER_CHAT", 50))
+
+# Deduplicación de updates recibidos por webhook (Telegram reintenta si no hay 200 a tiempo)
+WEBHOOK_DEDUPE_MAX_ENTRIES = int(os.getenv("WEBHOOK_DEDUPE_MAX_ENTRIES", 10000))
+WEBHOOK_DEDUPE_TTL_SECONDS = int(os.getenv("WEBHOOK_DEDUPE_TTL_SECONDS", 86400))
+
+# Caché por chat de la fila del lead y el estado de pausa (invalidación por Redis pub/sub)
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", 60))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", 10000))
+
+# Envío saliente a Telegram (límites de la Bot API: ~30 msg/s por bot, ~1 msg/s por chat)
+TELEGRAM_SEND_RATE_PER_SECOND = float(os.getenv("TELEGRAM_SEND_RATE_PER_SECOND", 30))
+TELEGRAM_SEND_PER_CHAT_INTERVAL = float(os.getenv("TELEGRAM_SEND_PER_CHAT_INTERVAL", 1.0))
+TELEGRAM_SEND_MAX_RETRIES = int(os.getenv("TELEGRAM_SEND_MAX_RETRIES", 3))
+
+# Respuestas a leads en streaming: placeholder que se edita a medida que llegan los tokens
+TELEGRAM_STREAMING_ENABLED = os.getenv("TELEGRAM_STREAMING_ENABLED", "true").lower() == "true"
+TELEGRAM_STREAM_EDIT_INTERVAL = float(os.getenv("TELEGRAM_STREAM_EDIT_INTERVAL", 1.0))
+TELEGRAM_STREAM_FIRST_EDIT_DELAY = float(os.getenv("TELEGRAM_STREAM_FIRST_EDIT_DELAY", 0.0))
+
+# Catálogo de servicios para estimados rápidos (se recarga al cambiar el archivo)
+QUOTE_CATALOG_PATH = os.getenv(
+    "QUOTE_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalogo_servicios.json")
+)
+QUOTE_CATALOG_RELOAD_SECONDS = float(os.getenv("QUOTE_CATALOG_RELOAD_SECONDS", 2.0))
+QUOTE_BATCH_MAX_ITEMS = int(os.getenv("QUOTE_BATCH_MAX_ITEMS", 50000))
+
+# PDF de cotizaciones (reportlab): fuente TTF y logo opcionales, cargados una vez por proceso
+COTIZACION_PDF_FONT_PATH = os.getenv("COTIZACION_PDF_FONT_PATH")
+COTIZACION_PDF_FONT_BOLD_PATH = os.getenv("COTIZACION_PDF_FONT_BOLD_PATH")
+COTIZACION_PDF_LOGO_PATH = os.getenv("COTIZACION_PDF_LOGO_PATH")
+
 # Configuración para usar OpenAI en el orchestrador
 USE_OPENAI_FOR_ORCHESTRATOR = os.getenv("USE_OPENAI_FOR_ORCHESTRATOR", "true").lower() == "true"
 OPENAI_MODEL_ORCHESTRATOR = os.getenv("OPENAI_MODEL_ORCHESTRATOR", "gpt-4o-mini")
 
 # Configuración de transcripción de voz
-TRANSCRIPTION_MODEL = "whisper-large-v3"
+TRANSCRIPTION_MODEL = os.getenv("TRANSCRIPTION_MODEL", "whisper-large-v3-turbo")
+TRANSCRIPTION_MAX_CONCURRENT = int(os.getenv("TRANSCRIPTION_MAX_CONCURRENT", 4))
+TRANSCRIPTION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", 1000))
+
+# Configuración del cliente HTTP compartido para Groq/OpenAI
+# Un solo pool de conexiones para todos los agentes (keep-alive entre llamadas)
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # None = API oficial de Groq
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # None = API oficial de OpenAI
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 100))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+
+# Configuración de Redis (opcional, usado por las cachés compartidas)
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Caché de completions LLM (opt-in)
+# Se omite automáticamente si la temperatura supera LLM_CACHE_MAX_TEMPERATURE
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 3600))
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", 0.7))
+
+# Caché semántica de respuestas del orquestador para preguntas frecuentes (opt-in)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.82))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 100000))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", 86400))
+
+# Modo del orquestador:
+# - "single_call": una sola completion devuelve enrutamiento + respuesta (sobre JSON)
+# - "two_step": análisis de intención y respuesta en dos llamadas separadas
+ORCHESTRATOR_MODE = os.getenv("ORCHESTRATOR_MODE", "single_call").lower()
+
+# Clasificador local de intención (fast-path antes del LLM)
+# El modelo se genera con train_intent_classifier.py
+INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "true").lower() == "true"
+INTENT_CLASSIFIER_PATH = os.getenv(
+    "INTENT_CLASSIFIER_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "intent_classifier.json")
+)
+INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", 0.85))
 
 def get_settings():
     """Obtiene todas las configuraciones del sistema"""
@@ -91,7 +198,58 @@ def get_settings():
         "empresa_sector": EMPRESA_SECTOR,
         "empresa_servicios": EMPRESA_SERVICIOS,
         "groq_models": GROQ_MODELS,
-        "transcription_model": TRANSCRIPTION_MODEL
+        "history_token_budgets": HISTORY_TOKEN_BUDGETS,
+        "summary_enabled": SUMMARY_ENABLED,
+        "summary_every_n_messages": SUMMARY_EVERY_N_MESSAGES,
+        "summary_keep_recent": SUMMARY_KEEP_RECENT,
+        "summary_max_tokens": SUMMARY_MAX_TOKENS,
+        "db_max_workers": DB_MAX_WORKERS,
+        "db_slow_query_ms": DB_SLOW_QUERY_MS,
+        "update_dispatcher_max_in_flight": UPDATE_DISPATCHER_MAX_IN_FLIGHT,
+        "update_dispatcher_max_per_chat": UPDATE_DISPATCHER_MAX_PER_CHAT,
+        "webhook_dedupe_max_entries": WEBHOOK_DEDUPE_MAX_ENTRIES,
+        "webhook_dedupe_ttl_seconds": WEBHOOK_DEDUPE_TTL_SECONDS,
+        "session_cache_ttl_seconds": SESSION_CACHE_TTL_SECONDS,
+        "session_cache_max_entries": SESSION_CACHE_MAX_ENTRIES,
+        "telegram_send_rate_per_second": TELEGRAM_SEND_RATE_PER_SECOND,
+        "telegram_send_per_chat_interval": TELEGRAM_SEND_PER_CHAT_INTERVAL,
+        "telegram_send_max_retries": TELEGRAM_SEND_MAX_RETRIES,
+        "telegram_streaming_enabled": TELEGRAM_STREAMING_ENABLED,
+        "telegram_stream_edit_interval": TELEGRAM_STREAM_EDIT_INTERVAL,
+        "telegram_stream_first_edit_delay": TELEGRAM_STREAM_FIRST_EDIT_DELAY,
+        "quote_catalog_path": QUOTE_CATALOG_PATH,
+        "quote_catalog_reload_seconds": QUOTE_CATALOG_RELOAD_SECONDS,
+        "quote_batch_max_items": QUOTE_BATCH_MAX_ITEMS,
+        "cotizacion_pdf_font_path": COTIZACION_PDF_FONT_PATH,
+        "cotizacion_pdf_font_bold_path": COTIZACION_PDF_FONT_BOLD_PATH,
+        "cotizacion_pdf_logo_path": COTIZACION_PDF_LOGO_PATH,
+        "log_sink_enabled": LOG_SINK_ENABLED,
+        "log_sink_batch_size": LOG_SINK_BATCH_SIZE,
+        "log_sink_flush_interval": LOG_SINK_FLUSH_INTERVAL,
+        "log_sink_max_queue": LOG_SINK_MAX_QUEUE,
+        "log_sink_drop_policy": LOG_SINK_DROP_POLICY,
+        "log_sink_block_timeout": LOG_SINK_BLOCK_TIMEOUT,
+        "transcription_model": TRANSCRIPTION_MODEL,
+        "transcription_max_concurrent": TRANSCRIPTION_MAX_CONCURRENT,
+        "transcription_cache_max_entries": TRANSCRIPTION_CACHE_MAX_ENTRIES,
+        "groq_base_url": GROQ_BASE_URL,
+        "openai_base_url": OPENAI_BASE_URL,
+        "llm_max_connections": LLM_MAX_CONNECTIONS,
+        "llm_max_keepalive_connections": LLM_MAX_KEEPALIVE_CONNECTIONS,
+        "llm_timeout_seconds": LLM_TIMEOUT_SECONDS,
+        "redis_url": REDIS_URL,
+        "llm_cache_enabled": LLM_CACHE_ENABLED,
+        "llm_cache_max_entries": LLM_CACHE_MAX_ENTRIES,
+        "llm_cache_ttl_seconds": LLM_CACHE_TTL_SECONDS,
+        "llm_cache_max_temperature": LLM_CACHE_MAX_TEMPERATURE,
+        "semantic_cache_enabled": SEMANTIC_CACHE_ENABLED,
+        "semantic_cache_threshold": SEMANTIC_CACHE_THRESHOLD,
+        "semantic_cache_max_entries": SEMANTIC_CACHE_MAX_ENTRIES,
+        "semantic_cache_ttl_seconds": SEMANTIC_CACHE_TTL_SECONDS,
+        "orchestrator_mode": ORCHESTRATOR_MODE,
+        "intent_classifier_enabled": INTENT_CLASSIFIER_ENABLED,
+        "intent_classifier_path": INTENT_CLASSIFIER_PATH,
+        "intent_classifier_threshold": INTENT_CLASSIFIER_THRESHOLD
     }
 
 def get_admin_chat_ids_list() -> list:
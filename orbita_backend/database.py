@@ -2,9 +2,14 @@
 # [CRITERIO 1] - Memoria persistente: todas las conversaciones se guardan
 
 from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_KEY
+from config import SUPABASE_URL, SUPABASE_KEY, DB_MAX_WORKERS, DB_SLOW_QUERY_MS
+from utils.log_sink import get_log_sink
 import asyncio
-from typing import Optional
+import statistics
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Dict, Tuple
 
 # Cliente global de Supabase
 supabase: Optional[Client] = None
@@ -23,20 +28,95 @@ async def init_db():
     try:
         db = get_db()
         # Test simple de conexión
-        result = db.table("empresas").select("id").limit(1).execute()
+        result = await db_execute(db.table("empresas").select("id").limit(1))
         print("✅ Conexión a Supabase exitosa")
         return True
     except Exception as e:
         print(f"❌ Error conectando a Supabase: {e}")
         return False
 
+# Ejecución de consultas fuera del event loop
+# El cliente de Supabase es síncrono: cada .execute() es una petición HTTP
+# bloqueante. db_execute la corre en un pool de hilos acotado para que el
+# event loop siga atendiendo otros updates mientras tanto.
+
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_semaphore: Optional[asyncio.Semaphore] = None
+_db_stats = {"consultas": 0, "errores": 0, "lentas": 0, "en_curso": 0, "en_curso_max": 0, "esperando": 0}
+_db_latencias: Dict[str, deque] = defaultdict(lambda: deque(maxlen=200))
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor, _db_semaphore
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="supabase")
+        # El semáforo limita las consultas simultáneas; el resto espera en el loop (no en la cola del pool)
+        _db_semaphore = asyncio.Semaphore(DB_MAX_WORKERS)
+    return _db_executor
+
+def _nombre_consulta(query: Any) -> str:
+    """Etiqueta 'tabla:método' para agrupar tiempos (p. ej. 'leads:GET')."""
+    path = str(getattr(query, "path", "") or "").rstrip("/").split("/")[-1]
+    method = getattr(query, "http_method", "") or ""
+    return f"{path or 'consulta'}:{method}" if method else (path or "consulta")
+
+async def db_execute(query: Any, label: Optional[str] = None) -> Any:
+    """
+    Ejecuta query.execute() en el pool de hilos acotado y registra su duración.
+    
+    Uso:
+        result = await db_execute(db.table("leads").select("*").eq("id", lead_id))
+    """
+    executor = _get_db_executor()
+    label = label or _nombre_consulta(query)
+    
+    inicio = time.perf_counter()
+    _db_stats["esperando"] += 1
+    async with _db_semaphore:
+        _db_stats["esperando"] -= 1
+        _db_stats["en_curso"] += 1
+        _db_stats["en_curso_max"] = max(_db_stats["en_curso_max"], _db_stats["en_curso"])
+        espera_ms = (time.perf_counter() - inicio) * 1000
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, query.execute)
+        except Exception:
+            _db_stats["errores"] += 1
+            raise
+        finally:
+            _db_stats["en_curso"] -= 1
+            _db_stats["consultas"] += 1
+            duracion_ms = (time.perf_counter() - inicio) * 1000 - espera_ms
+            _db_latencias[label].append(duracion_ms)
+            if duracion_ms > DB_SLOW_QUERY_MS:
+                _db_stats["lentas"] += 1
+                print(f"🐢 Consulta lenta {label}: {duracion_ms:.0f} ms (espera {espera_ms:.0f} ms)")
+
+def get_db_stats() -> Dict[str, Any]:
+    """Límite de concurrencia, consultas en curso y tiempos por tabla:método."""
+    por_consulta = {}
+    for label, latencias in _db_latencias.items():
+        ordenadas = sorted(latencias)
+        por_consulta[label] = {
+            "muestras": len(ordenadas),
+            "p50_ms": round(statistics.median(ordenadas), 1),
+            "p95_ms": round(ordenadas[max(0, int(len(ordenadas) * 0.95) - 1)], 1)
+        }
+    return {**_db_stats, "max_concurrencia": DB_MAX_WORKERS, "por_consulta": por_consulta}
+
+def shutdown_db_executor():
+    """Libera los hilos del pool (apagado)."""
+    global _db_executor, _db_semaphore
+    if _db_executor is not None:
+        _db_executor.shutdown(wait=True)
+    _db_executor = None
+    _db_semaphore = None
+
 # Funciones auxiliares para operaciones comunes
 
 async def create_record(table: str, data: dict) -> dict:
     """Crea un nuevo registro en la tabla especificada"""
     try:
         db = get_db()
-        result = db.table(table).insert(data).execute()
+        result = await db_execute(db.table(table).insert(data))
         return result.data[0] if result.data else None
     except Exception as e:
         print(f"Error creando registro en {table}: {e}")
@@ -46,7 +126,7 @@ async def get_record(table: str, id: int) -> dict:
     """Obtiene un registro por ID"""
     try:
         db = get_db()
-        result = db.table(table).select("*").eq("id", id).execute()
+        result = await db_execute(db.table(table).select("*").eq("id", id))
         return result.data[0] if result.data else None
     except Exception as e:
         print(f"Error obteniendo registro de {table}: {e}")
@@ -56,7 +136,7 @@ async def update_record(table: str, id: int, data: dict) -> dict:
     """Actualiza un registro existente"""
     try:
         db = get_db()
-        result = db.table(table).update(data).eq("id", id).execute()
+        result = await db_execute(db.table(table).update(data).eq("id", id))
         return result.data[0] if result.data else None
     except Exception as e:
         print(f"Error actualizando registro en {table}: {e}")
@@ -66,7 +146,7 @@ async def delete_record(table: str, id: int) -> bool:
     """Elimina un registro por ID"""
     try:
         db = get_db()
-        result = db.table(table).delete().eq("id", id).execute()
+        result = await db_execute(db.table(table).delete().eq("id", id))
         return True
     except Exception as e:
         print(f"Error eliminando registro de {table}: {e}")
@@ -91,7 +171,7 @@ async def query_records(table: str, filters: dict = None, order_by: str = None,
         if limit:
             query = query.limit(limit)
             
-        result = query.execute()
+        result = await db_execute(query)
         return result.data
     except Exception as e:
         print(f"Error consultando registros de {table}: {e}")
@@ -131,6 +211,75 @@ async def create_conversacion(session_id: str, role: str, content: str, agente:
     }
     return await create_record("conversaciones", data)
 
+async def add_conversation_message(
+    conversation_id: str,
+    lead_id: str,
+    role: str,
+    content: str,
+    content_type: str = "text",
+    agente: str = None
+) -> dict:
+    """Agrega un mensaje a conversation_messages (una fila, sin reescribir el historial)"""
+    return await create_record("conversation_messages", {
+        "conversation_id": conversation_id,
+        "lead_id": lead_id,
+        "role": role,
+        "content": content or "",
+        "content_type": content_type,
+        "agente": agente
+    })
+
+# Cursor de conversation_messages: (created_at, id). El id desempata mensajes con
+# el mismo created_at (inserciones en el mismo instante o filas del backfill).
+CursorMensaje = Tuple[str, int]
+
+def cursor_mensaje(mensaje: Dict[str, Any]) -> CursorMensaje:
+    """Cursor (created_at, id) de una fila de conversation_messages"""
+    return mensaje["created_at"], mensaje["id"]
+
+def _filtro_cursor(query, cursor: CursorMensaje, operador: str):
+    """Filas estrictamente posteriores (gt) o anteriores (lt) al cursor (created_at, id)"""
+    creado, id_ = cursor
+    return query.or_(
+        f'created_at.{operador}."{creado}",and(created_at.eq."{creado}",id.{operador}.{int(id_)})'
+    )
+
+async def get_ultimos_mensajes(
+    lead_id: str,
+    limite: int = 20,
+    despues_de: Optional[CursorMensaje] = None,
+    antes_de: Optional[CursorMensaje] = None
+) -> list:
+    """
+    Últimos N mensajes del lead en orden cronológico (paginación por cursor (created_at, id)).
+
+    Args:
+        despues_de: Solo mensajes posteriores a este cursor (p. ej. lo no resumido)
+        antes_de: Solo mensajes anteriores a este cursor (página siguiente hacia atrás,
+                  con cursor_mensaje() del primer mensaje de la página actual)
+    """
+    db = get_db()
+    query = db.table("conversation_messages")\
+        .select("id, role, content, content_type, agente, created_at")\
+        .eq("lead_id", lead_id)
+    if despues_de:
+        query = _filtro_cursor(query, despues_de, "gt")
+    if antes_de:
+        query = _filtro_cursor(query, antes_de, "lt")
+    result = await db_execute(query.order("created_at", desc=True).order("id", desc=True).limit(limite))
+    return list(reversed(result.data or []))
+
+async def get_mensajes_desde(lead_id: str, despues_de: Optional[CursorMensaje] = None, limite: int = 500) -> list:
+    """Mensajes del lead posteriores al cursor despues_de, del más antiguo al más reciente"""
+    db = get_db()
+    query = db.table("conversation_messages")\
+        .select("id, role, content, content_type, agente, created_at")\
+        .eq("lead_id", lead_id)
+    if despues_de:
+        query = _filtro_cursor(query, despues_de, "gt")
+    result = await db_execute(query.order("created_at").order("id").limit(limite))
+    return result.data or []
+
 async def create_lead(lead_data: dict) -> dict:
     """Crea un nuevo lead"""
     return await create_record("leads", lead_data)
@@ -152,13 +301,20 @@ async def create_campana(campana_data: dict) -> dict:
     return await create_record("campanas", campana_data)
 
 async def log_agent_action(agent_name: str, action: str, session_id: str = None, details: dict = None) -> dict:
-    """Registra la acción de un agente para analítica"""
+    """
+    Registra la acción de un agente para analítica.
+    Con LOG_SINK_ENABLED la fila se encola y se inserta en lote en segundo plano.
+    """
     log_data = {
         "agent_name": agent_name,
         "action": action,
         "session_id": session_id,
         "details": details
     }
+    sink = get_log_sink()
+    if sink is not None:
+        await sink.put(log_data)
+        return log_data
     return await create_record("agent_logs", log_data)
 
 # Funciones de analítica
@@ -167,12 +323,11 @@ async def get_analytics_leads_por_periodo(empresa_id: int, start_date: str, end_
     """Obtiene analítica de leads por período"""
     try:
         db = get_db()
-        result = db.table("leads")\
+        result = await db_execute(db.table("leads")\
             .select("*")\
             .eq("empresa_id", empresa_id)\
             .gte("created_at", start_date)\
-            .lte("created_at", end_date)\
-            .execute()
+            .lte("created_at", end_date))
         return result.data
     except Exception as e:
         print(f"Error obteniendo analítica de leads: {e}")
@@ -182,11 +337,10 @@ async def get_analytics_agentes_actividad(start_date: str, end_date: str) -> lis
     """Obtiene analítica de actividad de agentes"""
     try:
         db = get_db()
-        result = db.table("agent_logs")\
+        result = await db_execute(db.table("agent_logs")\
             .select("*")\
             .gte("created_at", start_date)\
-            .lte("created_at", end_date)\
-            .execute()
+            .lte("created_at", end_date))
         return result.data
     except Exception as e:
         print(f"Error obteniendo analítica de agentes: {e}")
@@ -22,10 +22,17 @@ from routers.agentes import agentes_router
 from routers.telegram import telegram_router
 
 # Importar configuración de base de datos
-from database import init_db
+from database import init_db, shutdown_db_executor
+from utils.groq_client import close_groq_client
+from utils.conversation_summary import get_conversation_summarizer
+from utils.log_sink import get_log_sink, close_log_sink
+from utils.session_cache import close_session_cache
 
 # Importar configuración de Telegram
-from Telegram_Bot.bot import setup_leads_webhook, setup_admin_webhook, delete_leads_webhook, delete_admin_webhook
+from Telegram_Bot.bot import (
+    setup_leads_webhook, setup_admin_webhook, delete_leads_webhook, delete_admin_webhook,
+    drain_dispatchers
+)
 from config import get_settings
 
 @asynccontextmanager
@@ -39,6 +46,11 @@ async def lifespan(app: FastAPI):
     await init_db()
     print("✅ Base de datos inicializada")
     
+    # Sink de agent_logs en lotes (se vacía al cerrar)
+    log_sink = get_log_sink()
+    if log_sink:
+        log_sink.start()
+    
     # 2. Configurar Telegram Bots (Leads + Admin)
     settings = get_settings()
     print("🤖 Configurando Telegram Bots...")
@@ -68,6 +80,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Cerrando ORBITA...")
+    await drain_dispatchers()
+    summarizer = get_conversation_summarizer()
+    if summarizer:
+        await summarizer.esperar_pendientes()
+    await close_log_sink()
+    await close_session_cache()
+    shutdown_db_executor()
+    await close_groq_client()
     print("👋 ORBITA cerrado")
 
 # Crear aplicación FastAPI
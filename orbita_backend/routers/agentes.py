@@ -1,10 +1,20 @@
 # Router del sistema multi-agente para ORBITA
 
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any
 from datetime import datetime
 from auth import get_current_active_user, get_current_user_empresa
+from utils.groq_client import get_completion_cache
+from utils.semantic_cache import get_semantic_cache
+from utils.intent_classifier import get_intent_classifier
+from agents.registry import get_agent, get_agent_registry
+from utils.log_sink import get_log_sink
+from utils.json_extract import get_json_parse_stats
+from database import get_db_stats
 
 agentes_router = APIRouter()
 
@@ -18,6 +28,41 @@ class AgentResponse(BaseModel):
     agente: str
     session_id: str
     timestamp: str
+    confianza: Optional[float] = None
+    razonamiento: Optional[str] = None
+
+# Streams de /chat/stream desde el arranque (cancelados: el cliente se desconectó)
+_chat_stream_stats = {"iniciados": 0, "completados": 0, "cancelados": 0}
+
+def _sesion_chat(request: ChatRequest, empresa: dict) -> tuple:
+    """
+    (session_id para el cliente, clave de memoria del orquestador). La clave incluye
+    la empresa para que una sesión no se pueda leer desde otra cuenta.
+    """
+    session_id = request.session_id or f"session_{datetime.utcnow().timestamp()}"
+    return session_id, f"dashboard_{empresa['id']}_{session_id}"
+
+def _contexto_chat(current_user: dict, empresa: dict) -> Dict[str, Any]:
+    return {
+        "canal": "dashboard",
+        "empresa_id": empresa["id"],
+        "empresa": empresa.get("nombre"),
+        "usuario_id": current_user.get("id")
+    }
+
+def _respuesta_chat(resultado: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+    """Resultado del orquestador con la forma de AgentResponse."""
+    return {
+        "response": resultado.get("response", ""),
+        "agente": resultado.get("route_to_agent") or resultado.get("agent", "orchestrator"),
+        "session_id": session_id,
+        "timestamp": resultado.get("timestamp") or datetime.utcnow().isoformat(),
+        "confianza": resultado.get("confidence"),
+        "razonamiento": resultado.get("reasoning")
+    }
+
+def _evento_sse(evento: str, datos: Dict[str, Any]) -> str:
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
 
 @agentes_router.get("/", summary="Obtener información de agentes")
 async def get_agentes_info(
@@ -67,36 +112,106 @@ async def chat_with_agent(
     current_user: dict = Depends(get_current_active_user),
     empresa: dict = Depends(get_current_user_empresa)
 ):
-    """Envía un mensaje al sistema multi-agente"""
+    """
+    Envía un mensaje al sistema multi-agente. Lo atiende el orquestador, que decide
+    el agente especializado (campo "agente" de la respuesta); request.agente se ignora.
+    """
+    session_id, memoria_id = _sesion_chat(request, empresa)
     try:
-        # Placeholder para el sistema de agentes
-        # En una implementación completa, aquí se llamaría al orquestador
-        
-        session_id = request.session_id or f"session_{datetime.utcnow().timestamp()}"
-        agente_usado = request.agente or "orchestrator"
-        
-        # Respuesta simulada
-        response_text = f"Respuesta del agente {agente_usado} para: '{request.message}'"
-        
-        return {
-            "response": response_text,
-            "agente": agente_usado,
-            "session_id": session_id,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        resultado = await get_agent("orchestrator").process_message(
+            message=request.message,
+            session_id=memoria_id,
+            context=_contexto_chat(current_user, empresa)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if not resultado.get("success") and resultado.get("error") == "Mensaje inválido":
+        raise HTTPException(status_code=400, detail="Mensaje inválido")
+    return _respuesta_chat(resultado, session_id)
+
+@agentes_router.post("/chat/stream", summary="Chat con agentes en streaming (SSE)")
+async def chat_with_agent_stream(
+    request: ChatRequest,
+    current_user: dict = Depends(get_current_active_user),
+    empresa: dict = Depends(get_current_user_empresa)
+):
+    """
+    Igual que /chat pero la respuesta llega como Server-Sent Events mientras se genera:
+    
+    - event: enrutamiento → {"agente", "confianza", "fuente"} en cuanto se decide
+    - event: token → {"texto"} con cada fragmento de la respuesta
+    - event: fin → el mismo cuerpo que /chat
+    - event: error → {"detalle"}
+    
+    Si el cliente se desconecta, el stream se cancela y con él la llamada al LLM.
+    """
+    orchestrator = get_agent("orchestrator")
+    # Validar antes de abrir el stream para poder responder 400
+    if not await orchestrator.validate_input(request.message):
+        raise HTTPException(status_code=400, detail="Mensaje inválido")
+    
+    session_id, memoria_id = _sesion_chat(request, empresa)
+    eventos = orchestrator.stream_message(
+        message=request.message,
+        session_id=memoria_id,
+        context=_contexto_chat(current_user, empresa)
+    )
+    
+    async def generar_sse() -> AsyncIterator[str]:
+        _chat_stream_stats["iniciados"] += 1
+        try:
+            async for evento in eventos:
+                tipo = evento["tipo"]
+                if tipo == "token":
+                    yield _evento_sse("token", {"texto": evento["texto"]})
+                elif tipo == "enrutamiento":
+                    yield _evento_sse("enrutamiento", {k: v for k, v in evento.items() if k != "tipo"})
+                elif evento["resultado"].get("success") or evento["resultado"].get("response"):
+                    yield _evento_sse("fin", _respuesta_chat(evento["resultado"], session_id))
+                else:
+                    yield _evento_sse("error", {"detalle": evento["resultado"].get("error", "Error procesando mensaje")})
+            _chat_stream_stats["completados"] += 1
+        except asyncio.CancelledError:
+            # Starlette cancela la respuesta al desconectarse el cliente: la cancelación
+            # atraviesa el orquestador y cierra el stream HTTP con el LLM
+            _chat_stream_stats["cancelados"] += 1
+            print(f"🔌 Cliente desconectado, se cancela el chat {session_id}")
+            raise
+        except Exception as e:
+            print(f"❌ Error en chat en streaming: {e}")
+            yield _evento_sse("error", {"detalle": str(e)})
+        finally:
+            await eventos.aclose()
+    
+    return StreamingResponse(
+        generar_sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @agentes_router.get("/status", summary="Estado del sistema multi-agente")
 async def get_agentes_status(
     current_user: dict = Depends(get_current_active_user)
 ):
     """Obtiene el estado actual del sistema multi-agente"""
+    completion_cache = get_completion_cache()
+    semantic_cache = get_semantic_cache()
+    intent_classifier = get_intent_classifier()
+    log_sink = get_log_sink()
     return {
         "sistema_activo": True,
         "groq_connection": "active",
         "agentes_disponibles": 5,
         "sesiones_activas": 0,
+        "registro_agentes": get_agent_registry().get_stats(),
+        "cache_llm": completion_cache.get_stats() if completion_cache else {"activa": False},
+        "cache_semantica": semantic_cache.get_stats() if semantic_cache else {"activa": False},
+        "clasificador_intencion": intent_classifier.get_stats() if intent_classifier else {"activo": False},
+        "log_sink": log_sink.get_stats() if log_sink else {"activo": False},
+        "base_datos": get_db_stats(),
+        "parseo_json": get_json_parse_stats(),
+        "chat_stream": dict(_chat_stream_stats),
         "timestamp": datetime.utcnow().isoformat()
     }
 
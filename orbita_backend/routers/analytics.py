@@ -4,7 +4,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 from datetime import datetime, timedelta
 from auth import get_current_active_user, get_current_user_empresa
-from database import get_db, get_analytics_leads_por_periodo, get_analytics_agentes_actividad
+from database import get_db, db_execute, get_analytics_leads_por_periodo, get_analytics_agentes_actividad
 
 analytics_router = APIRouter()
 
@@ -18,22 +18,19 @@ async def get_dashboard_analytics(
         db = get_db()
         
         # Contar leads totales
-        leads_result = db.table("leads")\
+        leads_result = await db_execute(db.table("leads")\
             .select("id", count="exact")\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         
         # Contar cotizaciones
-        cotizaciones_result = db.table("cotizaciones")\
+        cotizaciones_result = await db_execute(db.table("cotizaciones")\
             .select("id", count="exact")\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         
         # Contar reuniones
-        reuniones_result = db.table("reuniones")\
+        reuniones_result = await db_execute(db.table("reuniones")\
             .select("id", count="exact")\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         
         return {
             "total_leads": leads_result.count or 0,
@@ -5,7 +5,7 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from auth import get_current_active_user, get_current_user_empresa
-from database import get_db, create_campana
+from database import get_db, db_execute, create_campana
 
 campanas_router = APIRouter()
 
@@ -25,10 +25,9 @@ async def get_campanas(
     """Obtiene todas las campañas de la empresa"""
     try:
         db = get_db()
-        result = db.table("campanas")\
+        result = await db_execute(db.table("campanas")\
             .select("*")\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         return result.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
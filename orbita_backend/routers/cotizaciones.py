@@ -2,12 +2,19 @@
 # [CRITERIO 5] - Cotizaciones automáticas generadas por IA
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import json
 from auth import get_current_active_user, get_current_user_empresa
-from database import get_db, create_cotizacion
+from config import get_settings
+from database import get_db, db_execute, create_cotizacion
+from agents.registry import get_agent
 from utils.cotizacion_renderer import render_cotizacion_markdown
+from utils.cotizacion_pdf import generar_pdf_cotizacion, iter_pdf
+from utils.quick_estimate import get_quick_estimator
 
 cotizaciones_router = APIRouter()
 
@@ -23,6 +30,12 @@ class CotizacionGenerateRequest(BaseModel):
     servicio: str
     detalles: str
 
+class EstimadoLoteRequest(BaseModel):
+    mensajes: List[str]
+
+# Líneas NDJSON por escritura al cliente
+LINEAS_POR_BLOQUE = 500
+
 @cotizaciones_router.get("/", summary="Obtener cotizaciones")
 async def get_cotizaciones(
     current_user: dict = Depends(get_current_active_user),
@@ -31,10 +44,9 @@ async def get_cotizaciones(
     """Obtiene todas las cotizaciones de la empresa"""
     try:
         db = get_db()
-        result = db.table("cotizaciones")\
+        result = await db_execute(db.table("cotizaciones")\
             .select("*")\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         return result.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -73,20 +85,18 @@ async def generate_cotizacion_with_ai(
     try:
         # Obtener datos del lead
         db = get_db()
-        lead_result = db.table("leads")\
+        lead_result = await db_execute(db.table("leads")\
             .select("*")\
             .eq("id", request.lead_id)\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         
         if not lead_result.data:
             raise HTTPException(status_code=404, detail="Lead no encontrado")
         
         lead_data = lead_result.data[0]
         
-        # Usar agente de comunicación para generar cotización con IA
-        from agents.comunicacion import ComunicacionAgent
-        agente_comunicacion = ComunicacionAgent()
+        # Usar agente de comunicación (compartido) para generar cotización con IA
+        agente_comunicacion = get_agent("comunicacion")
         
         resultado = await agente_comunicacion.generate_cotizacion(
             lead_data=lead_data,
@@ -109,10 +119,9 @@ async def generate_cotizacion_with_ai(
         nueva_cotizacion = await create_cotizacion(cotizacion_data)
         
         # Actualizar estado del lead a "cotizado"
-        db.table("leads")\
+        await db_execute(db.table("leads")\
             .update({"status": "cotizado", "updated_at": datetime.utcnow().isoformat()})\
-            .eq("id", request.lead_id)\
-            .execute()
+            .eq("id", request.lead_id))
         
         return {
             "success": True,
@@ -129,6 +138,59 @@ async def generate_cotizacion_with_ai(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando cotización: {str(e)}")
 
+@cotizaciones_router.post("/estimados/lote", summary="Estimados rápidos en lote (NDJSON)")
+async def estimar_lote(
+    request: EstimadoLoteRequest,
+    current_user: dict = Depends(get_current_active_user),
+    empresa: dict = Depends(get_current_user_empresa)
+):
+    """
+    Estimados instantáneos para una importación masiva de leads, sin LLM.
+    Devuelve una línea JSON por mensaje (en el mismo orden) a medida que se calculan:
+    indice, servicio, nombre_servicio, confianza, nivel_complejidad, precio_estimado, moneda.
+    """
+    max_items = get_settings()["quote_batch_max_items"]
+    if len(request.mensajes) > max_items:
+        raise HTTPException(status_code=413, detail=f"Máximo {max_items} mensajes por lote")
+    
+    estimador = get_quick_estimator(empresa["id"])
+    
+    async def generar_ndjson():
+        bloque = []
+        for resultado in estimador.estimar_lote(request.mensajes):
+            bloque.append(json.dumps(resultado, ensure_ascii=False))
+            if len(bloque) >= LINEAS_POR_BLOQUE:
+                yield "\n".join(bloque) + "\n"
+                bloque = []
+                await asyncio.sleep(0)  # no acaparar el event loop en lotes grandes
+        if bloque:
+            yield "\n".join(bloque) + "\n"
+    
+    return StreamingResponse(generar_ndjson(), media_type="application/x-ndjson")
+
+async def _obtener_cotizacion_y_lead(cotizacion_id: int, empresa_id) -> tuple:
+    """Cotización de la empresa y su lead ({} si no existe); 404 si la cotización no es suya."""
+    db = get_db()
+    
+    # Obtener cotización
+    cotizacion_result = await db_execute(db.table("cotizaciones")\
+        .select("*")\
+        .eq("id", cotizacion_id)\
+        .eq("empresa_id", empresa_id))
+    
+    if not cotizacion_result.data:
+        raise HTTPException(status_code=404, detail="Cotización no encontrada")
+    
+    cotizacion_data = cotizacion_result.data[0]
+    
+    # Obtener datos del lead
+    lead_result = await db_execute(db.table("leads")\
+        .select("*")\
+        .eq("id", cotizacion_data["lead_id"]))
+    
+    lead_data = lead_result.data[0] if lead_result.data else {}
+    return cotizacion_data, lead_data
+
 @cotizaciones_router.get("/{cotizacion_id}/render", summary="Renderizar cotización en Markdown")
 async def render_cotizacion(
     cotizacion_id: int,
@@ -139,27 +201,7 @@ async def render_cotizacion(
     Obtiene una cotización renderizada en formato Markdown listo para enviar.
     """
     try:
-        db = get_db()
-        
-        # Obtener cotización
-        cotizacion_result = db.table("cotizaciones")\
-            .select("*")\
-            .eq("id", cotizacion_id)\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
-        
-        if not cotizacion_result.data:
-            raise HTTPException(status_code=404, detail="Cotización no encontrada")
-        
-        cotizacion_data = cotizacion_result.data[0]
-        
-        # Obtener datos del lead
-        lead_result = db.table("leads")\
-            .select("*")\
-            .eq("id", cotizacion_data["lead_id"])\
-            .execute()
-        
-        lead_data = lead_result.data[0] if lead_result.data else {}
+        cotizacion_data, lead_data = await _obtener_cotizacion_y_lead(cotizacion_id, empresa["id"])
         
         # Renderizar cotización
         markdown_content = render_cotizacion_markdown(
@@ -179,4 +221,31 @@ async def render_cotizacion(
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error renderizando cotización: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error renderizando cotización: {str(e)}")
+
+@cotizaciones_router.get("/{cotizacion_id}/pdf", summary="Descargar cotización en PDF")
+async def cotizacion_pdf(
+    cotizacion_id: int,
+    current_user: dict = Depends(get_current_active_user),
+    empresa: dict = Depends(get_current_user_empresa)
+):
+    """
+    Genera la cotización en PDF (mismos datos que /render) y la transmite por bloques.
+    """
+    try:
+        cotizacion_data, lead_data = await _obtener_cotizacion_y_lead(cotizacion_id, empresa["id"])
+        pdf = await generar_pdf_cotizacion(cotizacion_data, lead_data, empresa)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generando PDF: {str(e)}")
+    
+    nombre = cotizacion_data.get("numero_cotizacion") or f"COT-{cotizacion_id}"
+    return StreamingResponse(
+        iter_pdf(pdf),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'inline; filename="{nombre}.pdf"',
+            "Content-Length": str(len(pdf))
+        }
+    )
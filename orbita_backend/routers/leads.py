@@ -6,7 +6,7 @@ from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from datetime import datetime
 from auth import get_current_active_user, get_current_user_empresa
-from database import get_db, create_lead, update_lead_status, get_leads_by_empresa
+from database import get_db, db_execute, create_lead, update_lead_status, get_leads_by_empresa
 
 leads_router = APIRouter()
 
@@ -96,11 +96,10 @@ async def get_lead_by_id(
     """Obtiene un lead específico por ID"""
     try:
         db = get_db()
-        result = db.table("leads")\
+        result = await db_execute(db.table("leads")\
             .select("*")\
             .eq("id", lead_id)\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Lead no encontrado")
@@ -120,11 +119,10 @@ async def update_lead(
     try:
         # Verificar que el lead existe y pertenece a la empresa
         db = get_db()
-        existing_lead = db.table("leads")\
+        existing_lead = await db_execute(db.table("leads")\
             .select("*")\
             .eq("id", lead_id)\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         
         if not existing_lead.data:
             raise HTTPException(status_code=404, detail="Lead no encontrado")
@@ -134,10 +132,9 @@ async def update_lead(
         update_data["updated_at"] = datetime.utcnow().isoformat()
         
         # Actualizar lead
-        result = db.table("leads")\
+        result = await db_execute(db.table("leads")\
             .update(update_data)\
-            .eq("id", lead_id)\
-            .execute()
+            .eq("id", lead_id))
         
         return result.data[0]
     except Exception as e:
@@ -153,17 +150,16 @@ async def delete_lead(
     try:
         # Verificar que el lead existe y pertenece a la empresa
         db = get_db()
-        existing_lead = db.table("leads")\
+        existing_lead = await db_execute(db.table("leads")\
             .select("id")\
             .eq("id", lead_id)\
-            .eq("empresa_id", empresa["id"])\
-            .execute()
+            .eq("empresa_id", empresa["id"]))
         
         if not existing_lead.data:
             raise HTTPException(status_code=404, detail="Lead no encontrado")
         
         # Eliminar lead
-        db.table("leads").delete().eq("id", lead_id).execute()
+        await db_execute(db.table("leads").delete().eq("id", lead_id))
         
         return {"message": "Lead eliminado exitosamente"}
     except Exception as e:
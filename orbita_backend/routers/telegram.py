@@ -4,7 +4,18 @@ from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from datetime import datetime
+import json
+from telegram import Update
 from auth import get_current_active_user, get_current_user_empresa
+from config import get_settings
+from Telegram_Bot.bot import (
+    get_leads_bot, get_admin_bot, get_leads_dispatcher, get_admin_dispatcher, get_dispatchers_stats
+)
+from utils.update_dispatcher import chat_key
+from utils.webhook_ingest import SECRET_HEADER, secreto_valido, get_update_deduplicator
+from utils.transcription import get_voice_transcriber
+from utils.session_cache import get_session_cache
+from utils.telegram_sender import get_telegram_senders_stats
 
 telegram_router = APIRouter()
 
@@ -23,6 +34,8 @@ async def get_telegram_status(
     current_user: dict = Depends(get_current_active_user)
 ):
     """Obtiene el estado del bot de Telegram"""
+    # Solo lectura: no crea los handlers ni los dispatchers si aún no existen
+    dispatchers = get_dispatchers_stats()
     return {
         "bot_status": "active",
         "webhook_configured": True,
@@ -33,26 +46,61 @@ async def get_telegram_status(
             "Conversaciones con IA",
             "Notificaciones administrativas"
         ],
+        "dispatcher_leads": dispatchers["leads"],
+        "dispatcher_admin": dispatchers["admin"],
+        "webhook_dedupe": get_update_deduplicator().get_stats(),
+        "transcripcion_voz": get_voice_transcriber().get_stats(),
+        "cache_sesion": get_session_cache().get_stats(),
+        "envios": get_telegram_senders_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
-@telegram_router.post("/webhook", summary="Webhook de Telegram")
-async def telegram_webhook(request: Request):
+async def _ingestar_update(request: Request, nombre: str, bot, secreto: Optional[str], get_dispatcher):
     """
-    Endpoint que recibe actualizaciones del bot de Telegram.
-    Este endpoint debe estar configurado como webhook en Telegram.
+    Verifica el secreto, descarta reintentos por update_id y encola el update.
+    No espera al procesamiento: Telegram recibe 200 en milisegundos.
+    Si la cola del chat está llena se olvida el update_id y se responde 503,
+    así Telegram lo reintenta más tarde en lugar de perderlo.
     """
+    if not secreto_valido(request.headers.get(SECRET_HEADER), secreto):
+        raise HTTPException(status_code=401, detail="Secret token inválido")
+    
     try:
-        # Obtener datos del webhook
-        data = await request.json()
-        
-        # Placeholder para procesamiento del webhook
-        # En una implementación completa, aquí se procesarían los mensajes
-        
-        return {"status": "ok", "processed": True}
-    except Exception as e:
-        print(f"Error procesando webhook de Telegram: {e}")
-        return {"status": "error", "message": str(e)}
+        data = json.loads(await request.body())
+        update_id = int(data["update_id"])
+    except (ValueError, KeyError, TypeError):
+        # 200 para que Telegram no reintente un payload que nunca será válido
+        return {"status": "ignored"}
+    
+    deduplicator = get_update_deduplicator()
+    if not await deduplicator.es_nuevo(nombre, update_id):
+        return {"status": "duplicate"}
+    
+    update = Update.de_json(data, bot)
+    if not get_dispatcher().submit(chat_key(update), update, bot):
+        await deduplicator.olvidar(nombre, update_id)
+        raise HTTPException(status_code=503, detail="Cola del chat llena, reintentar más tarde")
+    return {"status": "ok", "queued": True}
+
+@telegram_router.post("/webhook", summary="Webhook de Telegram (bot de leads)")
+@telegram_router.post("/leads/webhook", summary="Webhook del bot de leads")
+async def telegram_leads_webhook(request: Request):
+    """
+    Recibe updates del bot de leads y los encola para LeadsBotHandler.
+    Responde de inmediato; el procesamiento (Whisper, agentes) sigue en segundo plano.
+    """
+    settings = get_settings()
+    return await _ingestar_update(
+        request, "leads", get_leads_bot(), settings["telegram_leads_webhook_secret"], get_leads_dispatcher
+    )
+
+@telegram_router.post("/admin/webhook", summary="Webhook del bot de admin")
+async def telegram_admin_webhook(request: Request):
+    """Recibe updates del bot de admin y los encola para AdminBotHandler."""
+    settings = get_settings()
+    return await _ingestar_update(
+        request, "admin", get_admin_bot(), settings["telegram_admin_bot_webhook_secret"], get_admin_dispatcher
+    )
 
 @telegram_router.post("/send-message", summary="Enviar mensaje por Telegram")
 async def send_telegram_message(
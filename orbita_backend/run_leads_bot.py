@@ -10,15 +10,21 @@ import sys
 from telegram.ext import Application, MessageHandler, filters, CommandHandler, ContextTypes, CallbackQueryHandler
 from telegram import Update, Bot
 from config import get_settings
-from Telegram_Bot.leads_handler import LeadsBotHandler
+from Telegram_Bot.bot import get_leads_handler, get_leads_dispatcher
+from utils.update_dispatcher import chat_key
+from utils.groq_client import close_groq_client
+from utils.log_sink import close_log_sink
+from utils.session_cache import close_session_cache
+from database import shutdown_db_executor
 
 logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
 
-# Inicializar el handler de leads
-leads_handler = LeadsBotHandler()
+# Handler de leads y cola de updates (en orden por chat, concurrente entre chats)
+leads_handler = get_leads_handler()
+dispatcher = get_leads_dispatcher()
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
@@ -28,14 +34,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Delega el manejo del mensaje al LeadsBotHandler."""
-    bot = context.bot
-    await leads_handler.handle_update(update, bot)
+    """Encola el mensaje para el LeadsBotHandler sin bloquear el polling."""
+    dispatcher.submit(chat_key(update), update, context.bot)
 
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Maneja los callbacks de botones inline."""
-    bot = context.bot
-    await leads_handler.handle_update(update, bot)
+    """Encola los callbacks de botones inline (mismo orden que los mensajes del chat)."""
+    dispatcher.submit(chat_key(update), update, context.bot)
 
 async def cleanup_webhooks(token: str):
     """Limpiar webhooks de manera asincrónica."""
@@ -87,11 +91,19 @@ async def main():
         await asyncio.Event().wait()
         
     finally:
-        # Cleanup apropiado
+        # Cleanup apropiado: dejar de recibir, terminar lo encolado con el bot
+        # todavía activo (sus respuestas usan app.bot) y recién entonces apagarlo
         print("\n🔧 Deteniendo bot...")
         await app.updater.stop()
+        await dispatcher.drain()
+        if leads_handler.summarizer:
+            await leads_handler.summarizer.esperar_pendientes()
         await app.stop()
         await app.shutdown()
+        await close_log_sink()
+        await close_session_cache()
+        shutdown_db_executor()
+        await close_groq_client()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Estimados rápidos en lote (importación de leads)
+Compara, sobre miles de mensajes de campañas:
+- Antes: detectar_servicio + _detectar_complejidad + generar_estimado por mensaje
+  (el camino del bot)
+- Después: QuickEstimateGenerator.estimar_lote
+Verifica que ambos dan el mismo servicio, confianza, complejidad y precio, y
+consume POST /cotizaciones/estimados/lote (ASGI en proceso) como NDJSON.
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_batch_estimates.py
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from auth import get_current_active_user, get_current_user_empresa
+from routers.cotizaciones import cotizaciones_router
+from utils.quick_estimate import get_quick_estimator
+
+LEADS = 20_000
+
+PLANTILLAS = [
+    "Quiero una página web {nivel} para mi {negocio}",
+    "Necesito una app móvil {nivel} para {negocio} con pagos",
+    "Me interesa una tienda online para vender online productos de {negocio}",
+    "Busco gestión de redes sociales e Instagram para {negocio}",
+    "¿Hacen chatbots con inteligencia artificial? Tengo un {negocio}",
+    "Quiero asesoría para digitalizar mi {negocio}",
+    "Posicionamiento en Google para mi {negocio}, algo {nivel}",
+    "Mantenimiento y hosting del sitio de mi {negocio} con integraciones",
+    "Hola, vi su anuncio",
+    "Información por favor",
+]
+NEGOCIOS = ["restaurante", "clínica dental", "ferretería", "gimnasio", "inmobiliaria", "panadería"]
+NIVELES = ["", "sencilla", "básico", "avanzado", "con múltiples integraciones", "personalizado"]
+
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}\n")
+
+
+def generar_mensajes(n: int) -> list:
+    return [
+        random.choice(PLANTILLAS).format(negocio=random.choice(NEGOCIOS), nivel=random.choice(NIVELES))
+        for _ in range(n)
+    ]
+
+
+def estimar_uno_a_uno(estimador, mensajes: list) -> list:
+    """Lo que haría el camino del bot para cada mensaje."""
+    resultados = []
+    for mensaje in mensajes:
+        servicio, confianza = estimador.detectar_servicio(mensaje)
+        nivel = estimador.detectar_complejidad(mensaje)
+        estimado = estimador.generar_estimado(servicio, mensaje, nivel) if servicio else None
+        resultados.append((servicio, confianza, nivel, estimado["precio_estimado"] if estimado else None))
+    return resultados
+
+
+async def main() -> bool:
+    random.seed(11)
+    mensajes = generar_mensajes(LEADS)
+    estimador = get_quick_estimator()
+    ok = True
+
+    print_header(f"ESTIMADOS EN LOTE ({LEADS} leads)")
+    inicio = time.perf_counter()
+    uno_a_uno = estimar_uno_a_uno(estimador, mensajes)
+    t_antes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    lote = list(estimador.estimar_lote(mensajes))
+    t_despues = time.perf_counter() - inicio
+
+    print(f"🐢 Uno a uno: {t_antes * 1000:8.1f} ms ({LEADS / t_antes:>10,.0f} leads/s)")
+    print(f"🚀 En lote:   {t_despues * 1000:8.1f} ms ({LEADS / t_despues:>10,.0f} leads/s)")
+    print(f"📈 Aceleración: x{t_antes / t_despues:.1f}")
+
+    diferencias = [
+        (mensajes[i], esperado, r)
+        for i, (esperado, r) in enumerate(zip(uno_a_uno, lote))
+        if esperado != (r["servicio"], r["confianza"], r["nivel_complejidad"], r["precio_estimado"])
+    ]
+    if not diferencias and [r["indice"] for r in lote] == list(range(LEADS)):
+        print("✅ Mismo servicio, confianza, complejidad y precio que el camino del bot")
+    else:
+        print(f"❌ {len(diferencias)} diferencias, p. ej. {diferencias[:1]}")
+        ok = False
+
+    # Endpoint NDJSON (autenticación sustituida por una empresa de prueba)
+    app = FastAPI()
+    app.include_router(cotizaciones_router, prefix="/cotizaciones")
+    app.dependency_overrides[get_current_active_user] = lambda: {"id": 1}
+    app.dependency_overrides[get_current_user_empresa] = lambda: {"id": 1}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://orbita") as client:
+        inicio = time.perf_counter()
+        primera_linea_ms = None
+        lineas = []
+        async with client.stream("POST", "/cotizaciones/estimados/lote", json={"mensajes": mensajes}) as r:
+            tipo = r.headers.get("content-type")
+            async for linea in r.aiter_lines():
+                if linea:
+                    if primera_linea_ms is None:
+                        primera_linea_ms = (time.perf_counter() - inicio) * 1000
+                    lineas.append(json.loads(linea))
+        total_ms = (time.perf_counter() - inicio) * 1000
+
+    print(f"🌊 NDJSON: primera línea a {primera_linea_ms:.1f} ms, {len(lineas)} líneas en {total_ms:.0f} ms ({tipo})")
+    if lineas == lote and tipo.startswith("application/x-ndjson"):
+        print("✅ El endpoint transmite los mismos resultados como NDJSON")
+    else:
+        print("❌ La respuesta NDJSON no coincide")
+        ok = False
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(main())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Render de cotizaciones con plantilla compilada
+Compara el renderer anterior (leer la plantilla del disco y decenas de
+str.replace secuenciales por cotización) con la plantilla compilada y cacheada:
+- Cotizaciones/segundo (objetivo: 10.000/s)
+- Salida idéntica para cotizaciones con y sin items/fases, campos por defecto
+  y bloques repetibles
+- Recompilación al cambiar el mtime de la plantilla
+
+La plantilla de producción (docs/ORBITA_Plantilla_Cotizacion.md) no está en el
+repositorio, así que el benchmark usa una plantilla sintética con todos los campos.
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_cotizacion_renderer.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from utils.cotizacion_renderer import CotizacionRenderer
+
+COTIZACIONES = 10_000
+OBJETIVO_POR_SEGUNDO = 10_000
+
+PLANTILLA = """<!-- Plantilla de cotización ORBITA: no editar los campos entre llaves -->
+# {{EMPRESA_NOMBRE}}
+_{{EMPRESA_SLOGAN}}_ · {{EMPRESA_CIUDAD}}, {{EMPRESA_PAIS}}
+{{EMPRESA_EMAIL}} · {{EMPRESA_TELEFONO}} · {{EMPRESA_SITIO_WEB}}
+
+## Propuesta {{COT_CODIGO}}
+
+| Emisión | Vencimiento | Canal |
+|---|---|---|
+| {{COT_FECHA_EMISION}} | {{COT_FECHA_VENCIMIENTO}} | {{COT_CANAL_ORIGEN}} |
+
+**Para:** {{LEAD_NOMBRE}} ({{LEAD_CARGO}}, {{LEAD_EMPRESA}})
+**Contacto:** {{LEAD_EMAIL}} · {{LEAD_TELEFONO}}
+**Interés:** {{LEAD_SERVICIO_INTERES}} · Presupuesto: {{LEAD_PRESUPUESTO_ESTIMADO}}
+
+{{COT_INTRODUCCION_PERSONALIZADA}}
+
+<!-- El asesor puede ampliar esta sección -->
+### {{COT_PLAN_NOMBRE}}
+{{COT_DESCRIPCION_PLAN}}
+
+{{COT_DESCRIPCION_ALCANCE}}
+
+## Entregables
+<!-- INICIO BLOQUE REPETIBLE: una fila por item -->
+| # | Entregable | Descripción | Valor |
+|---|---|---|---|
+| 1 | {{ITEM_1_NOMBRE}} | {{ITEM_1_DESCRIPCION}} | ${{ITEM_1_VALOR}} |
+<!-- FIN BLOQUE REPETIBLE -->
+
+Destacados: {{ITEM_1_NOMBRE}} (${{ITEM_1_VALOR}}), {{ITEM_2_NOMBRE}} (${{ITEM_2_VALOR}}),
+{{ITEM_3_NOMBRE}}, {{ITEM_4_NOMBRE}}, {{ITEM_5_NOMBRE}}
+
+## Cronograma
+1. **{{FASE_1_NOMBRE}}** ({{FASE_1_DURACION}}): {{FASE_1_DESCRIPCION}}
+2. **{{FASE_2_NOMBRE}}** ({{FASE_2_DURACION}}): {{FASE_2_DESCRIPCION}}
+3. **{{FASE_3_NOMBRE}}** ({{FASE_3_DURACION}}): {{FASE_3_DESCRIPCION}}
+
+## Inversión
+Subtotal: ${{COT_SUBTOTAL}} {{COT_MONEDA}}
+Descuento: {{COT_DESCUENTO_PORCENTAJE}}% (-${{COT_DESCUENTO_VALOR}})
+**Total: ${{COT_VALOR_TOTAL}} {{COT_MONEDA}}**
+
+Forma de pago: {{COT_FORMA_PAGO}}
+Duración: {{COT_TIEMPO_TOTAL}} · Inicio estimado: {{COT_FECHA_INICIO_ESTIMADA}}
+Vigencia: {{COT_VIGENCIA_DIAS}} días · Campo desconocido: {{CAMPO_SIN_VALOR}}
+
+---
+{{EMPRESA_PROPUESTA_VALOR}}
+
+{{EMPRESA_TERMINOS_CONDICIONES}}
+Asesor: {{EMPRESA_ASESOR_NOMBRE}}
+"""
+
+
+class RendererLegacy(CotizacionRenderer):
+    """Implementación anterior de render_cotizacion (referencia del benchmark)."""
+
+    def render_cotizacion(
+        self,
+        cotizacion_data: Dict[str, Any],
+        lead_data: Dict[str, Any],
+        empresa_data: Dict[str, Any]
+    ) -> str:
+        """
+        Renderiza una cotización completa en formato Markdown.
+
+        Args:
+            cotizacion_data: Datos de la cotización
+            lead_data: Datos del lead
+            empresa_data: Datos de la empresa
+
+        Returns:
+            String con el Markdown renderizado
+        """
+
+        # Si existe plantilla, cargarla y reemplazar campos
+        if os.path.exists(self.template_path):
+            with open(self.template_path, 'r', encoding='utf-8') as f:
+                template = f.read()
+
+            # Reemplazar campos de empresa
+            template = self._replace_empresa_fields(template, empresa_data)
+
+            # Reemplazar campos de lead
+            template = self._replace_lead_fields(template, lead_data)
+
+            # Reemplazar campos de cotización
+            template = self._replace_cotizacion_fields(template, cotizacion_data)
+
+            # Limpiar comentarios HTML
+            template = self._clean_html_comments(template)
+
+            return template
+
+        # Si no hay plantilla, generar cotización simple
+        return self._generate_simple_cotizacion(cotizacion_data, lead_data, empresa_data)
+
+    def _replace_empresa_fields(self, template: str, empresa_data: Dict[str, Any]) -> str:
+        """Reemplaza campos de empresa en la plantilla"""
+        replacements = {
+            "{{EMPRESA_NOMBRE}}": empresa_data.get("nombre", "ORBITA"),
+            "{{EMPRESA_SLOGAN}}": empresa_data.get("slogan", "Soluciones Inteligentes"),
+            "{{EMPRESA_CIUDAD}}": empresa_data.get("ciudad", "Ciudad"),
+            "{{EMPRESA_PAIS}}": empresa_data.get("pais", "País"),
+            "{{EMPRESA_EMAIL}}": empresa_data.get("email", "contacto@orbita.ai"),
+            "{{EMPRESA_TELEFONO}}": empresa_data.get("telefono", "+1 234 567 890"),
+            "{{EMPRESA_SITIO_WEB}}": empresa_data.get("sitio_web", "www.orbita.ai"),
+            "{{EMPRESA_ASESOR_NOMBRE}}": empresa_data.get("asesor_nombre", "Equipo ORBITA"),
+            "{{EMPRESA_PROPUESTA_VALOR}}": empresa_data.get("propuesta_valor",
+                "Soluciones de IA innovadoras y confiables"),
+            "{{EMPRESA_TERMINOS_CONDICIONES}}": empresa_data.get("terminos_condiciones",
+                "Esta propuesta es válida por 30 días desde su emisión.")
+        }
+
+        for placeholder, value in replacements.items():
+            template = template.replace(placeholder, str(value))
+
+        return template
+
+    def _replace_lead_fields(self, template: str, lead_data: Dict[str, Any]) -> str:
+        """Reemplaza campos de lead en la plantilla"""
+        replacements = {
+            "{{LEAD_NOMBRE}}": lead_data.get("nombre", "Cliente"),
+            "{{LEAD_EMPRESA}}": lead_data.get("empresa", "Empresa"),
+            "{{LEAD_CARGO}}": lead_data.get("cargo", ""),
+            "{{LEAD_EMAIL}}": lead_data.get("email", ""),
+            "{{LEAD_TELEFONO}}": lead_data.get("telefono", ""),
+            "{{LEAD_SERVICIO_INTERES}}": lead_data.get("interes", "servicios digitales"),
+            "{{LEAD_PRESUPUESTO_ESTIMADO}}": f"${lead_data.get('presupuesto', 'No especificado')}"
+        }
+
+        for placeholder, value in replacements.items():
+            template = template.replace(placeholder, str(value))
+
+        return template
+
+    def _replace_cotizacion_fields(self, template: str, cotizacion_data: Dict[str, Any]) -> str:
+        """Reemplaza campos de cotización en la plantilla"""
+
+        # Generar código de cotización si no existe
+        codigo = cotizacion_data.get("numero_cotizacion") or \
+                f"COT-{datetime.now().strftime('%Y%m%d')}-{cotizacion_data.get('id', '000')}"
+
+        # Fechas
+        fecha_emision = cotizacion_data.get("created_at", datetime.now().isoformat())
+        if isinstance(fecha_emision, str):
+            try:
+                fecha_emision = datetime.fromisoformat(fecha_emision.replace('Z', '+00:00'))
+            except:
+                fecha_emision = datetime.now()
+
+        validez_dias = cotizacion_data.get("validez_dias", 30)
+        fecha_vencimiento = fecha_emision + timedelta(days=validez_dias)
+
+        replacements = {
+            "{{COT_CODIGO}}": codigo,
+            "{{COT_FECHA_EMISION}}": fecha_emision.strftime("%d/%m/%Y"),
+            "{{COT_FECHA_VENCIMIENTO}}": fecha_vencimiento.strftime("%d/%m/%Y"),
+            "{{COT_CANAL_ORIGEN}}": cotizacion_data.get("origen", "Telegram"),
+            "{{COT_INTRODUCCION_PERSONALIZADA}}": cotizacion_data.get("descripcion",
+                "Gracias por su interés en nuestros servicios."),
+            "{{COT_PLAN_NOMBRE}}": cotizacion_data.get("plan_nombre", "Plan Profesional"),
+            "{{COT_DESCRIPCION_PLAN}}": cotizacion_data.get("descripcion_alcance",
+                "Plan personalizado para sus necesidades."),
+            "{{COT_DESCRIPCION_ALCANCE}}": cotizacion_data.get("descripcion_alcance", ""),
+            "{{COT_SUBTOTAL}}": f"{cotizacion_data.get('subtotal', 0):.2f}",
+            "{{COT_DESCUENTO_PORCENTAJE}}": str(cotizacion_data.get("descuento_general", 0)),
+            "{{COT_DESCUENTO_VALOR}}": f"{cotizacion_data.get('subtotal', 0) * cotizacion_data.get('descuento_general', 0) / 100:.2f}",
+            "{{COT_VALOR_TOTAL}}": f"{cotizacion_data.get('total', 0):.2f}",
+            "{{COT_MONEDA}}": cotizacion_data.get("moneda", "USD"),
+            "{{COT_FORMA_PAGO}}": cotizacion_data.get("forma_pago", "50% al inicio, 50% a la entrega"),
+            "{{COT_TIEMPO_TOTAL}}": cotizacion_data.get("tiempo_total", "6-8 semanas"),
+            "{{COT_FECHA_INICIO_ESTIMADA}}": (fecha_emision + timedelta(days=7)).strftime("%d/%m/%Y"),
+            "{{COT_VIGENCIA_DIAS}}": str(validez_dias)
+        }
+
+        for placeholder, value in replacements.items():
+            template = template.replace(placeholder, str(value))
+
+        # Reemplazar items (requiere lógica especial para loops)
+        template = self._replace_items(template, cotizacion_data.get("items", []))
+
+        # Reemplazar fases
+        template = self._replace_fases(template, cotizacion_data.get("fases", []))
+
+        return template
+
+    def _replace_items(self, template: str, items: List[Dict[str, Any]]) -> str:
+        """Reemplaza los items de la cotización"""
+        if not items:
+            return template
+
+        # Construir tabla de items
+        items_table = "| # | Entregable | Descripción | Valor |\n|---|---|---|---|\n"
+
+        for idx, item in enumerate(items, 1):
+            nombre = item.get("descripcion", item.get("nombre", "Item"))
+            descripcion = item.get("descripcion_detallada",
+                                  item.get("descripcion", ""))[:50]
+            valor = item.get("precio_unitario", 0) * item.get("cantidad", 1)
+            items_table += f"| {idx} | {nombre} | {descripcion} | ${valor:.2f} |\n"
+
+        # Reemplazar bloque de items
+        # Buscar patrón entre comentarios <!-- INICIO BLOQUE REPETIBLE --> y <!-- FIN BLOQUE REPETIBLE -->
+        import re
+        pattern = r'<!-- INICIO BLOQUE REPETIBLE.*?<!-- FIN BLOQUE REPETIBLE -->'
+        template = re.sub(pattern, items_table, template, flags=re.DOTALL)
+
+        # También reemplazar items individuales si existen
+        for i in range(1, 6):
+            if i <= len(items):
+                item = items[i-1]
+                template = template.replace(f"{{{{ITEM_{i}_NOMBRE}}}}",
+                                          item.get("descripcion", f"Item {i}"))
+                template = template.replace(f"{{{{ITEM_{i}_DESCRIPCION}}}}",
+                                          item.get("descripcion", ""))
+                template = template.replace(f"{{{{ITEM_{i}_VALOR}}}}",
+                                          f"{item.get('precio_unitario', 0):.2f}")
+
+        return template
+
+    def _replace_fases(self, template: str, fases: List[Dict[str, Any]]) -> str:
+        """Reemplaza las fases del proyecto"""
+        if not fases:
+            return template
+
+        for idx, fase in enumerate(fases, 1):
+            template = template.replace(f"{{{{FASE_{idx}_NOMBRE}}}}",
+                                      fase.get("nombre", f"Fase {idx}"))
+            template = template.replace(f"{{{{FASE_{idx}_DESCRIPCION}}}}",
+                                      fase.get("descripcion", ""))
+            template = template.replace(f"{{{{FASE_{idx}_DURACION}}}}",
+                                      fase.get("duracion", ""))
+
+        return template
+
+    def _clean_html_comments(self, template: str) -> str:
+        """Elimina comentarios HTML de la plantilla"""
+        import re
+        return re.sub(r'<!--.*?-->', '', template, flags=re.DOTALL)
+
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}\n")
+
+
+def generar_cotizacion(i: int) -> Dict[str, Any]:
+    """Cotizaciones variadas: con y sin items/fases, campos opcionales ausentes."""
+    n_items = random.choice([0, 1, 3, 5, 7])
+    items = [{
+        "descripcion": f"Entregable {j} del proyecto {i}",
+        "descripcion_detallada": f"Detalle ampliado del entregable {j} con alcance y criterios de aceptación",
+        "precio_unitario": random.randint(100, 5000),
+        "cantidad": random.randint(1, 3)
+    } for j in range(1, n_items + 1)]
+    subtotal = sum(it["precio_unitario"] * it["cantidad"] for it in items)
+    cotizacion = {
+        "id": i,
+        "numero_cotizacion": f"COT-20261018-{i:05d}",
+        "created_at": (datetime(2026, 10, 1) + timedelta(hours=i)).isoformat() + "Z",
+        "descripcion": f"Propuesta para el lead {i}",
+        "subtotal": subtotal,
+        "descuento_general": random.choice([0, 5, 10]),
+        "total": subtotal * 0.9,
+        "items": items,
+        "fases": [
+            {"nombre": f"Fase {k}", "descripcion": f"Trabajo de la fase {k}", "duracion": f"{k} semanas"}
+            for k in range(1, random.choice([0, 2, 3]) + 1)
+        ]
+    }
+    if i % 2:
+        cotizacion.update({"plan_nombre": "Plan Premium", "descripcion_alcance": "Alcance completo", "validez_dias": 15})
+    return cotizacion
+
+
+def medir(renderer, casos: List[tuple]) -> tuple:
+    inicio = time.perf_counter()
+    salidas = [renderer.render_cotizacion(c, l, e) for c, l, e in casos]
+    return salidas, len(casos) / (time.perf_counter() - inicio)
+
+
+def main() -> bool:
+    random.seed(5)
+    ok = True
+    empresa = {"nombre": "ORBITA", "ciudad": "Bogotá", "pais": "Colombia"}
+    casos = [
+        (generar_cotizacion(i), {"nombre": f"Lead {i}", "empresa": f"Empresa {i}", "presupuesto": 1000 + i}, empresa)
+        for i in range(COTIZACIONES)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "plantilla.md")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(PLANTILLA)
+
+        legacy = RendererLegacy(ruta)
+        compilado = CotizacionRenderer(ruta)
+
+        print_header(f"RENDER DE COTIZACIONES ({COTIZACIONES} cotizaciones)")
+        salidas_legacy, tasa_legacy = medir(legacy, casos)
+        salidas, tasa = medir(compilado, casos)
+        print(f"🐢 Antes:   {tasa_legacy:>10,.0f} cotizaciones/s")
+        print(f"🚀 Después: {tasa:>10,.0f} cotizaciones/s (objetivo {OBJETIVO_POR_SEGUNDO:,})")
+        print(f"📈 Aceleración: x{tasa / tasa_legacy:.1f}")
+
+        distintas = [i for i, (a, b) in enumerate(zip(salidas_legacy, salidas)) if a != b]
+        if not distintas:
+            print(f"✅ Salida idéntica al renderer anterior en las {COTIZACIONES} cotizaciones")
+        else:
+            print(f"❌ {len(distintas)} salidas distintas (primera: cotización {distintas[0]})")
+            ok = False
+
+        if tasa >= OBJETIVO_POR_SEGUNDO:
+            print(f"✅ Supera {OBJETIVO_POR_SEGUNDO:,} cotizaciones/s")
+        else:
+            print(f"❌ Por debajo del objetivo de {OBJETIVO_POR_SEGUNDO:,} cotizaciones/s")
+            ok = False
+
+        # La plantilla se recompila al cambiar el archivo
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(PLANTILLA.replace("## Inversión", "## Inversión total"))
+        os.utime(ruta, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        salida = compilado.render_cotizacion(*casos[0])
+        if "## Inversión total" in salida and salida == legacy.render_cotizacion(*casos[0]):
+            print("✅ Plantilla recompilada al cambiar su mtime")
+        else:
+            print("❌ Se siguió usando la plantilla anterior")
+            ok = False
+
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
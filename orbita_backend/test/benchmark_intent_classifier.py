@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Clasificador local de intención (fast-path)
+Entrena con el corpus semilla y reporta, sobre mensajes retenidos:
+- skip rate: fracción de mensajes que no necesitan la llamada de intención al LLM
+- accuracy global y accuracy dentro del fast-path
+- latencia por clasificación
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_intent_classifier.py
+"""
+
+import statistics
+import sys
+import time
+
+from train_intent_classifier import corpus_semilla, dividir, entrenar, evaluar
+from utils.intent_classifier import IntentClassifier
+
+UMBRAL = 0.85
+
+# Mensajes redactados a mano, fuera de las plantillas del corpus semilla
+RETENIDOS_MANUALES = [
+    ("hola buenas noches", "conversacional"),
+    ("muchas gracias por responder tan rápido", "conversacional"),
+    ("ok dale, lo reviso y te aviso", "conversacional"),
+    ("cuánto me sale una página para mi restaurante", "captador"),
+    ("necesito una app para pedidos a domicilio, qué presupuesto manejan", "captador"),
+    ("me pasas precios de tienda online?", "captador"),
+    ("quiero contratar el servicio de redes sociales", "captador"),
+    ("quiénes son y hace cuánto trabajan en esto", "identidad"),
+    ("tienen oficina en Bogotá?", "identidad"),
+    ("cuál es la misión de ustedes", "identidad"),
+    ("mándame el reporte de conversiones de octubre", "analitico"),
+    ("cómo van las métricas de la campaña de instagram", "analitico"),
+    ("quiero un análisis del embudo", "analitico"),
+]
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+def main() -> bool:
+    entrenamiento, retenidos = dividir(corpus_semilla(), ratio_eval=0.2)
+    model = entrenar(entrenamiento)
+
+    ok = True
+    for nombre, ejemplos in (("Corpus semilla retenido", retenidos), ("Mensajes manuales", RETENIDOS_MANUALES)):
+        m = evaluar(model, ejemplos, UMBRAL)
+        print(f"\n📊 {nombre} ({m['ejemplos']} ejemplos)")
+        print(f"   skip rate:           {m['skip_rate']:.0%}")
+        print(f"   accuracy global:     {m['accuracy']:.0%}")
+        print(f"   accuracy fast-path:  {m['accuracy_fast_path']:.0%}")
+        if m["accuracy_fast_path"] < 0.9:
+            print_error("El fast-path enruta mal más del 10% de los mensajes que omite")
+            ok = False
+
+    # Latencia por clasificación
+    clasificador = IntentClassifier(model=model, threshold=UMBRAL)
+    textos = [t for t, _ in RETENIDOS_MANUALES] * 200
+    latencias = []
+    for texto in textos:
+        t0 = time.perf_counter()
+        clasificador.classify(texto)
+        latencias.append((time.perf_counter() - t0) * 1000)
+    print(f"\n⏱️ Clasificación: p50={statistics.median(latencias):.3f} ms")
+
+    if ok:
+        print_success("Fast-path con precisión suficiente para omitir la llamada de intención")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Throughput del cliente LLM con sesiones concurrentes
+Compara el cliente síncrono anterior (groq.Groq dentro de corrutinas) contra el
+cliente asíncrono con pool compartido (AsyncGroq + httpx.AsyncClient), usando un
+servidor LLM simulado local con latencia fija.
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_llm_concurrency.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from stub_llm_server import StubLLMServer
+
+LATENCIA_MS = 200
+MENSAJES_POR_SESION = 3
+CONCURRENCIAS = [1, 10, 50]
+
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}\n")
+
+
+async def run_sessions(generate, concurrencia: int) -> float:
+    """Lanza N sesiones concurrentes; cada una envía MENSAJES_POR_SESION mensajes en serie."""
+    async def sesion(i: int):
+        for j in range(MENSAJES_POR_SESION):
+            await generate(f"Sesión {i} mensaje {j}: ¿cuánto cuesta una página web?")
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(sesion(i) for i in range(concurrencia)))
+    return time.perf_counter() - inicio
+
+
+async def main() -> bool:
+    server = StubLLMServer(latency_ms=LATENCIA_MS)
+    server.start()
+
+    # Apuntar los SDK al servidor simulado ANTES de importar config
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.pop("OPENAI_API_KEY", None)
+
+    import groq
+    from utils.groq_client import GroqClient, close_groq_client
+
+    # Cliente síncrono, tal como se usaba antes dentro de métodos async
+    sync_client = groq.Groq(api_key="stub-key", base_url=server.base_url)
+
+    async def generate_sync(prompt: str):
+        sync_client.chat.completions.create(
+            model="llama-3.1-8b-instant",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=300
+        )
+
+    async_client = GroqClient()
+
+    async def generate_async(prompt: str):
+        await async_client.generate_completion(prompt=prompt, agent_type="conversacional", max_tokens=300)
+
+    print_header(f"THROUGHPUT LLM (latencia simulada {LATENCIA_MS} ms)")
+    print(f"{'Sesiones':>9} | {'Sync (antes)':>16} | {'Async (ahora)':>16} | {'Mejora':>7}")
+    print(f"{'-'*9}-+-{'-'*16}-+-{'-'*16}-+-{'-'*7}")
+
+    ok = True
+    for concurrencia in CONCURRENCIAS:
+        total = concurrencia * MENSAJES_POR_SESION
+
+        t_sync = await run_sessions(generate_sync, concurrencia)
+        t_async = await run_sessions(generate_async, concurrencia)
+
+        rps_sync = total / t_sync
+        rps_async = total / t_async
+        print(
+            f"{concurrencia:>9} | {rps_sync:>10.1f} req/s | {rps_async:>10.1f} req/s | "
+            f"{rps_async / rps_sync:>6.1f}x"
+        )
+        if concurrencia > 1 and rps_async <= rps_sync:
+            ok = False
+
+    sync_client.close()
+    await close_groq_client()
+    server.stop()
+
+    print(f"\nPeticiones atendidas por el stub: {server.requests_served}")
+    if ok:
+        print("✅ El cliente asíncrono solapa la latencia de sesiones concurrentes")
+    else:
+        print("❌ El cliente asíncrono no mejoró el throughput concurrente")
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(main())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Latencia por mensaje del orquestador
+Compara el modo two_step (análisis de intención + respuesta, dos llamadas en
+serie) con el modo single_call (un sobre JSON con enrutamiento y respuesta),
+usando el servidor LLM simulado con latencia fija.
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_orchestrator_latency.py
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from stub_llm_server import StubLLMServer
+
+LATENCIA_MS = 150
+MENSAJES = [
+    "Hola, ¿qué servicios ofrecen?",
+    "Quiero una cotización para una tienda online",
+    "¿Quiénes son ustedes y cuáles son sus valores?",
+    "Necesito un reporte de métricas de mi campaña",
+    "¿Cuánto cuesta una app móvil?",
+]
+REPETICIONES = 8
+
+
+def responder(payload: dict) -> str:
+    """Sobre JSON si se pidió response_format, JSON de intención para el análisis, texto en otro caso."""
+    user = payload["messages"][-1]["content"]
+    if payload.get("response_format", {}).get("type") == "json_object":
+        return json.dumps({
+            "selected_agent": "captador",
+            "confidence": 0.85,
+            "reasoning": "Interés en servicios",
+            "extracted_data": {},
+            "message_type": "consulta_servicio",
+            "response": "¡Con gusto! Cuéntame un poco más de tu proyecto."
+        }, ensure_ascii=False)
+    if "AGENTES DISPONIBLES" in user:
+        return json.dumps({
+            "selected_agent": "captador",
+            "confidence": 0.85,
+            "reasoning": "Interés en servicios",
+            "extracted_data": {},
+            "message_type": "consulta_servicio"
+        })
+    return "¡Con gusto! Cuéntame un poco más de tu proyecto."
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+async def medir(agent, modo: str, server: StubLLMServer):
+    agent.mode = modo
+    server.reset_counters()
+    latencias = []
+    for i in range(REPETICIONES):
+        for j, mensaje in enumerate(MENSAJES):
+            t0 = time.perf_counter()
+            result = await agent.process_message(mensaje, session_id=f"{modo}-{i}-{j}")
+            latencias.append((time.perf_counter() - t0) * 1000)
+            assert result["success"] and result["route_to_agent"] == "captador", result
+    return latencias, server.requests_served / len(latencias)
+
+
+async def main() -> bool:
+    server = StubLLMServer(latency_ms=LATENCIA_MS, responder=responder)
+    server.start()
+
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["USE_OPENAI_FOR_ORCHESTRATOR"] = "false"
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["INTENT_CLASSIFIER_ENABLED"] = "false"
+    os.environ.pop("OPENAI_API_KEY", None)
+
+    # Sin Supabase: el registro de acciones no forma parte de la medición
+    import agents.base_agent
+    import agents.orchestrator
+
+    async def log_noop(*args, **kwargs):
+        return {}
+
+    agents.base_agent.log_agent_action = log_noop
+    agents.orchestrator.log_agent_action = log_noop
+
+    from agents.orchestrator import OrchestratorAgent
+    from utils.groq_client import close_groq_client
+
+    agent = OrchestratorAgent()
+
+    print(f"\n{'='*60}")
+    print(f"  LATENCIA DEL ORQUESTADOR (LLM simulado {LATENCIA_MS} ms)")
+    print(f"{'='*60}\n")
+    print(f"{'Modo':>12} | {'p50':>9} | {'p95':>9} | {'Llamadas/msg':>12}")
+    print(f"{'-'*12}-+-{'-'*9}-+-{'-'*9}-+-{'-'*12}")
+
+    resultados = {}
+    for modo in ("two_step", "single_call"):
+        latencias, llamadas = await medir(agent, modo, server)
+        p50, p95 = statistics.median(latencias), percentil(latencias, 0.95)
+        resultados[modo] = p50
+        print(f"{modo:>12} | {p50:>6.1f} ms | {p95:>6.1f} ms | {llamadas:>12.1f}")
+
+    await close_groq_client()
+    server.stop()
+
+    mejora = resultados["two_step"] / resultados["single_call"]
+    if mejora > 1.5:
+        print(f"\n✅ single_call reduce la latencia p50 {mejora:.1f}x")
+        return True
+    print(f"\n❌ single_call no redujo la latencia ({mejora:.1f}x)")
+    return False
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(main())
+    sys.exit(0 if resultado else 1)
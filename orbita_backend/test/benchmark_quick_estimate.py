@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Detección de servicio en QuickEstimateGenerator
+Compara mensajes/segundo de detectar_servicio:
+- Antes: normalizar cada keyword de cada servicio en cada mensaje (unicodedata
+  carácter por carácter) y buscar subcadenas
+- Después: keywords normalizadas al construir y compiladas en una sola regex
+  con límites de palabra (una pasada sobre el mensaje)
+
+También lista los mensajes en los que cambia la detección (p. ej. "ia" dentro
+de "asesoría", que antes se tomaba como automatización con IA).
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_quick_estimate.py
+"""
+
+import random
+import sys
+import time
+import unicodedata
+
+from utils.quick_estimate import QuickEstimateGenerator
+
+REPETICIONES = 200
+
+CORPUS = [
+    "Hola, buenas tardes",
+    "quiero una página web para mi negocio de repostería",
+    "Necesito una app móvil para pedidos a domicilio, ¿cuánto cuesta?",
+    "¿Hacen tiendas online? Quiero vender online mis productos artesanales",
+    "me interesa un chatbot con inteligencia artificial para atender clientes",
+    "Buenas, quisiera asesoría para digitalizar mi empresa",
+    "Cuánto cobran por gestionar redes sociales, Instagram y Facebook",
+    "Necesito mejorar el posicionamiento en Google de mi sitio web",
+    "¿Ofrecen mantenimiento y soporte técnico para el servidor?",
+    "Quiero automatizar la facturación y los correos de seguimiento",
+    "Tengo una landing page pero no convierte, ¿me ayudan con publicidad digital?",
+    "Me gustaría una aplicación para iOS y Android con pagos",
+    "¿Qué diferencia hay entre un sitio web y una tienda virtual?",
+    "Gracias, lo reviso con mi socia y les aviso",
+    "Necesito consultoría tecnológica, no sé por dónde empezar",
+    "¿Me pueden enviar la cotización por correo? Mi presupuesto es limitado",
+    "Queremos un portal web para nuestra franquicia con área de clientes",
+    "Hagan una evaluación de nuestra infraestructura y hosting actual",
+    "Estoy buscando alguien que haga campañas en Instagram para mi óptica",
+    "Quiero un bot de WhatsApp que responda preguntas frecuentes",
+    "¿Trabajan con comercio electrónico para empresas B2B?",
+    "Necesito que mi negocio aparezca en el buscador, ranking orgánico",
+    "Cuál es el precio de una app sencilla para reservas",
+    "Perfecto, agendemos una reunión el jueves",
+    "Busco estrategia de social media y marketing de contenidos",
+    "La materia prima de mi fábrica necesita un sistema de inventario",
+    "¿Tienen experiencia en ecommerce con Shopify o WooCommerce?",
+    "Mi página está caída, necesito soporte urgente",
+    "Queremos implementar IA en atención al cliente y análisis de datos",
+    "Solo quería saber los horarios de atención",
+]
+
+
+class DetectorLegacy(QuickEstimateGenerator):
+    """Implementación anterior de detectar_servicio (referencia del benchmark)."""
+
+    def _normalizar_texto(self, texto: str) -> str:
+        texto = texto.lower()
+        texto_nfd = unicodedata.normalize('NFD', texto)
+        return ''.join(char for char in texto_nfd if unicodedata.category(char) != 'Mn')
+
+    def detectar_servicio(self, mensaje: str):
+        mensaje_normalizado = self._normalizar_texto(mensaje)
+        mejores_matches = []
+        for servicio, keywords in self.KEYWORDS.items():
+            keywords_normalizados = [self._normalizar_texto(kw) for kw in keywords]
+            num_matches = sum(1 for kw in keywords_normalizados if kw in mensaje_normalizado)
+            if num_matches > 0:
+                confianza_base = min(0.5 + (num_matches - 1) * 0.25, 1.0)
+                mejores_matches.append((servicio, confianza_base, num_matches))
+        if mejores_matches:
+            mejores_matches.sort(key=lambda x: x[1], reverse=True)
+            servicio_detectado, confianza, _ = mejores_matches[0]
+            if confianza >= 0.5:
+                return servicio_detectado, confianza
+        return None, 0.0
+
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}\n")
+
+
+def medir(detector, mensajes: list) -> float:
+    inicio = time.perf_counter()
+    for mensaje in mensajes:
+        detector.detectar_servicio(mensaje)
+    return len(mensajes) / (time.perf_counter() - inicio)
+
+
+def main() -> bool:
+    random.seed(3)
+    mensajes = CORPUS * REPETICIONES
+    random.shuffle(mensajes)
+
+    nuevo = QuickEstimateGenerator()
+    legacy = DetectorLegacy()
+    legacy.KEYWORDS = {s: list(kws) for s, kws in nuevo.catalogo.keywords.items()}
+
+    print_header(f"DETECCIÓN DE SERVICIO ({len(mensajes)} mensajes)")
+    medir(legacy, CORPUS)
+    medir(nuevo, CORPUS)  # calentamiento
+    tasa_legacy = medir(legacy, mensajes)
+    tasa_nueva = medir(nuevo, mensajes)
+    print(f"🐢 Antes:   {tasa_legacy:>10,.0f} mensajes/s ({1e6 / tasa_legacy:.1f} µs/mensaje)")
+    print(f"🚀 Después: {tasa_nueva:>10,.0f} mensajes/s ({1e6 / tasa_nueva:.1f} µs/mensaje)")
+    print(f"📈 Aceleración: x{tasa_nueva / tasa_legacy:.1f}")
+
+    print("\n🔍 Detecciones que cambian (límites de palabra):")
+    cambios = 0
+    for mensaje in CORPUS:
+        antes, despues = legacy.detectar_servicio(mensaje), nuevo.detectar_servicio(mensaje)
+        if antes != despues:
+            cambios += 1
+            print(f"   '{mensaje}'\n      {antes} → {despues}")
+    if not cambios:
+        print("   (ninguna)")
+
+    ok = tasa_nueva > tasa_legacy
+    print(f"\n{'✅' if ok else '❌'} El matcher compilado {'es' if ok else 'NO es'} más rápido")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Generación de cotizaciones con esqueletos por servicio
+Compara tokens y tiempo por cotización en ComunicacionAgent.generate_cotizacion:
+- Antes: el LLM genera la propuesta completa (ítems, fases, precios y textos en JSON)
+- Después: ítems, fases y precios salen del esqueleto cacheado del servicio y el
+  LLM solo redacta el párrafo personalizado
+Usa el servidor LLM simulado con latencia fija más un costo por token generado.
+También valida que los esqueletos se descartan al cambiar la versión del catálogo.
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_quote_generation.py
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from stub_llm_server import StubLLMServer
+
+LATENCIA_MS = 120
+MS_POR_TOKEN = 4
+COTIZACIONES = 16
+SERVICIOS = ["sitio_web", "app_movil", "ecommerce", "automatizacion_ia"]
+PLANES = ["basico", "profesional", "enterprise"]
+
+PROPUESTA_JSON = {
+    "titulo": "Transformación digital a la medida",
+    "descripcion_personalizada": (
+        "Entendemos que tu negocio necesita una presencia digital sólida que convierta visitas en clientes. "
+        "Proponemos una solución escalable, medible y alineada con tus objetivos comerciales. "
+        "Nuestro equipo acompañará cada fase para asegurar resultados desde el primer mes."
+    ),
+    "plan_nombre": "Plan Profesional",
+    "descripcion_alcance": "Diseño, desarrollo, integración, pruebas y puesta en marcha del servicio solicitado.",
+    "items": [
+        {"nombre": f"Entregable {i}", "descripcion": "Descripción detallada del entregable y sus criterios de aceptación",
+         "cantidad": 1, "precio_unitario": 1500.0}
+        for i in range(1, 5)
+    ],
+    "fases": [
+        {"nombre": f"Fase {i}", "descripcion": "Actividades, responsables y entregables de la fase", "duracion": "2 semanas"}
+        for i in range(1, 5)
+    ],
+    "tiempo_total": "8 semanas",
+    "forma_pago": "50% al inicio, 50% a la entrega",
+    "notas": "Incluye soporte por 30 días y capacitación al equipo",
+    "descuento_sugerido": 0
+}
+PARRAFO = (
+    "Laura, sabemos que tu clínica quiere atender más pacientes sin sumar carga administrativa. "
+    "Esta propuesta se enfoca en lo que más impacto tendrá en tu operación desde el primer mes."
+)
+
+
+def responder(payload: dict) -> str:
+    user = payload["messages"][-1]["content"]
+    if "Responde ÚNICAMENTE en formato JSON" in user:
+        return json.dumps(PROPUESTA_JSON, ensure_ascii=False, indent=2)
+    return PARRAFO
+
+
+def lead(i: int, con_servicio: bool) -> dict:
+    return {
+        "id": i,
+        "nombre": "Laura Gómez",
+        "empresa": "Clínica Sonrisas",
+        "cargo": "Gerente",
+        "presupuesto": "5000",
+        "timeline": "2 meses",
+        "interes": SERVICIOS[i % len(SERVICIOS)] if con_servicio else "inicial"
+    }
+
+
+async def medir(agent, server: StubLLMServer, con_esqueleto: bool):
+    server.reset_counters()
+    tiempos, resultados = [], []
+    for i in range(COTIZACIONES):
+        plan = PLANES[i % len(PLANES)]
+        t0 = time.perf_counter()
+        r = await agent.generate_cotizacion(
+            lead_data=lead(i, con_esqueleto),
+            servicio_solicitado=f"Plan {plan.capitalize()}",
+            detalles_adicionales=f"Plan seleccionado: {plan}"
+        )
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        assert r["success"] and r["desde_esqueleto"] == con_esqueleto, r
+        resultados.append(r)
+    tokens = (server.prompt_tokens_total + server.completion_tokens_total) / COTIZACIONES
+    return statistics.median(tiempos), tokens, server.completion_tokens_total / COTIZACIONES, resultados
+
+
+async def main() -> bool:
+    server = StubLLMServer(latency_ms=LATENCIA_MS, latency_per_token_ms=MS_POR_TOKEN, responder=responder)
+    server.start()
+
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ.pop("OPENAI_API_KEY", None)
+
+    # Sin Supabase: el registro de acciones no forma parte de la medición
+    import agents.base_agent
+
+    async def log_noop(*args, **kwargs):
+        return {}
+
+    agents.base_agent.log_agent_action = log_noop
+
+    from agents.comunicacion import ComunicacionAgent
+    from utils.groq_client import close_groq_client
+    from utils.quick_estimate import ServiceCatalog, get_quick_estimator
+    from utils.quote_skeletons import get_quote_skeletons
+
+    agent = ComunicacionAgent()
+    esqueletos = get_quote_skeletons()
+    catalogo = get_quick_estimator().catalogo
+    esqueletos.precalentar(catalogo)
+    ok = True
+
+    print(f"\n{'='*60}")
+    print(f"  COTIZACIONES CON IA (LLM simulado {LATENCIA_MS} ms + {MS_POR_TOKEN} ms/token)")
+    print(f"{'='*60}\n")
+    print(f"{'Modo':>20} | {'p50':>9} | {'Tokens/cot':>10} | {'Generados':>9}")
+    print(f"{'-'*20}-+-{'-'*9}-+-{'-'*10}-+-{'-'*9}")
+
+    p50_antes, tokens_antes, gen_antes, _ = await medir(agent, server, con_esqueleto=False)
+    print(f"{'Propuesta completa':>20} | {p50_antes:>6.0f} ms | {tokens_antes:>10.0f} | {gen_antes:>9.0f}")
+    p50_despues, tokens_despues, gen_despues, resultados = await medir(agent, server, con_esqueleto=True)
+    print(f"{'Esqueleto + párrafo':>20} | {p50_despues:>6.0f} ms | {tokens_despues:>10.0f} | {gen_despues:>9.0f}")
+
+    print(f"\n📉 Tokens por cotización: -{(1 - tokens_despues / tokens_antes) * 100:.0f}%")
+    print(f"⚡ Latencia p50: x{p50_antes / p50_despues:.1f} más rápida")
+    if tokens_despues < tokens_antes and p50_despues < p50_antes:
+        print("✅ El esqueleto reduce tokens y latencia")
+    else:
+        print("❌ El esqueleto no mejoró tokens ni latencia")
+        ok = False
+
+    # Precio del catálogo y párrafo del LLM en la propuesta
+    cotizacion = resultados[1]["cotizacion"]  # app_movil, plan profesional
+    esperado = catalogo.precio("app_movil", "standard", False, False)
+    if cotizacion["subtotal"] == esperado and cotizacion["descripcion"] == PARRAFO:
+        print(f"✅ Subtotal del catálogo (${esperado:,}) y párrafo personalizado del LLM")
+    else:
+        print(f"❌ Subtotal {cotizacion['subtotal']} (esperado {esperado}) / {cotizacion['descripcion'][:40]}")
+        ok = False
+
+    # Nueva versión del catálogo: se descartan y se reconstruyen con los precios nuevos
+    data = {
+        "version": "benchmark-2",
+        "moneda": catalogo.moneda,
+        "multiplicadores_complejidad": dict(catalogo.multiplicadores),
+        "servicios": {s: {**info, "precio_base": info["precio_base"] * 2} for s, info in catalogo.servicios.items()}
+    }
+    nuevo = ServiceCatalog(data, origen=catalogo.origen)
+    esqueleto = esqueletos.obtener(nuevo, "app_movil", "standard")
+    subtotal = sum(i["precio_unitario"] * i["cantidad"] for i in esqueleto["items"])
+    if esqueletos.stats["invalidaciones"] == 1 and subtotal == esperado * 2 and esqueleto["catalogo_version"] == "benchmark-2":
+        print("✅ Al cambiar la versión del catálogo los esqueletos se reconstruyen")
+    else:
+        print(f"❌ Esqueleto desactualizado: {esqueleto['catalogo_version']} / {subtotal}")
+        ok = False
+
+    print(f"📊 {esqueletos.get_stats()}")
+    await close_groq_client()
+    server.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(main())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Caché semántica de preguntas frecuentes
+Llena el índice con 100k entradas sintéticas y mide:
+- Latencia de lookup (p50 / p99) para hits y misses
+- Que las paráfrasis de preguntas frecuentes encuentren la respuesta guardada
+- Que la expulsión LRU mantenga el tamaño acotado
+- Que las entradas de un espacio (canal / empresa) no se sirvan en otro
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_semantic_cache.py
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from utils.semantic_cache import SemanticAnswerCache, es_consulta_generica
+
+N_ENTRADAS = 100_000
+
+PREGUNTAS_FRECUENTES = [
+    ("¿Cuánto cuesta una página web?", ["cual es el precio de una pagina web", "Qué valor tiene un sitio web?", "costo de pagina web"]),
+    ("¿Cuánto tiempo tarda el desarrollo de una app?", ["cuánto demora el desarrollo de una aplicación", "tiempo de desarrollo de app"]),
+    ("¿Dónde están ubicados?", ["cual es su direccion", "donde estan ubicados ustedes?"]),
+    ("¿Hacen tiendas online con pasarela de pago?", ["hacen tienda online con pasarela de pagos?"]),
+]
+
+VOCABULARIO = [
+    "automatizacion", "chatbot", "crm", "ecommerce", "seo", "redes", "instagram", "facebook",
+    "campana", "hosting", "servidor", "dominio", "correo", "diseño", "logo", "marca", "video",
+    "contenido", "blog", "inventario", "facturacion", "nomina", "reservas", "agenda", "citas",
+    "restaurante", "clinica", "hotel", "gimnasio", "colegio", "inmobiliaria", "ferreteria",
+    "farmacia", "taller", "abogados", "contadores", "dentista", "veterinaria", "boutique",
+    "panaderia", "cafeteria", "transporte", "logistica", "seguros", "turismo", "eventos"
+]
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def main() -> bool:
+    random.seed(7)
+    cache = SemanticAnswerCache(threshold=0.75, max_entries=N_ENTRADAS)
+    ok = True
+
+    # 1. Preguntas frecuentes con su respuesta
+    for pregunta, _ in PREGUNTAS_FRECUENTES:
+        cache.store(pregunta, {"response": f"Respuesta a: {pregunta}"})
+
+    # 2. Relleno con consultas sintéticas distintas
+    inicio = time.perf_counter()
+    while len(cache) < N_ENTRADAS:
+        palabras = random.sample(VOCABULARIO, 3)
+        cache.store(
+            f"necesito {palabras[0]} para mi {palabras[1]} con {palabras[2]} {random.randint(0, 10**6)}",
+            {"response": "relleno"}
+        )
+    print(f"📥 {len(cache):,} entradas indexadas en {time.perf_counter() - inicio:.1f}s")
+
+    # 3. Paráfrasis de preguntas frecuentes
+    print("\n🔎 Paráfrasis:")
+    latencias_hit = []
+    for pregunta, parafrasis in PREGUNTAS_FRECUENTES:
+        for variante in parafrasis:
+            t0 = time.perf_counter()
+            resultado = cache.lookup(variante)
+            latencias_hit.append((time.perf_counter() - t0) * 1000)
+            if resultado and resultado[0]["response"] == f"Respuesta a: {pregunta}":
+                print_success(f"'{variante}' → '{pregunta}' (sim {resultado[1]:.2f})")
+            else:
+                print_error(f"'{variante}' no encontró '{pregunta}'")
+                ok = False
+
+    # 4. Latencia de lookups mixtos
+    consultas = []
+    for _ in range(2000):
+        palabras = random.sample(VOCABULARIO, 3)
+        consultas.append(f"quiero {palabras[0]} y {palabras[1]} para {palabras[2]}")
+    latencias = []
+    for consulta in consultas:
+        t0 = time.perf_counter()
+        cache.lookup(consulta)
+        latencias.append((time.perf_counter() - t0) * 1000)
+
+    p50, p99 = percentil(latencias, 0.5), percentil(latencias, 0.99)
+    print(f"\n⏱️ Lookup con {len(cache):,} entradas: p50={p50:.3f} ms  p99={p99:.3f} ms  "
+          f"(hits paráfrasis p50={statistics.median(latencias_hit):.3f} ms)")
+    if p50 < 1.0:
+        print_success("Lookup sub-milisegundo (p50)")
+    else:
+        print_error("Lookup p50 por encima de 1 ms")
+        ok = False
+
+    # 5. Expulsión LRU
+    cache.store("pregunta nueva sobre facturacion electronica", {"response": "nueva"})
+    if len(cache) == N_ENTRADAS and cache.stats["expulsadas"] >= 1:
+        print_success(f"Expulsión LRU mantiene {len(cache):,} entradas")
+    else:
+        print_error("La expulsión LRU no respetó el máximo")
+        ok = False
+
+    # 6. Solo preguntas frecuentes usan la caché; respuestas de mitad de conversación no
+    no_genericos = [
+        "mi correo es ana@empresa.com", "y eso cuánto cuesta?", "sí, me interesa", "no",
+        "mejor la opción dos", "el martes a las diez", "Me llamo Ana y tengo una panadería"
+    ]
+    aceptados = [m for m in no_genericos if es_consulta_generica(m)]
+    rechazadas = [p for p, _ in PREGUNTAS_FRECUENTES if not es_consulta_generica(p)]
+    if not aceptados and not rechazadas:
+        print_success(f"Preguntas frecuentes aceptadas; {len(no_genericos)} respuestas de conversación excluidas")
+    else:
+        print_error(f"es_consulta_generica: aceptó {aceptados}, rechazó {rechazadas}")
+        ok = False
+
+    # 7. Las entradas no cruzan de un espacio (canal / empresa) a otro
+    cache.store("¿Tienen planes de soporte mensual?", {"response": "empresa 1"}, espacio="dashboard:1")
+    if (cache.lookup("tienen planes de soporte mensual", espacio="dashboard:2") is None
+            and cache.lookup("tienen planes de soporte mensual", espacio="dashboard:1")[0]["response"] == "empresa 1"):
+        print_success("Una respuesta guardada en un espacio no se sirve en otro")
+    else:
+        print_error("La caché devolvió una respuesta de otro espacio")
+        ok = False
+
+    print(f"\n📊 {cache.get_stats()}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Respuestas a leads en streaming por Telegram
+Compara cuándo ve algo el lead:
+- Antes: process_message completo y un único send_message con la respuesta
+- Ahora: mensaje provisional inmediato y edit_message_text a medida que el
+  orquestador genera (stream_message + RespuestaProgresiva)
+Usa el servidor LLM simulado con latencia fija más un costo por token y un bot
+simulado que registra cada envío y edición. También valida:
+- Que la primera edición sale en cuanto hay texto y las siguientes respetan el
+  intervalo mínimo, sin dos en vuelo
+- Que no se muestra Markdown a medio cerrar
+- Que si Telegram rechaza el Markdown a mitad del stream se deja de editar y
+  la respuesta completa llega al final
+- Que si el modelo sigue escribiendo después del sobre JSON se deja de leer y
+  se corta la generación
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_streaming_replies.py
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from telegram.error import BadRequest
+
+from stub_llm_server import StubLLMServer
+
+LATENCIA_MS = 150
+MS_POR_TOKEN = 15
+INTERVALO = 1.0  # entre ediciones (Telegram: ~1 s); mayor que lo que tarda el primer token
+RITMO_CHAT = 0.1  # ritmo por chat del sender (reducido para el benchmark)
+REPETICIONES = 4
+
+RESPUESTA = (
+    "¡Hola! En *ORBITA* desarrollamos tiendas online completas: catálogo, carrito, "
+    "pasarela de pagos y panel de administración. Para un proyecto como el tuyo solemos "
+    "trabajar en _tres fases_ de dos semanas cada una.\n\n"
+    "Cuéntame cuántos productos tienes, si ya cuentas con dominio y qué medios de pago "
+    "quieres aceptar, así te preparo una propuesta a la medida con tiempos y precios."
+)
+
+
+def responder(payload: dict) -> str:
+    if payload.get("response_format", {}).get("type") == "json_object":
+        return json.dumps({
+            "selected_agent": "captador",
+            "confidence": 0.85,
+            "reasoning": "Interés en tienda online",
+            "extracted_data": {},
+            "message_type": "consulta_servicio",
+            "response": RESPUESTA
+        }, ensure_ascii=False)
+    return RESPUESTA
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+class BotSimulado:
+    """Bot con send_message / edit_message_text que registra (instante, tipo, texto, kwargs)."""
+
+    def __init__(self, rechazar_markdown_en_stream: bool = False):
+        self.token = "123456:SIMULADO"
+        self.eventos = []
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+        self.rechazar = rechazar_markdown_en_stream
+        self._textos = {}
+
+    async def _llamada(self):
+        self.en_vuelo += 1
+        self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+        await asyncio.sleep(0.01)
+        self.en_vuelo -= 1
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await self._llamada()
+        message_id = len(self._textos) + 1
+        self._textos[message_id] = text
+        self.eventos.append((time.perf_counter(), "send", text, kwargs))
+
+        class Mensaje:
+            pass
+        mensaje = Mensaje()
+        mensaje.message_id = message_id
+        return mensaje
+
+    async def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        from utils.telegram_sender import markdown_cerrado
+        await self._llamada()
+        if self._textos.get(message_id) == text:
+            raise BadRequest("Message is not modified")
+        if kwargs.get("parse_mode") and (
+            not markdown_cerrado(text) or (self.rechazar and len(text) < len(RESPUESTA))
+        ):
+            raise BadRequest("Can't parse entities: can't find end of the entity")
+        self._textos[message_id] = text
+        self.eventos.append((time.perf_counter(), "edit", text, kwargs))
+        return True
+
+
+async def sin_streaming(agent, sender, chat_id: str) -> float:
+    t0 = time.perf_counter()
+    resultado = await agent.process_message("Quiero una tienda online", session_id=chat_id)
+    await sender.enviar(chat_id, resultado["response"], parse_mode="Markdown")
+    return (time.perf_counter() - t0) * 1000
+
+
+async def con_streaming(agent, sender, chat_id: str):
+    from utils.telegram_sender import RespuestaProgresiva
+
+    t0 = time.perf_counter()
+    progresiva = RespuestaProgresiva(sender, chat_id, intervalo=INTERVALO, parse_mode="Markdown")
+    await progresiva.iniciar()
+    acumulado, resultado, primer_token = "", {}, None
+    async for evento in agent.stream_message("Quiero una tienda online", session_id=chat_id):
+        if evento["tipo"] == "token":
+            acumulado += evento["texto"]
+            primer_token = primer_token or time.perf_counter()
+            progresiva.actualizar(acumulado)
+        elif evento["tipo"] == "fin":
+            resultado = evento["resultado"]
+    await progresiva.finalizar(resultado["response"])
+    total = (time.perf_counter() - t0) * 1000
+    return t0, primer_token, total, progresiva
+
+
+async def main() -> bool:
+    server = StubLLMServer(latency_ms=LATENCIA_MS, latency_per_token_ms=MS_POR_TOKEN, responder=responder)
+    server.start()
+
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["USE_OPENAI_FOR_ORCHESTRATOR"] = "false"
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["INTENT_CLASSIFIER_ENABLED"] = "false"
+    os.environ.pop("OPENAI_API_KEY", None)
+
+    # Sin Supabase: el registro de acciones no forma parte de la medición
+    import agents.base_agent
+    import agents.orchestrator
+
+    async def log_noop(*args, **kwargs):
+        return {}
+
+    agents.base_agent.log_agent_action = log_noop
+    agents.orchestrator.log_agent_action = log_noop
+
+    from agents.orchestrator import OrchestratorAgent
+    from utils.groq_client import close_groq_client
+    from utils.telegram_sender import TelegramSender, markdown_cerrado
+
+    agent = OrchestratorAgent()
+    ok = True
+
+    print(f"\n{'='*60}")
+    print(f"  RESPUESTAS EN STREAMING (LLM simulado {LATENCIA_MS} ms + {MS_POR_TOKEN} ms/token)")
+    print(f"{'='*60}\n")
+
+    # 1. Primer byte visible: antes vs ahora
+    antes, provisional, primer_texto, totales, espaciados = [], [], [], [], []
+    desde_primer_token = []
+    ediciones_por_respuesta, omitidas = [], 0
+    bot = BotSimulado()
+    for i in range(REPETICIONES):
+        sender = TelegramSender(bot, per_chat_interval=RITMO_CHAT)
+        antes.append(await sin_streaming(agent, sender, f"antes-{i}"))
+
+        bot.eventos.clear()
+        sender = TelegramSender(bot, per_chat_interval=RITMO_CHAT)
+        t0, primer_token, total, progresiva = await con_streaming(agent, sender, f"ahora-{i}")
+        envios = [e for e in bot.eventos if e[1] == "send"]
+        ediciones = [e for e in bot.eventos if e[1] == "edit"]
+        provisional.append((envios[0][0] - t0) * 1000)
+        primer_texto.append((ediciones[0][0] - t0) * 1000)
+        desde_primer_token.append((ediciones[0][0] - primer_token) * 1000)
+        totales.append(total)
+        espaciados.extend(b[0] - a[0] for a, b in zip(ediciones, ediciones[1:]))
+        ediciones_por_respuesta.append(len(ediciones))
+        omitidas += progresiva.stats["omitidas_markdown"]
+
+        if ediciones[-1][2] != RESPUESTA or any(not markdown_cerrado(e[2]) for e in ediciones):
+            print_error(f"Ediciones incorrectas: {[e[2][-30:] for e in ediciones]}")
+            ok = False
+
+    print(f"{'Modo':>23} | {'Primer byte':>11} | {'Primer texto':>12} | {'Total':>9}")
+    print(f"{'-'*23}-+-{'-'*11}-+-{'-'*12}-+-{'-'*9}")
+    p50_antes = statistics.median(antes)
+    print(f"{'send_message al final':>23} | {p50_antes:>8.0f} ms | {p50_antes:>9.0f} ms | {p50_antes:>6.0f} ms")
+    print(
+        f"{'provisional + ediciones':>23} | {statistics.median(provisional):>8.0f} ms | "
+        f"{statistics.median(primer_texto):>9.0f} ms | {statistics.median(totales):>6.0f} ms"
+    )
+    print(f"\n✏️ Ediciones por respuesta: {statistics.median(ediciones_por_respuesta):.0f} "
+          f"(omitidas por Markdown abierto: {omitidas})")
+
+    if statistics.median(provisional) < 100 and statistics.median(primer_texto) < p50_antes:
+        print_success(f"El lead ve el primer byte {p50_antes / statistics.median(provisional):.0f}x antes "
+                      f"y el primer texto {p50_antes - statistics.median(primer_texto):.0f} ms antes")
+    else:
+        print_error("El streaming no adelantó la primera respuesta visible")
+        ok = False
+
+    # 2. Ritmo de ediciones: la primera no espera el intervalo completo, las siguientes sí
+    if max(desde_primer_token) < 100:
+        print_success(f"Primera edición a {statistics.median(desde_primer_token):.0f} ms del primer token "
+                      f"(sin esperar el intervalo de {INTERVALO}s)")
+    else:
+        print_error(f"La primera edición esperó {max(desde_primer_token):.0f} ms tras el primer token")
+        ok = False
+    if min(espaciados) >= INTERVALO * 0.95 and bot.max_en_vuelo == 1:
+        print_success(f"Ediciones siguientes separadas ≥ {INTERVALO}s (mín {min(espaciados):.2f}s) y una sola en vuelo")
+    else:
+        print_error(f"Ritmo de ediciones: mín {min(espaciados):.2f}s, en vuelo {bot.max_en_vuelo}")
+        ok = False
+
+    # 3. Telegram rechaza el Markdown a mitad del stream → respuesta completa al final
+    bot = BotSimulado(rechazar_markdown_en_stream=True)
+    sender = TelegramSender(bot, per_chat_interval=RITMO_CHAT)
+    _, _, _, progresiva = await con_streaming(agent, sender, "markdown-roto")
+    ediciones = [e for e in bot.eventos if e[1] == "edit"]
+    if not progresiva.streaming and len(ediciones) == 1 and ediciones[0][2] == RESPUESTA:
+        print_success("Markdown rechazado a mitad del stream: se deja de editar y se entrega la respuesta completa")
+    else:
+        print_error(f"Fallback sin streaming: {len(ediciones)} ediciones, streaming={progresiva.streaming}")
+        ok = False
+
+    # 4. Texto de más después del sobre: se corta el stream al cerrarse el JSON
+    def con_texto_de_mas(payload: dict) -> str:
+        sobra = "\n\nEspero haberte ayudado, cualquier duda me escribes. " * 40
+        return responder(payload) + (sobra if payload.get("response_format") else "")
+
+    server.responder = con_texto_de_mas
+    server.reset_counters()
+    resultado = {}
+    async for evento in agent.stream_message("Quiero una tienda online", session_id="sobre-cerrado"):
+        if evento["tipo"] == "fin":
+            resultado = evento["resultado"]
+    await asyncio.sleep(0.2)
+    if server.streams_cancelled == 1 and resultado.get("response") == RESPUESTA:
+        print_success(f"Sobre cerrado: el texto que sigue no se lee ({server.completion_tokens_total} tokens generados)")
+    else:
+        print_error(f"Se siguió leyendo después del sobre (cancelados {server.streams_cancelled}, {resultado})")
+        ok = False
+
+    print(f"📡 Streams servidos: {server.streams_served}")
+    await close_groq_client()
+    server.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(main())
+    sys.exit(0 if resultado else 1)
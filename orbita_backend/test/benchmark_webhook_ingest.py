@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Ingesta de webhooks de Telegram
+Reproduce miles de updates grabados (o generados) contra los endpoints
+/telegram/leads/webhook y /telegram/admin/webhook en proceso (ASGI), con un
+handler que simula la latencia de Whisper + LLM, y mide:
+- Latencia del ACK (lo que espera Telegram antes de reintentar)
+- Reintentos descartados por update_id
+- Rechazo de peticiones sin el secret token
+- Que todos los updates únicos terminan procesados en orden por chat
+- Que con la cola del chat llena se responde 503 y el reintento se acepta
+- Que el estado (GET /telegram/) no crea los handlers ni los dispatchers
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/benchmark_webhook_ingest.py
+    PYTHONPATH=. python test/benchmark_webhook_ingest.py --archivo updates.jsonl   # updates grabados
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+# Tokens y secretos de prueba ANTES de importar config
+os.environ.setdefault("TELEGRAM_LEADS_BOT_TOKEN", "123456:TEST-LEADS")
+os.environ.setdefault("TELEGRAM_ADMIN_BOT_TOKEN", "654321:TEST-ADMIN")
+os.environ["TELEGRAM_LEADS_WEBHOOK_SECRET"] = "secreto-leads"
+os.environ["TELEGRAM_ADMIN_BOT_WEBHOOK_SECRET"] = "secreto-admin"
+os.environ.pop("REDIS_URL", None)
+
+import httpx
+from fastapi import FastAPI
+
+import Telegram_Bot.bot as bots
+from auth import get_current_active_user
+from routers.telegram import telegram_router
+from utils.update_dispatcher import UpdateDispatcher
+
+UPDATES = 3000
+CHATS = 300
+RATIO_REINTENTOS = 0.1
+CONCURRENCIA = 50
+LATENCIA_HANDLER_S = 0.05  # Whisper + LLM simulados
+
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}\n")
+
+
+def generar_updates(n: int, chats: int) -> list:
+    """Updates sintéticos con la forma de la Bot API (mensajes y callbacks)."""
+    updates = []
+    for update_id in range(1, n + 1):
+        chat_id = 10_000 + random.randrange(chats)
+        chat = {"id": chat_id, "type": "private", "first_name": f"Lead {chat_id}"}
+        usuario = {"id": chat_id, "is_bot": False, "first_name": f"Lead {chat_id}"}
+        mensaje = {
+            "message_id": update_id, "date": int(time.time()), "chat": chat, "from": usuario,
+            "text": random.choice(["Hola", "¿Cuánto cuesta una página web?", "Quiero una app", "Gracias"])
+        }
+        if update_id % 10 == 0:
+            updates.append({"update_id": update_id, "callback_query": {
+                "id": str(update_id), "from": usuario, "chat_instance": str(chat_id),
+                "data": "cotizar_web", "message": mensaje
+            }})
+        else:
+            updates.append({"update_id": update_id, "message": mensaje})
+    return updates
+
+
+def cargar_updates(archivo: str) -> list:
+    with open(archivo, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+async def main() -> bool:
+    parser = argparse.ArgumentParser(description="Load test de los webhooks de Telegram")
+    parser.add_argument("--archivo", help="JSONL con updates grabados de la Bot API")
+    parser.add_argument("--updates", type=int, default=UPDATES)
+    args = parser.parse_args()
+
+    random.seed(7)
+    updates = cargar_updates(args.archivo) if args.archivo else generar_updates(args.updates, CHATS)
+    # Telegram reintenta algunos updates (timeouts, reinicios)
+    envios = [("leads", u) for u in updates]
+    envios += [("leads", u) for u in random.sample(updates, int(len(updates) * RATIO_REINTENTOS))]
+    random.shuffle(envios)
+    envios.sort(key=lambda e: e[1]["update_id"])  # orden de llegada aproximado
+
+    # Handler simulado en lugar de LeadsBotHandler/AdminBotHandler (sin Supabase ni Groq)
+    procesados = defaultdict(list)
+
+    async def handler(update, bot):
+        await asyncio.sleep(LATENCIA_HANDLER_S)
+        procesados[update.effective_chat.id].append(update.update_id)
+
+    app = FastAPI()
+    app.include_router(telegram_router, prefix="/telegram")
+    app.dependency_overrides[get_current_active_user] = lambda: {"id": 1}
+    transport = httpx.ASGITransport(app=app)
+
+    # Consultar el estado antes de recibir updates no debe construir nada
+    async with httpx.AsyncClient(transport=transport, base_url="http://orbita") as client:
+        estado = (await client.get("/telegram/")).json()
+    estado_sin_efectos = (
+        estado["dispatcher_leads"] is None and estado["dispatcher_admin"] is None
+        and bots._leads_dispatcher is None and bots._leads_handler is None and bots._admin_handler is None
+    )
+
+    bots._leads_dispatcher = UpdateDispatcher(handler, max_in_flight=64, max_pending_per_chat=1000)
+    bots._admin_dispatcher = UpdateDispatcher(handler, max_in_flight=8)
+
+    print_header(f"INGESTA DE WEBHOOKS ({len(envios)} peticiones, {len(updates)} updates únicos)")
+    ok = True
+    latencias = []
+    estados = defaultdict(int)
+    semaforo = asyncio.Semaphore(CONCURRENCIA)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://orbita") as client:
+        async def enviar(bot: str, update: dict):
+            async with semaforo:
+                t0 = time.perf_counter()
+                r = await client.post(
+                    f"/telegram/{bot}/webhook", json=update,
+                    headers={"X-Telegram-Bot-Api-Secret-Token": f"secreto-{bot}"}
+                )
+                latencias.append((time.perf_counter() - t0) * 1000)
+                estados[r.json().get("status") if r.status_code == 200 else r.status_code] += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(enviar(bot, u) for bot, u in envios))
+        t_ack = time.perf_counter() - inicio
+
+        # Petición sin secreto y con secreto de otro bot
+        sin_secreto = await client.post("/telegram/leads/webhook", json=updates[0])
+        secreto_cruzado = await client.post(
+            "/telegram/admin/webhook", json=updates[0],
+            headers={"X-Telegram-Bot-Api-Secret-Token": "secreto-leads"}
+        )
+
+    print(f"⏱️ ACK: p50={statistics.median(latencias):.2f} ms | p99={percentil(latencias, 0.99):.2f} ms | "
+          f"máx={max(latencias):.2f} ms ({len(envios) / t_ack:.0f} req/s)")
+    print(f"📬 Respuestas: {dict(estados)}")
+
+    if percentil(latencias, 0.99) < 50:
+        print("✅ Telegram recibe 200 sin esperar a los agentes")
+    else:
+        print("❌ El ACK es demasiado lento")
+        ok = False
+
+    if estados["duplicate"] == len(envios) - len(updates) and estados["ok"] == len(updates):
+        print(f"✅ {estados['duplicate']} reintentos descartados por update_id")
+    else:
+        print("❌ Deduplicación incorrecta")
+        ok = False
+
+    if estado_sin_efectos:
+        print("✅ GET /telegram/ no crea handlers ni dispatchers")
+    else:
+        print(f"❌ GET /telegram/ construyó dispatchers: {estado['dispatcher_leads']}, {estado['dispatcher_admin']}")
+        ok = False
+
+    if sin_secreto.status_code == 401 and secreto_cruzado.status_code == 401:
+        print("✅ Peticiones sin el secret token del bot rechazadas (401)")
+    else:
+        print(f"❌ Secreto no verificado ({sin_secreto.status_code}, {secreto_cruzado.status_code})")
+        ok = False
+
+    inicio = time.perf_counter()
+    await bots.drain_dispatchers()
+    t_proceso = time.perf_counter() - inicio
+    total = sum(len(ids) for ids in procesados.values())
+    en_orden = all(ids == sorted(ids) for ids in procesados.values())
+    print(f"⚙️ Procesamiento en segundo plano: {total} updates en {t_ack + t_proceso:.2f}s")
+    print(f"📊 {bots._leads_dispatcher.get_stats()}")
+    if total == len(updates) and en_orden:
+        print("✅ Todos los updates únicos procesados, en orden por chat")
+    else:
+        print(f"❌ Procesados {total}/{len(updates)} (en orden: {en_orden})")
+        ok = False
+
+    # Cola del chat llena: Telegram debe recibir un error para reintentar el update
+    bots._leads_dispatcher = UpdateDispatcher(handler, max_in_flight=1, max_pending_per_chat=1)
+    primero, segundo = generar_updates(2, 1)
+    primero["update_id"], segundo["update_id"] = 10**7, 10**7 + 1  # ids aún no vistos
+    headers = {"X-Telegram-Bot-Api-Secret-Token": "secreto-leads"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://orbita") as client:
+        aceptado = await client.post("/telegram/leads/webhook", json=primero, headers=headers)
+        lleno = await client.post("/telegram/leads/webhook", json=segundo, headers=headers)
+        await bots.drain_dispatchers()
+        reintento = await client.post("/telegram/leads/webhook", json=segundo, headers=headers)
+    await bots.drain_dispatchers()
+    if aceptado.status_code == 200 and lleno.status_code == 503 and reintento.json().get("status") == "ok":
+        print("✅ Cola del chat llena: 503 y el reintento de Telegram se procesa")
+    else:
+        print(f"❌ Cola llena: {aceptado.status_code}, {lleno.status_code}, reintento {reintento.json()}")
+        ok = False
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(main())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Servidor LLM simulado (compatible con la API de chat completions de Groq/OpenAI,
+incluido "stream": true por SSE, y con /audio/transcriptions de Whisper) para
+benchmarks locales sin consumir cuota ni depender de la red.
+
+Corre en un hilo propio con su propio event loop, de modo que incluso un cliente
+síncrono (que bloquea el loop del benchmark) puede ser medido contra él.
+
+Uso:
+    server = StubLLMServer(latency_ms=200)  # latency_per_token_ms simula la generación
+    server.start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    ...
+    server.stop()
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+
+def default_responder(payload: dict) -> str:
+    """Respuesta por defecto: texto fijo corto."""
+    return "Hola, soy el asistente de ORBITA. ¿En qué puedo ayudarte?"
+
+
+class StubLLMServer:
+    """Servidor HTTP/1.1 mínimo con keep-alive que responde /chat/completions y /audio/transcriptions."""
+
+    def __init__(
+        self,
+        latency_ms: float = 200,
+        latency_per_token_ms: float = 0,
+        responder: Optional[Callable[[dict], str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.latency_per_token_ms = latency_per_token_ms
+        self.responder = responder or default_responder
+        self.host = host
+        self.port = port
+        self.requests_served = 0
+        self.prompt_tokens_total = 0
+        self.completion_tokens_total = 0
+        self.transcriptions_served = 0
+        self.audio_bytes_total = 0
+        self.streams_served = 0
+        self.streams_cancelled = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def stop(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    async def _shutdown(self):
+        self._server.close()
+        tareas = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+    def reset_counters(self):
+        self.requests_served = 0
+        self.prompt_tokens_total = 0
+        self.completion_tokens_total = 0
+        self.transcriptions_served = 0
+        self.audio_bytes_total = 0
+        self.streams_served = 0
+        self.streams_cancelled = 0
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_connection, self.host, self.port, backlog=1024)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                await asyncio.sleep(self.latency_ms / 1000)
+                if b"/audio/transcriptions" in request_line:
+                    await self._write_transcription(writer, body)
+                else:
+                    payload = json.loads(body or b"{}")
+                    if payload.get("stream"):
+                        if not await self._write_stream(reader, writer, payload):
+                            break
+                    else:
+                        await self._write_completion(writer, payload)
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, payload: dict) -> bool:
+        """
+        Respuesta por SSE (chunked), un chunk por token de ~4 caracteres.
+        Si el cliente cierra la conexión se deja de generar (cuenta en
+        streams_cancelled y solo suma los tokens enviados). Devuelve False en ese caso.
+        """
+        content = self.responder(payload)
+        prompt_chars = sum(len(m.get("content") or "") for m in payload.get("messages", []))
+        self.prompt_tokens_total += max(1, prompt_chars // 4)
+        self.requests_served += 1
+        self.streams_served += 1
+        stream_id = f"stub-{self.requests_served}"
+
+        def evento(delta: dict, finish_reason=None) -> bytes:
+            data = json.dumps({
+                "id": stream_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": payload.get("model", "stub"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            })
+            linea = f"data: {data}\n\n".encode("utf-8")
+            return f"{len(linea):x}\r\n".encode("latin-1") + linea + b"\r\n"
+
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Connection: keep-alive\r\n"
+                b"Transfer-Encoding: chunked\r\n\r\n"
+                + evento({"role": "assistant", "content": ""})
+            )
+            await writer.drain()
+            for i in range(0, len(content), 4):
+                if i and self.latency_per_token_ms:
+                    await asyncio.sleep(self.latency_per_token_ms / 1000)
+                writer.write(evento({"content": content[i:i + 4]}))
+                await writer.drain()
+                self.completion_tokens_total += 1
+                if reader.at_eof() or writer.transport.is_closing():
+                    raise ConnectionResetError
+            fin = b"data: [DONE]\n\n"
+            writer.write(
+                evento({}, "stop")
+                + f"{len(fin):x}\r\n".encode("latin-1") + fin + b"\r\n"
+                + b"0\r\n\r\n"
+            )
+            await writer.drain()
+            return True
+        except (ConnectionResetError, BrokenPipeError):
+            self.streams_cancelled += 1
+            return False
+
+    async def _write_json(self, writer: asyncio.StreamWriter, data: dict):
+        response = json.dumps(data).encode("utf-8")
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Connection: keep-alive\r\n"
+            + f"Content-Length: {len(response)}\r\n\r\n".encode("latin-1")
+            + response
+        )
+        await writer.drain()
+
+    async def _write_transcription(self, writer: asyncio.StreamWriter, body: bytes):
+        """Whisper simulado: el texto indica cuántos bytes de audio llegaron (multipart)."""
+        self.transcriptions_served += 1
+        self.audio_bytes_total += len(body)
+        await self._write_json(writer, {"text": f"Transcripción simulada de {len(body)} bytes"})
+
+    async def _write_completion(self, writer: asyncio.StreamWriter, payload: dict):
+        content = self.responder(payload)
+        prompt_chars = sum(len(m.get("content") or "") for m in payload.get("messages", []))
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = max(1, len(content) // 4)
+        if self.latency_per_token_ms:
+            await asyncio.sleep(completion_tokens * self.latency_per_token_ms / 1000)
+
+        self.requests_served += 1
+        self.prompt_tokens_total += prompt_tokens
+        self.completion_tokens_total += completion_tokens
+
+        await self._write_json(writer, {
+            "id": f"stub-{self.requests_served}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+if __name__ == "__main__":
+    server = StubLLMServer()
+    server.start()
+    print(f"🧪 Stub LLM escuchando en {server.base_url} (Ctrl+C para detener)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
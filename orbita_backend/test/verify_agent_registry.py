@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Registro de agentes compartidos
+Valida que los agentes se construyen una sola vez por proceso, de forma
+perezosa, y que comparten el cliente LLM (un pool HTTP) y la memoria.
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_agent_registry.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+async def verify_registry() -> bool:
+    os.environ.setdefault("GROQ_API_KEY", "stub-key")
+
+    from agents.registry import get_agent_registry, get_agent, AGENT_CLASSES
+    from agents.comunicacion import ComunicacionAgent
+
+    registry = get_agent_registry()
+    ok = True
+
+    # 1. Carga perezosa
+    if not registry.loaded():
+        print_success("Ningún agente se construye al importar el registro")
+    else:
+        print_error(f"Agentes cargados antes de usarse: {registry.loaded()}")
+        ok = False
+
+    # 2. Una instancia por proceso
+    if get_agent("comunicacion") is get_agent("comunicacion"):
+        print_success("get_agent devuelve siempre la misma instancia")
+    else:
+        print_error("get_agent construyó dos instancias")
+        ok = False
+
+    # 3. Cliente LLM y memoria compartidos
+    agentes = [get_agent(nombre) for nombre in AGENT_CLASSES]
+    clientes = {id(a.groq_client) for a in agentes}
+    pools = {id(a.groq_client.http_client) for a in agentes}
+    memorias = {id(a.memory_manager.conversation_memory) for a in agentes}
+    if len(clientes) == len(pools) == len(memorias) == 1:
+        print_success(f"{len(agentes)} agentes comparten 1 GroqClient, 1 pool HTTP y 1 memoria")
+    else:
+        print_error(f"Clientes: {len(clientes)}, pools: {len(pools)}, memorias: {len(memorias)}")
+        ok = False
+
+    await get_agent("orchestrator").memory_manager.save_message("sesion-x", "Hola, soy Ana", "user")
+    historial, _ = await get_agent("captador").memory_manager.get_history_window("sesion-x", 200)
+    if "Ana" in historial:
+        print_success("El captador ve el contexto guardado por el orquestador")
+    else:
+        print_error("La memoria sigue separada entre agentes")
+        ok = False
+
+    # 4. Costo por request: construir vs reutilizar
+    from utils.groq_client import GroqClient
+    from utils.memory import MemoryManager
+
+    n = 50
+    t0 = time.perf_counter()
+    for _ in range(n):
+        # Lo que pagaba antes cada agente: cliente LLM y memoria propios
+        GroqClient()
+        MemoryManager()
+        ComunicacionAgent()
+    construir_ms = (time.perf_counter() - t0) * 1000 / n
+    t0 = time.perf_counter()
+    for _ in range(n):
+        get_agent("comunicacion")
+    registro_ms = (time.perf_counter() - t0) * 1000 / n
+    print(f"\n⏱️ Por request: construir agente + cliente + memoria {construir_ms:.3f} ms | registro {registro_ms:.4f} ms")
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_registry())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Chat del dashboard con el orquestador
+Levanta el router de agentes en un servidor uvicorn local (autenticación
+sustituida por una empresa de prueba) y el servidor LLM simulado para validar:
+- Que POST /agentes/chat responde con el orquestador y no con un texto simulado
+- Que POST /agentes/chat/stream emite enrutamiento, tokens y fin por SSE, y que
+  los tokens forman la misma respuesta que el evento fin
+- Que el primer token llega mucho antes que la respuesta completa
+- Que si el cliente se desconecta se corta la generación en el LLM
+- Que con la caché semántica activa una empresa no recibe respuestas guardadas
+  para otra
+- Que una pregunta frecuente en una sesión con historial no sale de la caché
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_agentes_chat_stream.py
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import httpx
+
+from stub_llm_server import StubLLMServer
+
+LATENCIA_MS = 100
+MS_POR_TOKEN = 20
+
+RESPUESTA = (
+    "Este mes los leads que llegaron por Telegram convirtieron mejor que los del sitio web. "
+    "Te sugiero revisar el seguimiento de los que pidieron cotización y no respondieron, "
+    "y reforzar la campaña que trajo más interesados en tiendas online."
+)
+
+
+def responder(payload: dict) -> str:
+    if payload.get("response_format", {}).get("type") == "json_object":
+        return json.dumps({
+            "selected_agent": "analitico",
+            "confidence": 0.9,
+            "reasoning": "Pide análisis de resultados",
+            "extracted_data": {},
+            "message_type": "reporte",
+            "response": RESPUESTA
+        }, ensure_ascii=False)
+    return RESPUESTA
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def leer_sse(respuesta: httpx.Response, hasta: str = None):
+    """Eventos (instante, evento, datos) de un stream SSE; se detiene tras el evento `hasta`."""
+    evento = None
+    for linea in respuesta.iter_lines():
+        if linea.startswith("event: "):
+            evento = linea[len("event: "):]
+        elif linea.startswith("data: "):
+            yield time.perf_counter(), evento, json.loads(linea[len("data: "):])
+            if evento == hasta:
+                return
+
+
+def main() -> bool:
+    server = StubLLMServer(latency_ms=LATENCIA_MS, latency_per_token_ms=MS_POR_TOKEN, responder=responder)
+    server.start()
+
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["USE_OPENAI_FOR_ORCHESTRATOR"] = "false"
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "true"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["INTENT_CLASSIFIER_ENABLED"] = "false"
+    os.environ.pop("OPENAI_API_KEY", None)
+
+    # Sin Supabase: el registro de acciones no forma parte de la verificación
+    import agents.base_agent
+    import agents.orchestrator
+
+    async def log_noop(*args, **kwargs):
+        return {}
+
+    agents.base_agent.log_agent_action = log_noop
+    agents.orchestrator.log_agent_action = log_noop
+
+    import uvicorn
+    from fastapi import FastAPI
+    from auth import get_current_active_user, get_current_user_empresa
+    from routers.agentes import agentes_router, _chat_stream_stats
+
+    app = FastAPI()
+    app.include_router(agentes_router, prefix="/agentes")
+    empresa = {"id": 1, "nombre": "ORBITA"}
+    app.dependency_overrides[get_current_active_user] = lambda: {"id": 1, "empresa_id": empresa["id"]}
+    app.dependency_overrides[get_current_user_empresa] = lambda: dict(empresa)
+
+    puerto = puerto_libre()
+    api = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning"))
+    threading.Thread(target=api.run, daemon=True).start()
+    while not api.started:
+        time.sleep(0.05)
+
+    ok = True
+    # Con un número: no es consulta genérica, así no pasa por la caché semántica
+    mensaje = {"message": "¿Cómo nos fue en marzo 2026 con los leads?", "session_id": "dash-1"}
+    with httpx.Client(base_url=f"http://127.0.0.1:{puerto}", timeout=30) as client:
+        # 1. /chat con el orquestador
+        r = client.post("/agentes/chat", json=mensaje)
+        cuerpo = r.json()
+        if r.status_code == 200 and cuerpo["response"] == RESPUESTA and cuerpo["agente"] == "analitico":
+            print_success(f"/chat responde con el orquestador (agente {cuerpo['agente']}, confianza {cuerpo['confianza']})")
+        else:
+            print_error(f"/chat: {r.status_code} {cuerpo}")
+            ok = False
+
+        vacio = client.post("/agentes/chat/stream", json={"message": "   "})
+        if vacio.status_code == 400:
+            print_success("Mensaje vacío rechazado con 400 antes de abrir el stream")
+        else:
+            print_error(f"Mensaje vacío: {vacio.status_code}")
+            ok = False
+
+        # 2. /chat/stream completo
+        t0 = time.perf_counter()
+        with client.stream("POST", "/agentes/chat/stream", json=mensaje) as r:
+            tipo = r.headers.get("content-type", "")
+            eventos = list(leer_sse(r, hasta="fin"))
+        nombres = [e for _, e, _ in eventos]
+        tokens = [d["texto"] for _, e, d in eventos if e == "token"]
+        fin = eventos[-1][2]
+        primer_token = next(t for t, e, _ in eventos if e == "token") - t0
+        total = eventos[-1][0] - t0
+        if (
+            tipo.startswith("text/event-stream") and nombres[0] == "enrutamiento" and nombres[-1] == "fin"
+            and "".join(tokens) == fin["response"] == RESPUESTA and eventos[0][2]["agente"] == "analitico"
+        ):
+            print_success(f"SSE: enrutamiento → {len(tokens)} tokens → fin, con la misma respuesta que /chat")
+        else:
+            print_error(f"Eventos SSE inesperados: {nombres[:5]}... {fin}")
+            ok = False
+        print(f"⚡ Primer token a {primer_token * 1000:.0f} ms, respuesta completa a {total * 1000:.0f} ms")
+        if primer_token < total / 2:
+            print_success("El dashboard muestra la respuesta mientras se genera")
+        else:
+            print_error("El primer token no llegó antes que la respuesta completa")
+            ok = False
+
+        # 3. El cliente se desconecta tras el primer token
+        server.reset_counters()
+        with client.stream("POST", "/agentes/chat/stream", json={**mensaje, "session_id": "dash-2"}) as r:
+            for _, evento, _ in leer_sse(r):
+                if evento == "token":
+                    break
+        time.sleep(0.5)
+        generados = server.completion_tokens_total
+        completos = -(-len(responder({"response_format": {"type": "json_object"}})) // 4)  # tokens de 4 caracteres
+        if server.streams_cancelled == 1 and generados < completos and _chat_stream_stats["cancelados"] == 1:
+            print_success(f"Desconexión: stream del LLM cancelado tras {generados}/{completos} tokens")
+        else:
+            print_error(
+                f"La generación siguió tras la desconexión: cancelados {server.streams_cancelled}, "
+                f"tokens {generados}/{completos}, stats {_chat_stream_stats}"
+            )
+            ok = False
+
+        # 4. Caché semántica separada por empresa
+        pregunta = {"message": "¿Tienen planes de soporte mensual?"}
+        client.post("/agentes/chat", json=pregunta)
+        server.reset_counters()
+        empresa["id"] = 2
+        client.post("/agentes/chat", json=pregunta)
+        llamadas_otra_empresa = server.requests_served
+        empresa["id"] = 1
+        client.post("/agentes/chat", json=pregunta)
+        if llamadas_otra_empresa == 1 and server.requests_served == 1:
+            print_success("Caché semántica por empresa: la empresa 2 genera su respuesta, la empresa 1 reutiliza la suya")
+        else:
+            print_error(f"Caché semántica compartida entre empresas ({llamadas_otra_empresa}, {server.requests_served} llamadas)")
+            ok = False
+
+        # 5. La misma pregunta a mitad de una conversación va al LLM con el historial
+        server.reset_counters()
+        client.post("/agentes/chat", json={**pregunta, "session_id": "dash-1"})
+        if server.requests_served == 1:
+            print_success("Sesión con historial: la pregunta frecuente se responde con el historial, no desde la caché")
+        else:
+            print_error(f"Sesión con historial servida desde la caché ({server.requests_served} llamadas)")
+            ok = False
+
+    print(f"📊 chat_stream: {_chat_stream_stats}")
+    api.should_exit = True
+    time.sleep(0.2)
+    server.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = main()
+    sys.exit(0 if resultado else 1)
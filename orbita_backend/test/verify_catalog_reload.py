@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Catálogo de estimados con recarga en caliente
+Copia data/catalogo_servicios.json a un directorio temporal y valida:
+- Que leer el catálogo no vuelve a parsear el JSON si el archivo no cambió
+- Lecturas concurrentes (varios hilos) mientras se publican versiones nuevas:
+  cada estimado ve una versión completa (precio y versión coherentes), nunca una mezcla
+- Que se acaba viendo la última versión sin reiniciar
+- Que un JSON inválido no reemplaza la versión vigente
+- Catálogo propio por empresa con el general como respaldo
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_catalog_reload.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from config import get_settings
+from utils.quick_estimate import CatalogStore, QuickEstimateGenerator
+
+LECTORES = 8
+VERSIONES = 25
+RECARGA_S = 0.01
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+def escribir_atomico(ruta: str, data: dict):
+    """Como lo haría un despliegue: archivo temporal + os.replace."""
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+
+def version_n(base: dict, n: int) -> dict:
+    """Versión n: todos los precios base valen n * 1000 (así se detectan mezclas)."""
+    data = json.loads(json.dumps(base))
+    data["version"] = str(n)
+    for info in data["servicios"].values():
+        info["precio_base"] = n * 1000
+    return data
+
+
+def verify_catalog_reload() -> bool:
+    ok = True
+    with open(get_settings()["quote_catalog_path"], encoding="utf-8") as f:
+        base = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "catalogo_servicios.json")
+        escribir_atomico(ruta, version_n(base, 1))
+        store = CatalogStore(ruta, reload_seconds=RECARGA_S)
+        estimador = QuickEstimateGenerator(store=store)
+
+        # 1. Sin cambios en el archivo no se vuelve a cargar
+        for _ in range(1000):
+            estimador.detectar_servicio("quiero una página web")
+        time.sleep(RECARGA_S * 2)
+        estimador.detectar_servicio("quiero una página web")
+        if store.stats["cargas"] == 1:
+            print_success("1000 lecturas con una sola carga del JSON")
+        else:
+            print_error(f"Se cargó {store.stats['cargas']} veces sin cambios")
+            ok = False
+
+        # 2. Lectores concurrentes mientras se publican versiones
+        inconsistencias = []
+        lecturas = [0] * LECTORES
+        versiones_vistas = set()
+        fin = threading.Event()
+
+        def lector(i: int):
+            while not fin.is_set():
+                estimado = estimador.generar_estimado("sitio_web")
+                version = int(estimado["catalogo_version"])
+                versiones_vistas.add(version)
+                if estimado["precio_base"] != version * 1000:
+                    inconsistencias.append(estimado)
+                lecturas[i] += 1
+
+        hilos = [threading.Thread(target=lector, args=(i,)) for i in range(LECTORES)]
+        for h in hilos:
+            h.start()
+        for n in range(2, VERSIONES + 1):
+            escribir_atomico(ruta, version_n(base, n))
+            time.sleep(RECARGA_S * 3)
+        time.sleep(RECARGA_S * 3)
+        fin.set()
+        for h in hilos:
+            h.join()
+
+        print(f"📖 {sum(lecturas)} estimados en {LECTORES} hilos; versiones vistas: {len(versiones_vistas)}/{VERSIONES}")
+        if not inconsistencias:
+            print_success("Ningún estimado mezcló precios de dos versiones")
+        else:
+            print_error(f"{len(inconsistencias)} estimados inconsistentes: {inconsistencias[0]}")
+            ok = False
+
+        if store.get().version == str(VERSIONES):
+            print_success(f"Versión {VERSIONES} publicada sin reiniciar")
+        else:
+            print_error(f"Versión vigente {store.get().version}")
+            ok = False
+
+        # 3. JSON inválido: se mantiene la versión anterior
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write('{"version": "roto", "servicios": ')
+        time.sleep(RECARGA_S * 2)
+        if store.get().version == str(VERSIONES) and store.stats["errores_carga"] == 1:
+            print_success("Un catálogo inválido no reemplaza al vigente")
+        else:
+            print_error("El catálogo inválido se publicó o no se detectó")
+            ok = False
+
+        # 4. Catálogo por empresa
+        escribir_atomico(ruta, version_n(base, 1))
+        escribir_atomico(os.path.join(tmp, "catalogo_servicios_7.json"), version_n(base, 70))
+        time.sleep(RECARGA_S * 2)
+        propio = QuickEstimateGenerator(empresa_id=7, store=store).generar_estimado("seo")
+        general = QuickEstimateGenerator(empresa_id=8, store=store).generar_estimado("seo")
+        if propio["precio_base"] == 70_000 and general["precio_base"] == 1000:
+            print_success("Catálogo propio por empresa, general como respaldo")
+        else:
+            print_error(f"Empresa 7: {propio['precio_base']}, empresa 8: {general['precio_base']}")
+            ok = False
+
+        print(f"📊 {store.get_stats()}")
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = verify_catalog_reload()
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Caché de completions LLM
+Valida hits/misses, bypass por temperatura, expiración por TTL y que el modo
+JSON forma parte de la clave usando el servidor LLM simulado (no consume cuota).
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_completion_cache.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from stub_llm_server import StubLLMServer
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+async def verify_cache() -> bool:
+    server = StubLLMServer(latency_ms=50)
+    server.start()
+
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["LLM_CACHE_ENABLED"] = "true"
+    os.environ["LLM_CACHE_MAX_TEMPERATURE"] = "0.5"
+    os.environ.pop("REDIS_URL", None)
+
+    from utils.groq_client import GroqClient, close_groq_client
+
+    client = GroqClient()
+    ok = True
+
+    system = "Eres el asistente de ORBITA."
+
+    # 1. Prompt idéntico: la segunda llamada no debe llegar al modelo
+    await client.generate_completion("hola", agent_type="conversacional", temperature=0.2, system_message=system)
+    t0 = time.perf_counter()
+    await client.generate_completion("hola", agent_type="conversacional", temperature=0.2, system_message=system)
+    hit_ms = (time.perf_counter() - t0) * 1000
+
+    if server.requests_served == 1:
+        print_success(f"Prompt repetido servido desde caché ({hit_ms:.2f} ms)")
+    else:
+        print_error(f"Se esperaba 1 llamada al modelo, hubo {server.requests_served}")
+        ok = False
+
+    # 2. Temperatura alta: siempre va al modelo
+    await client.generate_completion("hola", agent_type="captador", temperature=0.9, system_message=system)
+    await client.generate_completion("hola", agent_type="captador", temperature=0.9, system_message=system)
+    if server.requests_served == 3:
+        print_success("Temperatura sobre el umbral omite la caché")
+    else:
+        print_error(f"Bypass por temperatura no funcionó ({server.requests_served} llamadas)")
+        ok = False
+
+    # 3. TTL vencido: vuelve a consultar al modelo
+    client.cache.ttl_seconds = 0
+    await client.generate_completion("precio", agent_type="conversacional", temperature=0.2)
+    await client.generate_completion("precio", agent_type="conversacional", temperature=0.2)
+    if server.requests_served == 5:
+        print_success("Entradas expiradas por TTL se regeneran")
+    else:
+        print_error(f"TTL no respetado ({server.requests_served} llamadas)")
+        ok = False
+
+    # 4. Mismo prompt en texto libre y en modo JSON: entradas distintas
+    client.cache.ttl_seconds = 3600
+    await client.generate_completion("resumen", agent_type="analitico", temperature=0.2)
+    await client.generate_completion("resumen", agent_type="analitico", temperature=0.2, json_mode=True)
+    await client.generate_completion("resumen", agent_type="analitico", temperature=0.2, json_mode=True)
+    if server.requests_served == 7:
+        print_success("json_mode forma parte de la clave: no se sirve texto libre a quien pidió JSON")
+    else:
+        print_error(f"json_mode no separa las entradas ({server.requests_served} llamadas)")
+        ok = False
+
+    stats = client.cache.get_stats()["por_agente"]
+    print(f"\n📊 Contadores: {stats}")
+    if stats["conversacional"]["hits_memoria"] == 1 and stats["captador"]["bypass"] == 2:
+        print_success("Contadores por agent_type correctos")
+    else:
+        print_error("Contadores por agent_type incorrectos")
+        ok = False
+
+    await close_groq_client()
+    server.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_cache())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Mensajes en conversation_messages
+Valida sin Supabase:
+- Que el costo de escritura por mensaje ya no crece con la conversación
+- Que el backfill convierte historial en filas ordenadas e idempotentes
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_conversation_messages.py
+"""
+
+import json
+import sys
+
+from backfill_conversation_messages import filas_desde_historial
+
+MENSAJES = 200
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+def mensaje(i: int, con_timestamp: bool = True) -> dict:
+    m = {
+        "role": "user" if i % 2 == 0 else "assistant",
+        "content": f"Mensaje {i}: quiero una tienda online con pasarela de pagos",
+        "content_type": "text",
+        "agente": None if i % 2 == 0 else "conversacional"
+    }
+    if con_timestamp:
+        m["timestamp"] = f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}+00:00"
+    return m
+
+
+def verify_messages() -> bool:
+    ok = True
+
+    # 1. Bytes enviados a Supabase por mensaje: historial completo vs una fila
+    historial = []
+    bytes_antes = []
+    bytes_ahora = []
+    for i in range(MENSAJES):
+        historial.append(mensaje(i))
+        bytes_antes.append(len(json.dumps({"historial": historial})))  # select + update del arreglo completo
+        bytes_ahora.append(len(json.dumps(mensaje(i))))
+    print(
+        f"📦 Escritura del mensaje {MENSAJES}: {bytes_antes[-1]} bytes (historial) vs {bytes_ahora[-1]} bytes (fila)"
+    )
+    print(f"   Total de la conversación: {sum(bytes_antes)} vs {sum(bytes_ahora)} bytes")
+    if max(bytes_ahora) - min(bytes_ahora) < 50 and bytes_antes[-1] > 50 * bytes_ahora[-1]:
+        print_success("Guardar un mensaje cuesta lo mismo en el turno 1 que en el 200")
+    else:
+        print_error("El costo por mensaje sigue creciendo")
+        ok = False
+
+    # 2. Backfill: orden, timestamps faltantes y claves de idempotencia
+    conversation = {
+        "id": "conv-1",
+        "lead_id": "lead-1",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "historial": [mensaje(i, con_timestamp=False) for i in range(5)] + ["basura"]
+    }
+    filas = filas_desde_historial(conversation)
+    fechas = [f["created_at"] for f in filas]
+    if len(filas) == 5 and fechas == sorted(fechas) and len(set(fechas)) == 5:
+        print_success("Mensajes sin timestamp conservan el orden original")
+    else:
+        print_error(f"Orden inesperado: {fechas}")
+        ok = False
+
+    claves = {(f["conversation_id"], f["posicion_historial"]) for f in filas + filas_desde_historial(conversation)}
+    if len(claves) == 5 and all(set(f) == set(filas[0]) for f in filas):
+        print_success("Reejecutar el backfill produce las mismas claves (conversation_id, posicion_historial)")
+    else:
+        print_error("Claves de backfill inconsistentes")
+        ok = False
+
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_messages() else 1)
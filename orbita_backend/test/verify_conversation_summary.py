@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Resumen incremental de conversaciones
+Simula una conversación de varios días contra el servidor LLM simulado y valida:
+- Que el resumen se actualiza en segundo plano cada N mensajes
+- Que la respuesta al lead no espera al resumen
+- Que los agentes reciben resumen + turnos recientes en lugar del historial completo
+- Que el cursor (created_at, id) no pierde mensajes con el mismo created_at
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_conversation_summary.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from stub_llm_server import StubLLMServer
+
+EVERY_N = 10
+KEEP_RECENT = 6
+MENSAJES = 80
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+def responder(payload: dict) -> str:
+    if "RESUMEN ACTUALIZADO" in payload["messages"][-1]["content"]:
+        return "Lead interesado en tienda online, presupuesto medio, pide entrega en 6 semanas."
+    return "Claro, te cuento más detalles."
+
+
+async def verify_summary() -> bool:
+    server = StubLLMServer(latency_ms=200, responder=responder)
+    server.start()
+
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    from utils.conversation_summary import ConversationSummarizer
+    from utils.groq_client import close_groq_client
+
+    guardados = {}
+    mensajes_db = []  # conversation_messages simulada (orden de inserción)
+
+    def ultimos(despues_de, limite):
+        # Mismo filtro que database._filtro_cursor: (created_at, id) > cursor
+        pendientes = [m for m in mensajes_db if despues_de is None or (m["created_at"], m["id"]) > despues_de]
+        return pendientes[-limite:]
+
+    class SummarizerEnMemoria(ConversationSummarizer):
+        """Lee y guarda en memoria en lugar de Supabase."""
+        async def _cargar_pendientes(self, lead_id, resumen_hasta):
+            return ultimos(resumen_hasta, 500)
+
+        async def _guardar(self, conversation_id, resumen, hasta):
+            guardados[conversation_id] = {"resumen": resumen, "resumen_hasta": hasta}
+
+    summarizer = SummarizerEnMemoria(every_n=EVERY_N, keep_recent=KEEP_RECENT)
+    ok = True
+
+    # 1. Conversación larga: programar() nunca bloquea
+    fila = {"resumen": None, "resumen_hasta": None}
+    max_bloqueo_ms = 0.0
+    recientes = []
+    for i in range(MENSAJES):
+        # Pregunta y respuesta comparten created_at (mismo segundo): solo el id las ordena
+        mensajes_db.append({
+            "id": i + 1,
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Mensaje {i} sobre la tienda online",
+            "created_at": f"2026-01-01T00:{i // 120:02d}:{i // 2 % 60:02d}+00:00"
+        })
+        # Lectura de contexto del handler: lo no resumido, como máximo una ventana
+        recientes = ultimos(fila["resumen_hasta"] if fila["resumen"] else None, summarizer.ventana)
+        t0 = time.perf_counter()
+        summarizer.programar("conv-1", "lead-1", len(recientes), fila["resumen"], fila["resumen_hasta"])
+        max_bloqueo_ms = max(max_bloqueo_ms, (time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.05)
+        fila.update(guardados.get("conv-1", {}))
+    await summarizer.esperar_pendientes()
+    fila.update(guardados.get("conv-1", {}))
+    recientes = ultimos(fila["resumen_hasta"], summarizer.ventana)
+
+    if max_bloqueo_ms < 5:
+        print_success(f"programar() no bloquea el hot path (máx {max_bloqueo_ms:.2f} ms con LLM de 200 ms)")
+    else:
+        print_error(f"programar() bloqueó {max_bloqueo_ms:.1f} ms")
+        ok = False
+
+    pendientes = len(ultimos(fila["resumen_hasta"], MENSAJES))
+    if fila["resumen"] and pendientes < EVERY_N + KEEP_RECENT:
+        print_success(f"Resumen cubre {MENSAJES - pendientes}/{MENSAJES} mensajes ({pendientes} sin resumir)")
+    else:
+        print_error(f"Resumen desactualizado: {fila}")
+        ok = False
+
+    if len(recientes) <= EVERY_N + KEEP_RECENT:
+        print_success(f"Contexto del prompt: resumen + {len(recientes)} turnos recientes (de {MENSAJES})")
+    else:
+        print_error(f"Se enviarían {len(recientes)} turnos")
+        ok = False
+
+    # Cursor (created_at, id): el mensaje que comparte created_at con el último resumido no se pierde
+    from postgrest import SyncPostgrestClient
+    from database import _filtro_cursor
+
+    creado, id_ = fila["resumen_hasta"]
+    query = _filtro_cursor(SyncPostgrestClient("http://supabase").table("conversation_messages").select("id"), (creado, id_), "gt")
+    esperado = f'(created_at.gt."{creado}",and(created_at.eq."{creado}",id.gt.{id_}))'
+    empatados = ultimos((mensajes_db[0]["created_at"], mensajes_db[0]["id"]), MENSAJES)
+    if query.params.get("or") == esperado and empatados[0] is mensajes_db[1]:
+        print_success(f"Cursor {fila['resumen_hasta']}: los mensajes con el mismo created_at se desempatan por id")
+    else:
+        print_error(f"Filtro de cursor inesperado: {query.params.get('or')}")
+        ok = False
+
+    print(f"📊 {summarizer.get_stats()}")
+
+    # 2. Los agentes usan el resumen del contexto
+    import agents.base_agent
+
+    async def log_noop(*args, **kwargs):
+        return {}
+
+    agents.base_agent.log_agent_action = log_noop
+    from agents.captador import CaptadorAgent
+
+    agent = CaptadorAgent()
+    bloque, _ = await agent.build_history_block(
+        "lead-sin-memoria", {"resumen": fila["resumen"], "contexto": recientes}
+    )
+    if fila["resumen"] in bloque and "Mensaje 79" in bloque and "Mensaje 0 " not in bloque:
+        print_success("Los agentes reciben resumen + turnos recientes")
+    else:
+        print_error(f"Bloque de historial inesperado:\n{bloque}")
+        ok = False
+
+    await close_groq_client()
+    server.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_summary())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Cotizaciones en PDF
+Valida, sin Supabase ni red:
+- Que una cotización larga (muchos ítems) genera un PDF válido de varias páginas
+  con los mismos datos que la plantilla Markdown (build_values)
+- Que el logo y los estilos se preparan una sola vez por proceso
+- GET /cotizaciones/{id}/pdf (ASGI en proceso) como application/pdf por bloques
+- Que TelegramSender.enviar_documento manda el PDF como un único documento
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_cotizacion_pdf.py
+"""
+
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+from PIL import Image
+
+import routers.cotizaciones as cotizaciones_module
+import utils.cotizacion_pdf as cotizacion_pdf
+from auth import get_current_active_user, get_current_user_empresa
+from routers.cotizaciones import cotizaciones_router
+from utils.cotizacion_pdf import CotizacionPDFRenderer, generar_pdf_cotizacion
+from utils.telegram_sender import TelegramSender
+
+ITEMS = 120
+RENDERS = 10
+
+COTIZACION = {
+    "id": 42,
+    "numero_cotizacion": "COT-20261018-042",
+    "created_at": "2026-10-18T09:00:00Z",
+    "lead_id": 7,
+    "descripcion": "Propuesta para digitalizar la red de clínicas <Sonrisas & Cía>",
+    "subtotal": 24_000_000,
+    "descuento_general": 10,
+    "total": 21_600_000,
+    "items": [
+        {
+            "descripcion": f"Módulo {i}: integración con agenda y pagos",
+            "descripcion_detallada": "Diseño, desarrollo, pruebas y despliegue del módulo. " * 3,
+            "precio_unitario": 200_000,
+            "cantidad": 1
+        }
+        for i in range(ITEMS)
+    ],
+    "fases": [
+        {"nombre": "Descubrimiento", "descripcion": "Talleres y requisitos", "duracion": "2 semanas"},
+        {"nombre": "Desarrollo", "descripcion": "Sprints quincenales", "duracion": "10 semanas"},
+        {"nombre": "Lanzamiento", "descripcion": "Despliegue y capacitación", "duracion": "2 semanas"}
+    ]
+}
+LEAD = {"nombre": "Laura Gómez", "empresa": "Sonrisas & Cía", "interes": "app_movil"}
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+def paginas(pdf: bytes) -> int:
+    return len(re.findall(rb"/Type /Page[^s]", pdf))
+
+
+class BotSimulado:
+    """Bot con la firma de send_document que guarda lo recibido."""
+
+    def __init__(self):
+        self.token = "123456:SIMULADO"
+        self.documentos = []
+
+    async def send_document(self, chat_id, document, filename=None, caption=None, **kwargs):
+        self.documentos.append((chat_id, document.read(), filename, caption))
+        return {"chat_id": chat_id}
+
+
+async def verify_pdf() -> bool:
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logo = os.path.join(tmp, "logo.png")
+        Image.new("RGB", (256, 256), (31, 42, 68)).save(logo)
+        empresa = {"id": 1, "nombre": "ORBITA", "slogan": "Soluciones Inteligentes de IA", "logo_path": logo}
+
+        # 1. Cotización larga: PDF válido de varias páginas
+        inicio = time.perf_counter()
+        pdf = CotizacionPDFRenderer().render(COTIZACION, LEAD, empresa)
+        primera_ms = (time.perf_counter() - inicio) * 1000
+        if pdf.startswith(b"%PDF") and pdf.rstrip().endswith(b"%%EOF") and paginas(pdf) > 1:
+            print_success(f"{ITEMS} ítems → PDF de {paginas(pdf)} páginas ({len(pdf) / 1024:.0f} KB)")
+        else:
+            print_error("El PDF no es válido o no se paginó")
+            ok = False
+
+        # 2. Recursos compartidos: el logo no se vuelve a decodificar
+        lector_logo = cotizacion_pdf._logos[logo][1]
+        inicio = time.perf_counter()
+        for _ in range(RENDERS):
+            CotizacionPDFRenderer().render(COTIZACION, LEAD, empresa)
+        media_ms = (time.perf_counter() - inicio) * 1000 / RENDERS
+        print(f"⏱️ Primer PDF {primera_ms:.0f} ms, siguientes {media_ms:.0f} ms de media")
+        if cotizacion_pdf._logos[logo][1] is lector_logo and cotizacion_pdf._estilos is not None:
+            print_success("Logo y estilos preparados una sola vez por proceso")
+        else:
+            print_error("El logo se volvió a cargar")
+            ok = False
+
+        # 3. Endpoint (autenticación y consulta sustituidas)
+        async def obtener_simulado(cotizacion_id, empresa_id):
+            return COTIZACION, LEAD
+
+        cotizaciones_module._obtener_cotizacion_y_lead = obtener_simulado
+        app = FastAPI()
+        app.include_router(cotizaciones_router, prefix="/cotizaciones")
+        app.dependency_overrides[get_current_active_user] = lambda: {"id": 1}
+        app.dependency_overrides[get_current_user_empresa] = lambda: empresa
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://orbita") as client:
+            bloques = []
+            async with client.stream("GET", "/cotizaciones/42/pdf") as r:
+                async for bloque in r.aiter_bytes():
+                    bloques.append(bloque)
+                cabeceras = r.headers
+        recibido = b"".join(bloques)
+        if (
+            cabeceras.get("content-type") == "application/pdf"
+            and 'filename="COT-20261018-042.pdf"' in cabeceras.get("content-disposition", "")
+            and recibido.startswith(b"%PDF") and paginas(recibido) == paginas(pdf)
+        ):
+            print_success(f"GET /cotizaciones/42/pdf transmitió {len(recibido) / 1024:.0f} KB como application/pdf")
+        else:
+            print_error(f"Respuesta del endpoint inesperada: {dict(cabeceras)}")
+            ok = False
+
+        # 4. Telegram: un único documento
+        bot = BotSimulado()
+        sender = TelegramSender(bot, per_chat_interval=0)
+        pdf = await generar_pdf_cotizacion(COTIZACION, LEAD, empresa)
+        await sender.enviar_documento("lead-1", pdf, "COT-20261018-042.pdf", caption="📄 Propuesta")
+        if len(bot.documentos) == 1 and bot.documentos[0][1] == pdf and bot.documentos[0][2].endswith(".pdf"):
+            print_success("La cotización llega a Telegram como un solo documento")
+        else:
+            print_error(f"Documentos enviados: {len(bot.documentos)}")
+            ok = False
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_pdf())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Consultas a Supabase fuera del event loop
+Usa consultas simuladas con .execute() bloqueante (como el cliente síncrono de
+Supabase) para validar:
+- Que llamar .execute() directamente congela el event loop
+- Que db_execute lo mantiene libre y ejecuta consultas en paralelo
+- Que la concurrencia queda acotada por DB_MAX_WORKERS
+- Que se registran tiempos por tabla:método
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_db_executor.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+os.environ["DB_MAX_WORKERS"] = "4"
+
+from database import db_execute, get_db_stats, shutdown_db_executor
+
+LATENCIA_DB_S = 0.1  # ~ round-trip HTTP a Supabase
+CONSULTAS = 12
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+class ConsultaSimulada:
+    """Imita un request builder de postgrest: path, http_method y execute() bloqueante."""
+
+    def __init__(self, tabla: str, latencia_s: float = LATENCIA_DB_S):
+        self.path = f"/{tabla}"
+        self.http_method = "GET"
+        self.latencia_s = latencia_s
+
+    def execute(self):
+        time.sleep(self.latencia_s)
+        return {"data": []}
+
+
+async def medir_bloqueo(trabajo) -> tuple:
+    """Ejecuta el trabajo junto a un latido de 10 ms y devuelve (duración, mayor pausa del loop)."""
+    pausas = []
+    terminado = False
+
+    async def latido():
+        anterior = time.perf_counter()
+        while not terminado:
+            await asyncio.sleep(0.01)
+            ahora = time.perf_counter()
+            pausas.append((ahora - anterior) * 1000)
+            anterior = ahora
+
+    tarea = asyncio.create_task(latido())
+    inicio = time.perf_counter()
+    await trabajo()
+    duracion = time.perf_counter() - inicio
+    terminado = True
+    await tarea
+    return duracion, max(pausas) if pausas else 0.0
+
+
+async def verify_executor() -> bool:
+    ok = True
+
+    # 1. Llamadas directas: cada .execute() bloquea el loop completo
+    async def directas():
+        async def una():
+            ConsultaSimulada("leads").execute()
+        await asyncio.gather(*(una() for _ in range(CONSULTAS)))
+
+    duracion_directa, pausa_directa = await medir_bloqueo(directas)
+    print(f"⏱️ Directo: {duracion_directa:.2f}s, mayor pausa del loop {pausa_directa:.0f} ms")
+
+    # 2. db_execute: en paralelo (limitado a 4) y con el loop libre
+    async def con_pool():
+        await asyncio.gather(*(db_execute(ConsultaSimulada("leads")) for _ in range(CONSULTAS)))
+
+    duracion_pool, pausa_pool = await medir_bloqueo(con_pool)
+    print(f"⏱️ db_execute: {duracion_pool:.2f}s, mayor pausa del loop {pausa_pool:.0f} ms")
+
+    if pausa_pool < 50 and pausa_directa >= LATENCIA_DB_S * 1000:
+        print_success("El event loop sigue atendiendo mientras las consultas corren en hilos")
+    else:
+        print_error("El event loop se bloquea con db_execute")
+        ok = False
+
+    stats = get_db_stats()
+    esperado = CONSULTAS / stats["max_concurrencia"] * LATENCIA_DB_S
+    if stats["en_curso_max"] == stats["max_concurrencia"] and duracion_pool >= esperado * 0.9:
+        print_success(f"Concurrencia acotada a {stats['max_concurrencia']} ({duracion_pool:.2f}s ≥ {esperado:.2f}s)")
+    else:
+        print_error(f"Límite de concurrencia no respetado: {stats}")
+        ok = False
+
+    # 3. Métricas por consulta y errores propagados
+    class ConsultaFallida(ConsultaSimulada):
+        def execute(self):
+            raise RuntimeError("supabase no disponible")
+
+    try:
+        await db_execute(ConsultaFallida("conversations"))
+        print_error("El error de la consulta no se propagó")
+        ok = False
+    except RuntimeError:
+        print_success("Los errores de la consulta se propagan al llamador")
+
+    stats = get_db_stats()
+    print(f"📊 {stats}")
+    if stats["por_consulta"].get("leads:GET", {}).get("muestras") == CONSULTAS and stats["errores"] == 1:
+        print_success("Tiempos registrados por tabla:método")
+    else:
+        print_error("Métricas por consulta incompletas")
+        ok = False
+
+    shutdown_db_executor()
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_executor())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Ventana de historial acotada por tokens
+Simula una conversación larga contra el servidor LLM simulado y comprueba que
+el tamaño del prompt se estabiliza en lugar de crecer con cada mensaje.
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_history_window.py
+"""
+
+import asyncio
+import os
+import sys
+
+from stub_llm_server import StubLLMServer
+
+TURNOS = 60
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+async def verify_window() -> bool:
+    server = StubLLMServer(latency_ms=5)
+    server.start()
+
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+
+    # Sin Supabase: el registro de acciones no forma parte de la verificación
+    import agents.base_agent
+
+    async def log_noop(*args, **kwargs):
+        return {}
+
+    agents.base_agent.log_agent_action = log_noop
+
+    from agents.conversacional import ConversacionalAgent
+    from config import HISTORY_TOKEN_BUDGETS
+    from utils.groq_client import close_groq_client
+    from utils.tokens import estimate_tokens, truncate_to_tokens
+
+    ok = True
+
+    # 1. Aproximación de tokens
+    texto = "¿Cuánto cuesta desarrollar una aplicación móvil para mi restaurante?"
+    tokens = estimate_tokens(texto)
+    if 12 <= tokens <= 25:
+        print_success(f"estimate_tokens en rango razonable ({tokens} tokens para {len(texto)} caracteres)")
+    else:
+        print_error(f"estimate_tokens fuera de rango: {tokens}")
+        ok = False
+    if estimate_tokens(truncate_to_tokens(texto * 20, 30)) <= 30:
+        print_success("truncate_to_tokens respeta el límite")
+    else:
+        print_error("truncate_to_tokens excede el límite")
+        ok = False
+
+    # 2. Conversación larga: el prompt debe estabilizarse
+    agent = ConversacionalAgent()
+    presupuesto = HISTORY_TOKEN_BUDGETS["conversacional"]
+    prompt_tokens = []
+    server_tokens = []
+    for turno in range(TURNOS):
+        server.reset_counters()
+        result = await agent.generate_response(
+            f"Mensaje {turno}: quiero saber más sobre la tienda online y los plazos de entrega del proyecto",
+            session_id="sesion-larga"
+        )
+        prompt_tokens.append(result["prompt_tokens"])
+        server_tokens.append(server.prompt_tokens_total)
+
+    print(f"\n📈 prompt_tokens por turno: {prompt_tokens[:3]} ... {prompt_tokens[-3:]}")
+    print(f"   tokens vistos por el stub: {server_tokens[:3]} ... {server_tokens[-3:]}")
+
+    _, history_tokens = await agent.memory_manager.get_history_window("sesion-larga", presupuesto)
+    if history_tokens <= presupuesto:
+        print_success(f"Historial dentro del presupuesto ({history_tokens}/{presupuesto} tokens)")
+    else:
+        print_error(f"Historial excede el presupuesto ({history_tokens}/{presupuesto})")
+        ok = False
+
+    ultimos = prompt_tokens[TURNOS // 2:]
+    if max(ultimos) - min(ultimos) <= 50:
+        print_success(f"Prompt estable tras llenar la ventana (máx {max(ultimos)}, mín {min(ultimos)})")
+    else:
+        print_error(f"El prompt sigue creciendo ({min(ultimos)} → {max(ultimos)})")
+        ok = False
+
+    await close_groq_client()
+    server.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_window())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Extracción de JSON en respuestas de los agentes
+Con respuestas típicas de LLM (JSON limpio, envuelto en texto o ```json, comas
+finales, comillas simples, True/None, rangos copiados del ejemplo, palabras sin
+comillas con letras no ASCII, cortadas por max_tokens) valida:
+- Tasa de parseo por agente: json.loads directo (antes) vs parse_llm_json (ahora)
+- Que los esquemas rechazan objetos sin los campos requeridos y limpian opcionales
+- Que JsonExtractor indica el cierre del objeto para dejar de leer el stream
+- Las estadísticas por agente que expone /agentes/status
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_json_extract.py
+"""
+
+import json
+import sys
+
+from utils.json_extract import JsonExtractor, extraer_json, get_json_parse_stats, parse_llm_json
+
+SOBRE = '{"selected_agent": "captador", "confidence": 0.85, "reasoning": "Interés", "extracted_data": {}, "message_type": "consulta", "response": "¡Con gusto!"}'
+
+# (tarea, respuesta del modelo)
+RESPUESTAS = [
+    ("orchestrator.sobre", SOBRE),
+    ("orchestrator.sobre", f"```json\n{SOBRE}\n```"),
+    ("orchestrator.sobre", f"Aquí está el análisis:\n{SOBRE}\nAvísame si necesitas algo más {{}}"),
+    ("orchestrator.enrutamiento", "{'selected_agent': 'identidad', 'confidence': 0.0-1.0, 'reasoning': 'Pregunta por la empresa',}"),
+    ("orchestrator.enrutamiento", '{"selected_agent": "analitico", "confidence": 0.7, "reasoning": "Pide métricas del mes"'),
+    ("captador.extraccion", '{"interes": "tienda online", "empresa": null, "cargo": "Gerente", "presupuesto": 5000, "timeline": None}'),
+    ("captador.extraccion", 'Datos extraídos:\n{\n  interes: "app móvil",\n  nivel_urgencia: "alto",\n}'),
+    ("conversacional.analisis", '{"type": "information", "formality": "casual", "confidence": 0.9, "key_topics": ["precios"]}'),
+    ("conversacional.analisis", '```\n{"type": "complaint", "emotional_tone": "frustrated", // tono detectado\n "key_topics": ["soporte"]}\n```'),
+    ("identidad.inferencia", '{"professional_profile": {"experience_level": "senior", "confidence": 0.8}, "motivations": {"primary_drivers": ["costo"]}}'),
+    ("identidad.inferencia", 'Perfil inferido: {"personal_characteristics": {"communication_style": "directo", "technical_level": "medio", "urgency": "alta"'),
+    ("analitico.interpretacion", '{"analysis_type": "performance", "target_metrics": ["conversion"], "confidence": 0.8}'),
+    ("analitico.insights", 'Resultados:\n```json\n{"key_findings": [{"finding": "Subió la conversión", "impact": "alto", "confidence": 0.9}], "next_steps": ["Escalar campaña",]}\n```'),
+    ("comunicacion.analisis", '{"communication_objective": "engagement", "campaign_type": "nurturing", "preferred_channels": ["email", "whatsapp"]}'),
+    ("comunicacion.contenido", '{"content_variations": {"email": {"subject_lines": ["Hola"], "main_content": "Contenido\ncon salto"}}}'),
+    ("comunicacion.cotizacion", '{"titulo": "Propuesta web", "items": [{"nombre": "Sitio", "cantidad": 1, "precio_unitario": 1500.0}], "fases": [{"nombre": "Diseño", "duracion": "2 semanas"}, {"nombre": "Desarr'),
+    ("comunicacion.cotizacion", "Lo siento, no puedo generar esa cotización ahora."),
+]
+
+# Objetos válidos como JSON pero que no cumplen el esquema de su tarea
+FUERA_DE_ESQUEMA = [
+    ("orchestrator.enrutamiento", '{"agent": "captador", "confidence": 0.9}'),
+    ("comunicacion.cotizacion", '{"titulo": "Propuesta", "items": "sitio web"}'),
+]
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+def json_loads_directo(texto: str) -> bool:
+    try:
+        return isinstance(json.loads(texto), dict)
+    except json.JSONDecodeError:
+        return False
+
+
+def verify_json_extract() -> bool:
+    ok = True
+
+    # 1. Tasa de parseo antes / después
+    antes = sum(json_loads_directo(texto) for _, texto in RESPUESTAS)
+    resultados = [parse_llm_json(texto, tarea) for tarea, texto in RESPUESTAS]
+    ahora = sum(r is not None for r in resultados)
+    print(f"📥 {len(RESPUESTAS)} respuestas: json.loads {antes}/{len(RESPUESTAS)}, parse_llm_json {ahora}/{len(RESPUESTAS)}")
+    if ahora == len(RESPUESTAS) - 1 and resultados[-1] is None:
+        print_success("Se recuperan todas las respuestas con JSON (la de solo texto cae al fallback del agente)")
+    else:
+        fallidas = [RESPUESTAS[i][1][:60] for i, r in enumerate(resultados) if r is None]
+        print_error(f"No se recuperaron: {fallidas}")
+        ok = False
+
+    rango = resultados[3]
+    cortada = resultados[15]
+    captador = resultados[5]
+    if (
+        rango["selected_agent"] == "identidad" and rango["confidence"] == 0.0
+        and len(cortada["items"]) == 1 and cortada["fases"][-1]["nombre"] == "Desarr"
+        and captador["timeline"] is None and captador["presupuesto"] == 5000
+    ):
+        print_success("Rangos del ejemplo, comillas simples, None y respuestas cortadas se reparan")
+    else:
+        print_error(f"Reparación inesperada: {rango} / {cortada} / {captador}")
+        ok = False
+
+    # Palabras sin comillas que empiezan con una letra no ASCII
+    sin_comillas = [extraer_json('{"a": ético}')[0], extraer_json('{"a": 1, ñ: 2}')[0]]
+    if sin_comillas == [{"a": "ético"}, {"a": 1, "ñ": 2}]:
+        print_success("Valores y claves sin comillas con tildes o ñ se reparan sin error")
+    else:
+        print_error(f"Reparación con letras no ASCII: {sin_comillas}")
+        ok = False
+
+    # 2. Esquemas
+    rechazados = [parse_llm_json(texto, tarea) for tarea, texto in FUERA_DE_ESQUEMA]
+    limpio = parse_llm_json('{"type": "info", "confidence": "alta", "key_topics": "precios"}', "conversacional.analisis")
+    if all(r is None for r in rechazados) and limpio == {"type": "info"}:
+        print_success("Esquemas: faltan requeridos → fallback; opcionales con tipo incorrecto → se descartan")
+    else:
+        print_error(f"Validación de esquema: {rechazados} / {limpio}")
+        ok = False
+
+    # 3. Stream: el objeto se da por cerrado sin leer lo que el modelo agrega después
+    texto = SOBRE + "\n\nEspero que esta respuesta te sea útil. " * 20
+    chunks = [texto[i:i + 4] for i in range(0, len(texto), 4)]
+    extractor = JsonExtractor()
+    leidos = next(n for n, chunk in enumerate(chunks, start=1) if extractor.feed(chunk))
+    obj = parse_llm_json(extractor.texto, "orchestrator.sobre")
+    if obj and obj["selected_agent"] == "captador" and leidos < len(chunks) and extractor.texto == SOBRE:
+        print_success(f"Objeto cerrado tras {leidos}/{len(chunks)} chunks: el resto del stream no se lee")
+    else:
+        print_error(f"El cierre del objeto no se detectó ({leidos}/{len(chunks)})")
+        ok = False
+
+    # 4. Estadísticas por agente
+    stats = get_json_parse_stats()
+    print("\n📊 Parseo por agente:")
+    for agente, s in stats.items():
+        print(
+            f"   {agente:<15} tasa {s['tasa_exito']:.0%}  "
+            f"(directo {s['directo']}, extraído {s['extraido']}, reparado {s['reparado']}, "
+            f"esquema {s['esquema_invalido']}, fallido {s['fallido']})"
+        )
+    if set(stats) == {"orchestrator", "captador", "conversacional", "identidad", "analitico", "comunicacion"}:
+        print_success("Estadísticas para los seis agentes")
+    else:
+        print_error(f"Agentes en estadísticas: {sorted(stats)}")
+        ok = False
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = verify_json_extract()
+    sys.exit(0 if resultado else 1)
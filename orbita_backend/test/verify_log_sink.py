@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Sink de agent_logs con escritura diferida
+Usa una función de insert que simula la latencia de Supabase para validar:
+- Que encolar no paga el round-trip a la base de datos
+- Que las filas se agrupan en inserts masivos por tamaño o intervalo
+- Las políticas de descarte cuando la base de datos está lenta
+- Que stop() vacía la cola al cerrar
+- Que los lotes pasan por db_execute (pool acotado y estadísticas de consultas)
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_log_sink.py
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from database import db_execute, get_db_stats
+from utils.log_sink import LogSink
+
+LATENCIA_DB_S = 0.08  # ~ round-trip HTTP a Supabase
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+class TablaSimulada:
+    """Insert con latencia fija, ejecutado por db_execute como el de Supabase."""
+
+    def __init__(self, latencia_s: float):
+        self.latencia_s = latencia_s
+        self.filas = []
+        self.lotes = 0
+
+    async def insert(self, table, rows):
+        await db_execute(InsertSimulado(self, rows), label=f"{table}:POST")
+
+
+class InsertSimulado:
+    """Consulta con execute() síncrono, como un query builder de Supabase."""
+
+    def __init__(self, tabla: TablaSimulada, rows: list):
+        self.tabla = tabla
+        self.rows = rows
+
+    def execute(self):
+        time.sleep(self.tabla.latencia_s)
+        self.tabla.filas.extend(self.rows)
+        self.tabla.lotes += 1
+
+
+def fila(i: int) -> dict:
+    return {"agent_name": "captador", "action": "generate_response", "session_id": f"s{i}", "details": {"i": i}}
+
+
+async def verify_sink() -> bool:
+    ok = True
+
+    # 1. Latencia de encolar vs insert directo
+    tabla = TablaSimulada(LATENCIA_DB_S)
+    consultas_antes = get_db_stats()["consultas"]
+    sink = LogSink(batch_size=50, flush_interval=0.2, insert_fn=tabla.insert)
+    latencias = []
+    for i in range(500):
+        t0 = time.perf_counter()
+        await sink.put(fila(i))
+        latencias.append((time.perf_counter() - t0) * 1000)
+        if i % 50 == 0:
+            await asyncio.sleep(0)
+    await sink.stop()
+
+    p50 = statistics.median(latencias)
+    print(f"⏱️ put() p50={p50:.4f} ms vs insert directo ~{LATENCIA_DB_S * 1000:.0f} ms")
+    if p50 < 1:
+        print_success("Encolar no espera a la base de datos")
+    else:
+        print_error("put() está bloqueando")
+        ok = False
+
+    if len(tabla.filas) == 500 and tabla.lotes <= 15:
+        print_success(f"500 filas insertadas en {tabla.lotes} lotes")
+    else:
+        print_error(f"Filas: {len(tabla.filas)}, lotes: {tabla.lotes}")
+        ok = False
+    consultas = get_db_stats()["consultas"] - consultas_antes
+    if consultas == tabla.lotes:
+        print_success(f"Los {consultas} lotes pasan por db_execute (pool acotado, visibles en get_db_stats)")
+    else:
+        print_error(f"Lotes fuera de db_execute: {tabla.lotes} lotes, {consultas} consultas")
+        ok = False
+    print(f"📊 {sink.get_stats()}")
+
+    # 2. Vaciado por intervalo (lote incompleto)
+    tabla = TablaSimulada(0.0)
+    sink = LogSink(batch_size=100, flush_interval=0.1, insert_fn=tabla.insert)
+    for i in range(3):
+        await sink.put(fila(i))
+    await asyncio.sleep(0.3)
+    if len(tabla.filas) == 3:
+        print_success("Lotes incompletos se envían al vencer el intervalo")
+    else:
+        print_error(f"Intervalo no respetado ({len(tabla.filas)} filas)")
+        ok = False
+    await sink.stop()
+
+    # 3. Base de datos lenta: cola acotada con políticas de descarte
+    for politica in ("drop_oldest", "drop_newest", "block"):
+        tabla = TablaSimulada(0.5)
+        sink = LogSink(
+            batch_size=10, flush_interval=0.05, max_queue=20,
+            drop_policy=politica, block_timeout=0.01, insert_fn=tabla.insert
+        )
+        for i in range(200):
+            await sink.put(fila(i))
+        stats = sink.get_stats()
+        await sink.stop()
+
+        if stats["profundidad_max"] <= 20 and stats["descartadas"] > 0:
+            print_success(f"{politica}: cola acotada ({stats['profundidad_max']}/20), {stats['descartadas']} descartadas")
+        else:
+            print_error(f"{politica}: {stats}")
+            ok = False
+        if politica == "drop_oldest" and tabla.filas[-1]["details"]["i"] != 199:
+            print_error("drop_oldest debería conservar las filas más recientes")
+            ok = False
+
+    # 4. Errores de la base de datos: reintentos y descarte del lote
+    async def insert_falla(table, rows):
+        raise RuntimeError("supabase no disponible")
+
+    sink = LogSink(batch_size=5, flush_interval=0.05, max_retries=2, insert_fn=insert_falla)
+    for i in range(5):
+        await sink.put(fila(i))
+    await sink.stop()
+    if sink.stats["lotes_fallidos"] == 1 and sink.stats["descartadas"] == 5:
+        print_success("Lotes que fallan tras los reintentos se descartan sin romper el sink")
+    else:
+        print_error(f"Manejo de errores inesperado: {sink.stats}")
+        ok = False
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_sink())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Caché de sesión por chat (lead + pausa)
+Valida, con loaders simulados en lugar de Supabase:
+- Que una ráfaga de mensajes del mismo chat consulta la BD una sola vez
+- Que el estado "no pausado" también se cachea y que los None no
+- Que las entradas expiran con el TTL
+- Que /pausa del bot de admin (invalidar) se ve en el siguiente mensaje
+- Que si la suscripción de Redis se cae se usa un TTL corto y se reconecta
+- Con REDIS_URL accesible: que la invalidación llega a otro proceso por pub/sub
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_session_cache.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from utils.session_cache import ChatSessionCache
+
+LATENCIA_BD_S = 0.02
+MENSAJES = 50
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+class BDSimulada:
+    """Tablas leads y telegram_bot_sessions en memoria, contando consultas."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.leads = {"1001": {"id": 1, "nombre": "Ana", "status": "nuevo"}}
+        self.pausados = set()
+
+    async def buscar_lead(self, chat_id: str):
+        self.consultas += 1
+        await asyncio.sleep(LATENCIA_BD_S)
+        return self.leads.get(chat_id)
+
+    async def esta_pausado(self, chat_id: str) -> bool:
+        self.consultas += 1
+        await asyncio.sleep(LATENCIA_BD_S)
+        return chat_id in self.pausados
+
+
+class RedisSimulado:
+    """Redis con pub/sub en memoria cuya suscripción falla las primeras `fallos` veces."""
+
+    def __init__(self, fallos: int):
+        self.fallos = fallos
+        self.suscripciones = 0
+        self.colas = []
+
+    def pubsub(self):
+        return PubSubSimulado(self)
+
+    async def publish(self, canal, data):
+        for cola in self.colas:
+            cola.put_nowait({"type": "message", "data": data})
+
+
+class PubSubSimulado:
+    def __init__(self, redis: RedisSimulado):
+        self.redis = redis
+        self.cola = asyncio.Queue()
+
+    async def subscribe(self, canal):
+        self.redis.suscripciones += 1
+        if self.redis.fallos > 0:
+            self.redis.fallos -= 1
+            raise ConnectionError("Redis no disponible")
+        self.redis.colas.append(self.cola)
+
+    async def listen(self):
+        while True:
+            yield await self.cola.get()
+
+    async def reset(self):
+        if self.cola in self.redis.colas:
+            self.redis.colas.remove(self.cola)
+
+
+async def procesar_mensaje(cache: ChatSessionCache, bd: BDSimulada, chat_id: str):
+    """Lo que hace LeadsBotHandler antes de llamar a los agentes."""
+    pausado = await cache.get_or_load("pausado", chat_id, lambda: bd.esta_pausado(chat_id))
+    if pausado:
+        return None
+    return await cache.get_or_load("lead", chat_id, lambda: bd.buscar_lead(chat_id))
+
+
+async def verify_session_cache() -> bool:
+    ok = True
+    bd = BDSimulada()
+    cache = ChatSessionCache(ttl_seconds=0.5)
+
+    # 1. Ráfaga de mensajes del mismo chat
+    inicio = time.perf_counter()
+    for _ in range(MENSAJES):
+        await procesar_mensaje(cache, bd, "1001")
+    duracion = time.perf_counter() - inicio
+    print(f"⏱️ {MENSAJES} mensajes en {duracion * 1000:.1f} ms "
+          f"(sin caché: {MENSAJES * 2 * LATENCIA_BD_S * 1000:.0f} ms)")
+    if bd.consultas == 2:
+        print_success("Lead y pausa consultados una sola vez por chat")
+    else:
+        print_error(f"Se hicieron {bd.consultas} consultas")
+        ok = False
+
+    # 2. Un lead inexistente no se cachea (se creará en el siguiente paso)
+    bd.consultas = 0
+    for _ in range(3):
+        await cache.get_or_load("lead", "2002", lambda: bd.buscar_lead("2002"))
+    if bd.consultas == 3:
+        print_success("Los leads inexistentes (None) no se cachean")
+    else:
+        print_error("Se cacheó un lead inexistente")
+        ok = False
+
+    # 3. /pausa desde el bot de admin: invalidación explícita
+    bd.pausados.add("1001")
+    await cache.invalidar("1001")
+    if await procesar_mensaje(cache, bd, "1001") is None:
+        print_success("La pausa del admin se aplica en el siguiente mensaje")
+    else:
+        print_error("El bot siguió respondiendo tras /pausa")
+        ok = False
+
+    # 4. Expiración por TTL (cambios que no pasan por el bot de admin)
+    bd.pausados.discard("1001")
+    await asyncio.sleep(0.6)
+    if await procesar_mensaje(cache, bd, "1001") is not None:
+        print_success("Las entradas expiran con el TTL")
+    else:
+        print_error("La entrada no expiró")
+        ok = False
+
+    # 5. Los errores del loader se propagan y no se cachean
+    async def falla():
+        raise RuntimeError("Supabase caído")
+    try:
+        await cache.get_or_load("pausado", "3003", falla)
+        print_error("El error del loader no se propagó")
+        ok = False
+    except RuntimeError:
+        if await cache.get_or_load("pausado", "3003", lambda: bd.esta_pausado("3003")) is False:
+            print_success("Los errores de la BD no se cachean")
+        else:
+            ok = False
+
+    print(f"📊 {cache.get_stats()}")
+
+    # 6. Caída de la suscripción: TTL corto y reconexión con backoff
+    redis = RedisSimulado(fallos=2)
+    caido = ChatSessionCache(ttl_seconds=60, ttl_sin_pubsub_seconds=0.1)
+    caido._redis = redis
+    caido.BACKOFF_INICIAL_S = 0.05
+    otro = ChatSessionCache(ttl_seconds=60)
+    otro._redis = redis
+    try:
+        bd.pausados.clear()
+        await procesar_mensaje(caido, bd, "1001")
+        await asyncio.sleep(0.01)
+        ttl_corto = caido.get_stats()["ttl_vigente_segundos"] == 0.1
+        await asyncio.sleep(0.3)  # dos reintentos: 0.05 s + 0.1 s
+        stats = caido.get_stats()
+        bd.pausados.add("1001")
+        await otro.invalidar("1001")
+        await asyncio.sleep(0.01)
+        pausado = await procesar_mensaje(caido, bd, "1001") is None
+        if (ttl_corto and redis.suscripciones == 3 and stats["pubsub_suscrito"]
+                and stats["caidas_pubsub"] == 2 and stats["reconexiones_pubsub"] == 1 and pausado):
+            print_success("Con la suscripción caída se usa un TTL corto y se reconecta con backoff")
+        else:
+            print_error(f"Reconexión incorrecta: ttl_corto={ttl_corto}, "
+                        f"suscripciones={redis.suscripciones}, pausado={pausado}, {stats}")
+            ok = False
+    finally:
+        await caido.close()
+
+    # 7. Invalidación entre procesos por Redis pub/sub
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        print("⏭️ REDIS_URL no definido: se omite la prueba de pub/sub")
+        return ok
+
+    bot_leads = ChatSessionCache(ttl_seconds=60, redis_url=redis_url)
+    bot_admin = ChatSessionCache(ttl_seconds=60, redis_url=redis_url)
+    try:
+        bd.pausados.clear()
+        await procesar_mensaje(bot_leads, bd, "1001")
+        await asyncio.sleep(0.2)  # dar tiempo a la suscripción
+        bd.pausados.add("1001")
+        await bot_admin.invalidar("1001")
+        await asyncio.sleep(0.2)
+        if await procesar_mensaje(bot_leads, bd, "1001") is None:
+            print_success("La invalidación llega al otro proceso por pub/sub")
+        else:
+            print_error("El otro proceso no recibió la invalidación")
+            ok = False
+    finally:
+        await bot_leads.close()
+        await bot_admin.close()
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_session_cache())
+    sys.exit(0 if resultado else 1)
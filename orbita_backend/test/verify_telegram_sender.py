@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Planificador de envíos a Telegram
+Usa un bot simulado (sin red) que registra la hora de cada send_message para validar:
+- Que el total de envíos no supera TELEGRAM_SEND_RATE_PER_SECOND
+- Que los mensajes de un mismo chat se espacian y llegan en orden
+- Que las respuestas a leads adelantan a una difusión en curso
+- Que un 429 (RetryAfter) se reintenta tras retry_after
+- Que un Markdown inválido se reenvía como texto plano
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_telegram_sender.py
+"""
+
+import asyncio
+import sys
+import time
+from collections import defaultdict
+
+from telegram.error import BadRequest, RetryAfter
+
+from utils.telegram_sender import (
+    TelegramSender, PRIORIDAD_DIFUSION, PRIORIDAD_RESPUESTA, dividir_texto
+)
+
+TASA = 30
+INTERVALO_CHAT = 0.2
+CHATS_DIFUSION = 90
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+class BotSimulado:
+    """Bot con la firma de send_message que registra (instante, chat_id, texto, kwargs)."""
+
+    def __init__(self):
+        self.token = "123456:SIMULADO"
+        self.envios = []
+        self.fallos_429 = defaultdict(int)  # chat_id → 429 pendientes de devolver
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(0.005)
+        if self.fallos_429[chat_id] > 0:
+            self.fallos_429[chat_id] -= 1
+            raise RetryAfter(1)
+        if kwargs.get("parse_mode") and "_" in text:
+            raise BadRequest("Can't parse entities: can't find end of the entity")
+        self.envios.append((time.monotonic(), chat_id, text, kwargs))
+        return {"chat_id": chat_id, "text": text}
+
+
+def max_en_ventana(instantes: list, ventana: float = 1.0) -> int:
+    instantes = sorted(instantes)
+    maximo, i = 0, 0
+    for j, t in enumerate(instantes):
+        while t - instantes[i] >= ventana:
+            i += 1
+        maximo = max(maximo, j - i + 1)
+    return maximo
+
+
+async def verify_sender() -> bool:
+    ok = True
+
+    # 1. Difusión a muchos chats + respuestas a leads que llegan en medio
+    bot = BotSimulado()
+    sender = TelegramSender(bot, rate_per_second=TASA, per_chat_interval=INTERVALO_CHAT)
+    inicio = time.monotonic()
+    difusion = asyncio.create_task(sender.difundir(
+        [f"admin-{i}" for i in range(CHATS_DIFUSION)], "Resumen diario", prioridad=PRIORIDAD_DIFUSION
+    ))
+    await asyncio.sleep(0.3)
+    t_respuesta = time.monotonic()
+    await sender.enviar("lead-1", "Respuesta al lead", prioridad=PRIORIDAD_RESPUESTA)
+    espera_respuesta = time.monotonic() - t_respuesta
+    resultados = await difusion
+    duracion = time.monotonic() - inicio
+
+    pico = max_en_ventana([t for t, *_ in bot.envios])
+    print(f"⏱️ {len(bot.envios)} envíos en {duracion:.2f}s, pico {pico} en 1 s (límite {TASA})")
+    if pico <= TASA + 1 and all(e is None for e in resultados.values()):
+        print_success(f"Difusión a {CHATS_DIFUSION} chats sin superar el límite global")
+    else:
+        print_error("Se superó el límite global o fallaron envíos")
+        ok = False
+
+    if espera_respuesta < 0.2:
+        print_success(f"La respuesta al lead adelantó a la difusión (esperó {espera_respuesta * 1000:.0f} ms)")
+    else:
+        print_error(f"La respuesta esperó {espera_respuesta:.2f}s detrás de la difusión")
+        ok = False
+
+    # 2. Varios mensajes al mismo chat: espaciados y en orden
+    bot = BotSimulado()
+    sender = TelegramSender(bot, rate_per_second=TASA, per_chat_interval=INTERVALO_CHAT)
+    partes = dividir_texto("\n".join(f"Línea {i} de la cotización " * 10 for i in range(60)), 4000)
+    await asyncio.gather(*(sender.enviar("lead-2", f"parte {i}") for i in range(len(partes))))
+    enviados = await sender.enviar_largo("lead-3", "\n".join(partes))
+    instantes = [t for t, chat, *_ in bot.envios if chat == "lead-2"]
+    separaciones = [b - a for a, b in zip(instantes, instantes[1:])]
+    textos = [texto for _, chat, texto, _ in bot.envios if chat == "lead-2"]
+    if min(separaciones) >= INTERVALO_CHAT * 0.95 and textos == [f"parte {i}" for i in range(len(partes))]:
+        print_success(f"Mensajes del mismo chat espaciados ≥ {INTERVALO_CHAT}s y en orden")
+    else:
+        print_error(f"Separaciones {separaciones} / orden {textos}")
+        ok = False
+
+    if len(enviados) == len(partes) and all(len(p) <= 4000 for p in partes):
+        print_success(f"Texto largo dividido en {len(partes)} mensajes de ≤ 4000 caracteres")
+    else:
+        print_error("División de texto largo incorrecta")
+        ok = False
+
+    # 3. 429 con retry_after
+    bot.fallos_429["lead-4"] = 1
+    t0 = time.monotonic()
+    await sender.enviar("lead-4", "Hola")
+    if sender.stats["reintentos_429"] == 1 and time.monotonic() - t0 >= 1:
+        print_success("RetryAfter respetado y mensaje reenviado")
+    else:
+        print_error("No se respetó el retry_after")
+        ok = False
+
+    # 4. Markdown inválido
+    await sender.enviar("lead-5", "precio_base *sin cerrar", parse_mode="Markdown")
+    ultimo = bot.envios[-1]
+    if ultimo[1] == "lead-5" and "parse_mode" not in ultimo[3] and sender.stats["fallback_texto_plano"] == 1:
+        print_success("Markdown inválido reenviado como texto plano")
+    else:
+        print_error("Falló el fallback a texto plano")
+        ok = False
+
+    print(f"📊 {sender.get_stats()}")
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_sender())
+    sys.exit(0 if resultado else 1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Despachador de updates por chat
+Simula muchos leads escribiendo a la vez, con algunos updates lentos (notas de
+voz / LLM), y valida:
+- Que los updates de un mismo chat se procesan en orden y nunca en paralelo
+- Que chats distintos avanzan en paralelo, sin superar el tope global
+- Que un chat lento no retrasa a los demás
+- Que submit() no espera al procesamiento
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_update_dispatcher.py
+"""
+
+import asyncio
+import sys
+import time
+from collections import defaultdict
+
+from utils.update_dispatcher import UpdateDispatcher
+
+CHATS = 40
+UPDATES_POR_CHAT = 5
+MAX_IN_FLIGHT = 8
+LATENCIA_S = 0.02        # respuesta normal
+LATENCIA_LENTA_S = 1.0   # transcripción + LLM lento
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+async def verify_dispatcher() -> bool:
+    ok = True
+    procesados = defaultdict(list)
+    activos_por_chat = defaultdict(int)
+    solapes = []
+    fin_por_chat = {}
+
+    async def handler(chat_id, n, latencia):
+        activos_por_chat[chat_id] += 1
+        if activos_por_chat[chat_id] > 1:
+            solapes.append(chat_id)
+        await asyncio.sleep(latencia)
+        procesados[chat_id].append(n)
+        activos_por_chat[chat_id] -= 1
+        fin_por_chat[chat_id] = time.perf_counter()
+
+    dispatcher = UpdateDispatcher(handler, max_in_flight=MAX_IN_FLIGHT)
+
+    inicio = time.perf_counter()
+    max_submit_ms = 0.0
+    for n in range(UPDATES_POR_CHAT):
+        for chat_id in range(CHATS):
+            # El chat 0 es lento en todos sus updates
+            latencia = LATENCIA_LENTA_S if chat_id == 0 else LATENCIA_S
+            t0 = time.perf_counter()
+            dispatcher.submit(chat_id, chat_id, n, latencia)
+            max_submit_ms = max(max_submit_ms, (time.perf_counter() - t0) * 1000)
+    await dispatcher.drain()
+    total = time.perf_counter() - inicio
+    stats = dispatcher.get_stats()
+
+    secuencial = LATENCIA_LENTA_S * UPDATES_POR_CHAT + LATENCIA_S * UPDATES_POR_CHAT * (CHATS - 1)
+    print(f"⏱️ {CHATS * UPDATES_POR_CHAT} updates en {total:.2f}s (uno a uno: ~{secuencial:.1f}s)")
+    print(f"📊 {stats}")
+
+    if max_submit_ms < 1:
+        print_success(f"submit() no espera al procesamiento (máx {max_submit_ms:.3f} ms)")
+    else:
+        print_error(f"submit() tardó {max_submit_ms:.2f} ms")
+        ok = False
+
+    if not solapes and all(procesados[c] == list(range(UPDATES_POR_CHAT)) for c in range(CHATS)):
+        print_success("Cada chat se procesó en orden y sin solapes")
+    else:
+        print_error(f"Orden roto o solapes en chats {set(solapes)}")
+        ok = False
+
+    if 1 < stats["en_proceso_max"] <= MAX_IN_FLIGHT:
+        print_success(f"Chats en paralelo hasta el tope ({stats['en_proceso_max']}/{MAX_IN_FLIGHT})")
+    else:
+        print_error(f"Concurrencia inesperada: {stats['en_proceso_max']}")
+        ok = False
+
+    ultimo_rapido = max(t for c, t in fin_por_chat.items() if c != 0) - inicio
+    if ultimo_rapido < LATENCIA_LENTA_S:
+        print_success(f"El chat lento no frena a los demás (resto terminado en {ultimo_rapido:.2f}s)")
+    else:
+        print_error(f"Los chats rápidos esperaron al lento ({ultimo_rapido:.2f}s)")
+        ok = False
+
+    # Errores del handler no detienen la cola del chat
+    async def handler_falla(n):
+        if n == 0:
+            raise RuntimeError("fallo en el primer update")
+        procesados["falla"].append(n)
+
+    dispatcher = UpdateDispatcher(handler_falla, max_in_flight=2, max_pending_per_chat=3)
+    aceptados = [dispatcher.submit("chat", n) for n in range(5)]
+    await dispatcher.drain()
+    if procesados["falla"] == [1, 2] and aceptados == [True, True, True, False, False]:
+        print_success("Un error no corta la cola del chat y el tope por chat descarta el exceso")
+    else:
+        print_error(f"Procesados {procesados['falla']}, aceptados {aceptados}")
+        ok = False
+
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_dispatcher())
+    sys.exit(0 if resultado else 1)
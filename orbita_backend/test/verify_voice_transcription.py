@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Script de Verificación - Transcripción de notas de voz en memoria
+Usa el endpoint /audio/transcriptions del servidor simulado para validar:
+- Que el audio llega completo a Whisper sin escribir archivos temporales
+- Que las transcripciones simultáneas respetan TRANSCRIPTION_MAX_CONCURRENT
+- Que una nota reenviada (mismo file_unique_id) no vuelve a transcribirse
+- Que dos copias del mismo audio recibidas a la vez comparten una transcripción
+
+Ejecutar desde orbita_backend/:
+    PYTHONPATH=. python test/verify_voice_transcription.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from stub_llm_server import StubLLMServer
+
+LATENCIA_MS = 150
+MAX_CONCURRENTES = 3
+NOTAS = 12
+TAM_AUDIO = 48_000  # ~30 s de OGG/Opus
+
+
+def print_success(text):
+    print(f"✅ {text}")
+
+
+def print_error(text):
+    print(f"❌ {text}")
+
+
+async def verify_transcription() -> bool:
+    server = StubLLMServer(latency_ms=LATENCIA_MS)
+    server.start()
+
+    os.environ["GROQ_API_KEY"] = "stub-key"
+    os.environ["GROQ_BASE_URL"] = server.base_url
+
+    from utils.groq_client import close_groq_client
+    from utils.transcription import VoiceTranscriber
+
+    ok = True
+    transcriber = VoiceTranscriber(max_concurrent=MAX_CONCURRENTES)
+    descargas = []
+
+    def descarga_simulada(nota: int):
+        """Imita telegram.File.download_to_memory: escribe el OGG en el buffer."""
+        async def descargar(buffer):
+            descargas.append(nota)
+            buffer.write(bytes([nota % 256]) * TAM_AUDIO)
+        return descargar
+
+    archivos_tmp_antes = set(os.listdir(tempfile.gettempdir()))
+
+    # 1. Notas distintas a la vez: limitadas por el semáforo
+    inicio = time.perf_counter()
+    textos = await asyncio.gather(*(
+        transcriber.transcribir(f"nota-{i}", descarga_simulada(i)) for i in range(NOTAS)
+    ))
+    duracion = time.perf_counter() - inicio
+    minimo = (NOTAS / MAX_CONCURRENTES) * LATENCIA_MS / 1000
+    print(f"⏱️ {NOTAS} notas en {duracion:.2f}s (mínimo con {MAX_CONCURRENTES} a la vez: {minimo:.2f}s)")
+
+    if all(textos) and server.transcriptions_served == NOTAS and server.audio_bytes_total >= NOTAS * TAM_AUDIO:
+        print_success(f"Audio completo enviado a Whisper ({server.audio_bytes_total} bytes en multipart)")
+    else:
+        print_error(f"Transcripciones incompletas: {server.transcriptions_served}, {server.audio_bytes_total} bytes")
+        ok = False
+
+    if duracion >= minimo * 0.9:
+        print_success(f"Transcripciones simultáneas limitadas a {MAX_CONCURRENTES}")
+    else:
+        print_error("El semáforo no limitó la concurrencia")
+        ok = False
+
+    if set(os.listdir(tempfile.gettempdir())) == archivos_tmp_antes:
+        print_success("Sin archivos temporales en disco")
+    else:
+        print_error("Se crearon archivos temporales")
+        ok = False
+
+    # 2. Nota reenviada: sale de la caché sin descargar ni llamar a Whisper
+    server.reset_counters()
+    descargas.clear()
+    t0 = time.perf_counter()
+    texto = await transcriber.transcribir("nota-0", descarga_simulada(0))
+    ms_cache = (time.perf_counter() - t0) * 1000
+    if texto == textos[0] and server.transcriptions_served == 0 and not descargas:
+        print_success(f"Nota reenviada resuelta desde caché en {ms_cache:.3f} ms")
+    else:
+        print_error("La nota reenviada volvió a transcribirse")
+        ok = False
+
+    # 3. La misma nota recibida varias veces a la vez: una sola transcripción
+    server.reset_counters()
+    iguales = await asyncio.gather(*(
+        transcriber.transcribir("nota-nueva", descarga_simulada(99)) for _ in range(5)
+    ))
+    if len(set(iguales)) == 1 and server.transcriptions_served == 1:
+        print_success("Copias simultáneas del mismo audio comparten una transcripción")
+    else:
+        print_error(f"Se hicieron {server.transcriptions_served} transcripciones para el mismo audio")
+        ok = False
+
+    # 4. Error de descarga: None sin romper al llamador
+    async def descarga_fallida(buffer):
+        raise RuntimeError("Telegram no disponible")
+
+    if await transcriber.transcribir("nota-rota", descarga_fallida) is None:
+        print_success("Los errores de descarga devuelven None")
+    else:
+        print_error("Error de descarga no manejado")
+        ok = False
+
+    print(f"📊 {transcriber.get_stats()}")
+
+    await close_groq_client()
+    server.stop()
+    return ok
+
+
+if __name__ == "__main__":
+    resultado = asyncio.run(verify_transcription())
+    sys.exit(0 if resultado else 1)
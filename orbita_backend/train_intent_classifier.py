@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Entrena el clasificador local de intención del orquestador.
+
+Etiquetas:
+- agent_logs (action="route_message", source="llm"): decisiones del LLM con
+  confianza alta, junto al mensaje original
+- Corpus semilla incluido abajo, para arrancar sin datos históricos
+
+Ejecutar desde orbita_backend/:
+    python train_intent_classifier.py                 # logs + semilla
+    python train_intent_classifier.py --solo-semilla  # sin Supabase
+"""
+
+import argparse
+import random
+import sys
+from collections import Counter
+from itertools import product
+from typing import List, Tuple
+
+from config import get_settings
+from utils.intent_classifier import AGENTES, CharNgramLinearModel, IntentClassifier, save_model
+
+
+# ─── CORPUS SEMILLA ──────────────────────────────────────────
+
+_SERVICIOS = [
+    "una página web", "un sitio web", "una tienda online", "una app móvil", "una aplicación",
+    "un chatbot", "automatización con IA", "marketing digital", "manejo de redes sociales",
+    "una landing page", "un ecommerce", "un CRM", "hosting", "SEO"
+]
+
+_PLANTILLAS = {
+    "captador": [
+        "¿Cuánto cuesta {s}?", "Quiero cotizar {s}", "Necesito {s} para mi negocio",
+        "Me interesa {s}, ¿qué precio tiene?", "Quisiera un presupuesto para {s}",
+        "¿Qué valor tiene {s}?", "Estoy interesado en contratar {s}",
+        "Quiero agendar una reunión para hablar de {s}", "¿Me pueden cotizar {s}?",
+        "Busco a alguien que me haga {s}", "precio de {s}", "cotización de {s} por favor"
+    ],
+    "conversacional": [
+        "Hola", "Buenas tardes", "Buenos días", "Hola, ¿cómo estás?", "Gracias por la info",
+        "Muchas gracias", "Ok, perfecto", "Hasta luego", "Chao, gracias", "Vale, lo pienso",
+        "¿Me puedes ayudar?", "Tengo una pregunta", "¿Hay alguien ahí?", "Entiendo",
+        "No entendí, ¿me explicas otra vez?", "Listo", "Súper, gracias", "Hola de nuevo",
+        "Ok", "Dale", "Bueno", "Perfecto, quedo atento", "¿Siguen ahí?", "Saludos",
+        "Hola, quisiera información", "Genial", "Que tengas buen día", "Excelente"
+    ],
+    "identidad": [
+        "¿Quiénes son ustedes?", "¿Qué es ORBITA?", "¿Cuál es la misión de la empresa?",
+        "¿Qué valores tiene la empresa?", "¿Cuántos años de experiencia tienen?",
+        "¿Dónde están ubicados?", "¿Quién fundó la empresa?", "Cuéntame sobre su equipo",
+        "¿Tienen portafolio?", "¿Con qué clientes han trabajado?", "¿Cuál es su historia?",
+        "¿Cuál es la visión de ORBITA?", "¿A qué se dedica la empresa?",
+        "¿Qué tan grande es su equipo?", "¿Tienen oficina física?", "¿Qué los diferencia de otras agencias?",
+        "¿Hace cuánto existen?", "¿Qué trayectoria tienen?", "Háblame de la empresa",
+        "¿En qué ciudad están?", "¿Tienen casos de éxito?", "¿Qué experiencia tienen en {s}?"
+    ],
+    "analitico": [
+        "Quiero ver el reporte de leads del mes", "¿Cuál es la tasa de conversión?",
+        "Muéstrame las métricas de la campaña", "Necesito un análisis de {s}",
+        "¿Cuántos leads llegaron esta semana?", "Dame las estadísticas de ventas",
+        "¿Cómo va el rendimiento de {s}?", "Genera un informe de resultados",
+        "Quiero el dashboard de conversiones", "¿Cuáles son los KPI del trimestre?",
+        "Análisis del embudo de ventas", "Reporte de métricas de {s}",
+        "¿Qué canal trae más leads?", "Estadísticas de tráfico del sitio"
+    ]
+}
+
+
+def corpus_semilla() -> List[Tuple[str, str]]:
+    """Expande las plantillas con los servicios (sin duplicados)."""
+    ejemplos = set()
+    for agente, plantillas in _PLANTILLAS.items():
+        for plantilla, servicio in product(plantillas, _SERVICIOS):
+            ejemplos.add((plantilla.format(s=servicio), agente))
+    return sorted(ejemplos)
+
+
+# ─── DATOS DESDE agent_logs ──────────────────────────────────
+
+def ejemplos_desde_logs(limite: int, min_confianza: float) -> List[Tuple[str, str]]:
+    """Lee decisiones de enrutamiento del LLM registradas en agent_logs."""
+    from database import get_db
+
+    result = get_db().table("agent_logs")\
+        .select("details")\
+        .eq("action", "route_message")\
+        .order("created_at", desc=True)\
+        .limit(limite)\
+        .execute()
+
+    ejemplos = []
+    for row in result.data or []:
+        details = row.get("details") or {}
+        if details.get("source") != "llm" or not details.get("message"):
+            continue
+        if details.get("selected_agent") in AGENTES and float(details.get("confidence") or 0) >= min_confianza:
+            ejemplos.append((details["message"], details["selected_agent"]))
+    return ejemplos
+
+
+# ─── ENTRENAMIENTO Y EVALUACIÓN ──────────────────────────────
+
+def dividir(ejemplos: List[Tuple[str, str]], ratio_eval: float, seed: int = 7):
+    ejemplos = list(ejemplos)
+    random.Random(seed).shuffle(ejemplos)
+    corte = int(len(ejemplos) * (1 - ratio_eval))
+    return ejemplos[:corte], ejemplos[corte:]
+
+
+def entrenar(ejemplos: List[Tuple[str, str]]) -> CharNgramLinearModel:
+    model = CharNgramLinearModel()
+    model.fit([t for t, _ in ejemplos], [e for _, e in ejemplos])
+    return model
+
+
+def evaluar(model: CharNgramLinearModel, ejemplos: List[Tuple[str, str]], threshold: float) -> dict:
+    """Skip rate (fast-path) y precisión sobre los ejemplos retenidos."""
+    clasificador = IntentClassifier(model=model, threshold=threshold)
+    aciertos = aciertos_fast = fast = 0
+    for texto, esperado in ejemplos:
+        resultado = clasificador.classify(texto)
+        correcto = resultado["selected_agent"] == esperado
+        aciertos += correcto
+        if clasificador.is_confident(resultado):
+            fast += 1
+            aciertos_fast += correcto
+    total = len(ejemplos) or 1
+    return {
+        "ejemplos": len(ejemplos),
+        "accuracy": aciertos / total,
+        "skip_rate": fast / total,
+        "accuracy_fast_path": aciertos_fast / fast if fast else 0.0
+    }
+
+
+def main() -> bool:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Entrena el clasificador local de intención")
+    parser.add_argument("--solo-semilla", action="store_true", help="No consultar agent_logs")
+    parser.add_argument("--limite", type=int, default=20000, help="Máximo de filas de agent_logs")
+    parser.add_argument("--min-confianza", type=float, default=0.8, help="Confianza mínima del LLM")
+    parser.add_argument("--ratio-eval", type=float, default=0.2, help="Fracción retenida para evaluar")
+    parser.add_argument("--salida", default=settings["intent_classifier_path"])
+    args = parser.parse_args()
+
+    ejemplos = corpus_semilla()
+    if not args.solo_semilla:
+        try:
+            desde_logs = ejemplos_desde_logs(args.limite, args.min_confianza)
+            print(f"📥 {len(desde_logs)} ejemplos etiquetados desde agent_logs")
+            ejemplos += desde_logs
+        except Exception as e:
+            print(f"⚠️ No se pudo leer agent_logs ({e}); se usa solo el corpus semilla")
+
+    print(f"📚 {len(ejemplos)} ejemplos: {dict(Counter(e for _, e in ejemplos))}")
+
+    entrenamiento, retenidos = dividir(ejemplos, args.ratio_eval)
+    metricas = evaluar(entrenar(entrenamiento), retenidos, settings["intent_classifier_threshold"])
+    print(f"📊 Evaluación (retenidos): {metricas}")
+
+    # El modelo final se entrena con todos los ejemplos
+    save_model(entrenar(ejemplos), args.salida, metadata={"ejemplos": len(ejemplos), "evaluacion": metricas})
+    print(f"✅ Modelo guardado en {args.salida}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,169 @@
+"""
+Resumen incremental de conversaciones largas
+[CRITERIO 1] - Memoria persistente sin reenviar todo el historial
+
+Cada N mensajes nuevos, los turnos más antiguos que ya no se envían en crudo
+se pliegan en un resumen acumulado que se guarda en la fila de conversations
+(columnas resumen / resumen_hasta_at / resumen_hasta_id, el cursor
+(created_at, id) del último mensaje de conversation_messages cubierto). Los agentes reciben el resumen más los
+turnos recientes en lugar del historial completo.
+
+La actualización corre en una tarea de fondo: nunca bloquea la respuesta al lead.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+from config import get_settings
+from utils.groq_client import get_groq_client, FALLBACK_RESPONSE
+from utils.memory import render_history_window
+
+
+SUMMARY_SYSTEM_PROMPT = """Eres un asistente que mantiene el resumen de una conversación comercial de ORBITA con un lead.
+
+Actualiza el resumen previo con los turnos nuevos. Conserva solo lo útil para continuar la venta:
+- Datos del lead (nombre, empresa, sector, contacto)
+- Servicios de interés, presupuesto, plazos y requisitos
+- Cotizaciones o reuniones ofrecidas y su estado
+- Dudas u objeciones pendientes
+
+Escribe en español, en frases cortas, máximo 150 palabras. Responde solo con el resumen."""
+
+
+class ConversationSummarizer:
+    """
+    Pliega turnos antiguos en un resumen persistido junto a la conversación.
+
+    - keep_recent: turnos recientes que se siguen enviando en crudo
+    - every_n: cuántos mensajes nuevos fuera de la ventana disparan una actualización
+    """
+
+    def __init__(self, every_n: int = 10, keep_recent: int = 6, max_tokens: int = 300):
+        self.every_n = every_n
+        self.keep_recent = keep_recent
+        self.max_tokens = max_tokens
+        # Mensajes sin resumir que se leen para el prompt (y que disparan el resumen al llenarse)
+        self.ventana = every_n + keep_recent
+        self._en_curso: Set[str] = set()
+        self._tareas: Set[asyncio.Task] = set()
+        self.stats = {"actualizaciones": 0, "errores": 0, "omitidas_en_curso": 0}
+
+    def necesita_resumen(self, sin_resumir: int) -> bool:
+        """Hay al menos every_n mensajes sin resumir fuera de la ventana reciente."""
+        return sin_resumir - self.keep_recent >= self.every_n
+
+    def programar(
+        self,
+        conversation_id: str,
+        lead_id: str,
+        sin_resumir: int,
+        resumen: Optional[str],
+        resumen_hasta: Optional[Tuple[str, int]]
+    ) -> Optional[asyncio.Task]:
+        """
+        Lanza la actualización en segundo plano si corresponde.
+        Solo una actualización por conversación a la vez.
+
+        Args:
+            sin_resumir: Mensajes posteriores a resumen_hasta ya leídos para el prompt
+                         (basta con leer hasta self.ventana)
+            resumen_hasta: Cursor (created_at, id) del último mensaje cubierto por el resumen
+        """
+        if not self.necesita_resumen(sin_resumir):
+            return None
+        if conversation_id in self._en_curso:
+            self.stats["omitidas_en_curso"] += 1
+            return None
+
+        self._en_curso.add(conversation_id)
+        tarea = asyncio.create_task(self._actualizar(conversation_id, lead_id, resumen, resumen_hasta))
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+        return tarea
+
+    async def resumir(self, resumen_previo: Optional[str], nuevos: List[Dict[str, Any]]) -> Optional[str]:
+        """Genera el resumen actualizado con el LLM (None si falla)."""
+        turnos, _ = render_history_window(nuevos, max_tokens=4000)
+        prompt = (
+            f"RESUMEN PREVIO:\n{resumen_previo or 'Sin resumen previo'}\n\n"
+            f"TURNOS NUEVOS:\n{turnos}\n\n"
+            "RESUMEN ACTUALIZADO:"
+        )
+        respuesta = await get_groq_client().generate_completion(
+            prompt=prompt,
+            agent_type="resumen",
+            system_message=SUMMARY_SYSTEM_PROMPT,
+            temperature=0.2,
+            max_tokens=self.max_tokens
+        )
+        if not respuesta or respuesta == FALLBACK_RESPONSE:
+            return None
+        return respuesta.strip()
+
+    async def _actualizar(
+        self,
+        conversation_id: str,
+        lead_id: str,
+        resumen: Optional[str],
+        resumen_hasta: Optional[Tuple[str, int]]
+    ):
+        try:
+            # Todos los mensajes sin resumir (puede haber más que la ventana si falló un resumen previo)
+            pendientes = await self._cargar_pendientes(lead_id, resumen_hasta)
+            a_plegar = pendientes[:len(pendientes) - self.keep_recent]
+            if not a_plegar:
+                return
+
+            nuevo_resumen = await self.resumir(resumen, a_plegar)
+            if nuevo_resumen is None:
+                self.stats["errores"] += 1
+                return
+
+            await self._guardar(conversation_id, nuevo_resumen, (a_plegar[-1]["created_at"], a_plegar[-1]["id"]))
+            self.stats["actualizaciones"] += 1
+            print(f"📝 Resumen actualizado para conversación {conversation_id} (+{len(a_plegar)} mensajes)")
+        except Exception as e:
+            self.stats["errores"] += 1
+            print(f"⚠️ Error actualizando resumen de conversación {conversation_id}: {e}")
+        finally:
+            self._en_curso.discard(conversation_id)
+
+    async def _cargar_pendientes(self, lead_id: str, resumen_hasta: Optional[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        """Mensajes de conversation_messages posteriores al resumen, en orden cronológico."""
+        from database import get_mensajes_desde
+        return await get_mensajes_desde(lead_id, despues_de=resumen_hasta)
+
+    async def _guardar(self, conversation_id: str, resumen: str, hasta: Tuple[str, int]):
+        """Persiste el resumen y su cursor (created_at, id) en la fila de conversations."""
+        from database import get_db, db_execute
+        await db_execute(get_db().table("conversations").update({
+            "resumen": resumen,
+            "resumen_hasta_at": hasta[0],
+            "resumen_hasta_id": hasta[1],
+            "resumen_actualizado_at": datetime.now(timezone.utc).isoformat()
+        }).eq("id", conversation_id))
+
+    async def esperar_pendientes(self):
+        """Espera las actualizaciones en curso (apagado ordenado y pruebas)."""
+        if self._tareas:
+            await asyncio.gather(*list(self._tareas), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "en_curso": len(self._en_curso)}
+
+
+# Instancia global (None si SUMMARY_ENABLED=false)
+_summarizer: Optional[ConversationSummarizer] = None
+
+def get_conversation_summarizer() -> Optional[ConversationSummarizer]:
+    """Obtiene el resumidor de conversaciones global, o None si está desactivado."""
+    global _summarizer
+    settings = get_settings()
+    if _summarizer is None and settings["summary_enabled"]:
+        _summarizer = ConversationSummarizer(
+            every_n=settings["summary_every_n_messages"],
+            keep_recent=settings["summary_keep_recent"],
+            max_tokens=settings["summary_max_tokens"]
+        )
+    return _summarizer
@@ -0,0 +1,273 @@
+"""
+Render de cotizaciones en PDF con reportlab
+[CRITERIO 5] - Cotizaciones automáticas generadas por IA
+
+Usa el mismo modelo de datos que la plantilla Markdown
+(CotizacionRenderer.build_values) y escribe el documento página a página en un
+buffer en memoria. Las fuentes, los estilos y el logo se preparan una sola vez
+por proceso: cada cotización solo maqueta sus datos.
+
+La maquetación es CPU pura; desde código async se llama con
+generar_pdf_cotizacion(), que la ejecuta fuera del event loop.
+"""
+
+import asyncio
+import io
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from config import get_settings
+from utils.cotizacion_renderer import CotizacionRenderer
+
+COLOR_PRIMARIO = colors.HexColor("#1F2A44")
+COLOR_SUAVE = colors.HexColor("#EEF1F7")
+TAMANO_BLOQUE = 64 * 1024
+
+# ─── RECURSOS COMPARTIDOS POR PROCESO ─────────────────────────
+
+_recursos_lock = threading.Lock()
+_fuentes: Optional[Tuple[str, str]] = None
+_estilos: Optional[Dict[str, ParagraphStyle]] = None
+_logos: Dict[str, Tuple[Tuple[int, int], ImageReader]] = {}
+
+
+def _get_fuentes() -> Tuple[str, str]:
+    """(regular, negrita): TTF configuradas (registradas una vez) o Helvetica."""
+    global _fuentes
+    if _fuentes is None:
+        with _recursos_lock:
+            if _fuentes is None:
+                settings = get_settings()
+                regular, negrita = settings["cotizacion_pdf_font_path"], settings["cotizacion_pdf_font_bold_path"]
+                try:
+                    if regular:
+                        pdfmetrics.registerFont(TTFont("OrbitaSans", regular))
+                        pdfmetrics.registerFont(TTFont("OrbitaSans-Bold", negrita or regular))
+                        _fuentes = ("OrbitaSans", "OrbitaSans-Bold")
+                except Exception as e:
+                    print(f"⚠️ No se pudo registrar la fuente del PDF, se usa Helvetica: {e}")
+                if _fuentes is None:
+                    _fuentes = ("Helvetica", "Helvetica-Bold")
+    return _fuentes
+
+
+def _get_estilos() -> Dict[str, ParagraphStyle]:
+    global _estilos
+    if _estilos is None:
+        regular, negrita = _get_fuentes()
+        base = getSampleStyleSheet()
+        _estilos = {
+            "titulo": ParagraphStyle("titulo", parent=base["Title"], fontName=negrita,
+                                     fontSize=18, textColor=COLOR_PRIMARIO, spaceAfter=4),
+            "subtitulo": ParagraphStyle("subtitulo", parent=base["Heading2"], fontName=negrita,
+                                        fontSize=12, textColor=COLOR_PRIMARIO, spaceBefore=10, spaceAfter=4),
+            "normal": ParagraphStyle("normal", parent=base["BodyText"], fontName=regular,
+                                     fontSize=9.5, leading=13),
+            "celda": ParagraphStyle("celda", parent=base["BodyText"], fontName=regular,
+                                    fontSize=8.5, leading=11),
+            "celda_derecha": ParagraphStyle("celda_derecha", parent=base["BodyText"], fontName=regular,
+                                            fontSize=8.5, leading=11, alignment=TA_RIGHT),
+            "total": ParagraphStyle("total", parent=base["BodyText"], fontName=negrita,
+                                    fontSize=12, alignment=TA_RIGHT, textColor=COLOR_PRIMARIO)
+        }
+    return _estilos
+
+
+def _get_logo(path: Optional[str]) -> Optional[ImageReader]:
+    """Logo decodificado una vez por ruta (se vuelve a leer si cambia el archivo)."""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    firma = (st.st_mtime_ns, st.st_size)
+    entrada = _logos.get(path)
+    if entrada is None or entrada[0] != firma:
+        try:
+            entrada = (firma, ImageReader(path))
+        except Exception as e:
+            print(f"⚠️ Logo de cotización no válido ({path}): {e}")
+            return None
+        _logos[path] = entrada
+    return entrada[1]
+
+
+# ─── RENDER ───────────────────────────────────────────────────
+
+class CotizacionPDFRenderer:
+    """Maqueta una cotización (mismos campos que la plantilla Markdown) en un PDF A4."""
+
+    def __init__(self, logo_path: Optional[str] = None):
+        self.datos = CotizacionRenderer()
+        self.logo_path = logo_path if logo_path is not None else get_settings()["cotizacion_pdf_logo_path"]
+
+    def render(
+        self,
+        cotizacion_data: Dict[str, Any],
+        lead_data: Dict[str, Any],
+        empresa_data: Dict[str, Any]
+    ) -> bytes:
+        """Devuelve el PDF completo en bytes."""
+        buffer = io.BytesIO()
+        self.render_to(buffer, cotizacion_data, lead_data, empresa_data)
+        return buffer.getvalue()
+
+    def render_to(
+        self,
+        buffer: io.BufferedIOBase,
+        cotizacion_data: Dict[str, Any],
+        lead_data: Dict[str, Any],
+        empresa_data: Dict[str, Any]
+    ):
+        """Escribe el PDF en `buffer` (cualquier objeto con write)."""
+        v = self.datos.build_values(cotizacion_data, lead_data, empresa_data)
+        estilos = _get_estilos()
+        regular, negrita = _get_fuentes()
+        logo = _get_logo(empresa_data.get("logo_path") or self.logo_path)
+
+        doc = SimpleDocTemplate(
+            buffer, pagesize=A4,
+            leftMargin=18 * mm, rightMargin=18 * mm, topMargin=28 * mm, bottomMargin=18 * mm,
+            title=f"Propuesta {v['COT_CODIGO']}", author=v["EMPRESA_NOMBRE"]
+        )
+
+        def encabezado_y_pie(canvas, documento):
+            canvas.saveState()
+            ancho, alto = A4
+            x = 18 * mm
+            if logo is not None:
+                canvas.drawImage(logo, x, alto - 22 * mm, width=14 * mm, height=14 * mm,
+                                 preserveAspectRatio=True, mask="auto")
+                x += 17 * mm
+            canvas.setFont(negrita, 11)
+            canvas.setFillColor(COLOR_PRIMARIO)
+            canvas.drawString(x, alto - 15 * mm, v["EMPRESA_NOMBRE"])
+            canvas.setFont(regular, 8)
+            canvas.drawString(x, alto - 19.5 * mm, v["EMPRESA_SLOGAN"])
+            canvas.drawRightString(ancho - 18 * mm, alto - 15 * mm, v["COT_CODIGO"])
+            canvas.setStrokeColor(COLOR_PRIMARIO)
+            canvas.line(18 * mm, alto - 24 * mm, ancho - 18 * mm, alto - 24 * mm)
+            canvas.setFillColor(colors.grey)
+            canvas.drawString(18 * mm, 10 * mm, f"{v['EMPRESA_EMAIL']} · {v['EMPRESA_TELEFONO']} · {v['EMPRESA_SITIO_WEB']}")
+            canvas.drawRightString(ancho - 18 * mm, 10 * mm, f"Página {documento.page}")
+            canvas.restoreState()
+
+        doc.build(
+            self._contenido(v, cotizacion_data, estilos),
+            onFirstPage=encabezado_y_pie,
+            onLaterPages=encabezado_y_pie
+        )
+
+    def _contenido(self, v: Dict[str, str], cotizacion_data: Dict[str, Any], estilos: Dict[str, ParagraphStyle]) -> list:
+        p = lambda texto, estilo="normal": Paragraph(escape(str(texto)), estilos[estilo])
+        moneda = v["COT_MONEDA"]
+        flujo = [
+            p(f"Propuesta comercial para {v['LEAD_NOMBRE']}", "titulo"),
+            self._tabla_simple([
+                ["Cliente", f"{v['LEAD_NOMBRE']} · {v['LEAD_EMPRESA']}", "Emisión", v["COT_FECHA_EMISION"]],
+                ["Interés", v["LEAD_SERVICIO_INTERES"], "Vence", v["COT_FECHA_VENCIMIENTO"]],
+            ], estilos),
+            Spacer(1, 4 * mm),
+            p(v["COT_INTRODUCCION_PERSONALIZADA"]),
+            p(v["COT_PLAN_NOMBRE"], "subtitulo"),
+            p(v["COT_DESCRIPCION_PLAN"]),
+        ]
+
+        items = cotizacion_data.get("items") or []
+        if items:
+            flujo.append(p("Entregables", "subtitulo"))
+            flujo.append(self._tabla_items(items, moneda, estilos))
+
+        fases = cotizacion_data.get("fases") or []
+        if fases:
+            flujo.append(p("Cronograma", "subtitulo"))
+            for idx in range(1, len(fases) + 1):
+                flujo.append(Paragraph(
+                    f"<b>{escape(v[f'FASE_{idx}_NOMBRE'])}</b> ({escape(v[f'FASE_{idx}_DURACION'])}): "
+                    f"{escape(v[f'FASE_{idx}_DESCRIPCION'])}",
+                    estilos["normal"]
+                ))
+
+        flujo += [
+            p("Inversión", "subtitulo"),
+            self._tabla_simple([
+                ["Subtotal", f"${v['COT_SUBTOTAL']} {moneda}"],
+                [f"Descuento ({v['COT_DESCUENTO_PORCENTAJE']}%)", f"-${v['COT_DESCUENTO_VALOR']} {moneda}"],
+            ], estilos, derecha=True),
+            p(f"Total: ${v['COT_VALOR_TOTAL']} {moneda}", "total"),
+            Spacer(1, 3 * mm),
+            p(f"Forma de pago: {v['COT_FORMA_PAGO']}"),
+            p(f"Duración estimada: {v['COT_TIEMPO_TOTAL']} · Inicio estimado: {v['COT_FECHA_INICIO_ESTIMADA']}"),
+            p(f"Propuesta válida por {v['COT_VIGENCIA_DIAS']} días."),
+            Spacer(1, 4 * mm),
+            p(v["EMPRESA_PROPUESTA_VALOR"]),
+            p(v["EMPRESA_TERMINOS_CONDICIONES"]),
+            p(f"Asesor: {v['EMPRESA_ASESOR_NOMBRE']}"),
+        ]
+        return flujo
+
+    def _tabla_items(self, items: List[Dict[str, Any]], moneda: str, estilos: Dict[str, ParagraphStyle]) -> Table:
+        filas = [["#", "Entregable", "Cant.", "Valor"]]
+        for idx, item in enumerate(items, 1):
+            cantidad = item.get("cantidad", 1)
+            valor = item.get("precio_unitario", 0) * cantidad
+            detalle = item.get("descripcion_detallada")
+            texto = escape(str(item.get("descripcion", item.get("nombre", "Item"))))
+            if detalle and detalle != item.get("descripcion"):
+                texto += f"<br/><font size=7.5 color='#555555'>{escape(str(detalle))}</font>"
+            filas.append([
+                str(idx),
+                Paragraph(texto, estilos["celda"]),
+                Paragraph(f"{cantidad:g}" if isinstance(cantidad, (int, float)) else escape(str(cantidad)), estilos["celda_derecha"]),
+                Paragraph(f"${valor:,.2f} {escape(moneda)}", estilos["celda_derecha"])
+            ])
+
+        tabla = Table(filas, colWidths=[8 * mm, 110 * mm, 14 * mm, 40 * mm], repeatRows=1)
+        tabla.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (-1, 0), _get_fuentes()[1]),
+            ("FONTSIZE", (0, 0), (-1, -1), 8.5),
+            ("BACKGROUND", (0, 0), (-1, 0), COLOR_PRIMARIO),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, COLOR_SUAVE]),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("ALIGN", (2, 0), (-1, 0), "RIGHT"),
+        ]))
+        return tabla
+
+    def _tabla_simple(self, filas: List[List[str]], estilos: Dict[str, ParagraphStyle], derecha: bool = False) -> Table:
+        estilo = estilos["celda_derecha"] if derecha else estilos["celda"]
+        tabla = Table([[Paragraph(escape(str(c)), estilo) for c in fila] for fila in filas], hAlign="RIGHT" if derecha else "LEFT")
+        tabla.setStyle(TableStyle([
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ]))
+        return tabla
+
+
+def iter_pdf(pdf: bytes, tamano_bloque: int = TAMANO_BLOQUE) -> Iterator[bytes]:
+    """Trozos del PDF para StreamingResponse."""
+    vista = memoryview(pdf)
+    for inicio in range(0, len(pdf), tamano_bloque):
+        yield bytes(vista[inicio:inicio + tamano_bloque])
+
+
+async def generar_pdf_cotizacion(
+    cotizacion_data: Dict[str, Any],
+    lead_data: Dict[str, Any],
+    empresa_data: Dict[str, Any]
+) -> bytes:
+    """Genera el PDF fuera del event loop (la maquetación es CPU)."""
+    return await asyncio.to_thread(CotizacionPDFRenderer().render, cotizacion_data, lead_data, empresa_data)
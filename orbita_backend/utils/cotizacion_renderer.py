@@ -1,11 +1,103 @@
 """
 Utilidad para renderizar plantillas de cotización con datos reales
 [CRITERIO 5] - Cotizaciones automáticas con plantillas personalizables
+
+La plantilla se compila una sola vez en una lista de segmentos (texto literal,
+campos {{CAMPO}} y bloques repetibles), sin comentarios HTML, y se cachea por
+ruta; se vuelve a compilar solo si cambia su mtime. Cada render resuelve todos
+los valores en un diccionario y arma el documento en una sola pasada con join.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import os
+import re
+import threading
+
+_RE_BLOQUE = re.compile(r'<!-- INICIO BLOQUE REPETIBLE.*?<!-- FIN BLOQUE REPETIBLE -->', re.DOTALL)
+_RE_COMENTARIO = re.compile(r'<!--.*?-->', re.DOTALL)
+_RE_CAMPO = re.compile(r'\{\{(\w+)\}\}')
+
+# Tipos de segmento de una plantilla compilada
+_LITERAL, _CAMPO, _BLOQUE = 0, 1, 2
+
+
+def _compilar_segmentos(texto: str) -> List[Tuple]:
+    """Texto sin bloques → [(LITERAL, texto) | (CAMPO, nombre, "{{nombre}}")], sin comentarios HTML."""
+    texto = _RE_COMENTARIO.sub('', texto)
+    segmentos = []
+    posicion = 0
+    for match in _RE_CAMPO.finditer(texto):
+        if match.start() > posicion:
+            segmentos.append((_LITERAL, texto[posicion:match.start()]))
+        segmentos.append((_CAMPO, match.group(1), match.group(0)))
+        posicion = match.end()
+    if posicion < len(texto):
+        segmentos.append((_LITERAL, texto[posicion:]))
+    return segmentos
+
+
+class CompiledTemplate:
+    """
+    Plantilla de cotización ya analizada.
+
+    Un bloque repetible se sustituye por la tabla de items cuando la cotización
+    tiene items; si no, queda su contenido (sin los comentarios que lo delimitan).
+    Los campos sin valor se dejan tal cual ({{CAMPO}}).
+    """
+
+    def __init__(self, texto: str):
+        self.segmentos: List[Tuple] = []
+        posicion = 0
+        for match in _RE_BLOQUE.finditer(texto):
+            self.segmentos.extend(_compilar_segmentos(texto[posicion:match.start()]))
+            self.segmentos.append((_BLOQUE, _compilar_segmentos(match.group(0))))
+            posicion = match.end()
+        self.segmentos.extend(_compilar_segmentos(texto[posicion:]))
+
+    def render(self, valores: Dict[str, str], tabla_items: Optional[str] = None) -> str:
+        partes: List[str] = []
+        self._render_en(self.segmentos, valores, tabla_items, partes)
+        return ''.join(partes)
+
+    def _render_en(self, segmentos: List[Tuple], valores: Dict[str, str], tabla_items: Optional[str], partes: List[str]):
+        agregar = partes.append
+        for segmento in segmentos:
+            tipo = segmento[0]
+            if tipo == _LITERAL:
+                agregar(segmento[1])
+            elif tipo == _CAMPO:
+                agregar(valores.get(segmento[1], segmento[2]))
+            elif tabla_items:
+                agregar(tabla_items)
+            else:
+                self._render_en(segmento[1], valores, tabla_items, partes)
+
+
+# Plantillas compiladas por ruta: ruta → ((mtime_ns, tamaño), plantilla)
+_plantillas: Dict[str, Tuple[Tuple[int, int], CompiledTemplate]] = {}
+_plantillas_lock = threading.Lock()
+
+
+def get_compiled_template(path: str) -> Optional[CompiledTemplate]:
+    """Plantilla compilada de `path` (None si no existe); se recompila si el archivo cambió."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    firma = (st.st_mtime_ns, st.st_size)
+    entrada = _plantillas.get(path)
+    if entrada is not None and entrada[0] == firma:
+        return entrada[1]
+
+    with _plantillas_lock:
+        entrada = _plantillas.get(path)
+        if entrada is None or entrada[0] != firma:
+            with open(path, 'r', encoding='utf-8') as f:
+                entrada = (firma, CompiledTemplate(f.read()))
+            _plantillas[path] = entrada
+    return entrada[1]
+
 
 class CotizacionRenderer:
     """Renderiza plantillas de cotización con datos reales"""
@@ -42,69 +134,65 @@ class CotizacionRenderer:
             String con el Markdown renderizado
         """
         
-        # Si existe plantilla, cargarla y reemplazar campos
-        if os.path.exists(self.template_path):
-            with open(self.template_path, 'r', encoding='utf-8') as f:
-                template = f.read()
-            
-            # Reemplazar campos de empresa
-            template = self._replace_empresa_fields(template, empresa_data)
-            
-            # Reemplazar campos de lead
-            template = self._replace_lead_fields(template, lead_data)
-            
-            # Reemplazar campos de cotización
-            template = self._replace_cotizacion_fields(template, cotizacion_data)
-            
-            # Limpiar comentarios HTML
-            template = self._clean_html_comments(template)
-            
-            return template
+        # Si existe plantilla, usar su versión compilada y rellenar campos
+        plantilla = get_compiled_template(self.template_path)
+        if plantilla is not None:
+            valores = self.build_values(cotizacion_data, lead_data, empresa_data)
+            return plantilla.render(valores, self._items_table(cotizacion_data.get("items", [])))
         
         # Si no hay plantilla, generar cotización simple
         return self._generate_simple_cotizacion(cotizacion_data, lead_data, empresa_data)
     
-    def _replace_empresa_fields(self, template: str, empresa_data: Dict[str, Any]) -> str:
-        """Reemplaza campos de empresa en la plantilla"""
-        replacements = {
-            "{{EMPRESA_NOMBRE}}": empresa_data.get("nombre", "ORBITA"),
-            "{{EMPRESA_SLOGAN}}": empresa_data.get("slogan", "Soluciones Inteligentes"),
-            "{{EMPRESA_CIUDAD}}": empresa_data.get("ciudad", "Ciudad"),
-            "{{EMPRESA_PAIS}}": empresa_data.get("pais", "País"),
-            "{{EMPRESA_EMAIL}}": empresa_data.get("email", "contacto@orbita.ai"),
-            "{{EMPRESA_TELEFONO}}": empresa_data.get("telefono", "+1 234 567 890"),
-            "{{EMPRESA_SITIO_WEB}}": empresa_data.get("sitio_web", "www.orbita.ai"),
-            "{{EMPRESA_ASESOR_NOMBRE}}": empresa_data.get("asesor_nombre", "Equipo ORBITA"),
-            "{{EMPRESA_PROPUESTA_VALOR}}": empresa_data.get("propuesta_valor", 
-                "Soluciones de IA innovadoras y confiables"),
-            "{{EMPRESA_TERMINOS_CONDICIONES}}": empresa_data.get("terminos_condiciones",
-                "Esta propuesta es válida por 30 días desde su emisión.")
+    def build_values(
+        self,
+        cotizacion_data: Dict[str, Any],
+        lead_data: Dict[str, Any],
+        empresa_data: Dict[str, Any]
+    ) -> Dict[str, str]:
+        """
+        Todos los campos de la plantilla ya formateados (EMPRESA_*, LEAD_*, COT_*,
+        ITEM_n_*, FASE_n_*). Es el modelo de datos común al Markdown y al PDF.
+        """
+        valores = {
+            **self._empresa_values(empresa_data),
+            **self._lead_values(lead_data),
+            **self._cotizacion_values(cotizacion_data)
         }
-        
-        for placeholder, value in replacements.items():
-            template = template.replace(placeholder, str(value))
-        
-        return template
+        valores.update(self._item_values(cotizacion_data.get("items", [])))
+        valores.update(self._fase_values(cotizacion_data.get("fases", [])))
+        return valores
     
-    def _replace_lead_fields(self, template: str, lead_data: Dict[str, Any]) -> str:
-        """Reemplaza campos de lead en la plantilla"""
-        replacements = {
-            "{{LEAD_NOMBRE}}": lead_data.get("nombre", "Cliente"),
-            "{{LEAD_EMPRESA}}": lead_data.get("empresa", "Empresa"),
-            "{{LEAD_CARGO}}": lead_data.get("cargo", ""),
-            "{{LEAD_EMAIL}}": lead_data.get("email", ""),
-            "{{LEAD_TELEFONO}}": lead_data.get("telefono", ""),
-            "{{LEAD_SERVICIO_INTERES}}": lead_data.get("interes", "servicios digitales"),
-            "{{LEAD_PRESUPUESTO_ESTIMADO}}": f"${lead_data.get('presupuesto', 'No especificado')}"
+    def _empresa_values(self, empresa_data: Dict[str, Any]) -> Dict[str, str]:
+        """Valores de los campos de empresa"""
+        return {
+            "EMPRESA_NOMBRE": str(empresa_data.get("nombre", "ORBITA")),
+            "EMPRESA_SLOGAN": str(empresa_data.get("slogan", "Soluciones Inteligentes")),
+            "EMPRESA_CIUDAD": str(empresa_data.get("ciudad", "Ciudad")),
+            "EMPRESA_PAIS": str(empresa_data.get("pais", "País")),
+            "EMPRESA_EMAIL": str(empresa_data.get("email", "contacto@orbita.ai")),
+            "EMPRESA_TELEFONO": str(empresa_data.get("telefono", "+1 234 567 890")),
+            "EMPRESA_SITIO_WEB": str(empresa_data.get("sitio_web", "www.orbita.ai")),
+            "EMPRESA_ASESOR_NOMBRE": str(empresa_data.get("asesor_nombre", "Equipo ORBITA")),
+            "EMPRESA_PROPUESTA_VALOR": str(empresa_data.get("propuesta_valor", 
+                "Soluciones de IA innovadoras y confiables")),
+            "EMPRESA_TERMINOS_CONDICIONES": str(empresa_data.get("terminos_condiciones",
+                "Esta propuesta es válida por 30 días desde su emisión."))
         }
-        
-        for placeholder, value in replacements.items():
-            template = template.replace(placeholder, str(value))
-        
-        return template
     
-    def _replace_cotizacion_fields(self, template: str, cotizacion_data: Dict[str, Any]) -> str:
-        """Reemplaza campos de cotización en la plantilla"""
+    def _lead_values(self, lead_data: Dict[str, Any]) -> Dict[str, str]:
+        """Valores de los campos de lead"""
+        return {
+            "LEAD_NOMBRE": str(lead_data.get("nombre", "Cliente")),
+            "LEAD_EMPRESA": str(lead_data.get("empresa", "Empresa")),
+            "LEAD_CARGO": str(lead_data.get("cargo", "")),
+            "LEAD_EMAIL": str(lead_data.get("email", "")),
+            "LEAD_TELEFONO": str(lead_data.get("telefono", "")),
+            "LEAD_SERVICIO_INTERES": str(lead_data.get("interes", "servicios digitales")),
+            "LEAD_PRESUPUESTO_ESTIMADO": f"${lead_data.get('presupuesto', 'No especificado')}"
+        }
+    
+    def _cotizacion_values(self, cotizacion_data: Dict[str, Any]) -> Dict[str, str]:
+        """Valores de los campos de cotización"""
         
         # Generar código de cotización si no existe
         codigo = cotizacion_data.get("numero_cotizacion") or \
@@ -121,92 +209,61 @@ class CotizacionRenderer:
         validez_dias = cotizacion_data.get("validez_dias", 30)
         fecha_vencimiento = fecha_emision + timedelta(days=validez_dias)
         
-        replacements = {
-            "{{COT_CODIGO}}": codigo,
-            "{{COT_FECHA_EMISION}}": fecha_emision.strftime("%d/%m/%Y"),
-            "{{COT_FECHA_VENCIMIENTO}}": fecha_vencimiento.strftime("%d/%m/%Y"),
-            "{{COT_CANAL_ORIGEN}}": cotizacion_data.get("origen", "Telegram"),
-            "{{COT_INTRODUCCION_PERSONALIZADA}}": cotizacion_data.get("descripcion", 
-                "Gracias por su interés en nuestros servicios."),
-            "{{COT_PLAN_NOMBRE}}": cotizacion_data.get("plan_nombre", "Plan Profesional"),
-            "{{COT_DESCRIPCION_PLAN}}": cotizacion_data.get("descripcion_alcance", 
-                "Plan personalizado para sus necesidades."),
-            "{{COT_DESCRIPCION_ALCANCE}}": cotizacion_data.get("descripcion_alcance", ""),
-            "{{COT_SUBTOTAL}}": f"{cotizacion_data.get('subtotal', 0):.2f}",
-            "{{COT_DESCUENTO_PORCENTAJE}}": str(cotizacion_data.get("descuento_general", 0)),
-            "{{COT_DESCUENTO_VALOR}}": f"{cotizacion_data.get('subtotal', 0) * cotizacion_data.get('descuento_general', 0) / 100:.2f}",
-            "{{COT_VALOR_TOTAL}}": f"{cotizacion_data.get('total', 0):.2f}",
-            "{{COT_MONEDA}}": cotizacion_data.get("moneda", "USD"),
-            "{{COT_FORMA_PAGO}}": cotizacion_data.get("forma_pago", "50% al inicio, 50% a la entrega"),
-            "{{COT_TIEMPO_TOTAL}}": cotizacion_data.get("tiempo_total", "6-8 semanas"),
-            "{{COT_FECHA_INICIO_ESTIMADA}}": (fecha_emision + timedelta(days=7)).strftime("%d/%m/%Y"),
-            "{{COT_VIGENCIA_DIAS}}": str(validez_dias)
+        return {
+            "COT_CODIGO": str(codigo),
+            "COT_FECHA_EMISION": fecha_emision.strftime("%d/%m/%Y"),
+            "COT_FECHA_VENCIMIENTO": fecha_vencimiento.strftime("%d/%m/%Y"),
+            "COT_CANAL_ORIGEN": str(cotizacion_data.get("origen", "Telegram")),
+            "COT_INTRODUCCION_PERSONALIZADA": str(cotizacion_data.get("descripcion", 
+                "Gracias por su interés en nuestros servicios.")),
+            "COT_PLAN_NOMBRE": str(cotizacion_data.get("plan_nombre", "Plan Profesional")),
+            "COT_DESCRIPCION_PLAN": str(cotizacion_data.get("descripcion_alcance", 
+                "Plan personalizado para sus necesidades.")),
+            "COT_DESCRIPCION_ALCANCE": str(cotizacion_data.get("descripcion_alcance", "")),
+            "COT_SUBTOTAL": f"{cotizacion_data.get('subtotal', 0):.2f}",
+            "COT_DESCUENTO_PORCENTAJE": str(cotizacion_data.get("descuento_general", 0)),
+            "COT_DESCUENTO_VALOR": f"{cotizacion_data.get('subtotal', 0) * cotizacion_data.get('descuento_general', 0) / 100:.2f}",
+            "COT_VALOR_TOTAL": f"{cotizacion_data.get('total', 0):.2f}",
+            "COT_MONEDA": str(cotizacion_data.get("moneda", "USD")),
+            "COT_FORMA_PAGO": str(cotizacion_data.get("forma_pago", "50% al inicio, 50% a la entrega")),
+            "COT_TIEMPO_TOTAL": str(cotizacion_data.get("tiempo_total", "6-8 semanas")),
+            "COT_FECHA_INICIO_ESTIMADA": (fecha_emision + timedelta(days=7)).strftime("%d/%m/%Y"),
+            "COT_VIGENCIA_DIAS": str(validez_dias)
         }
-        
-        for placeholder, value in replacements.items():
-            template = template.replace(placeholder, str(value))
-        
-        # Reemplazar items (requiere lógica especial para loops)
-        template = self._replace_items(template, cotizacion_data.get("items", []))
-        
-        # Reemplazar fases
-        template = self._replace_fases(template, cotizacion_data.get("fases", []))
-        
-        return template
     
-    def _replace_items(self, template: str, items: List[Dict[str, Any]]) -> str:
-        """Reemplaza los items de la cotización"""
+    def _items_table(self, items: List[Dict[str, Any]]) -> Optional[str]:
+        """Tabla Markdown de items que sustituye a los bloques repetibles (None si no hay items)"""
         if not items:
-            return template
+            return None
         
-        # Construir tabla de items
-        items_table = "| # | Entregable | Descripción | Valor |\n|---|---|---|---|\n"
+        filas = ["| # | Entregable | Descripción | Valor |\n|---|---|---|---|\n"]
         
         for idx, item in enumerate(items, 1):
             nombre = item.get("descripcion", item.get("nombre", "Item"))
             descripcion = item.get("descripcion_detallada", 
                                   item.get("descripcion", ""))[:50]
             valor = item.get("precio_unitario", 0) * item.get("cantidad", 1)
-            items_table += f"| {idx} | {nombre} | {descripcion} | ${valor:.2f} |\n"
-        
-        # Reemplazar bloque de items
-        # Buscar patrón entre comentarios <!-- INICIO BLOQUE REPETIBLE --> y <!-- FIN BLOQUE REPETIBLE -->
-        import re
-        pattern = r'<!-- INICIO BLOQUE REPETIBLE.*?<!-- FIN BLOQUE REPETIBLE -->'
-        template = re.sub(pattern, items_table, template, flags=re.DOTALL)
+            filas.append(f"| {idx} | {nombre} | {descripcion} | ${valor:.2f} |\n")
         
-        # También reemplazar items individuales si existen
-        for i in range(1, 6):
-            if i <= len(items):
-                item = items[i-1]
-                template = template.replace(f"{{{{ITEM_{i}_NOMBRE}}}}", 
-                                          item.get("descripcion", f"Item {i}"))
-                template = template.replace(f"{{{{ITEM_{i}_DESCRIPCION}}}}", 
-                                          item.get("descripcion", ""))
-                template = template.replace(f"{{{{ITEM_{i}_VALOR}}}}", 
-                                          f"{item.get('precio_unitario', 0):.2f}")
-        
-        return template
+        return ''.join(filas)
     
-    def _replace_fases(self, template: str, fases: List[Dict[str, Any]]) -> str:
-        """Reemplaza las fases del proyecto"""
-        if not fases:
-            return template
-        
-        for idx, fase in enumerate(fases, 1):
-            template = template.replace(f"{{{{FASE_{idx}_NOMBRE}}}}", 
-                                      fase.get("nombre", f"Fase {idx}"))
-            template = template.replace(f"{{{{FASE_{idx}_DESCRIPCION}}}}", 
-                                      fase.get("descripcion", ""))
-            template = template.replace(f"{{{{FASE_{idx}_DURACION}}}}", 
-                                      fase.get("duracion", ""))
-        
-        return template
+    def _item_values(self, items: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Valores de los items individuales ITEM_1..ITEM_5"""
+        valores = {}
+        for i, item in enumerate(items[:5], 1):
+            valores[f"ITEM_{i}_NOMBRE"] = str(item.get("descripcion", f"Item {i}"))
+            valores[f"ITEM_{i}_DESCRIPCION"] = str(item.get("descripcion", ""))
+            valores[f"ITEM_{i}_VALOR"] = f"{item.get('precio_unitario', 0):.2f}"
+        return valores
     
-    def _clean_html_comments(self, template: str) -> str:
-        """Elimina comentarios HTML de la plantilla"""
-        import re
-        return re.sub(r'<!--.*?-->', '', template, flags=re.DOTALL)
+    def _fase_values(self, fases: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Valores de las fases del proyecto FASE_n"""
+        valores = {}
+        for idx, fase in enumerate(fases, 1):
+            valores[f"FASE_{idx}_NOMBRE"] = str(fase.get("nombre", f"Fase {idx}"))
+            valores[f"FASE_{idx}_DESCRIPCION"] = str(fase.get("descripcion", ""))
+            valores[f"FASE_{idx}_DURACION"] = str(fase.get("duracion", ""))
+        return valores
     
     def _generate_simple_cotizacion(
         self, 
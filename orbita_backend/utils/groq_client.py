@@ -1,24 +1,224 @@
 # Cliente para Groq API y OpenAI API
 # [CRITERIO 3] — Uso real de IA con modelos de Groq y OpenAI
 
-import groq
-from openai import OpenAI
-from typing import Dict, Any, List, Optional
-from config import get_settings, USE_OPENAI_FOR_ORCHESTRATOR, OPENAI_MODEL_ORCHESTRATOR
+import hashlib
+import json
+import time
+from collections import OrderedDict, defaultdict
+import httpx
+from groq import AsyncGroq
+from openai import AsyncOpenAI
+from typing import AsyncIterator, BinaryIO, Dict, Any, List, Optional, Tuple
+from config import get_settings, USE_OPENAI_FOR_ORCHESTRATOR, OPENAI_MODEL_ORCHESTRATOR, TRANSCRIPTION_MODEL
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    # Redis es opcional: sin la librería la caché funciona solo en memoria
+    aioredis = None
+
+# Respuesta genérica cuando falla la API (nunca se guarda en caché)
+FALLBACK_RESPONSE = "Lo siento, hay un problema técnico. Por favor intenta de nuevo."
+
+# Pool HTTP compartido por todas las instancias de GroqClient del proceso
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """Obtiene el httpx.AsyncClient compartido (un solo pool de conexiones por proceso)."""
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        settings = get_settings()
+        _shared_http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings["llm_max_connections"],
+                max_keepalive_connections=settings["llm_max_keepalive_connections"]
+            ),
+            timeout=httpx.Timeout(settings["llm_timeout_seconds"], connect=10.0)
+        )
+    return _shared_http_client
+
+class CompletionCache:
+    """
+    Caché opcional de completions para prompts idénticos entre sesiones.
+    
+    Dos niveles:
+    - Memoria del proceso: LRU con TTL (OrderedDict)
+    - Redis (opcional): compartido entre workers, con el mismo TTL
+    
+    Las llamadas con temperatura por encima de max_temperature no se cachean.
+    Lleva contadores por agent_type para medir ahorro de llamadas y latencia.
+    """
+    
+    REDIS_PREFIX = "orbita:llm_cache:"
+    
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: int = 3600,
+        max_temperature: float = 0.7,
+        redis_url: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._redis = None
+        if redis_url and aioredis is not None:
+            self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            "hits_memoria": 0,
+            "hits_redis": 0,
+            "misses": 0,
+            "bypass": 0,
+            "latencia_misses_ms": 0.0,
+            "tokens_ahorrados_aprox": 0
+        })
+    
+    def is_cacheable(self, temperature: float) -> bool:
+        """Solo se cachean llamadas poco creativas (temperatura <= umbral)."""
+        return temperature <= self.max_temperature
+    
+    @staticmethod
+    def make_key(
+        model: str,
+        system_message: Optional[str],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool = False
+    ) -> str:
+        """Clave estable a partir de (modelo, system, prompt, temperatura, max_tokens, json_mode)."""
+        raw = json.dumps(
+            [model, system_message or "", prompt, round(temperature, 3), max_tokens, json_mode],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    async def get(self, key: str, agent_type: str, prompt_chars: int = 0) -> Optional[str]:
+        """Busca en memoria y luego en Redis; registra hit/miss por agente."""
+        stats = self._stats[agent_type]
+        
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                stats["hits_memoria"] += 1
+                stats["tokens_ahorrados_aprox"] += (prompt_chars + len(value)) // 4
+                return value
+            del self._entries[key]
+        
+        if self._redis is not None:
+            try:
+                value = await self._redis.get(self.REDIS_PREFIX + key)
+            except Exception as e:
+                print(f"⚠️ Caché Redis no disponible, usando solo memoria: {e}")
+                self._redis = None
+                value = None
+            if value is not None:
+                self._store_local(key, value)
+                stats["hits_redis"] += 1
+                stats["tokens_ahorrados_aprox"] += (prompt_chars + len(value)) // 4
+                return value
+        
+        stats["misses"] += 1
+        return None
+    
+    async def set(self, key: str, value: str):
+        """Guarda la respuesta en ambos niveles."""
+        self._store_local(key, value)
+        if self._redis is not None:
+            try:
+                await self._redis.set(self.REDIS_PREFIX + key, value, ex=self.ttl_seconds)
+            except Exception as e:
+                print(f"⚠️ No se pudo escribir en caché Redis: {e}")
+    
+    def _store_local(self, key: str, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def record_bypass(self, agent_type: str):
+        self._stats[agent_type]["bypass"] += 1
+    
+    def record_miss_latency(self, agent_type: str, latency_ms: float):
+        self._stats[agent_type]["latencia_misses_ms"] += latency_ms
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores por agent_type con el ahorro estimado de latencia."""
+        por_agente = {}
+        for agent_type, stats in self._stats.items():
+            hits = stats["hits_memoria"] + stats["hits_redis"]
+            latencia_media = (
+                stats["latencia_misses_ms"] / stats["misses"] if stats["misses"] else 0.0
+            )
+            por_agente[agent_type] = {
+                "hits_memoria": stats["hits_memoria"],
+                "hits_redis": stats["hits_redis"],
+                "misses": stats["misses"],
+                "bypass": stats["bypass"],
+                "hit_rate": hits / (hits + stats["misses"]) if hits + stats["misses"] else 0.0,
+                "latencia_ahorrada_ms": round(hits * latencia_media, 1),
+                "tokens_ahorrados_aprox": stats["tokens_ahorrados_aprox"]
+            }
+        return {
+            "entradas_memoria": len(self._entries),
+            "redis_activo": self._redis is not None,
+            "max_temperatura": self.max_temperature,
+            "por_agente": por_agente
+        }
+    
+    def clear(self):
+        self._entries.clear()
+
+
+# Caché compartida por todas las instancias de GroqClient (None si está desactivada)
+_completion_cache: Optional[CompletionCache] = None
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """Obtiene la caché global de completions, o None si LLM_CACHE_ENABLED=false."""
+    global _completion_cache
+    settings = get_settings()
+    if _completion_cache is None and settings["llm_cache_enabled"]:
+        _completion_cache = CompletionCache(
+            max_entries=settings["llm_cache_max_entries"],
+            ttl_seconds=settings["llm_cache_ttl_seconds"],
+            max_temperature=settings["llm_cache_max_temperature"],
+            redis_url=settings.get("redis_url")
+        )
+    return _completion_cache
 
 class GroqClient:
     """
     Cliente para interactuar con Groq API y OpenAI API.
     Maneja diferentes modelos para diferentes agentes según las especificaciones.
+    
+    Usa los clientes asíncronos de los SDK (AsyncGroq / AsyncOpenAI) sobre un
+    único httpx.AsyncClient compartido, de modo que las llamadas concurrentes
+    de distintos leads se solapan en vez de bloquear el event loop.
     """
     
     def __init__(self):
         settings = get_settings()
-        self.groq_client = groq.Groq(api_key=settings["groq_api_key"])
+        
+        # Pool de conexiones compartido por Groq y OpenAI
+        self.http_client = get_shared_http_client()
+        
+        self.groq_client = AsyncGroq(
+            api_key=settings["groq_api_key"],
+            base_url=settings.get("groq_base_url"),
+            http_client=self.http_client
+        )
         
         # Inicializar cliente de OpenAI si está configurado
         if settings.get("openai_api_key"):
-            self.openai_client = OpenAI(api_key=settings["openai_api_key"])
+            self.openai_client = AsyncOpenAI(
+                api_key=settings["openai_api_key"],
+                base_url=settings.get("openai_base_url"),
+                http_client=self.http_client
+            )
         else:
             self.openai_client = None
             
@@ -30,6 +230,9 @@ class GroqClient:
             "analitico": "llama-3.3-70b-versatile"
         }
         
+        # Caché de completions (opt-in con LLM_CACHE_ENABLED)
+        self.cache = get_completion_cache()
+        
     def get_model_for_agent(self, agent_type: str) -> str:
         """Obtiene el modelo apropiado para cada tipo de agente."""
         return self.models.get(agent_type, "llama-3.1-8b-instant")
@@ -40,7 +243,8 @@ class GroqClient:
         agent_type: str = "conversacional",
         max_tokens: int = 1000,
         temperature: float = 0.7,
-        system_message: Optional[str] = None
+        system_message: Optional[str] = None,
+        json_mode: bool = False
     ) -> str:
         """
         Genera una respuesta usando Groq API o OpenAI API según configuración.
@@ -51,19 +255,125 @@ class GroqClient:
             max_tokens: Máximo número de tokens en la respuesta
             temperature: Creatividad de la respuesta (0.0-2.0)
             system_message: Mensaje del sistema opcional
+            json_mode: Solicita al modelo un objeto JSON válido (response_format)
             
         Returns:
             Respuesta generada por el modelo
         """
         # Usar OpenAI para orchestrator si está configurado
-        if agent_type == "orchestrator" and USE_OPENAI_FOR_ORCHESTRATOR and self.openai_client:
-            return await self._generate_openai_completion(
-                prompt, system_message, max_tokens, temperature
+        use_openai = agent_type == "orchestrator" and USE_OPENAI_FOR_ORCHESTRATOR and self.openai_client
+        model = OPENAI_MODEL_ORCHESTRATOR if use_openai else self.get_model_for_agent(agent_type)
+        
+        # Consultar la caché antes de llamar al modelo
+        cache_key = None
+        if self.cache is not None:
+            if self.cache.is_cacheable(temperature):
+                cache_key = self.cache.make_key(model, system_message, prompt, temperature, max_tokens, json_mode)
+                prompt_chars = len(prompt) + len(system_message or "")
+                cached = await self.cache.get(cache_key, agent_type, prompt_chars)
+                if cached is not None:
+                    return cached
+            else:
+                self.cache.record_bypass(agent_type)
+        
+        start = time.perf_counter()
+        
+        if use_openai:
+            content = await self._generate_openai_completion(
+                prompt, system_message, max_tokens, temperature, json_mode
             )
+        else:
+            content = await self._generate_groq_completion(
+                prompt, model, system_message, max_tokens, temperature, json_mode
+            )
+        
+        if cache_key is not None and content and content != FALLBACK_RESPONSE:
+            self.cache.record_miss_latency(agent_type, (time.perf_counter() - start) * 1000)
+            await self.cache.set(cache_key, content)
+        
+        return content
+    
+    async def stream_completion(
+        self,
+        prompt: str,
+        agent_type: str = "conversacional",
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        system_message: Optional[str] = None,
+        json_mode: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Igual que generate_completion pero entrega el texto a medida que se genera.
         
-        # Usar Groq para otros agentes
-        model = self.get_model_for_agent(agent_type)
+        Cerrar el iterador antes de tiempo (break / aclose) cierra la conexión
+        y con ella la generación. Un acierto de caché se entrega de una vez; la
+        respuesta completa se guarda en caché al terminar el stream. Si la API
+        falla antes del primer fragmento se entrega FALLBACK_RESPONSE.
+        """
+        use_openai = agent_type == "orchestrator" and USE_OPENAI_FOR_ORCHESTRATOR and self.openai_client
+        model = OPENAI_MODEL_ORCHESTRATOR if use_openai else self.get_model_for_agent(agent_type)
+        
+        cache_key = None
+        if self.cache is not None:
+            if self.cache.is_cacheable(temperature):
+                cache_key = self.cache.make_key(model, system_message, prompt, temperature, max_tokens, json_mode)
+                prompt_chars = len(prompt) + len(system_message or "")
+                cached = await self.cache.get(cache_key, agent_type, prompt_chars)
+                if cached is not None:
+                    yield cached
+                    return
+            else:
+                self.cache.record_bypass(agent_type)
+        
+        messages = []
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": prompt})
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        client = self.openai_client if use_openai else self.groq_client
+        
+        start = time.perf_counter()
+        partes: List[str] = []
+        stream = None
+        try:
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                **extra
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    partes.append(delta)
+                    yield delta
+        except Exception as e:
+            print(f"❌ Error en streaming de {'OpenAI' if use_openai else 'Groq'} API: {e}")
+            if not partes:
+                yield FALLBACK_RESPONSE
+            return
+        finally:
+            if stream is not None:
+                await stream.close()
         
+        if cache_key is not None and partes:
+            self.cache.record_miss_latency(agent_type, (time.perf_counter() - start) * 1000)
+            await self.cache.set(cache_key, "".join(partes))
+    
+    async def _generate_groq_completion(
+        self,
+        prompt: str,
+        model: str,
+        system_message: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool = False
+    ) -> str:
+        """
+        Genera una respuesta usando Groq API.
+        """
         messages = []
         if system_message:
             messages.append({
@@ -76,26 +386,30 @@ class GroqClient:
             "content": prompt
         })
         
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        
         try:
-            response = self.groq_client.chat.completions.create(
+            response = await self.groq_client.chat.completions.create(
                 model=model,
                 messages=messages,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                **extra
             )
             
             return response.choices[0].message.content
             
         except Exception as e:
             print(f"❌ Error en Groq API: {e}")
-            return "Lo siento, hay un problema técnico. Por favor intenta de nuevo."
+            return FALLBACK_RESPONSE
     
     async def _generate_openai_completion(
         self,
         prompt: str,
         system_message: Optional[str],
         max_tokens: int,
-        temperature: float
+        temperature: float,
+        json_mode: bool = False
     ) -> str:
         """
         Genera una respuesta usando OpenAI API.
@@ -112,19 +426,51 @@ class GroqClient:
             "content": prompt
         })
         
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        
         try:
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model=OPENAI_MODEL_ORCHESTRATOR,
                 messages=messages,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                **extra
             )
             
             return response.choices[0].message.content
             
         except Exception as e:
             print(f"❌ Error en OpenAI API: {e}")
-            return "Lo siento, hay un problema técnico. Por favor intenta de nuevo."
+            return FALLBACK_RESPONSE
+    
+    async def transcribe_audio(
+        self,
+        audio: BinaryIO,
+        filename: str = "voice.ogg",
+        content_type: str = "audio/ogg",
+        language: str = "es"
+    ) -> str:
+        """
+        Transcribe audio con Whisper de Groq.
+        
+        Args:
+            audio: Archivo en memoria (p. ej. BytesIO); se envía tal cual en el multipart
+            filename: Nombre con la extensión del formato (Whisper la usa para detectarlo)
+            
+        Returns:
+            Texto transcrito (lanza la excepción del SDK si falla)
+        """
+        transcript = await self.groq_client.audio.transcriptions.create(
+            file=(filename, audio, content_type),
+            model=TRANSCRIPTION_MODEL,
+            language=language
+        )
+        return transcript.text
+    
+    async def aclose(self):
+        """Cierra el pool de conexiones compartido (usar al apagar la aplicación)."""
+        if not self.http_client.is_closed:
+            await self.http_client.aclose()
 
 # Instancia global del cliente
 _groq_client: Optional[GroqClient] = None
@@ -136,6 +482,14 @@ def get_groq_client() -> GroqClient:
         _groq_client = GroqClient()
     return _groq_client
 
+async def close_groq_client():
+    """Cierra el pool HTTP compartido y descarta el cliente global."""
+    global _groq_client, _shared_http_client
+    if _shared_http_client is not None and not _shared_http_client.is_closed:
+        await _shared_http_client.aclose()
+    _shared_http_client = None
+    _groq_client = None
+
 # Funciones de conveniencia para usar en los agentes
 async def generate_agent_response(
     prompt: str,
@@ -0,0 +1,278 @@
+"""
+Clasificador local de intención (fast-path) para el orquestador
+[CRITERIO 2] - Enruta mensajes obvios sin gastar una llamada al LLM
+
+Dos componentes en Python puro (sin numpy ni GPU):
+- Autómata de palabras clave: una sola expresión regular compilada con un
+  grupo por agente; una pasada sobre el texto cuenta coincidencias por agente.
+- Modelo lineal (regresión logística multinomial) sobre n-gramas de caracteres
+  hasheados, entrenado con train_intent_classifier.py a partir de agent_logs.
+
+Si la confianza combinada supera el umbral, el orquestador usa esta decisión
+y omite la llamada de intención al LLM.
+"""
+
+import json
+import math
+import os
+import random
+import re
+import zlib
+from typing import Dict, List, Optional, Any, Tuple
+
+from config import get_settings
+from utils.semantic_cache import normalizar_mensaje
+
+
+AGENTES = ["captador", "conversacional", "identidad", "analitico"]
+
+# Raíces de palabras clave por agente (texto normalizado, sin acentos)
+PALABRAS_CLAVE = {
+    "captador": [
+        "cotiz", "precio", "presupuest", "cuanto cuesta", "cuanto vale", "costo",
+        "contrat", "interesad", "necesito una", "necesito un", "quiero una", "quiero un",
+        "tienda online", "ecommerce", "app movil", "pagina web", "sitio web", "landing",
+        "agendar", "reunion", "llamada"
+    ],
+    "conversacional": [
+        "hola", "buenas", "buenos dias", "buenas tardes", "gracias", "ayuda",
+        "como estas", "adios", "hasta luego", "chao", "ok", "perfecto", "vale"
+    ],
+    "identidad": [
+        "quienes son", "quienes somos", "empresa", "nosotros", "valores", "mision",
+        "vision", "historia", "equipo", "fundad", "trayectoria", "experiencia tienen",
+        "donde estan", "ubicad", "portafolio", "clientes han"
+    ],
+    "analitico": [
+        "reporte", "metrica", "analisis", "estadistic", "dashboard", "kpi",
+        "conversion", "rendimiento", "tasa de", "informe", "embudo"
+    ]
+}
+
+
+class KeywordAutomaton:
+    """
+    Autómata de palabras clave compilado.
+
+    Todas las raíces se combinan en una expresión regular con un grupo
+    nombrado por agente, así el texto se recorre una sola vez.
+    """
+
+    def __init__(self, palabras_clave: Dict[str, List[str]] = PALABRAS_CLAVE):
+        grupos = []
+        for agente, raices in palabras_clave.items():
+            # Raíces más largas primero para preferir la coincidencia más específica
+            alternativas = "|".join(re.escape(r) for r in sorted(raices, key=len, reverse=True))
+            grupos.append(f"(?P<{agente}>\\b(?:{alternativas})\\w*)")
+        self._regex = re.compile("|".join(grupos))
+
+    def match(self, texto_normalizado: str) -> Dict[str, int]:
+        conteos: Dict[str, int] = {}
+        for m in self._regex.finditer(texto_normalizado):
+            conteos[m.lastgroup] = conteos.get(m.lastgroup, 0) + 1
+        return conteos
+
+
+class CharNgramLinearModel:
+    """
+    Regresión logística multinomial sobre n-gramas de caracteres hasheados.
+
+    Los pesos se guardan dispersos (feature -> lista de pesos por clase) para
+    que el archivo JSON y el costo de predicción sean pequeños.
+    """
+
+    def __init__(
+        self,
+        labels: List[str] = AGENTES,
+        n_features: int = 1 << 18,
+        ngram_range: Tuple[int, int] = (3, 5)
+    ):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.bias = [0.0] * len(self.labels)
+        self.weights: Dict[int, List[float]] = {}
+
+    def featurize(self, texto_normalizado: str) -> Dict[int, float]:
+        """N-gramas de caracteres por palabra más la palabra completa, normalizados L2."""
+        conteos: Dict[int, float] = {}
+        n_min, n_max = self.ngram_range
+        for palabra in texto_normalizado.split():
+            rellenada = f" {palabra} "
+            terminos = [f"w:{palabra}"]
+            for n in range(n_min, n_max + 1):
+                terminos.extend(rellenada[i:i + n] for i in range(max(1, len(rellenada) - n + 1)))
+            for termino in terminos:
+                h = zlib.crc32(termino.encode("utf-8")) % self.n_features
+                conteos[h] = conteos.get(h, 0.0) + 1.0
+        norma = math.sqrt(sum(v * v for v in conteos.values()))
+        return {f: v / norma for f, v in conteos.items()} if norma else {}
+
+    def predict_proba(self, features: Dict[int, float]) -> List[float]:
+        scores = list(self.bias)
+        for f, v in features.items():
+            pesos = self.weights.get(f)
+            if pesos:
+                for k, w in enumerate(pesos):
+                    scores[k] += w * v
+        maximo = max(scores)
+        exps = [math.exp(s - maximo) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def fit(
+        self,
+        textos: List[str],
+        etiquetas: List[str],
+        epochs: int = 15,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 13
+    ):
+        """Entrena con SGD (Python puro; suficiente para miles de ejemplos)."""
+        datos = [(self.featurize(normalizar_mensaje(t)), self.labels.index(e)) for t, e in zip(textos, etiquetas)]
+        rng = random.Random(seed)
+        n_clases = len(self.labels)
+
+        for epoch in range(epochs):
+            rng.shuffle(datos)
+            lr = learning_rate / (1 + epoch * 0.2)
+            for features, y in datos:
+                probs = self.predict_proba(features)
+                for k in range(n_clases):
+                    gradiente = probs[k] - (1.0 if k == y else 0.0)
+                    self.bias[k] -= lr * gradiente
+                    if abs(gradiente) < 1e-6:
+                        continue
+                    for f, v in features.items():
+                        pesos = self.weights.setdefault(f, [0.0] * n_clases)
+                        pesos[k] -= lr * (gradiente * v + l2 * pesos[k])
+
+    def to_dict(self, min_weight: float = 1e-3) -> Dict[str, Any]:
+        return {
+            "labels": self.labels,
+            "n_features": self.n_features,
+            "ngram_range": list(self.ngram_range),
+            "bias": [round(b, 5) for b in self.bias],
+            "weights": {
+                str(f): [round(w, 5) for w in pesos]
+                for f, pesos in self.weights.items()
+                if max(abs(w) for w in pesos) >= min_weight
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CharNgramLinearModel":
+        model = cls(labels=data["labels"], n_features=data["n_features"], ngram_range=data["ngram_range"])
+        model.bias = list(data["bias"])
+        model.weights = {int(f): pesos for f, pesos in data["weights"].items()}
+        return model
+
+
+class IntentClassifier:
+    """
+    Combina el autómata de palabras clave y el modelo lineal.
+
+    - Si ambos coinciden, la confianza del modelo se refuerza.
+    - Si se contradicen, la confianza se limita para que decida el LLM.
+    - Sin modelo entrenado, solo el autómata (confianza moderada).
+    """
+
+    def __init__(self, model: Optional[CharNgramLinearModel] = None, threshold: float = 0.85):
+        self.automaton = KeywordAutomaton()
+        self.model = model
+        self.threshold = threshold
+        self.stats = {"clasificados": 0, "fast_path": 0, "derivados_llm": 0}
+
+    def classify(self, mensaje: str) -> Dict[str, Any]:
+        """
+        Clasifica un mensaje.
+
+        Returns:
+            Dict con la forma del análisis de intención del orquestador
+            (selected_agent, confidence, reasoning, extracted_data, message_type)
+        """
+        texto = normalizar_mensaje(mensaje)
+        conteos = self.automaton.match(texto)
+
+        agente_kw = None
+        if conteos:
+            ordenados = sorted(conteos.items(), key=lambda x: x[1], reverse=True)
+            if len(ordenados) == 1 or ordenados[0][1] > ordenados[1][1]:
+                agente_kw = ordenados[0][0]
+
+        if self.model is not None:
+            probs = self.model.predict_proba(self.model.featurize(texto))
+            mejor = max(range(len(probs)), key=probs.__getitem__)
+            agente, confianza = self.model.labels[mejor], probs[mejor]
+            if agente_kw == agente:
+                confianza = 1 - (1 - confianza) * 0.5
+            elif agente_kw is not None:
+                confianza = min(confianza, 0.5)
+            scores = {label: round(p, 4) for label, p in zip(self.model.labels, probs)}
+        elif agente_kw is not None:
+            agente = agente_kw
+            confianza = 0.9 if conteos[agente_kw] >= 2 else 0.75
+            scores = {}
+        else:
+            agente, confianza, scores = "conversacional", 0.0, {}
+
+        self.stats["clasificados"] += 1
+        self.stats["fast_path" if confianza >= self.threshold else "derivados_llm"] += 1
+
+        return {
+            "selected_agent": agente,
+            "confidence": confianza,
+            "reasoning": f"Clasificador local: palabras clave {conteos or 'ninguna'}",
+            "extracted_data": {"intent_scores": scores},
+            "message_type": "fast_path"
+        }
+
+    def is_confident(self, resultado: Dict[str, Any]) -> bool:
+        return resultado["confidence"] >= self.threshold
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.stats["clasificados"]
+        return {
+            **self.stats,
+            "modelo_cargado": self.model is not None,
+            "umbral": self.threshold,
+            "skip_rate": self.stats["fast_path"] / total if total else 0.0
+        }
+
+
+def save_model(model: CharNgramLinearModel, path: str, metadata: Optional[Dict[str, Any]] = None):
+    """Guarda el modelo en JSON (escritura atómica)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = model.to_dict()
+    data["metadata"] = metadata or {}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_model(path: str) -> Optional[CharNgramLinearModel]:
+    """Carga el modelo desde JSON; None si el archivo no existe."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return CharNgramLinearModel.from_dict(json.load(f))
+
+
+# Instancia global (None si INTENT_CLASSIFIER_ENABLED=false)
+_intent_classifier: Optional[IntentClassifier] = None
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """Obtiene el clasificador de intención global, o None si está desactivado."""
+    global _intent_classifier
+    settings = get_settings()
+    if _intent_classifier is None and settings["intent_classifier_enabled"]:
+        try:
+            model = load_model(settings["intent_classifier_path"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ No se pudo cargar el clasificador de intención: {e}")
+            model = None
+        _intent_classifier = IntentClassifier(model=model, threshold=settings["intent_classifier_threshold"])
+        print(f"🧭 Clasificador de intención activo (modelo: {'sí' if model else 'solo palabras clave'})")
+    return _intent_classifier
@@ -0,0 +1,452 @@
+"""
+Extracción y reparación de JSON en respuestas de LLM
+[CRITERIO 3] - Uso real de IA: no desperdiciar completions por formato
+
+Los agentes piden JSON en el prompt, pero el modelo a veces lo envuelve en texto
+o en bloques ```json, deja comas finales, usa comillas simples o True/None de
+Python, copia rangos del ejemplo ("confidence": 0.0-1.0) o se corta por max_tokens.
+Antes cualquiera de esos casos terminaba en json.loads fallido y en los valores
+por defecto del agente.
+
+- JsonExtractor: lector incremental que encuentra el primer objeto balanceado;
+  feed() indica cuándo se cerró, así un stream de tokens se puede cortar ahí
+  (OrchestratorAgent._stream_route_and_respond)
+- CampoStreamExtractor: entrega en vivo el valor de un campo string (el
+  "response" del sobre del orquestador) mientras el objeto se genera
+- reparar_json(): corrige los errores habituales en una pasada
+- Esquema / ESQUEMAS: campos requeridos y tipos por agente y tarea; los campos
+  opcionales con tipo incorrecto se descartan para que apliquen los defaults
+- parse_llm_json(): punto de entrada de los agentes; lleva la tasa de éxito por
+  agente (get_json_parse_stats, visible en /agentes/status)
+"""
+
+import json
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.groq_client import FALLBACK_RESPONSE
+
+# Intentos de extracción desde distintas llaves de apertura (texto con "{" antes del JSON)
+MAX_CANDIDATOS = 5
+
+_NUMERO = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_RANGO = re.compile(r"-\d+(?:\.\d+)?")
+_IDENTIFICADOR = re.compile(r"[^\W\d][\w-]*")  # cualquier letra Unicode ("ético", "ñ")
+_LITERALES = {
+    "true": "true", "false": "false", "null": "null",
+    "True": "true", "False": "false", "None": "null"
+}
+
+
+class JsonExtractor:
+    """
+    Lector incremental del primer objeto JSON balanceado de un texto.
+
+    Ignora lo anterior a la primera "{" (prosa, ```json) y cuenta llaves y
+    corchetes fuera de strings; feed() devuelve True en cuanto el objeto se cierra.
+    """
+
+    def __init__(self):
+        self._partes: List[str] = []
+        self._pila: List[str] = []
+        self._en_string = False
+        self._comilla = ""
+        self._escape = False
+        self.iniciado = False
+        self.completo = False
+
+    def feed(self, texto: str) -> bool:
+        if self.completo:
+            return True
+        i = 0
+        if not self.iniciado:
+            i = texto.find("{")
+            if i == -1:
+                return False
+            self.iniciado = True
+        inicio = i
+        for i in range(i, len(texto)):
+            c = texto[i]
+            if self._en_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == self._comilla:
+                    self._en_string = False
+            elif c in "\"'":
+                self._en_string, self._comilla = True, c
+            elif c in "{[":
+                self._pila.append(c)
+            elif c in "}]":
+                if self._pila:
+                    self._pila.pop()
+                if not self._pila:
+                    self._partes.append(texto[inicio:i + 1])
+                    self.completo = True
+                    return True
+        self._partes.append(texto[inicio:])
+        return False
+
+    @property
+    def texto(self) -> str:
+        """Objeto acumulado (completo o, si el texto terminó antes, parcial)."""
+        return "".join(self._partes)
+
+
+class CampoStreamExtractor:
+    """
+    Valor de un campo string de un objeto JSON que llega por fragmentos.
+
+    feed() devuelve el texto ya decodificado del campo que trajo ese fragmento
+    (vacío antes de que empiece y después de que se cierre). Los escapes partidos
+    entre fragmentos se guardan hasta completarse. El valor definitivo sigue
+    saliendo de parse_llm_json sobre el texto completo.
+    """
+
+    def __init__(self, campo: str):
+        self._apertura = re.compile(r'"%s"\s*:\s*"' % re.escape(campo))
+        self._buffer = ""
+        self._pendiente = ""
+        self.prefijo = ""  # texto del objeto anterior al campo
+        self.iniciado = False
+        self.completo = False
+
+    def feed(self, texto: str) -> str:
+        if self.completo:
+            return ""
+        if not self.iniciado:
+            self._buffer += texto
+            m = self._apertura.search(self._buffer)
+            if not m:
+                return ""
+            self.iniciado = True
+            self.prefijo = self._buffer[:m.start()]
+            texto, self._buffer = self._buffer[m.end():], ""
+
+        texto, self._pendiente = self._pendiente + texto, ""
+        salida: List[str] = []
+        i = 0
+        while i < len(texto):
+            c = texto[i]
+            if c == '"':
+                self.completo = True
+                break
+            if c != "\\":
+                salida.append(c)
+                i += 1
+                continue
+            largo = _largo_escape(texto, i)
+            if largo is None:
+                self._pendiente = texto[i:]
+                break
+            try:
+                salida.append(json.loads(f'"{texto[i:i + largo]}"'))
+            except json.JSONDecodeError:
+                salida.append(texto[i + 1:i + largo])
+            i += largo
+        return "".join(salida)
+
+
+def _largo_escape(texto: str, i: int) -> Optional[int]:
+    """Largo del escape que empieza en texto[i] (None si todavía no llegó completo)."""
+    if i + 1 >= len(texto):
+        return None
+    if texto[i + 1] != "u":
+        return 2
+    if i + 6 > len(texto):
+        return None
+    # Par sustituto (emojis): \ud83d\ude00 se decodifica junto
+    if texto[i + 2].lower() == "d" and texto[i + 3].lower() in "89ab":
+        if i + 12 > len(texto):
+            return None
+        return 12 if texto[i + 6:i + 8] == "\\u" else 6
+    return 6
+
+
+def reparar_json(texto: str) -> str:
+    """
+    Corrige en una pasada: comentarios, comas finales, comillas simples, claves
+    sin comillas, True/False/None, saltos de línea dentro de strings, rangos
+    numéricos copiados del ejemplo y objetos cortados (cierra strings y llaves).
+    """
+    salida: List[str] = []
+    pila: List[str] = []
+    i, n = 0, len(texto)
+    while i < n:
+        c = texto[i]
+
+        if c in "\"'":
+            # String: siempre con comillas dobles y sin saltos de línea crudos
+            comilla, i = c, i + 1
+            partes = ['"']
+            cerrado = False
+            while i < n:
+                d = texto[i]
+                if d == "\\" and i + 1 < n:
+                    siguiente = texto[i + 1]
+                    partes.append(siguiente if comilla == "'" and siguiente == "'" else d + siguiente)
+                    i += 2
+                    continue
+                if d == comilla:
+                    cerrado = True
+                    i += 1
+                    break
+                if d == '"':
+                    partes.append('\\"')
+                elif d == "\n":
+                    partes.append("\\n")
+                elif d != "\r":
+                    partes.append(d)
+                i += 1
+            partes.append('"')
+            salida.append("".join(partes))
+            if not cerrado:
+                break
+            continue
+
+        if c == "/" and texto.startswith("//", i):
+            fin = texto.find("\n", i)
+            i = n if fin == -1 else fin
+            continue
+        if c == "/" and texto.startswith("/*", i):
+            fin = texto.find("*/", i + 2)
+            i = n if fin == -1 else fin + 2
+            continue
+
+        if c in "{[":
+            pila.append("}" if c == "{" else "]")
+            salida.append(c)
+        elif c in "}]":
+            _quitar_coma_final(salida)
+            if pila:
+                salida.append(pila.pop())
+            if not pila:
+                break
+        elif c == "-" or c.isdigit():
+            m = _NUMERO.match(texto, i)
+            if m:
+                salida.append(m.group())
+                i = m.end()
+                rango = _RANGO.match(texto, i)
+                if rango:  # "0.0-1.0" → 0.0
+                    i = rango.end()
+                continue
+            salida.append(c)
+        elif c.isalpha() or c == "_":
+            m = _IDENTIFICADOR.match(texto, i)
+            if m is None:
+                salida.append(c)
+                i += 1
+                continue
+            palabra = m.group()
+            i = m.end()
+            if palabra in _LITERALES:
+                salida.append(_LITERALES[palabra])
+            else:
+                # Clave sin comillas o palabra suelta como valor
+                salida.append(json.dumps(palabra))
+            continue
+        else:
+            salida.append(c)
+        i += 1
+
+    # Objeto cortado: quitar lo que quedó a medias y cerrar
+    if pila:
+        _quitar_coma_final(salida)
+        if salida and salida[-1].rstrip().endswith(":"):
+            salida.append("null")
+        elif pila[-1] == "}" and _clave_sin_valor(salida):
+            salida.append(":null")
+        while pila:
+            _quitar_coma_final(salida)
+            salida.append(pila.pop())
+    return "".join(salida)
+
+
+def _quitar_coma_final(salida: List[str]):
+    while salida and not salida[-1].strip():
+        salida.pop()
+    if salida and salida[-1].rstrip().endswith(","):
+        salida[-1] = salida[-1].rstrip()[:-1]
+
+
+def _clave_sin_valor(salida: List[str]) -> bool:
+    """¿El último token es una clave de objeto (string precedido de "{" o ",")?"""
+    if not salida or not salida[-1].startswith('"'):
+        return False
+    previos = [s for s in salida[:-1] if s.strip()]
+    return bool(previos) and previos[-1].rstrip()[-1:] in ("{", ",")
+
+
+def extraer_json(texto: str) -> Tuple[Optional[Any], str]:
+    """
+    Primer objeto JSON del texto.
+
+    Returns:
+        (objeto o None, forma): forma es "directo", "extraido", "reparado" o "fallido"
+    """
+    if not texto:
+        return None, "fallido"
+    try:
+        return json.loads(texto), "directo"
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    inicio = texto.find("{")
+    for _ in range(MAX_CANDIDATOS):
+        if inicio == -1:
+            break
+        extractor = JsonExtractor()
+        extractor.feed(texto[inicio:])
+        candidato = extractor.texto
+        if extractor.completo:
+            try:
+                return json.loads(candidato), "extraido"
+            except json.JSONDecodeError:
+                pass
+        try:
+            return json.loads(reparar_json(candidato)), "reparado"
+        except json.JSONDecodeError:
+            inicio = texto.find("{", inicio + 1)
+    return None, "fallido"
+
+
+class Esquema:
+    """Campos requeridos (con tipo) y opcionales (se descartan si el tipo no coincide)."""
+
+    def __init__(self, requeridos: Optional[Dict[str, tuple]] = None, opcionales: Optional[Dict[str, tuple]] = None):
+        self.requeridos = requeridos or {}
+        self.opcionales = opcionales or {}
+
+    def validar(self, obj: Any) -> List[str]:
+        """Errores de los campos requeridos; limpia los opcionales inválidos en el propio objeto."""
+        if not isinstance(obj, dict):
+            return ["no es un objeto"]
+        errores = [
+            f"{campo}: falta o no es {'/'.join(t.__name__ for t in tipos)}"
+            for campo, tipos in self.requeridos.items()
+            if not isinstance(obj.get(campo), tipos)
+        ]
+        for campo, tipos in self.opcionales.items():
+            if campo in obj and not isinstance(obj[campo], tipos):
+                del obj[campo]
+        return errores
+
+
+_NUM = (int, float)
+_TEXTO_O_NULO = (str, int, float, type(None))
+
+ESQUEMAS: Dict[str, Esquema] = {
+    "orchestrator.enrutamiento": Esquema(
+        requeridos={"selected_agent": (str,)},
+        opcionales={"confidence": _NUM + (str,), "reasoning": (str,), "extracted_data": (dict,), "message_type": (str,)}
+    ),
+    "orchestrator.sobre": Esquema(
+        requeridos={"response": (str,)},
+        opcionales={"selected_agent": (str,), "confidence": _NUM + (str,), "reasoning": (str,),
+                    "extracted_data": (dict,), "message_type": (str,)}
+    ),
+    "analitico.interpretacion": Esquema(
+        requeridos={"analysis_type": (str,)},
+        opcionales={"secondary_types": (list,), "target_metrics": (list,), "dimensions": (list,),
+                    "time_period": (dict,), "detail_level": (str,), "output_format": (list,),
+                    "specific_questions": (list,), "confidence": _NUM}
+    ),
+    "analitico.insights": Esquema(
+        requeridos={"key_findings": (list,)},
+        opcionales={"trends": (list,), "opportunities": (list,), "risks": (list,),
+                    "recommendations": (list,), "next_steps": (list,), "confidence": _NUM}
+    ),
+    "captador.extraccion": Esquema(
+        opcionales={campo: _TEXTO_O_NULO for campo in
+                    ("interes", "empresa", "cargo", "presupuesto", "timeline", "nivel_urgencia")}
+    ),
+    "comunicacion.analisis": Esquema(
+        requeridos={"communication_objective": (str,)},
+        opcionales={"campaign_type": (str,), "target_audience": (dict,), "message_priority": (str,),
+                    "content_type": (str,), "preferred_channels": (list,), "timeline": (str,),
+                    "success_metrics": (list,), "special_requirements": (list,),
+                    "budget_considerations": (str,), "compliance_requirements": (list,), "confidence": _NUM}
+    ),
+    "comunicacion.contenido": Esquema(
+        requeridos={"content_variations": (dict,)},
+        opcionales={"ab_testing_plan": (dict,), "personalization_strategy": (dict,)}
+    ),
+    "comunicacion.cotizacion": Esquema(
+        requeridos={"items": (list,)},
+        opcionales={"titulo": (str,), "descripcion_personalizada": (str,), "plan_nombre": (str,),
+                    "descripcion_alcance": (str,), "fases": (list,), "tiempo_total": (str,),
+                    "forma_pago": (str,), "notas": (str,), "descuento_sugerido": _NUM}
+    ),
+    "conversacional.analisis": Esquema(
+        requeridos={"type": (str,)},
+        opcionales={"formality": (str,), "emotional_tone": (str,), "technical_level": (str,),
+                    "main_intent": (str,), "confidence": _NUM, "key_topics": (list,)}
+    ),
+    "identidad.inferencia": Esquema(
+        opcionales={"professional_profile": (dict,), "personal_characteristics": (dict,),
+                    "business_context": (dict,), "motivations": (dict,)}
+    ),
+}
+
+
+class JsonParseStats:
+    """Cómo terminó cada respuesta JSON, por agente (sin_respuesta: falló la API, no cuenta en la tasa)."""
+
+    FORMAS = ("directo", "extraido", "reparado", "esquema_invalido", "fallido", "sin_respuesta")
+
+    def __init__(self):
+        self._por_agente: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.FORMAS, 0))
+
+    def registrar(self, agente: str, forma: str):
+        self._por_agente[agente][forma] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for agente, contadores in sorted(self._por_agente.items()):
+            total = sum(contadores.values()) - contadores["sin_respuesta"]
+            exitos = contadores["directo"] + contadores["extraido"] + contadores["reparado"]
+            stats[agente] = {
+                **contadores,
+                "total": total,
+                "tasa_exito": round(exitos / total, 3) if total else None
+            }
+        return stats
+
+    def reset(self):
+        self._por_agente.clear()
+
+
+_parse_stats = JsonParseStats()
+
+def get_json_parse_stats() -> Dict[str, Any]:
+    """Tasa de parseo correcto por agente desde el arranque."""
+    return _parse_stats.get_stats()
+
+
+def parse_llm_json(texto: Optional[str], tarea: str) -> Optional[Dict[str, Any]]:
+    """
+    Objeto JSON de la respuesta del LLM validado con ESQUEMAS[tarea], o None.
+
+    Args:
+        tarea: "<agente>.<tarea>" (p. ej. "captador.extraccion"); el agente es la
+               clave de las estadísticas
+    """
+    agente = tarea.split(".", 1)[0]
+    if not texto or texto == FALLBACK_RESPONSE:
+        _parse_stats.registrar(agente, "sin_respuesta")
+        return None
+    obj, forma = extraer_json(texto)
+    if obj is None:
+        _parse_stats.registrar(agente, "fallido")
+        return None
+    esquema = ESQUEMAS.get(tarea)
+    errores = esquema.validar(obj) if esquema else ([] if isinstance(obj, dict) else ["no es un objeto"])
+    if errores:
+        print(f"⚠️ JSON de {tarea} no cumple el esquema: {'; '.join(errores)}")
+        _parse_stats.registrar(agente, "esquema_invalido")
+        return None
+    _parse_stats.registrar(agente, forma)
+    return obj
@@ -0,0 +1,210 @@
+"""
+Sink asíncrono con escritura diferida (write-behind) para agent_logs
+[CRITERIO 1] - Registro completo de la actividad de los agentes sin frenar las respuestas
+
+log_agent_action ya no hace un insert a Supabase por llamada: encola la fila
+y una tarea de fondo la envía en inserts masivos cuando se junta un lote
+(LOG_SINK_BATCH_SIZE) o vence el intervalo (LOG_SINK_FLUSH_INTERVAL).
+
+Si la base de datos está lenta y la cola se llena, se aplica la política
+LOG_SINK_DROP_POLICY:
+- drop_oldest: descarta la fila más antigua (por defecto)
+- drop_newest: descarta la fila entrante
+- block: el llamador espera hasta LOG_SINK_BLOCK_TIMEOUT y luego descarta
+"""
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Any
+
+from config import get_settings
+
+DROP_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class LogSink:
+    """
+    Cola acotada + tarea de fondo que inserta lotes en una tabla.
+
+    insert_fn es una corrutina que recibe (tabla, filas); la de Supabase pasa
+    por database.db_execute, así los lotes comparten el pool acotado y el
+    semáforo de las demás consultas y aparecen en sus estadísticas.
+    """
+
+    def __init__(
+        self,
+        table: str = "agent_logs",
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+        drop_policy: str = "drop_oldest",
+        block_timeout: float = 0.5,
+        max_retries: int = 3,
+        insert_fn: Optional[Callable[[str, List[Dict[str, Any]]], Awaitable[Any]]] = None
+    ):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"LOG_SINK_DROP_POLICY inválida: {drop_policy} (opciones: {', '.join(DROP_POLICIES)})")
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+        self.insert_fn = insert_fn or _supabase_insert
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._hay_datos: Optional[asyncio.Event] = None
+        self._hay_espacio: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._cerrando = False
+
+        self._flush_latencies: Deque[float] = deque(maxlen=500)
+        self.stats = {
+            "encoladas": 0,
+            "insertadas": 0,
+            "descartadas": 0,
+            "lotes": 0,
+            "lotes_fallidos": 0,
+            "profundidad_max": 0
+        }
+
+    # ─── CICLO DE VIDA ────────────────────────────────────────
+
+    def start(self):
+        """Arranca la tarea de vaciado (requiere un event loop activo)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._hay_datos = asyncio.Event()
+        self._hay_espacio = asyncio.Event()
+        self._hay_espacio.set()
+        self._cerrando = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """Vacía la cola y detiene la tarea de fondo."""
+        if self._task is None:
+            return
+        self._cerrando = True
+        self._hay_datos.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            print(f"⚠️ LogSink: {len(self._queue)} filas sin enviar al cerrar")
+        self._task = None
+
+    # ─── ENCOLAR ──────────────────────────────────────────────
+
+    async def put(self, row: Dict[str, Any]):
+        """Encola una fila aplicando la política de descarte si la cola está llena."""
+        if self._task is None or self._task.done():
+            self.start()
+
+        if len(self._queue) >= self.max_queue:
+            if self.drop_policy == "drop_newest":
+                self.stats["descartadas"] += 1
+                return
+            if self.drop_policy == "drop_oldest":
+                self._queue.popleft()
+                self.stats["descartadas"] += 1
+            else:
+                # block: contrapresión sobre el llamador, con límite de espera
+                self._hay_espacio.clear()
+                try:
+                    await asyncio.wait_for(self._hay_espacio.wait(), timeout=self.block_timeout)
+                except asyncio.TimeoutError:
+                    self.stats["descartadas"] += 1
+                    return
+                if len(self._queue) >= self.max_queue:
+                    self.stats["descartadas"] += 1
+                    return
+
+        self._queue.append(row)
+        self.stats["encoladas"] += 1
+        self.stats["profundidad_max"] = max(self.stats["profundidad_max"], len(self._queue))
+        if len(self._queue) >= self.batch_size:
+            self._hay_datos.set()
+
+    # ─── VACIADO ──────────────────────────────────────────────
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._hay_datos.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._hay_datos.clear()
+
+            while self._queue:
+                await self._flush_batch()
+                if not self._cerrando and len(self._queue) < self.batch_size:
+                    break
+
+            if self._cerrando and not self._queue:
+                return
+
+    async def _flush_batch(self):
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        self._hay_espacio.set()
+
+        for intento in range(1, self.max_retries + 1):
+            inicio = time.perf_counter()
+            try:
+                await self.insert_fn(self.table, batch)
+                self._flush_latencies.append((time.perf_counter() - inicio) * 1000)
+                self.stats["lotes"] += 1
+                self.stats["insertadas"] += len(batch)
+                return
+            except Exception as e:
+                print(f"⚠️ LogSink: error insertando {len(batch)} filas en {self.table} (intento {intento}): {e}")
+                if intento < self.max_retries:
+                    await asyncio.sleep(min(0.5 * 2 ** (intento - 1), 5.0))
+
+        self.stats["lotes_fallidos"] += 1
+        self.stats["descartadas"] += len(batch)
+
+    # ─── MÉTRICAS ─────────────────────────────────────────────
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencias = sorted(self._flush_latencies)
+        return {
+            **self.stats,
+            "profundidad_cola": len(self._queue),
+            "max_cola": self.max_queue,
+            "politica": self.drop_policy,
+            "flush_ms_p50": round(statistics.median(latencias), 2) if latencias else None,
+            "flush_ms_p95": round(latencias[int(len(latencias) * 0.95) - 1], 2) if latencias else None,
+            "activo": self._task is not None and not self._task.done()
+        }
+
+
+async def _supabase_insert(table: str, rows: List[Dict[str, Any]]):
+    """Insert masivo en Supabase (una sola petición HTTP por lote) en el pool de db_execute."""
+    from database import get_db, db_execute
+    await db_execute(get_db().table(table).insert(rows))
+
+
+# Instancia global (None si LOG_SINK_ENABLED=false)
+_log_sink: Optional[LogSink] = None
+
+def get_log_sink() -> Optional[LogSink]:
+    """Obtiene el sink de logs global, o None si está desactivado."""
+    global _log_sink
+    settings = get_settings()
+    if _log_sink is None and settings["log_sink_enabled"]:
+        _log_sink = LogSink(
+            batch_size=settings["log_sink_batch_size"],
+            flush_interval=settings["log_sink_flush_interval"],
+            max_queue=settings["log_sink_max_queue"],
+            drop_policy=settings["log_sink_drop_policy"],
+            block_timeout=settings["log_sink_block_timeout"]
+        )
+    return _log_sink
+
+async def close_log_sink():
+    """Vacía y detiene el sink global (apagado ordenado)."""
+    if _log_sink is not None:
+        await _log_sink.stop()
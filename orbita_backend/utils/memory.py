@@ -3,11 +3,21 @@ Gestión de memoria y contexto de conversaciones para ORBITA
 """
 
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 import asyncio
 from collections import defaultdict
 
+from utils.tokens import estimate_tokens, truncate_to_tokens
+
+# Etiquetas de rol para el historial compacto que se envía al LLM
+ROLE_LABELS = {
+    "user": "Usuario",
+    "assistant": "Asistente",
+    "agent": "Asistente",
+    "system": "Sistema"
+}
+
 
 class ConversationMemory:
     """
@@ -281,14 +291,50 @@ class ConversationMemory:
         }
 
 
+def render_history_window(messages: List[Dict[str, Any]], max_tokens: int) -> Tuple[str, int]:
+    """
+    Renderiza los mensajes más recientes que caben en un presupuesto de tokens.
+    
+    Recorre los mensajes hacia atrás hasta llenar el presupuesto y los devuelve
+    en orden cronológico como líneas "Rol: contenido". Acepta mensajes de la
+    memoria en proceso ('type') y del historial en BD ('role').
+    
+    Returns:
+        (historial renderizado, tokens estimados usados)
+    """
+    lines = []
+    used_tokens = 0
+    
+    for msg in reversed(messages):
+        role = ROLE_LABELS.get(msg.get('type') or msg.get('role'), "Sistema")
+        content = " ".join(str(msg.get('content') or "").split())
+        if not content:
+            continue
+        line = f"{role}: {content}"
+        line_tokens = estimate_tokens(line) + 1
+        
+        if used_tokens + line_tokens > max_tokens:
+            # El turno más reciente siempre entra, recortado si hace falta
+            if not lines and max_tokens > 8:
+                line = truncate_to_tokens(line, max_tokens - 1)
+                lines.append(line)
+                used_tokens = estimate_tokens(line) + 1
+            break
+        
+        lines.append(line)
+        used_tokens += line_tokens
+    
+    return "\n".join(reversed(lines)), used_tokens
+
+
 class MemoryManager:
     """
     Clase de compatibilidad para el sistema de agentes existente.
     Encapsula ConversationMemory con la interfaz esperada.
     """
     
-    def __init__(self):
-        self.conversation_memory = ConversationMemory()
+    def __init__(self, conversation_memory: Optional[ConversationMemory] = None):
+        self.conversation_memory = conversation_memory or ConversationMemory()
         
     async def get_conversation_context(self, session_id: str) -> Dict[str, Any]:
         """
@@ -307,6 +353,20 @@ class MemoryManager:
             'agent_state': self.conversation_memory.conversations[session_id]['agent_state']
         }
     
+    async def get_history_window(self, session_id: str, max_tokens: int) -> Tuple[str, int]:
+        """
+        Construye el historial reciente de la sesión que cabe en un presupuesto de tokens.
+        
+        Args:
+            session_id: Identificador de la sesión
+            max_tokens: Presupuesto de tokens para el historial
+        
+        Returns:
+            (historial renderizado, tokens estimados usados)
+        """
+        messages = self.conversation_memory.get_conversation_history(session_id)
+        return render_history_window(messages, max_tokens)
+    
     async def save_message(self, session_id: str, message: str, message_type: str = "user", agent_name: str = None, **kwargs):
         """
         Guarda un mensaje en la conversación.
@@ -363,6 +423,22 @@ def get_memory() -> ConversationMemory:
     return conversation_memory
 
 
+# Gestor compartido por todos los agentes (misma memoria para una sesión)
+_memory_manager: Optional[MemoryManager] = None
+
+def get_memory_manager() -> MemoryManager:
+    """
+    Obtiene el MemoryManager global, respaldado por la memoria global.
+    
+    Returns:
+        Instancia compartida de MemoryManager
+    """
+    global _memory_manager
+    if _memory_manager is None:
+        _memory_manager = MemoryManager(conversation_memory)
+    return _memory_manager
+
+
 # Funciones de conveniencia para uso directo
 def add_user_message(conversation_id: str, user_id: str, message: str, message_type: str = "text"):
     """
@@ -1,80 +1,258 @@
 # Utilidad para generar estimados rápidos de precio
 # Detecta el servicio solicitado y genera un estimado al instante
+# El catálogo (servicios, precios, keywords) vive en data/catalogo_servicios.json
+# y se recarga en caliente cuando el archivo cambia, sin reiniciar el proceso
 
 import json
+import os
 import re
+import threading
+import time
 import unicodedata
-from typing import Dict, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple
 from datetime import datetime
 
+from config import get_settings
+
+_MARCAS_DIACRITICAS = re.compile("[\u0300-\u036f]")
+
+# Nivel de complejidad pedido en el mensaje
+PALABRAS_NIVEL_SIMPLE = ["simple", "básico", "sencillo", "pequeño"]
+PALABRAS_NIVEL_COMPLEJO = ["complejo", "avanzado", "múltiples", "integraciones", "customizado"]
+
+# Ajustes sobre el precio según los detalles
+PALABRAS_AJUSTE_COMPLEJO = ["múltiples", "integraciones", "apis", "complejas", "avanzado", "personalizado"]
+PALABRAS_AJUSTE_SIMPLE = ["básico", "simple", "sencillo", "estándar"]
+
+
+def _regex_subcadenas(palabras: list) -> "re.Pattern":
+    """Equivale a any(p in texto for p in palabras), en una sola búsqueda."""
+    return re.compile("|".join(re.escape(p) for p in palabras))
+
+
+_RE_NIVEL_SIMPLE = _regex_subcadenas(PALABRAS_NIVEL_SIMPLE)
+_RE_NIVEL_COMPLEJO = _regex_subcadenas(PALABRAS_NIVEL_COMPLEJO)
+_RE_AJUSTE_COMPLEJO = _regex_subcadenas(PALABRAS_AJUSTE_COMPLEJO)
+_RE_AJUSTE_SIMPLE = _regex_subcadenas(PALABRAS_AJUSTE_SIMPLE)
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas y sin acentos (NFD + eliminación de marcas combinantes)."""
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    return _MARCAS_DIACRITICAS.sub("", unicodedata.normalize("NFD", texto))
+
+
+class KeywordMatcher:
+    """
+    Todas las keywords de todos los servicios compiladas en una sola expresión regular.
+    
+    Cada keyword debe empezar al inicio de una palabra y terminar al final de una
+    (se admite plural: "apps", "chatbots"), así "ia" no coincide dentro de
+    "asesoría" ni "bot" dentro de "robot". El patrón va dentro de un lookahead
+    para encontrar también keywords solapadas ("app móvil" y "móvil").
+    """
+    
+    def __init__(self, keywords: Dict[str, list]):
+        # keyword normalizada → servicios que la usan
+        self._servicios: Dict[str, set] = {}
+        for servicio, lista in keywords.items():
+            for kw in lista:
+                self._servicios.setdefault(normalizar_texto(kw), set()).add(servicio)
+        
+        # Más largas primero: en cada posición gana la keyword más larga...
+        ordenadas = sorted(self._servicios, key=len, reverse=True)
+        alternativas = "|".join(re.escape(kw) for kw in ordenadas)
+        self._patron = re.compile(rf"(?<!\w)(?=({alternativas})(?:e?s)?(?!\w))")
+        
+        # ...y se añaden las que son prefijo de palabra de ella ("app" en "app movil")
+        self._incluidas: Dict[str, list] = {
+            kw: [
+                corta for corta in ordenadas
+                if len(corta) < len(kw) and kw.startswith(corta) and not kw[len(corta)].isalnum()
+            ]
+            for kw in ordenadas
+        }
+    
+    def contar(self, texto_normalizado: str) -> Dict[str, int]:
+        """Número de keywords distintas encontradas por servicio."""
+        encontradas = set()
+        for match in self._patron.finditer(texto_normalizado):
+            kw = match.group(1)
+            encontradas.add(kw)
+            encontradas.update(self._incluidas[kw])
+        
+        conteo: Dict[str, int] = {}
+        for kw in encontradas:
+            for servicio in self._servicios[kw]:
+                conteo[servicio] = conteo.get(servicio, 0) + 1
+        return conteo
+
+
+class ServiceCatalog:
+    """
+    Versión inmutable del catálogo ya compilada: servicios en MappingProxyType,
+    listas como tuplas y las keywords en un KeywordMatcher. Cada petición toma
+    una referencia y trabaja con ella aunque entretanto se publique otra versión.
+    """
+    
+    CAMPOS_SERVICIO = ("nombre", "precio_base", "descripcion", "duracion", "incluye", "keywords")
+    
+    def __init__(self, data: Dict[str, Any], origen: str = ""):
+        servicios = data.get("servicios")
+        if not isinstance(servicios, dict) or not servicios:
+            raise ValueError("El catálogo no define servicios")
+        
+        compilados = {}
+        for servicio, info in servicios.items():
+            faltantes = [c for c in self.CAMPOS_SERVICIO if c not in info]
+            if faltantes:
+                raise ValueError(f"Servicio '{servicio}' sin campos {faltantes}")
+            if not isinstance(info["precio_base"], (int, float)) or info["precio_base"] < 0:
+                raise ValueError(f"Servicio '{servicio}' con precio_base inválido")
+            compilados[servicio] = MappingProxyType({
+                **info,
+                "incluye": tuple(info["incluye"]),
+                "keywords": tuple(info["keywords"])
+            })
+        
+        self.version = str(data.get("version", "sin-version"))
+        self.moneda = data.get("moneda", "USD")
+        self.origen = origen
+        self.servicios: Mapping[str, Mapping[str, Any]] = MappingProxyType(compilados)
+        self.multiplicadores: Mapping[str, float] = MappingProxyType(
+            dict(data.get("multiplicadores_complejidad") or {"simple": 0.7, "standard": 1.0, "complejo": 1.5})
+        )
+        self.keywords: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {servicio: info["keywords"] for servicio, info in compilados.items()}
+        )
+        self.matcher = KeywordMatcher(self.keywords)
+        self._precios: Dict[Tuple[str, str, bool, bool], int] = {}
+    
+    def precio(self, servicio: str, nivel_complejidad: str, mas_complejo: bool, mas_simple: bool) -> int:
+        """Precio estimado (mismos redondeos que generar_estimado), memorizado por combinación."""
+        clave = (servicio, nivel_complejidad, mas_complejo, mas_simple)
+        precio = self._precios.get(clave)
+        if precio is None:
+            precio = int(self.servicios[servicio]["precio_base"] * self.multiplicadores.get(nivel_complejidad, 1.0))
+            if mas_complejo:
+                precio = int(precio * 1.3)
+            if mas_simple:
+                precio = int(precio * 0.8)
+            self._precios[clave] = precio
+        return precio
+
+
+class CatalogStore:
+    """
+    Carga catálogos desde JSON y los sustituye de forma atómica cuando cambian.
+    
+    - Catálogo por empresa: <ruta base>_<empresa_id>.json junto al catálogo
+      general; si no existe se usa el general.
+    - Como mucho cada `reload_seconds` se hace un stat() del archivo; si cambió
+      (mtime, tamaño o inode), se parsea y compila la nueva versión fuera de la
+      ruta de lectura y se publica cambiando una sola referencia.
+    - Si la nueva versión no es válida se mantiene la anterior.
+    """
+    
+    def __init__(self, path: str, reload_seconds: float = 2.0):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        # ruta → (firma del archivo, catálogo, próximo chequeo)
+        self._entradas: Dict[str, Tuple[Tuple, ServiceCatalog, float]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"cargas": 0, "errores_carga": 0}
+    
+    def ruta_empresa(self, empresa_id: Optional[Any] = None) -> str:
+        if empresa_id is None:
+            return self.path
+        base, ext = os.path.splitext(self.path)
+        ruta = f"{base}_{empresa_id}{ext}"
+        return ruta if os.path.exists(ruta) else self.path
+    
+    def get(self, empresa_id: Optional[Any] = None) -> ServiceCatalog:
+        """Catálogo vigente (sin parsear nada salvo que el archivo haya cambiado)."""
+        ruta = self.ruta_empresa(empresa_id)
+        entrada = self._entradas.get(ruta)
+        if entrada is not None and time.monotonic() < entrada[2]:
+            return entrada[1]
+        return self._revisar(ruta)
+    
+    def _revisar(self, ruta: str) -> ServiceCatalog:
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            ahora = time.monotonic()
+            if entrada is not None and ahora < entrada[2]:
+                return entrada[1]  # otro hilo acaba de revisarlo
+            
+            try:
+                st = os.stat(ruta)
+                firma = (st.st_mtime_ns, st.st_size, st.st_ino)
+            except OSError as e:
+                if entrada is None:
+                    raise
+                print(f"⚠️ No se pudo leer el catálogo {ruta}, se mantiene v{entrada[1].version}: {e}")
+                firma = entrada[0]
+            
+            if entrada is not None and firma == entrada[0]:
+                catalogo = entrada[1]
+            else:
+                try:
+                    with open(ruta, encoding="utf-8") as f:
+                        catalogo = ServiceCatalog(json.load(f), origen=ruta)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    self.stats["errores_carga"] += 1
+                    if entrada is None:
+                        raise
+                    print(f"⚠️ Catálogo {ruta} inválido, se mantiene v{entrada[1].version}: {e}")
+                    catalogo = entrada[1]
+                else:
+                    self.stats["cargas"] += 1
+                    if entrada is not None:
+                        print(f"🔄 Catálogo recargado: v{entrada[1].version} → v{catalogo.version}")
+            
+            # Publicación atómica: una sola asignación de la tupla completa
+            self._entradas[ruta] = (firma, catalogo, ahora + self.reload_seconds)
+            return catalogo
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "catalogos": {ruta: entrada[1].version for ruta, entrada in self._entradas.items()}
+        }
+
+
+# Almacén global de catálogos
+_catalog_store: Optional[CatalogStore] = None
+
+def get_catalog_store() -> CatalogStore:
+    global _catalog_store
+    if _catalog_store is None:
+        settings = get_settings()
+        _catalog_store = CatalogStore(
+            settings["quote_catalog_path"],
+            reload_seconds=settings["quote_catalog_reload_seconds"]
+        )
+    return _catalog_store
+
+
 class QuickEstimateGenerator:
     """Genera estimados rápidos de precio based on user request."""
     
-    # Servicios y precios estimados base
-    SERVICIOS = {
-        "sitio_web": {
-            "nombre": "Desarrollo de Sitio Web",
-            "precio_base": 2000,
-            "descripcion": "Página web profesional con diseño responsive y mantenimiento"
-        },
-        "app_movil": {
-            "nombre": "Aplicación Móvil",
-            "precio_base": 5000,
-            "descripcion": "Desarrollo de app iOS/Android con funcionalidades personalizadas"
-        },
-        "ecommerce": {
-            "nombre": "Tienda Online",
-            "precio_base": 4000,
-            "descripcion": "Plataforma de comercio electrónico con pasarela de pago"
-        },
-        "marketing_digital": {
-            "nombre": "Estrategia Marketing Digital",
-            "precio_base": 1500,
-            "descripcion": "Gestión de redes sociales y campañas digitales"
-        },
-        "automatizacion_ia": {
-            "nombre": "Automatización con IA",
-            "precio_base": 3000,
-            "descripcion": "Chatbots, procesamiento de datos, y automatización inteligente"
-        },
-        "consultoria": {
-            "nombre": "Consultoría Tecnológica",
-            "precio_base": 1000,
-            "descripcion": "Asesoría y análisis de necesidades tecnológicas"
-        },
-        "mantenimiento": {
-            "nombre": "Mantenimiento y Soporte",
-            "precio_base": 500,
-            "descripcion": "Soporte técnico, actualizaciones y mantenimiento periódico"
-        },
-        "seo": {
-            "nombre": "SEO y Posicionamiento",
-            "precio_base": 1200,
-            "descripcion": "Optimización para buscadores y posicionamiento orgánico"
-        }
-    }
+    def __init__(self, empresa_id: Optional[Any] = None, store: Optional[CatalogStore] = None):
+        self.empresa_id = empresa_id
+        self.store = store or get_catalog_store()
     
-    # Palabras clave para detectar servicios
-    KEYWORDS = {
-        "sitio_web": ["sitio web", "página web", "website", "landing page", "portal web"],
-        "app_movil": ["app", "aplicación", "movil", "mobile", "ios", "android", "app móvil", "aplicativo"],
-        "ecommerce": ["tienda online", "ecommerce", "comercio electrónico", "tienda virtual", "vender online"],
-        "marketing_digital": ["marketing", "redes sociales", "instagram", "facebook", "publicidad digital", "campañas", "social media"],
-        "automatizacion_ia": ["chatbot", "automatización", "ia", "inteligencia artificial", "bot", "automatizar"],
-        "consultoria": ["consultoría", "consultor", "asesoría", "diagnóstico", "evaluación", "análisis"],
-        "mantenimiento": ["mantenimiento", "soporte técnico", "mantencion", "servidor", "hosting"],
-        "seo": ["seo", "posicionamiento", "buscador", "organico", "google", "ranking"]
-    }
+    @property
+    def catalogo(self) -> ServiceCatalog:
+        """Versión vigente del catálogo (puede cambiar entre llamadas, nunca durante una)."""
+        return self.store.get(self.empresa_id)
     
     def _normalizar_texto(self, texto: str) -> str:
         """Normaliza el texto eliminando acentos y convirtiendo a minúsculas."""
-        # Convertir a minúsculas
-        texto = texto.lower()
-        # Usar NFD para descomponer acentos en caracteres base + combinaciones
-        texto_nfd = unicodedata.normalize('NFD', texto)
-        # Eliminar los acentos (caracteres de combinación)
-        sin_acentos = ''.join(char for char in texto_nfd if unicodedata.category(char) != 'Mn')
-        return sin_acentos
+        return normalizar_texto(texto)
     
     def detectar_servicio(self, mensaje: str) -> Tuple[Optional[str], float]:
         """
@@ -83,16 +261,14 @@ class QuickEstimateGenerator:
         Returns:
             (tipo_servicio, confianza)
         """
-        # Normalizar el mensaje para evitar problemas con acentos
-        mensaje_normalizado = self._normalizar_texto(mensaje)
+        catalogo = self.catalogo
+        # Una sola pasada sobre el mensaje normalizado: keywords distintas por servicio
+        matches_por_servicio = catalogo.matcher.contar(self._normalizar_texto(mensaje))
         
-        # Búsqueda por keywords
         mejores_matches = []
         
-        for servicio, keywords in self.KEYWORDS.items():
-            # Normalizar cada keyword también
-            keywords_normalizados = [self._normalizar_texto(kw) for kw in keywords]
-            num_matches = sum(1 for kw in keywords_normalizados if kw in mensaje_normalizado)
+        for servicio in catalogo.servicios:
+            num_matches = matches_por_servicio.get(servicio, 0)
             
             if num_matches > 0:
                 # Calcular confianza basada en matches
@@ -111,6 +287,20 @@ class QuickEstimateGenerator:
         
         return None, 0.0
     
+    def detectar_complejidad(self, mensaje: str) -> str:
+        """Detecta el nivel de complejidad basado en el mensaje."""
+        mensaje_lower = mensaje.lower()
+        
+        # Palabras de baja complejidad
+        if _RE_NIVEL_SIMPLE.search(mensaje_lower):
+            return "simple"
+        
+        # Palabras de alta complejidad
+        if _RE_NIVEL_COMPLEJO.search(mensaje_lower):
+            return "complejo"
+        
+        return "standard"
+    
     def generar_estimado(self, 
                         servicio: str, 
                         detalles_adicionales: str = "",
@@ -119,39 +309,25 @@ class QuickEstimateGenerator:
         Genera un estimado de precio para el servicio detectado.
         
         Args:
-            servicio: Tipo de servicio (ver SERVICIOS)
+            servicio: Tipo de servicio (ver el catálogo)
             detalles_adicionales: Descripción adicional de lo que necesita
             nivel_complejidad: "simple", "standard", "complejo"
         """
-        if servicio not in self.SERVICIOS:
+        catalogo = self.catalogo
+        if servicio not in catalogo.servicios:
             return None
         
-        info_servicio = self.SERVICIOS[servicio]
+        info_servicio = catalogo.servicios[servicio]
         precio_base = info_servicio["precio_base"]
         
-        # Ajustar precio por complejidad
-        multiplicadores = {
-            "simple": 0.7,
-            "standard": 1.0,
-            "complejo": 1.5
-        }
-        
-        multiplicador = multiplicadores.get(nivel_complejidad, 1.0)
-        precio_estimado = int(precio_base * multiplicador)
-        
-        # Detectar si hay menciones de complejidad adicional
-        if detalles_adicionales:
-            detalles_lower = detalles_adicionales.lower()
-            
-            # Palabras que indican mayor complejidad
-            palabras_complejas = ["múltiples", "integraciones", "apis", "complejas", "avanzado", "personalizado"]
-            if any(palabra in detalles_lower for palabra in palabras_complejas):
-                precio_estimado = int(precio_estimado * 1.3)
-            
-            # Palabras que indican menor complejidad
-            palabras_simples = ["básico", "simple", "sencillo", "estándar"]
-            if any(palabra in detalles_lower for palabra in palabras_simples):
-                precio_estimado = int(precio_estimado * 0.8)
+        # Ajustar precio por complejidad y por menciones de complejidad adicional en los detalles
+        detalles_lower = detalles_adicionales.lower()
+        precio_estimado = catalogo.precio(
+            servicio,
+            nivel_complejidad,
+            mas_complejo=bool(_RE_AJUSTE_COMPLEJO.search(detalles_lower)),
+            mas_simple=bool(_RE_AJUSTE_SIMPLE.search(detalles_lower))
+        )
         
         return {
             "servicio": servicio,
@@ -160,87 +336,73 @@ class QuickEstimateGenerator:
             "precio_estimado": precio_estimado,
             "precio_base": precio_base,
             "nivel_complejidad": nivel_complejidad,
-            "moneda": "USD",
-            "rango_duracion": self._get_rango_duracion(servicio),
-            "incluye": self._get_includes(servicio),
+            "moneda": catalogo.moneda,
+            "rango_duracion": info_servicio.get("duracion") or "A definir",
+            "incluye": list(info_servicio["incluye"]),
+            "catalogo_version": catalogo.version,
             "timestamp": datetime.now().isoformat()
         }
     
-    def _get_rango_duracion(self, servicio: str) -> str:
-        """Retorna el rango estimado de duración del proyecto."""
-        duraciones = {
-            "sitio_web": "2-4 semanas",
-            "app_movil": "6-12 semanas",
-            "ecommerce": "4-6 semanas",
-            "marketing_digital": "Continuo",
-            "automatizacion_ia": "3-6 semanas",
-            "consultoria": "1-2 semanas",
-            "mantenimiento": "Mensual",
-            "seo": "Continuo (3-6 meses para resultados)"
-        }
-        return duraciones.get(servicio, "A definir")
+    def estimar_lote(self, mensajes: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Estimados para muchos mensajes (p. ej. importación de leads de campañas).
+        
+        Todo el lote usa una misma versión del catálogo; los mensajes repetidos
+        (plantillas de formularios) se resuelven una sola vez y los precios salen
+        de la tabla memorizada del catálogo. Genera un resultado por mensaje, en orden:
+        
+            {"indice", "servicio", "nombre_servicio", "confianza",
+             "nivel_complejidad", "precio_estimado", "moneda"}
+        
+        servicio/precio_estimado son None si no se detecta ningún servicio.
+        """
+        catalogo = self.catalogo
+        resueltos: Dict[str, Dict[str, Any]] = {}
+        
+        for indice, mensaje in enumerate(mensajes):
+            resultado = resueltos.get(mensaje)
+            if resultado is None:
+                resultado = self._estimar_mensaje(catalogo, mensaje)
+                if len(resueltos) < 10_000:
+                    resueltos[mensaje] = resultado
+            yield {"indice": indice, **resultado}
     
-    def _get_includes(self, servicio: str) -> list:
-        """Retorna qué incluye típicamente cada servicio."""
-        includes = {
-            "sitio_web": [
-                "Diseño responsivo",
-                "Carrusel de imágenes",
-                "Formulario de contacto",
-                "Integración SEO basic",
-                "1 mes de soporte gratis"
-            ],
-            "app_movil": [
-                "Desarrollo nativo",
-                "Diseño UI/UX profesional",
-                "1 año de mantenimiento",
-                "Publicación en tiendas",
-                "Documentación técnica"
-            ],
-            "ecommerce": [
-                "Pasarela de pago",
-                "Gestión de inventario",
-                "Sistema de carrito",
-                "Email marketing integrado",
-                "3 meses de soporte"
-            ],
-            "marketing_digital": [
-                "Estrategia mensual",
-                "Creación de contenido",
-                "Gestión de campañas",
-                "Reportes mensuales",
-                "Asesoría permanente"
-            ],
-            "automatizacion_ia": [
-                "Chatbot inteligente",
-                "Entrenamiento de modelos",
-                "Integración con CRM",
-                "Dashboard de análisis",
-                "Soporte técnico"
-            ],
-            "consultoria": [
-                "Análisis de situación",
-                "Propuesta de soluciones",
-                "Documento ejecutivo",
-                "Recomendaciones",
-                "Seguimiento 1 mes"
-            ],
-            "mantenimiento": [
-                "Actualizaciones mensuales",
-                "Monitoreo 24/7",
-                "Backups automáticos",
-                "Soporte técnico",
-                "Reportes mensuales"
-            ],
-            "seo": [
-                "Auditoría SEO",
-                "Palabras clave",
-                "Optimización on-page",
-                "Link building",
-                "Reportes mensuales"
-            ]
+    def _estimar_mensaje(self, catalogo: ServiceCatalog, mensaje: str) -> Dict[str, Any]:
+        mensaje_lower = mensaje.lower()
+        conteo = catalogo.matcher.contar(normalizar_texto(mensaje))
+        
+        servicio, confianza = None, 0.0
+        for candidato in catalogo.servicios:  # a igual confianza gana el primero, como en detectar_servicio
+            n = conteo.get(candidato, 0)
+            if n and min(0.5 + (n - 1) * 0.25, 1.0) > confianza:
+                servicio, confianza = candidato, min(0.5 + (n - 1) * 0.25, 1.0)
+        
+        if _RE_NIVEL_SIMPLE.search(mensaje_lower):
+            nivel = "simple"
+        elif _RE_NIVEL_COMPLEJO.search(mensaje_lower):
+            nivel = "complejo"
+        else:
+            nivel = "standard"
+        
+        if servicio is None:
+            return {
+                "servicio": None, "nombre_servicio": None, "confianza": 0.0,
+                "nivel_complejidad": nivel, "precio_estimado": None, "moneda": catalogo.moneda
+            }
+        
+        return {
+            "servicio": servicio,
+            "nombre_servicio": catalogo.servicios[servicio]["nombre"],
+            "confianza": confianza,
+            "nivel_complejidad": nivel,
+            "precio_estimado": catalogo.precio(
+                servicio,
+                nivel,
+                mas_complejo=bool(_RE_AJUSTE_COMPLEJO.search(mensaje_lower)),
+                mas_simple=bool(_RE_AJUSTE_SIMPLE.search(mensaje_lower))
+            ),
+            "moneda": catalogo.moneda
         }
-        return includes.get(servicio, [])
     
     def formatear_estimado(self, estimado: Dict) -> str:
         """Formatea el estimado en un mensaje amigable."""
@@ -269,11 +431,11 @@ _*Nota: Este es un estimado basado en funcionalidades estándar. El precio final
         return msg
 
 
-# Instancia global
-_estimator = None
+# Instancias globales (una por empresa; None = catálogo general)
+_estimators: Dict[Any, QuickEstimateGenerator] = {}
 
-def get_quick_estimator() -> QuickEstimateGenerator:
-    global _estimator
-    if _estimator is None:
-        _estimator = QuickEstimateGenerator()
-    return _estimator
+def get_quick_estimator(empresa_id: Optional[Any] = None) -> QuickEstimateGenerator:
+    estimator = _estimators.get(empresa_id)
+    if estimator is None:
+        estimator = _estimators[empresa_id] = QuickEstimateGenerator(empresa_id)
+    return estimator
@@ -0,0 +1,193 @@
+"""
+Esqueletos de propuesta por servicio
+[CRITERIO 5] - Cotizaciones automáticas generadas por IA
+
+Los ítems, fases, precios y forma de pago de una cotización dependen del servicio
+y del nivel del plan, no del lead. Se construyen a partir del catálogo de
+estimados (data/catalogo_servicios.json) la primera vez que se piden, o todos de
+una vez con precalentar(), y se guardan por (servicio, nivel) dentro de la
+versión del catálogo que los produjo: al publicarse otra versión se descartan.
+
+El LLM solo redacta el párrafo personalizado para el lead.
+"""
+
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from utils.quick_estimate import ServiceCatalog, get_quick_estimator, normalizar_texto
+
+NIVELES = ("simple", "standard", "complejo")
+
+# Plan elegido en Telegram → nivel de complejidad del catálogo
+NIVEL_POR_PLAN = {
+    "basico": "simple",
+    "profesional": "standard",
+    "enterprise": "complejo"
+}
+NOMBRE_PLAN = {
+    "simple": "Plan Básico",
+    "standard": "Plan Profesional",
+    "complejo": "Plan Enterprise"
+}
+FORMA_PAGO = {
+    "simple": "50% al inicio, 50% a la entrega",
+    "standard": "50% al inicio, 50% a la entrega",
+    "complejo": "40% al inicio, 30% a mitad del proyecto, 30% a la entrega"
+}
+
+_RE_SEMANAS = re.compile(r"(\d+)\s*(?:-\s*(\d+)\s*)?semanas?")
+
+
+def detectar_nivel_plan(texto: str) -> str:
+    """Nivel a partir del plan mencionado ("Plan Básico", "plan_enterprise"...) o del texto."""
+    normalizado = normalizar_texto(texto or "")
+    for plan, nivel in NIVEL_POR_PLAN.items():
+        if plan in normalizado:
+            return nivel
+    return get_quick_estimator().detectar_complejidad(texto or "")
+
+
+def _semanas(duracion: str) -> int:
+    """Semanas máximas de un rango tipo "4-6 semanas" (6 si no se puede leer)."""
+    m = _RE_SEMANAS.search(duracion or "")
+    if not m:
+        return 6
+    return int(m.group(2) or m.group(1))
+
+
+def _fmt_semanas(n: int) -> str:
+    return f"{n} semana" if n == 1 else f"{n} semanas"
+
+
+def construir_esqueleto(catalogo: ServiceCatalog, servicio: str, nivel: str) -> Dict[str, Any]:
+    """Propuesta sin personalizar: ítems con precio, fases, tiempos y forma de pago."""
+    info = catalogo.servicios[servicio]
+    precio = catalogo.precio(servicio, nivel, False, False)
+
+    # Entregables del catálogo; los marcados como gratis no suman al precio
+    incluye = list(info["incluye"])
+    cobrables = [e for e in incluye if "gratis" not in normalizar_texto(e)]
+    if not cobrables:
+        cobrables = [info["nombre"]]
+        incluye.insert(0, info["nombre"])
+    cuota = (precio // len(cobrables)) // 10 * 10
+    items = [
+        {
+            "nombre": entregable,
+            "descripcion": f"{entregable} — {info['nombre']}",
+            "cantidad": 1,
+            "precio_unitario": float(cuota if entregable in cobrables else 0)
+        }
+        for entregable in incluye
+    ]
+    # El redondeo se suma al primer entregable para que el subtotal sea el precio del catálogo
+    items[incluye.index(cobrables[0])]["precio_unitario"] += precio - cuota * len(cobrables)
+
+    semanas = _semanas(info.get("duracion"))
+    inicio = max(1, round(semanas * 0.2))
+    cierre = max(1, round(semanas * 0.2))
+    desarrollo = max(1, semanas - inicio - cierre)
+
+    return {
+        "servicio": servicio,
+        "nivel": nivel,
+        "catalogo_version": catalogo.version,
+        "moneda": catalogo.moneda,
+        "titulo": f"Propuesta de {info['nombre']}",
+        "plan_nombre": f"{NOMBRE_PLAN.get(nivel, 'Plan Profesional')} · {info['nombre']}",
+        "descripcion_alcance": f"{info['descripcion']}. Incluye: {', '.join(incluye)}.",
+        "items": items,
+        "fases": [
+            {"nombre": "Descubrimiento", "descripcion": "Levantamiento de requerimientos y plan de trabajo", "duracion": _fmt_semanas(inicio)},
+            {"nombre": "Implementación", "descripcion": f"{info['descripcion']}", "duracion": _fmt_semanas(desarrollo)},
+            {"nombre": "Entrega", "descripcion": "Pruebas, capacitación y puesta en marcha", "duracion": _fmt_semanas(cierre)}
+        ],
+        "tiempo_total": info.get("duracion") or _fmt_semanas(semanas),
+        "forma_pago": FORMA_PAGO.get(nivel, FORMA_PAGO["standard"]),
+        "notas": f"Precio según catálogo {catalogo.version}. Incluye: {', '.join(incluye)}.",
+        "descuento_sugerido": 0
+    }
+
+
+class QuoteSkeletonCache:
+    """Esqueletos por (servicio, nivel), agrupados por catálogo y válidos para una versión."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_catalogo: Dict[str, Tuple[str, Dict[Tuple[str, str], Dict[str, Any]]]] = {}
+        self.stats = {"aciertos": 0, "construidos": 0, "invalidaciones": 0}
+
+    def obtener(self, catalogo: ServiceCatalog, servicio: str, nivel: str) -> Optional[Dict[str, Any]]:
+        """Copia del esqueleto (None si el servicio no está en el catálogo)."""
+        if servicio not in catalogo.servicios:
+            return None
+        nivel = nivel if nivel in NIVELES else "standard"
+        esqueletos = self._esqueletos(catalogo)
+        esqueleto = esqueletos.get((servicio, nivel))
+        if esqueleto is None:
+            esqueleto = esqueletos[(servicio, nivel)] = construir_esqueleto(catalogo, servicio, nivel)
+            self.stats["construidos"] += 1
+        else:
+            self.stats["aciertos"] += 1
+        # Copia: quien la recibe puede modificar ítems y fases
+        return {
+            **esqueleto,
+            "items": [dict(item) for item in esqueleto["items"]],
+            "fases": [dict(fase) for fase in esqueleto["fases"]]
+        }
+
+    def precalentar(self, catalogo: ServiceCatalog) -> int:
+        """Construye de antemano todos los esqueletos del catálogo."""
+        esqueletos = self._esqueletos(catalogo)
+        nuevos = 0
+        for servicio in catalogo.servicios:
+            for nivel in NIVELES:
+                if (servicio, nivel) not in esqueletos:
+                    esqueletos[(servicio, nivel)] = construir_esqueleto(catalogo, servicio, nivel)
+                    nuevos += 1
+        self.stats["construidos"] += nuevos
+        return nuevos
+
+    def _esqueletos(self, catalogo: ServiceCatalog) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        with self._lock:
+            entrada = self._por_catalogo.get(catalogo.origen)
+            if entrada is None or entrada[0] != catalogo.version:
+                if entrada is not None:
+                    self.stats["invalidaciones"] += 1
+                    print(f"♻️ Catálogo {catalogo.version}: se descartan {len(entrada[1])} esqueletos de cotización")
+                entrada = self._por_catalogo[catalogo.origen] = (catalogo.version, {})
+            return entrada[1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "esqueletos": sum(len(e) for _, e in self._por_catalogo.values()),
+            "versiones": {origen: version for origen, (version, _) in self._por_catalogo.items()}
+        }
+
+
+def resolver_servicio(
+    lead_data: Dict[str, Any],
+    servicio_solicitado: str,
+    detalles_adicionales: Optional[str] = None,
+    empresa_id: Optional[Any] = None
+) -> Tuple[Optional[str], ServiceCatalog]:
+    """Servicio del catálogo para la cotización: el interés guardado del lead o el detectado en el texto."""
+    estimador = get_quick_estimator(empresa_id)
+    catalogo = estimador.catalogo
+    interes = lead_data.get("interes")
+    if interes in catalogo.servicios:
+        return interes, catalogo
+    servicio, _ = estimador.detectar_servicio(f"{servicio_solicitado} {detalles_adicionales or ''}")
+    return servicio, catalogo
+
+
+_skeleton_cache: Optional[QuoteSkeletonCache] = None
+
+def get_quote_skeletons() -> QuoteSkeletonCache:
+    """Obtiene la caché de esqueletos de cotización."""
+    global _skeleton_cache
+    if _skeleton_cache is None:
+        _skeleton_cache = QuoteSkeletonCache()
+    return _skeleton_cache
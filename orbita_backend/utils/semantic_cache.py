@@ -0,0 +1,360 @@
+"""
+Caché semántica de respuestas para preguntas frecuentes de leads
+[CRITERIO 3] - Evita llamadas repetidas al LLM para consultas equivalentes
+
+Los leads hacen las mismas preguntas con distintas palabras ("¿cuánto cuesta
+una web?", "precio de una página web"). Esta caché vectoriza cada mensaje
+normalizado con TF-IDF sobre features hasheadas (sin GPU ni dependencias) y
+devuelve la respuesta guardada cuando la similitud coseno supera un umbral.
+
+Estructura del índice:
+- Índice invertido feature -> ids de entradas (solo se comparan candidatos
+  que comparten features poco frecuentes con la consulta)
+- Diccionario exacto texto_normalizado -> id para hits O(1)
+- OrderedDict como LRU + TTL para expulsar entradas antiguas
+
+Cada entrada pertenece a un espacio (canal / empresa): lookup() solo compara
+contra entradas del mismo espacio, así una respuesta nunca cruza de una
+cuenta o canal a otro.
+"""
+
+import math
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+
+from config import get_settings
+
+
+# Palabras vacías en español (no aportan significado para comparar preguntas)
+STOPWORDS = {
+    "a", "al", "algo", "con", "de", "del", "el", "en", "es", "esta", "este",
+    "hay", "la", "las", "le", "lo", "los", "me", "mi", "mis", "para", "por",
+    "que", "se", "si", "su", "sus", "te", "tu", "un", "una", "uno", "unos",
+    "unas", "y", "o", "ya", "muy", "hola", "buenas", "buenos", "dias", "tardes",
+    "gracias", "favor", "quisiera", "quiero", "necesito", "tienen", "ustedes",
+    "puedo", "podria", "podrian", "saber", "como", "cual", "cuales", "estan",
+    "tiene", "son"
+}
+
+# Sinónimos frecuentes en consultas comerciales -> forma canónica
+SINONIMOS = {
+    "cuanto": "precio", "cuesta": "precio", "cuestan": "precio", "costo": "precio",
+    "costos": "precio", "valor": "precio", "vale": "precio", "tarifa": "precio",
+    "tarifas": "precio", "cobran": "precio", "presupuesto": "precio",
+    "cotizacion": "precio", "precios": "precio",
+    "sitio": "pagina", "website": "pagina", "web": "pagina", "landing": "pagina",
+    "paginas": "pagina",
+    "app": "aplicacion", "apps": "aplicacion", "aplicaciones": "aplicacion",
+    "movil": "aplicacion",
+    "demora": "tiempo", "tardan": "tiempo", "tarda": "tiempo", "duracion": "tiempo",
+    "horario": "horarios", "atienden": "horarios",
+    "ubicados": "ubicacion", "donde": "ubicacion", "direccion": "ubicacion",
+}
+
+# Palabras que hacen referencia a mensajes anteriores (la respuesta depende del historial)
+DEICTICOS = {"eso", "esto", "ese", "esa", "aquello", "anterior", "tambien", "entonces", "mismo"}
+
+# Temas de preguntas frecuentes (formas canónicas, tras SINONIMOS): solo estas
+# preguntas tienen una respuesta que sirve igual para cualquier lead
+TEMAS_FRECUENTES = {
+    "precio", "horarios", "ubicacion", "tiempo", "servicio", "servicios", "ofrecen",
+    "pagina", "aplicacion", "tienda", "tiendas", "ecommerce", "marketing", "redes",
+    "seo", "hosting", "dominio", "mantenimiento", "soporte", "planes", "plan",
+    "automatizacion", "chatbot", "pago", "pagos", "garantia", "consultoria"
+}
+
+# Inicios de pregunta ("¿cuánto...?", "hacen...?", "tienen...?")
+INTERROGATIVOS = {
+    "que", "cual", "cuales", "cuanto", "cuanta", "cuantos", "cuantas", "como", "donde",
+    "cuando", "hacen", "tienen", "ofrecen", "trabajan", "manejan", "cuentan", "aceptan",
+    "venden", "atienden", "incluye", "incluyen"
+}
+
+_RE_NO_ALFANUM = re.compile(r"[^a-z0-9ñ ]+")
+_RE_DATOS_PERSONALES = re.compile(r"\d|@|https?://|www\.")
+
+
+def normalizar_mensaje(texto: str) -> str:
+    """Minúsculas, sin acentos ni signos de puntuación, espacios colapsados."""
+    texto = unicodedata.normalize("NFD", texto.lower())
+    texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
+    texto = _RE_NO_ALFANUM.sub(" ", texto)
+    return " ".join(texto.split())
+
+
+class HashedTfidfVectorizer:
+    """
+    Vectorizador TF-IDF con hashing trick.
+
+    Features: tokens canónicos (sinónimos + stem por prefijo) y bigramas.
+    El IDF se calcula con las frecuencias de documento que mantiene el índice.
+    """
+
+    def __init__(self, n_features: int = 1 << 20, stem_length: int = 6):
+        self.n_features = n_features
+        self.stem_length = stem_length
+
+    def tokenize(self, texto_normalizado: str) -> List[str]:
+        tokens = []
+        for palabra in texto_normalizado.split():
+            if palabra in STOPWORDS:
+                continue
+            token = SINONIMOS.get(palabra, palabra)[:self.stem_length]
+            # "página web" y "sitio web" colapsan al mismo token canónico
+            if not tokens or tokens[-1] != token:
+                tokens.append(token)
+        return tokens
+
+    def features(self, texto_normalizado: str) -> Dict[int, float]:
+        """Frecuencia de término por feature hasheada."""
+        tokens = self.tokenize(texto_normalizado)
+        terminos = tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+        tf: Dict[int, float] = {}
+        for termino in terminos:
+            h = zlib.crc32(termino.encode("utf-8")) % self.n_features
+            tf[h] = tf.get(h, 0.0) + 1.0
+        return tf
+
+    @staticmethod
+    def weight(tf: Dict[int, float], idf) -> Dict[int, float]:
+        """Aplica IDF y normaliza L2."""
+        vector = {f: (1.0 + math.log(c)) * idf(f) for f, c in tf.items()}
+        norma = math.sqrt(sum(v * v for v in vector.values()))
+        if norma == 0:
+            return {}
+        return {f: v / norma for f, v in vector.items()}
+
+
+class _Entrada:
+    __slots__ = ("id", "espacio", "texto", "vector", "respuesta", "expira", "hits")
+
+    def __init__(
+        self, id_: int, espacio: str, texto: str, vector: Dict[int, float],
+        respuesta: Dict[str, Any], expira: float
+    ):
+        self.id = id_
+        self.espacio = espacio
+        self.texto = texto
+        self.vector = vector
+        self.respuesta = respuesta
+        self.expira = expira
+        self.hits = 0
+
+
+class SemanticAnswerCache:
+    """
+    Caché semántica con índice invertido, LRU y TTL.
+
+    lookup() compara solo contra candidatos que comparten las features más
+    raras de la consulta (acotados a max_candidates), por lo que el costo no
+    crece con el tamaño total del índice (sub-milisegundo con 100k entradas).
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.82,
+        max_entries: int = 100_000,
+        ttl_seconds: int = 86_400,
+        max_candidate_features: int = 4,
+        max_postings_ratio: float = 0.2,
+        max_candidates: int = 256
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_candidate_features = max_candidate_features
+        self.max_postings_ratio = max_postings_ratio
+        self.max_candidates = max_candidates
+        self.vectorizer = HashedTfidfVectorizer()
+
+        self._entradas: "OrderedDict[int, _Entrada]" = OrderedDict()
+        self._exactas: Dict[Tuple[str, str], int] = {}
+        self._postings: Dict[Tuple[str, int], set] = {}
+        self._por_espacio: Dict[str, int] = {}
+        self._next_id = 0
+
+        self.stats = {"hits_exactos": 0, "hits_semanticos": 0, "misses": 0, "expulsadas": 0}
+
+    # ─── IDF ──────────────────────────────────────────────────
+
+    def _idf(self, espacio: str, feature: int) -> float:
+        df = len(self._postings.get((espacio, feature), ()))
+        return math.log((1 + self._por_espacio.get(espacio, 0)) / (1 + df)) + 1.0
+
+    # ─── API PÚBLICA ──────────────────────────────────────────
+
+    def lookup(self, mensaje: str, espacio: str = "") -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Busca una respuesta para un mensaje equivalente dentro del espacio.
+
+        Returns:
+            (respuesta, similitud) o None si no hay match sobre el umbral
+        """
+        texto = normalizar_mensaje(mensaje)
+        if not texto:
+            return None
+        ahora = time.monotonic()
+
+        # 1. Match exacto del texto normalizado
+        id_exacto = self._exactas.get((espacio, texto))
+        if id_exacto is not None:
+            entrada = self._entradas.get(id_exacto)
+            if entrada and entrada.expira > ahora:
+                return self._hit(entrada, 1.0, exacto=True)
+            self._remove(id_exacto)
+
+        # 2. Candidatos desde el índice invertido (features más raras primero)
+        tf = self.vectorizer.features(texto)
+        if not tf:
+            self.stats["misses"] += 1
+            return None
+        consulta = self.vectorizer.weight(tf, lambda f: self._idf(espacio, f))
+
+        limite_postings = max(50, int(self._por_espacio.get(espacio, 0) * self.max_postings_ratio))
+        features_raras = sorted(
+            ((espacio, f) for f in consulta if 0 < len(self._postings.get((espacio, f), ())) <= limite_postings),
+            key=lambda clave: len(self._postings[clave])
+        )[:self.max_candidate_features]
+
+        # La feature más rara siempre aporta candidatos; las siguientes solo
+        # mientras el conjunto no supere max_candidates
+        candidatos = set()
+        for feature in features_raras:
+            postings = self._postings[feature]
+            if candidatos and len(candidatos) + len(postings) > self.max_candidates:
+                break
+            candidatos.update(postings)
+
+        mejor: Optional[_Entrada] = None
+        mejor_sim = 0.0
+        for id_ in candidatos:
+            entrada = self._entradas[id_]
+            vector = entrada.vector
+            sim = sum(peso * vector.get(f, 0.0) for f, peso in consulta.items())
+            if sim > mejor_sim:
+                mejor, mejor_sim = entrada, sim
+
+        if mejor is not None and mejor_sim >= self.threshold:
+            if mejor.expira > ahora:
+                return self._hit(mejor, mejor_sim, exacto=False)
+            self._remove(mejor.id)
+
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, mensaje: str, respuesta: Dict[str, Any], espacio: str = ""):
+        """Guarda la respuesta para el mensaje en el espacio (reemplaza si ya existía)."""
+        texto = normalizar_mensaje(mensaje)
+        if not texto:
+            return
+        if (espacio, texto) in self._exactas:
+            self._remove(self._exactas[(espacio, texto)])
+
+        tf = self.vectorizer.features(texto)
+        if not tf:
+            return
+        vector = self.vectorizer.weight(tf, lambda f: self._idf(espacio, f))
+
+        id_ = self._next_id
+        self._next_id += 1
+        self._entradas[id_] = _Entrada(id_, espacio, texto, vector, respuesta, time.monotonic() + self.ttl_seconds)
+        self._exactas[(espacio, texto)] = id_
+        self._por_espacio[espacio] = self._por_espacio.get(espacio, 0) + 1
+        for feature in vector:
+            self._postings.setdefault((espacio, feature), set()).add(id_)
+
+        while len(self._entradas) > self.max_entries:
+            id_antiguo = next(iter(self._entradas))
+            self._remove(id_antiguo)
+            self.stats["expulsadas"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.stats["hits_exactos"] + self.stats["hits_semanticos"] + self.stats["misses"]
+        hits = self.stats["hits_exactos"] + self.stats["hits_semanticos"]
+        return {
+            **self.stats,
+            "entradas": len(self._entradas),
+            "espacios": len(self._por_espacio),
+            "features_indexadas": len(self._postings),
+            "hit_rate": hits / total if total else 0.0,
+            "umbral": self.threshold
+        }
+
+    def clear(self):
+        self._entradas.clear()
+        self._exactas.clear()
+        self._postings.clear()
+        self._por_espacio.clear()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    # ─── INTERNOS ─────────────────────────────────────────────
+
+    def _hit(self, entrada: _Entrada, similitud: float, exacto: bool) -> Tuple[Dict[str, Any], float]:
+        self._entradas.move_to_end(entrada.id)
+        entrada.hits += 1
+        self.stats["hits_exactos" if exacto else "hits_semanticos"] += 1
+        return entrada.respuesta, similitud
+
+    def _remove(self, id_: int):
+        entrada = self._entradas.pop(id_, None)
+        if entrada is None:
+            return
+        espacio = entrada.espacio
+        if self._exactas.get((espacio, entrada.texto)) == id_:
+            del self._exactas[(espacio, entrada.texto)]
+        self._por_espacio[espacio] -= 1
+        if not self._por_espacio[espacio]:
+            del self._por_espacio[espacio]
+        for feature in entrada.vector:
+            postings = self._postings.get((espacio, feature))
+            if postings is not None:
+                postings.discard(id_)
+                if not postings:
+                    del self._postings[(espacio, feature)]
+
+
+def es_consulta_generica(mensaje: str, max_palabras: int = 20) -> bool:
+    """
+    Indica si un mensaje es una pregunta frecuente (precio, servicios, horarios,
+    ubicación...) cuya respuesta puede compartirse entre leads.
+
+    Lista de permitidos: tiene que ser una pregunta (signo de interrogación o
+    palabra interrogativa al inicio) o empezar por el tema, y tratar un tema de
+    TEMAS_FRECUENTES. Se descartan mensajes con datos personales (números,
+    emails, URLs), largos o que hacen referencia a mensajes anteriores.
+    Solo mira el texto: el orquestador además exige que la conversación no
+    tenga historial ni datos del lead (ver OrchestratorAgent).
+    """
+    if _RE_DATOS_PERSONALES.search(mensaje):
+        return False
+    palabras = normalizar_mensaje(mensaje).split()
+    if not palabras or len(palabras) > max_palabras:
+        return False
+    if any(p in DEICTICOS for p in palabras):
+        return False
+    canonicas = [SINONIMOS.get(p, p) for p in palabras]
+    if not any(p in TEMAS_FRECUENTES for p in canonicas):
+        return False
+    return "?" in mensaje or palabras[0] in INTERROGATIVOS or canonicas[0] in TEMAS_FRECUENTES
+
+
+# Instancia global (None si SEMANTIC_CACHE_ENABLED=false)
+_semantic_cache: Optional[SemanticAnswerCache] = None
+
+def get_semantic_cache() -> Optional[SemanticAnswerCache]:
+    """Obtiene la caché semántica global, o None si está desactivada."""
+    global _semantic_cache
+    settings = get_settings()
+    if _semantic_cache is None and settings["semantic_cache_enabled"]:
+        _semantic_cache = SemanticAnswerCache(
+            threshold=settings["semantic_cache_threshold"],
+            max_entries=settings["semantic_cache_max_entries"],
+            ttl_seconds=settings["semantic_cache_ttl_seconds"]
+        )
+    return _semantic_cache
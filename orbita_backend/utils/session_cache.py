@@ -0,0 +1,224 @@
+"""
+Caché de sesión por chat de Telegram: fila del lead y estado de pausa
+[CRITERIO 1] - Respuesta inmediata sin consultar la BD en cada mensaje
+
+Cada mensaje del bot de leads necesitaba dos consultas antes de empezar a
+trabajar (leads por telegram_chat_id y telegram_bot_sessions). Esta caché de
+lectura las guarda por chat_id con un TTL (SESSION_CACHE_TTL_SECONDS).
+
+Cuando el bot de admin pausa un chat o cambia un lead, invalida la entrada de
+forma explícita. Con REDIS_URL la invalidación se publica en un canal pub/sub
+para que los demás procesos (p. ej. run_leads_bot.py y los workers de uvicorn)
+descarten su copia. Si la suscripción se cae, se reintenta con backoff
+exponencial y, mientras tanto, las entradas nuevas usan un TTL corto.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import get_settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis es opcional
+    aioredis = None
+
+_AUSENTE = object()
+
+
+class ChatSessionCache:
+    """
+    LRU con TTL de (campo, chat_id) → valor, con invalidación local y por pub/sub.
+
+    Campos: "lead" (fila de leads) y "pausado" (bool de telegram_bot_sessions).
+    """
+
+    CHANNEL = "orbita:session_cache:invalidate"
+    BACKOFF_INICIAL_S = 0.5
+    BACKOFF_MAX_S = 30.0
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 10_000, redis_url: Optional[str] = None,
+                 ttl_sin_pubsub_seconds: float = 5):
+        self.ttl_seconds = ttl_seconds
+        # TTL mientras no hay suscripción: sin invalidaciones remotas solo el TTL acota lo desactualizado
+        self.ttl_sin_pubsub_seconds = min(ttl_sin_pubsub_seconds, ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._origen = uuid.uuid4().hex  # para ignorar nuestras propias publicaciones
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        self._suscrito = False
+        if redis_url and aioredis is not None:
+            self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidaciones": 0,
+            "invalidaciones_remotas": 0,
+            "caidas_pubsub": 0,
+            "reconexiones_pubsub": 0
+        }
+
+    # ─── LECTURA ──────────────────────────────────────────────
+
+    async def get_or_load(self, campo: str, chat_id: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Devuelve el valor cacheado o lo carga con loader().
+        Los None no se cachean (p. ej. un lead que aún no existe); los errores del loader se propagan.
+        """
+        self._asegurar_suscripcion()
+        clave = (campo, str(chat_id))
+        valor = self._get(clave)
+        if valor is not _AUSENTE:
+            self.stats["hits"] += 1
+            return valor
+
+        self.stats["misses"] += 1
+        valor = await loader()
+        if valor is not None:
+            self.set(campo, chat_id, valor)
+        return valor
+
+    def _get(self, clave: Tuple[str, str]) -> Any:
+        entrada = self._entries.get(clave)
+        if entrada is None:
+            return _AUSENTE
+        expira, valor = entrada
+        if expira <= time.monotonic():
+            del self._entries[clave]
+            return _AUSENTE
+        self._entries.move_to_end(clave)
+        return valor
+
+    def _ttl_vigente(self) -> float:
+        if self._redis is not None and not self._suscrito:
+            return self.ttl_sin_pubsub_seconds
+        return self.ttl_seconds
+
+    def set(self, campo: str, chat_id: str, valor: Any):
+        clave = (campo, str(chat_id))
+        self._entries[clave] = (time.monotonic() + self._ttl_vigente(), valor)
+        self._entries.move_to_end(clave)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ─── INVALIDACIÓN ─────────────────────────────────────────
+
+    def _descartar(self, chat_id: str, campo: Optional[str] = None):
+        campos = (campo,) if campo else ("lead", "pausado")
+        for c in campos:
+            self._entries.pop((c, str(chat_id)), None)
+
+    async def invalidar(self, chat_id: str, campo: Optional[str] = None):
+        """Descarta la entrada del chat en este proceso y la publica para los demás."""
+        self._descartar(chat_id, campo)
+        self.stats["invalidaciones"] += 1
+        if self._redis is not None:
+            try:
+                await self._redis.publish(self.CHANNEL, json.dumps({
+                    "origen": self._origen, "chat_id": str(chat_id), "campo": campo
+                }))
+            except Exception as e:
+                print(f"⚠️ No se pudo publicar la invalidación en Redis: {e}")
+
+    def _asegurar_suscripcion(self):
+        if self._redis is not None and self._listener is None:
+            try:
+                self._listener = asyncio.get_running_loop().create_task(self._escuchar())
+            except RuntimeError:
+                pass  # sin event loop todavía; se reintenta en la próxima lectura
+
+    async def _escuchar(self):
+        """
+        Aplica las invalidaciones publicadas por otros procesos.
+        Si la suscripción falla o se cierra, reintenta con backoff exponencial.
+        """
+        espera = self.BACKOFF_INICIAL_S
+        caida = False
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                if caida:
+                    # Las invalidaciones publicadas durante la caída se perdieron
+                    self._entries.clear()
+                    self.stats["reconexiones_pubsub"] += 1
+                    print("✅ Suscripción de invalidaciones en Redis restablecida")
+                self._suscrito = True
+                espera = self.BACKOFF_INICIAL_S
+                async for mensaje in pubsub.listen():
+                    if mensaje.get("type") == "message":
+                        self._aplicar_remota(mensaje["data"])
+                raise ConnectionError("la suscripción se cerró")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Lo cacheado con el TTL largo ya no recibirá invalidaciones
+                self._entries.clear()
+                caida = True
+                self.stats["caidas_pubsub"] += 1
+                print(f"⚠️ Suscripción de invalidaciones en Redis caída ({e}); "
+                      f"TTL de {self.ttl_sin_pubsub_seconds}s, reintento en {espera}s")
+            finally:
+                self._suscrito = False
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, self.BACKOFF_MAX_S)
+
+    def _aplicar_remota(self, data: str):
+        try:
+            evento = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if evento.get("origen") == self._origen:
+            return
+        self._descartar(evento["chat_id"], evento.get("campo"))
+        self.stats["invalidaciones_remotas"] += 1
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    # ─── MÉTRICAS ─────────────────────────────────────────────
+
+    def get_stats(self) -> Dict[str, Any]:
+        consultas = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / consultas, 3) if consultas else 0.0,
+            "entradas": len(self._entries),
+            "ttl_segundos": self.ttl_seconds,
+            "pubsub": self._redis is not None,
+            "pubsub_suscrito": self._suscrito,
+            "ttl_vigente_segundos": self._ttl_vigente()
+        }
+
+
+# Instancia global
+_session_cache: Optional[ChatSessionCache] = None
+
+def get_session_cache() -> ChatSessionCache:
+    """Obtiene la caché de sesión por chat global."""
+    global _session_cache
+    if _session_cache is None:
+        settings = get_settings()
+        _session_cache = ChatSessionCache(
+            ttl_seconds=settings["session_cache_ttl_seconds"],
+            max_entries=settings["session_cache_max_entries"],
+            redis_url=settings["redis_url"]
+        )
+    return _session_cache
+
+async def close_session_cache():
+    """Detiene la suscripción de invalidaciones (apagado ordenado)."""
+    if _session_cache is not None:
+        await _session_cache.close()
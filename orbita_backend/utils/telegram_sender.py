@@ -0,0 +1,491 @@
+"""
+Envío saliente a Telegram con límites de tasa
+[CRITERIO 1] - Respuesta inmediata sin bloqueos por flood control
+
+Telegram admite ~30 mensajes/s por bot y ~1 mensaje/s por chat. Todos los
+send_message de los bots pasan por un TelegramSender (uno por token) que:
+
+- Reparte los envíos con un token bucket global (TELEGRAM_SEND_RATE_PER_SECOND)
+- Espacia los mensajes de un mismo chat (TELEGRAM_SEND_PER_CHAT_INTERVAL),
+  conservando su orden
+- Atiende primero las respuestas a leads y después alertas y difusiones
+- Respeta el retry_after de los 429 y reintenta (TELEGRAM_SEND_MAX_RETRIES)
+- Reenvía como texto plano si el Markdown no se puede parsear
+- Envía a muchos chats a la vez (difundir) sin superar el límite global
+- Envía archivos (enviar_documento) con los mismos límites y orden por chat
+- Edita mensajes (editar) con el mismo ritmo por chat; RespuestaProgresiva
+  muestra una respuesta en streaming editando un mensaje provisional
+"""
+
+import asyncio
+import heapq
+import io
+import itertools
+import re
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from telegram import Bot
+from telegram.error import BadRequest, RetryAfter
+
+from config import get_settings
+
+# Carriles de prioridad (menor = antes)
+PRIORIDAD_RESPUESTA = 0
+PRIORIDAD_ALERTA = 1
+PRIORIDAD_DIFUSION = 2
+
+_NOMBRES_PRIORIDAD = {
+    PRIORIDAD_RESPUESTA: "respuesta",
+    PRIORIDAD_ALERTA: "alerta",
+    PRIORIDAD_DIFUSION: "difusion"
+}
+
+LIMITE_MENSAJE = 4096
+
+
+class PriorityTokenBucket:
+    """
+    Token bucket cuyos turnos se entregan por prioridad y, a igual prioridad, por orden de llegada.
+
+    Con capacity=1 (por defecto) los envíos se espacian 1/rate segundos: ninguna
+    ventana de un segundo supera `rate`, que es como Telegram mide el límite.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._actualizado = time.monotonic()
+        self._esperando: List[tuple] = []
+        self._orden = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, prioridad: int = PRIORIDAD_RESPUESTA):
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._esperando, (prioridad, next(self._orden), futuro))
+        self._despachar()
+        await futuro
+
+    def _despachar(self):
+        self._timer = None
+        ahora = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (ahora - self._actualizado) * self.rate)
+        self._actualizado = ahora
+
+        while self._esperando and self._tokens >= 1:
+            _, _, futuro = heapq.heappop(self._esperando)
+            if futuro.done():  # el llamador se canceló mientras esperaba
+                continue
+            self._tokens -= 1
+            futuro.set_result(None)
+
+        if self._esperando and self._timer is None:
+            espera = (1 - self._tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(espera, self._despachar)
+
+    @property
+    def en_cola(self) -> int:
+        return len(self._esperando)
+
+
+class TelegramSender:
+    """Planificador de envíos de un bot: token bucket global + ritmo por chat + reintentos."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        rate_per_second: float = 30,
+        per_chat_interval: float = 1.0,
+        max_retries: int = 3
+    ):
+        self.bot = bot
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        self._bucket = PriorityTokenBucket(rate_per_second)
+        self._locks_chat: Dict[str, tuple] = {}  # chat_id → (lock, envíos pendientes)
+        self._proximo_envio: Dict[str, float] = {}
+        self._esperas_ms = {p: deque(maxlen=500) for p in _NOMBRES_PRIORIDAD}
+        self.stats = {
+            "enviados": 0,
+            "reintentos_429": 0,
+            "fallback_texto_plano": 0,
+            "ediciones": 0,
+            "errores": 0
+        }
+
+    async def enviar(
+        self,
+        chat_id,
+        text: str,
+        prioridad: int = PRIORIDAD_RESPUESTA,
+        **kwargs
+    ):
+        """
+        Envía un mensaje respetando los límites de Telegram.
+
+        Args:
+            prioridad: PRIORIDAD_RESPUESTA, PRIORIDAD_ALERTA o PRIORIDAD_DIFUSION
+            **kwargs: Argumentos de Bot.send_message (parse_mode, reply_markup, ...)
+
+        Returns:
+            telegram.Message enviado (los errores distintos de 429 se propagan)
+        """
+        return await self._en_orden(chat_id, prioridad, lambda: self._send_message(chat_id, text, kwargs))
+
+    async def enviar_documento(
+        self,
+        chat_id,
+        documento: bytes,
+        filename: str,
+        caption: Optional[str] = None,
+        prioridad: int = PRIORIDAD_RESPUESTA,
+        **kwargs
+    ):
+        """
+        Envía un archivo (p. ej. el PDF de una cotización) como un único documento.
+
+        Args:
+            documento: Contenido del archivo
+            filename: Nombre con el que lo verá el usuario
+            **kwargs: Argumentos de Bot.send_document (parse_mode, reply_markup, ...)
+        """
+        def envio():
+            # Buffer nuevo en cada intento: un reintento tras 429 vuelve a leer desde el inicio
+            return self.bot.send_document(
+                chat_id=chat_id, document=io.BytesIO(documento), filename=filename,
+                caption=caption, **kwargs
+            )
+        return await self._en_orden(chat_id, prioridad, envio)
+
+    async def editar(
+        self,
+        chat_id,
+        message_id: int,
+        text: str,
+        prioridad: int = PRIORIDAD_RESPUESTA,
+        fallback_texto_plano: bool = True,
+        **kwargs
+    ):
+        """
+        Edita el texto de un mensaje ya enviado. Las ediciones cuentan para el
+        ritmo por chat igual que los envíos.
+
+        Args:
+            fallback_texto_plano: Si el Markdown no se puede parsear, reintentar sin
+                formato (con False se propaga el BadRequest)
+            **kwargs: Argumentos de Bot.edit_message_text (parse_mode, reply_markup, ...)
+
+        Returns:
+            telegram.Message editado, o None si el texto no cambió
+        """
+        async def envio():
+            try:
+                return await self.bot.edit_message_text(
+                    text=text, chat_id=chat_id, message_id=message_id, **kwargs
+                )
+            except BadRequest as e:
+                error = str(e).lower()
+                if "not modified" in error:
+                    return None
+                if not fallback_texto_plano or not kwargs.get("parse_mode") or "parse" not in error:
+                    raise
+                print(f"⚠️ Error con Markdown al editar, se edita como texto plano: {e}")
+                self.stats["fallback_texto_plano"] += 1
+                sin_formato = {k: v for k, v in kwargs.items() if k != "parse_mode"}
+                return await self.bot.edit_message_text(
+                    text=text, chat_id=chat_id, message_id=message_id, **sin_formato
+                )
+        mensaje = await self._en_orden(chat_id, prioridad, envio)
+        self.stats["ediciones"] += 1
+        return mensaje
+
+    async def _en_orden(self, chat_id, prioridad: int, envio: Callable[[], Awaitable[Any]]):
+        clave = str(chat_id)
+        lock, usos = self._locks_chat.get(clave) or (asyncio.Lock(), 0)
+        self._locks_chat[clave] = (lock, usos + 1)
+        try:
+            # El lock del chat conserva el orden de sus mensajes
+            async with lock:
+                return await self._enviar_en_turno(clave, prioridad, envio)
+        finally:
+            lock, usos = self._locks_chat[clave]
+            if usos == 1:
+                del self._locks_chat[clave]
+            else:
+                self._locks_chat[clave] = (lock, usos - 1)
+
+    async def _enviar_en_turno(self, clave: str, prioridad: int, envio: Callable[[], Awaitable[Any]]):
+        inicio = time.perf_counter()
+        intentos = 0
+        while True:
+            espera = self._proximo_envio.get(clave, 0) - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            await self._bucket.acquire(prioridad)
+            if intentos == 0:
+                self._esperas_ms[prioridad].append((time.perf_counter() - inicio) * 1000)
+
+            try:
+                mensaje = await envio()
+            except RetryAfter as e:
+                intentos += 1
+                self.stats["reintentos_429"] += 1
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                self._proximo_envio[clave] = time.monotonic() + float(retry_after)
+                print(f"⏳ Flood control en chat {clave}: reintento en {retry_after}s")
+                if intentos > self.max_retries:
+                    self.stats["errores"] += 1
+                    raise
+                continue
+            except Exception:
+                self.stats["errores"] += 1
+                raise
+
+            self.stats["enviados"] += 1
+            ahora = time.monotonic()
+            self._proximo_envio[clave] = ahora + self.per_chat_interval
+            if len(self._proximo_envio) > 10_000:
+                self._proximo_envio = {c: t for c, t in self._proximo_envio.items() if t > ahora}
+            return mensaje
+
+    async def _send_message(self, chat_id, text: str, kwargs: Dict[str, Any]):
+        try:
+            return await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        except BadRequest as e:
+            # Markdown mal formado (típico en respuestas del LLM): reenviar como texto plano
+            if not kwargs.get("parse_mode") or "parse" not in str(e).lower():
+                raise
+            print(f"⚠️ Error con Markdown, enviando como texto plano: {e}")
+            self.stats["fallback_texto_plano"] += 1
+            sin_formato = {k: v for k, v in kwargs.items() if k != "parse_mode"}
+            return await self.bot.send_message(chat_id=chat_id, text=text, **sin_formato)
+
+    async def enviar_largo(
+        self,
+        chat_id,
+        text: str,
+        prioridad: int = PRIORIDAD_RESPUESTA,
+        limite: int = 4000,
+        **kwargs
+    ) -> list:
+        """Divide textos mayores que el límite de Telegram y los envía en orden (cortando en saltos de línea)."""
+        if len(text) <= LIMITE_MENSAJE:
+            return [await self.enviar(chat_id, text, prioridad, **kwargs)]
+        return [
+            await self.enviar(chat_id, parte, prioridad, **kwargs)
+            for parte in dividir_texto(text, limite)
+        ]
+
+    async def difundir(
+        self,
+        chat_ids: Iterable,
+        text: str,
+        prioridad: int = PRIORIDAD_DIFUSION,
+        **kwargs
+    ) -> Dict[str, Optional[str]]:
+        """
+        Envía el mismo mensaje a varios chats a la vez.
+
+        Returns:
+            {chat_id: None si se envió, o el error}
+        """
+        chat_ids = list(chat_ids)
+        resultados = await asyncio.gather(
+            *(self.enviar(chat_id, text, prioridad, **kwargs) for chat_id in chat_ids),
+            return_exceptions=True
+        )
+        return {
+            str(chat_id): (str(r) if isinstance(r, Exception) else None)
+            for chat_id, r in zip(chat_ids, resultados)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        espera = {}
+        for prioridad, valores in self._esperas_ms.items():
+            if valores:
+                ordenados = sorted(valores)
+                espera[_NOMBRES_PRIORIDAD[prioridad]] = {
+                    "p50": round(ordenados[len(ordenados) // 2], 1),
+                    "p95": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))], 1)
+                }
+        return {
+            **self.stats,
+            "en_cola": self._bucket.en_cola,
+            "espera_ms": espera,
+            "limite_por_segundo": self._bucket.rate,
+            "intervalo_por_chat_s": self.per_chat_interval
+        }
+
+
+_RE_ENLACE = re.compile(r"\[[^\]]*\]\([^)]*\)")
+
+
+def markdown_cerrado(texto: str) -> bool:
+    """
+    ¿El texto no deja entidades de Markdown abiertas (*, _, `, ```, [enlace](url))?
+    Un texto a medio generar puede cortar una entidad y Telegram lo rechazaría.
+    """
+    if texto.count("```") % 2:
+        return False
+    sin_bloques = texto.replace("```", "")
+    if sin_bloques.count("`") % 2 or texto.count("*") % 2 or texto.count("_") % 2:
+        return False
+    return texto.count("[") == len(_RE_ENLACE.findall(texto))
+
+
+class RespuestaProgresiva:
+    """
+    Respuesta a un chat que se muestra mientras se genera.
+
+    iniciar() envía un mensaje provisional; actualizar() recibe el texto acumulado
+    y lo vuelca con edit_message_text en lotes: una edición en vuelo como mucho y
+    separadas por `intervalo` segundos (además del ritmo por chat del sender).
+    La primera edición solo espera `primer_intervalo` desde el provisional, para
+    que el lead vea texto en cuanto llegan los primeros tokens.
+    Solo se muestran textos con el Markdown cerrado; si aun así Telegram rechaza
+    una edición, o el texto supera el límite de un mensaje, se dejan de editar y
+    finalizar() entrega la respuesta completa como sin streaming.
+    """
+
+    def __init__(
+        self,
+        sender: TelegramSender,
+        chat_id,
+        intervalo: float = 1.0,
+        primer_intervalo: float = 0.0,
+        provisional: str = "✍️ ...",
+        parse_mode: Optional[str] = "Markdown"
+    ):
+        self.sender = sender
+        self.chat_id = chat_id
+        self.intervalo = intervalo
+        self.primer_intervalo = primer_intervalo
+        self.provisional = provisional
+        self.parse_mode = parse_mode
+        self.mensaje = None
+        self.streaming = True
+        self._texto = ""
+        self._seguro = ""
+        self._mostrado = ""
+        self._ultima_edicion = 0.0
+        self._tarea: Optional[asyncio.Task] = None
+        self.stats = {"ediciones": 0, "omitidas_markdown": 0}
+
+    async def iniciar(self):
+        """Envía el mensaje provisional (si falla, finalizar() enviará un mensaje normal)."""
+        try:
+            self.mensaje = await self.sender.enviar(self.chat_id, self.provisional)
+        except Exception as e:
+            print(f"⚠️ No se pudo enviar el mensaje provisional: {e}")
+            self.streaming = False
+        self._ultima_edicion = time.monotonic()
+
+    def actualizar(self, texto: str):
+        """Registra el texto acumulado; programa una edición si no hay otra en vuelo."""
+        self._texto = texto
+        if not self.streaming or self.mensaje is None:
+            return
+        if len(texto) > LIMITE_MENSAJE:
+            self.streaming = False
+            return
+        if self.parse_mode and not markdown_cerrado(texto):
+            self.stats["omitidas_markdown"] += 1
+            return
+        self._seguro = texto
+        if self._tarea is None or self._tarea.done():
+            self._tarea = asyncio.create_task(self._editar_en_lotes())
+
+    async def _editar_en_lotes(self):
+        while self.streaming and self._seguro != self._mostrado:
+            pausa = self.intervalo if self.stats["ediciones"] else self.primer_intervalo
+            espera = self._ultima_edicion + pausa - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+                if not self.streaming:
+                    return
+            texto = self._seguro
+            try:
+                await self.sender.editar(
+                    self.chat_id, self.mensaje.message_id, texto,
+                    fallback_texto_plano=False, parse_mode=self.parse_mode
+                )
+            except Exception as e:
+                # Markdown roto a mitad de la respuesta u otro error: se entrega al final
+                print(f"⚠️ Se desactiva la edición en streaming: {e}")
+                self.streaming = False
+                return
+            self._mostrado = texto
+            self._ultima_edicion = time.monotonic()
+            self.stats["ediciones"] += 1
+
+    async def finalizar(self, texto: str, reply_markup=None):
+        """Muestra la respuesta completa (con botones) en el mensaje provisional."""
+        self.streaming = False
+        if self._tarea is not None:
+            await self._tarea
+
+        kwargs = {"parse_mode": self.parse_mode} if self.parse_mode else {}
+        if self.mensaje is None:
+            return await self.sender.enviar_largo(self.chat_id, texto, reply_markup=reply_markup, **kwargs)
+
+        partes = dividir_texto(texto) if len(texto) > LIMITE_MENSAJE else [texto]
+        try:
+            await self.sender.editar(
+                self.chat_id, self.mensaje.message_id, partes[0],
+                reply_markup=reply_markup if len(partes) == 1 else None, **kwargs
+            )
+        except Exception as e:
+            print(f"⚠️ No se pudo editar la respuesta final, se envía como mensaje nuevo: {e}")
+            return await self.sender.enviar_largo(self.chat_id, texto, reply_markup=reply_markup, **kwargs)
+        for i, parte in enumerate(partes[1:], start=2):
+            await self.sender.enviar(
+                self.chat_id, parte,
+                reply_markup=reply_markup if i == len(partes) else None, **kwargs
+            )
+
+
+def dividir_texto(text: str, limite: int = 4000) -> List[str]:
+    """Parte el texto en trozos de como mucho `limite` caracteres, preferiblemente en saltos de línea."""
+    partes = []
+    while len(text) > limite:
+        corte = text.rfind("\n", 0, limite)
+        if corte <= 0:
+            corte = limite
+        partes.append(text[:corte])
+        text = text[corte:].lstrip("\n")
+    if text:
+        partes.append(text)
+    return partes
+
+
+# Un planificador por token (los límites de Telegram son por bot)
+_senders: Dict[str, TelegramSender] = {}
+
+def get_telegram_sender(bot: Bot) -> TelegramSender:
+    """Obtiene el planificador de envíos del bot."""
+    sender = _senders.get(bot.token)
+    if sender is None:
+        settings = get_settings()
+        sender = _senders[bot.token] = TelegramSender(
+            bot,
+            rate_per_second=settings["telegram_send_rate_per_second"],
+            per_chat_interval=settings["telegram_send_per_chat_interval"],
+            max_retries=settings["telegram_send_max_retries"]
+        )
+    return sender
+
+def get_telegram_senders_stats() -> Dict[str, Any]:
+    """Métricas de todos los planificadores creados (clave: username del bot si se conoce)."""
+    stats = {}
+    for token, sender in _senders.items():
+        try:
+            nombre = sender.bot.username
+        except RuntimeError:  # bot sin initialize()
+            nombre = token.split(":")[0]
+        stats[nombre] = sender.get_stats()
+    return stats
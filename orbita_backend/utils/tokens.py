@@ -0,0 +1,49 @@
+"""
+Aproximación de conteo de tokens para prompts de Groq/OpenAI
+[CRITERIO 3] - Presupuesto de tokens por agente sin depender de un tokenizer
+
+Los tokenizers BPE de Llama 3 y GPT-4o separan signos de puntuación y parten
+las palabras largas (o con acentos) en varias piezas. Contar ~1 token por cada
+4 caracteres de palabra, con mínimo 1 por palabra, y 1 por cada signo queda
+cerca del conteo real en español sin cargar vocabularios.
+"""
+
+import math
+import re
+from typing import Dict, List
+
+_RE_PIEZAS = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Tokens extra por mensaje en el formato chat (rol + delimitadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación de tokens de un texto."""
+    if not text:
+        return 0
+    total = 0
+    for pieza in _RE_PIEZAS.findall(text):
+        total += max(1, math.ceil(len(pieza) / 4)) if pieza[0].isalnum() or pieza[0] == "_" else 1
+    return total
+
+
+def estimate_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimación de tokens de prompt para una lista de mensajes de chat."""
+    return sum(estimate_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Recorta el texto para que no supere max_tokens (corta por palabras)."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    palabras = text.split()
+    resultado = []
+    usados = 0
+    for palabra in palabras:
+        costo = estimate_tokens(palabra)
+        if usados + costo > max_tokens - 1:
+            break
+        resultado.append(palabra)
+        usados += costo
+    return " ".join(resultado) + "…"
@@ -0,0 +1,130 @@
+"""
+Transcripción de notas de voz en memoria
+[CRITERIO 3] - Whisper transcribe notas de voz en tiempo real
+
+El audio se descarga de Telegram a un BytesIO y se envía tal cual al endpoint
+de Whisper, sin archivos temporales. Las transcripciones simultáneas se limitan
+con un semáforo (TRANSCRIPTION_MAX_CONCURRENT) y se cachean por el
+file_unique_id de Telegram: una nota de voz reenviada (o el mismo audio
+recibido dos veces a la vez) se transcribe una sola vez.
+"""
+
+import asyncio
+import io
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Optional
+
+from config import get_settings
+from utils.groq_client import get_groq_client
+
+
+class VoiceTranscriber:
+    """Semáforo de transcripciones + caché LRU de textos por file_unique_id."""
+
+    def __init__(self, max_concurrent: int = 4, cache_max_entries: int = 1000):
+        self.max_concurrent = max_concurrent
+        self.cache_max_entries = cache_max_entries
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._en_curso: Dict[str, asyncio.Future] = {}
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self.stats = {
+            "transcripciones": 0,
+            "hits_cache": 0,
+            "compartidas": 0,
+            "errores": 0,
+            "bytes_audio": 0,
+            "ms_total": 0.0
+        }
+
+    async def transcribir(
+        self,
+        file_unique_id: str,
+        descargar: Callable[[BinaryIO], Awaitable[Any]],
+        filename: str = "voice.ogg"
+    ) -> Optional[str]:
+        """
+        Devuelve la transcripción del audio identificado por file_unique_id.
+
+        Args:
+            descargar: Corrutina que escribe el audio en el buffer recibido
+                       (p. ej. telegram.File.download_to_memory)
+
+        Returns:
+            Texto transcrito, o None si la descarga o Whisper fallan
+        """
+        texto = self._cache.get(file_unique_id)
+        if texto is not None:
+            self._cache.move_to_end(file_unique_id)
+            self.stats["hits_cache"] += 1
+            return texto
+
+        # El mismo audio ya se está transcribiendo: esperar ese resultado
+        pendiente = self._en_curso.get(file_unique_id)
+        if pendiente is not None:
+            self.stats["compartidas"] += 1
+            return await asyncio.shield(pendiente)
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_curso[file_unique_id] = futuro
+        try:
+            texto = await self._transcribir_limitado(descargar, filename)
+            if texto:
+                self._guardar(file_unique_id, texto)
+            futuro.set_result(texto)
+            return texto
+        finally:
+            if not futuro.done():
+                futuro.set_result(None)
+            del self._en_curso[file_unique_id]
+
+    async def _transcribir_limitado(self, descargar, filename: str) -> Optional[str]:
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_concurrent)
+
+        async with self._semaforo:
+            inicio = time.perf_counter()
+            try:
+                buffer = io.BytesIO()
+                await descargar(buffer)
+                self.stats["bytes_audio"] += buffer.tell()
+                buffer.seek(0)
+                texto = await get_groq_client().transcribe_audio(buffer, filename=filename)
+            except Exception as e:
+                self.stats["errores"] += 1
+                print(f"❌ Error transcribiendo voz: {e}")
+                return None
+            self.stats["transcripciones"] += 1
+            self.stats["ms_total"] += (time.perf_counter() - inicio) * 1000
+            return texto
+
+    def _guardar(self, file_unique_id: str, texto: str):
+        self._cache[file_unique_id] = texto
+        self._cache.move_to_end(file_unique_id)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        hechas = self.stats["transcripciones"]
+        return {
+            **{k: v for k, v in self.stats.items() if k != "ms_total"},
+            "ms_promedio": round(self.stats["ms_total"] / hechas, 1) if hechas else None,
+            "en_cache": len(self._cache),
+            "en_curso": len(self._en_curso),
+            "max_concurrentes": self.max_concurrent
+        }
+
+
+# Instancia global
+_transcriber: Optional[VoiceTranscriber] = None
+
+def get_voice_transcriber() -> VoiceTranscriber:
+    """Obtiene el transcriptor de notas de voz global."""
+    global _transcriber
+    if _transcriber is None:
+        settings = get_settings()
+        _transcriber = VoiceTranscriber(
+            max_concurrent=settings["transcription_max_concurrent"],
+            cache_max_entries=settings["transcription_cache_max_entries"]
+        )
+    return _transcriber
@@ -0,0 +1,157 @@
+"""
+Despachador de updates de Telegram: en orden por chat, concurrente entre chats
+[CRITERIO 1] - Una nota de voz o una respuesta lenta de un lead no frena a los demás
+
+Cada chat_id tiene su propia cola y un único consumidor, así los mensajes de un
+mismo lead se procesan estrictamente en el orden en que llegaron. Los distintos
+chats avanzan en paralelo, con un tope global de updates en proceso
+(UPDATE_DISPATCHER_MAX_IN_FLIGHT) para no saturar Groq ni Supabase.
+
+submit() solo encola: el polling de python-telegram-bot y el webhook responden
+de inmediato y el trabajo pesado queda en segundo plano.
+"""
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from config import get_settings
+
+
+class UpdateDispatcher:
+    """
+    Colas por clave (chat_id) + semáforo global de updates en proceso.
+
+    handler recibe los mismos argumentos que se pasan a submit() después de la clave.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        max_in_flight: int = 32,
+        max_pending_per_chat: int = 50
+    ):
+        self.handler = handler
+        self.max_in_flight = max_in_flight
+        self.max_pending_per_chat = max_pending_per_chat
+
+        self._colas: Dict[Any, Deque[Tuple[float, tuple]]] = {}
+        self._consumidores: Set[asyncio.Task] = set()
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._en_proceso = 0
+
+        self._esperas_ms: Deque[float] = deque(maxlen=1000)
+        self._duraciones_ms: Deque[float] = deque(maxlen=1000)
+        self.stats = {
+            "recibidos": 0,
+            "procesados": 0,
+            "errores": 0,
+            "descartados": 0,
+            "en_proceso_max": 0
+        }
+
+    # ─── ENCOLAR ──────────────────────────────────────────────
+
+    def submit(self, key: Any, *args) -> bool:
+        """
+        Encola un update para su chat. Retorna False si la cola del chat está llena.
+        No espera al procesamiento.
+        """
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_in_flight)
+
+        cola = self._colas.get(key)
+        if cola is not None and len(cola) >= self.max_pending_per_chat:
+            self.stats["descartados"] += 1
+            print(f"⚠️ Dispatcher: cola del chat {key} llena, update descartado")
+            return False
+
+        self.stats["recibidos"] += 1
+        if cola is None:
+            # Primer update pendiente del chat: se arranca su consumidor
+            cola = self._colas[key] = deque()
+            cola.append((time.perf_counter(), args))
+            tarea = asyncio.create_task(self._consumir(key, cola))
+            self._consumidores.add(tarea)
+            tarea.add_done_callback(self._consumidores.discard)
+        else:
+            cola.append((time.perf_counter(), args))
+        return True
+
+    # ─── PROCESAMIENTO ────────────────────────────────────────
+
+    async def _consumir(self, key: Any, cola: Deque[Tuple[float, tuple]]):
+        """Procesa la cola de un chat en orden; termina cuando queda vacía."""
+        try:
+            while cola:
+                encolado, args = cola[0]
+                async with self._semaforo:
+                    cola.popleft()
+                    self._esperas_ms.append((time.perf_counter() - encolado) * 1000)
+                    self._en_proceso += 1
+                    self.stats["en_proceso_max"] = max(self.stats["en_proceso_max"], self._en_proceso)
+                    inicio = time.perf_counter()
+                    try:
+                        await self.handler(*args)
+                        self.stats["procesados"] += 1
+                    except Exception as e:
+                        self.stats["errores"] += 1
+                        print(f"❌ Dispatcher: error procesando update del chat {key}: {e}")
+                    finally:
+                        self._en_proceso -= 1
+                        self._duraciones_ms.append((time.perf_counter() - inicio) * 1000)
+        finally:
+            if self._colas.get(key) is cola:
+                del self._colas[key]
+
+    async def drain(self, timeout: float = 30.0):
+        """Espera a que se procesen los updates pendientes (apagado ordenado y pruebas)."""
+        if not self._consumidores:
+            return
+        _, pendientes = await asyncio.wait(list(self._consumidores), timeout=timeout)
+        for tarea in pendientes:
+            tarea.cancel()
+        if pendientes:
+            print(f"⚠️ Dispatcher: {len(pendientes)} chats con updates sin procesar al cerrar")
+
+    # ─── MÉTRICAS ─────────────────────────────────────────────
+
+    @staticmethod
+    def _percentiles(valores: Deque[float]) -> Dict[str, Optional[float]]:
+        ordenados = sorted(valores)
+        if not ordenados:
+            return {"p50": None, "p95": None, "max": None}
+        return {
+            "p50": round(statistics.median(ordenados), 2),
+            "p95": round(ordenados[max(0, int(len(ordenados) * 0.95) - 1)], 2),
+            "max": round(ordenados[-1], 2)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "en_proceso": self._en_proceso,
+            "max_en_proceso": self.max_in_flight,
+            "chats_activos": len(self._colas),
+            "pendientes": sum(len(c) for c in self._colas.values()),
+            "espera_cola_ms": self._percentiles(self._esperas_ms),
+            "duracion_ms": self._percentiles(self._duraciones_ms)
+        }
+
+
+def chat_key(update: Any) -> Any:
+    """Clave de orden de un update de Telegram: el chat, o el update_id si no tiene chat."""
+    chat = getattr(update, "effective_chat", None)
+    return chat.id if chat is not None else f"update:{update.update_id}"
+
+
+def create_update_dispatcher(handler: Callable[..., Awaitable[Any]]) -> UpdateDispatcher:
+    """Crea un dispatcher con los límites configurados (UPDATE_DISPATCHER_*)."""
+    settings = get_settings()
+    return UpdateDispatcher(
+        handler,
+        max_in_flight=settings["update_dispatcher_max_in_flight"],
+        max_pending_per_chat=settings["update_dispatcher_max_per_chat"]
+    )
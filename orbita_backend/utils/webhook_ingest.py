@@ -0,0 +1,116 @@
+"""
+Ingesta de webhooks de Telegram: verificación del secreto y deduplicación
+[CRITERIO 1] - Ningún mensaje de un lead se procesa dos veces ni se pierde por reintentos
+
+Telegram reintenta un update si el webhook no responde 200 a tiempo, y puede
+reenviarlo tras un reinicio. Los endpoints verifican el header
+X-Telegram-Bot-Api-Secret-Token, descartan update_id ya vistos y encolan el
+resto en el UpdateDispatcher, respondiendo en milisegundos.
+
+La deduplicación usa un LRU en memoria y, si hay REDIS_URL, un SET NX con TTL
+compartido entre workers de uvicorn.
+"""
+
+import hmac
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import get_settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis es opcional
+    aioredis = None
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def secreto_valido(recibido: Optional[str], esperado: Optional[str]) -> bool:
+    """Compara el header del webhook con el secreto configurado en tiempo constante."""
+    if not esperado:
+        return True  # Sin secreto configurado no hay nada que verificar
+    return hmac.compare_digest((recibido or "").encode(), esperado.encode())
+
+
+class UpdateDeduplicator:
+    """
+    Recuerda los update_id recientes de cada bot.
+
+    - Memoria: LRU acotado con TTL (un worker)
+    - Redis (opcional): SET NX EX, para que dos workers no procesen el mismo update
+    """
+
+    REDIS_PREFIX = "orbita:tg_update:"
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: int = 86_400, redis_url: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._vistos: "OrderedDict[str, float]" = OrderedDict()
+        self._redis = None
+        if redis_url and aioredis is not None:
+            self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.stats = {"nuevos": 0, "duplicados": 0, "olvidados": 0}
+
+    async def es_nuevo(self, bot: str, update_id: int) -> bool:
+        """True la primera vez que se ve (bot, update_id); False en reintentos."""
+        clave = f"{bot}:{update_id}"
+        ahora = time.monotonic()
+
+        expira = self._vistos.get(clave)
+        if expira is not None and expira > ahora:
+            self.stats["duplicados"] += 1
+            return False
+
+        if self._redis is not None:
+            try:
+                if not await self._redis.set(self.REDIS_PREFIX + clave, 1, nx=True, ex=self.ttl_seconds):
+                    self._recordar(clave, ahora)
+                    self.stats["duplicados"] += 1
+                    return False
+            except Exception as e:
+                print(f"⚠️ Deduplicación en Redis no disponible, usando solo memoria: {e}")
+                self._redis = None
+
+        self._recordar(clave, ahora)
+        self.stats["nuevos"] += 1
+        return True
+
+    async def olvidar(self, bot: str, update_id: int):
+        """
+        Descarta (bot, update_id) para que el reintento de Telegram se acepte.
+        Se usa cuando el update no se pudo encolar tras marcarlo como visto.
+        """
+        clave = f"{bot}:{update_id}"
+        self._vistos.pop(clave, None)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(self.REDIS_PREFIX + clave)
+            except Exception as e:
+                print(f"⚠️ No se pudo liberar el update {clave} en Redis: {e}")
+        self.stats["olvidados"] += 1
+
+    def _recordar(self, clave: str, ahora: float):
+        self._vistos[clave] = ahora + self.ttl_seconds
+        self._vistos.move_to_end(clave)
+        while len(self._vistos) > self.max_entries:
+            self._vistos.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "en_memoria": len(self._vistos), "redis": self._redis is not None}
+
+
+# Instancia global
+_deduplicator: Optional[UpdateDeduplicator] = None
+
+def get_update_deduplicator() -> UpdateDeduplicator:
+    """Obtiene el deduplicador de updates global."""
+    global _deduplicator
+    if _deduplicator is None:
+        settings = get_settings()
+        _deduplicator = UpdateDeduplicator(
+            max_entries=settings["webhook_dedupe_max_entries"],
+            ttl_seconds=settings["webhook_dedupe_ttl_seconds"],
+            redis_url=settings["redis_url"]
+        )
+    return _deduplicator
@@ -0,0 +1,22 @@
+-- =========================================================
+-- Migración: Resumen incremental en conversations
+-- Propósito: Guardar un resumen acumulado de los turnos
+-- antiguos para no reenviar todo el historial a los agentes
+-- =========================================================
+
+-- Resumen acumulado de la conversación
+ALTER TABLE conversations
+ADD COLUMN IF NOT EXISTS resumen TEXT;
+
+-- Última actualización del resumen
+ALTER TABLE conversations
+ADD COLUMN IF NOT EXISTS resumen_actualizado_at TIMESTAMPTZ;
+
+-- Comentarios
+COMMENT ON COLUMN conversations.resumen IS 'Resumen incremental de los turnos antiguos, generado en segundo plano';
+
+-- Log de migración exitosa
+DO $$
+BEGIN
+  RAISE NOTICE 'Migración completada: columnas de resumen agregadas a tabla conversations';
+END $$;
@@ -0,0 +1,76 @@
+-- =========================================================
+-- Migración: Tabla conversation_messages (solo inserciones)
+-- Propósito: Guardar cada mensaje como una fila en lugar de
+-- reescribir el arreglo conversations.historial en cada turno
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS conversation_messages (
+  id BIGSERIAL PRIMARY KEY,
+  conversation_id UUID NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+  lead_id UUID NOT NULL REFERENCES leads(id) ON DELETE CASCADE,
+  role TEXT NOT NULL CHECK (role IN ('user', 'assistant', 'system')),
+  content TEXT NOT NULL DEFAULT '',
+  content_type TEXT DEFAULT 'text',
+  agente TEXT,
+
+  -- Posición en conversations.historial (solo filas migradas por el backfill)
+  posicion_historial INTEGER,
+
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  -- Evita duplicados si el backfill se ejecuta más de una vez
+  CONSTRAINT conversation_messages_historial_unique UNIQUE (conversation_id, posicion_historial)
+);
+
+-- Lectura "últimos N mensajes del lead" con paginación por cursor (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_conversation_messages_lead_created
+  ON conversation_messages(lead_id, created_at DESC, id DESC);
+
+-- Hasta qué mensaje cubre el resumen: cursor (created_at, id) sobre conversation_messages
+ALTER TABLE conversations
+ADD COLUMN IF NOT EXISTS resumen_hasta_at TIMESTAMPTZ;
+
+ALTER TABLE conversations
+ADD COLUMN IF NOT EXISTS resumen_hasta_id BIGINT;
+
+-- Seguridad a nivel de fila (mismas políticas que conversations)
+ALTER TABLE conversation_messages ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role tiene acceso completo a conversation_messages"
+  ON conversation_messages
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+CREATE POLICY "Backend puede insertar conversation_messages"
+  ON conversation_messages
+  FOR INSERT
+  TO authenticated
+  WITH CHECK (true);
+
+CREATE POLICY "Backend puede leer conversation_messages"
+  ON conversation_messages
+  FOR SELECT
+  TO authenticated
+  USING (true);
+
+-- ADVERTENCIA: Deshabilitar en producción
+CREATE POLICY "Anon puede acceder conversation_messages (solo desarrollo)"
+  ON conversation_messages
+  FOR ALL
+  TO anon
+  USING (true)
+  WITH CHECK (true);
+
+-- Comentarios
+COMMENT ON TABLE conversation_messages IS 'Mensajes de las conversaciones con leads, una fila por mensaje';
+COMMENT ON COLUMN conversation_messages.posicion_historial IS 'Índice original en conversations.historial (NULL para mensajes nuevos)';
+COMMENT ON COLUMN conversations.resumen_hasta_at IS 'created_at del último mensaje de conversation_messages cubierto por el resumen';
+COMMENT ON COLUMN conversations.resumen_hasta_id IS 'id del último mensaje de conversation_messages cubierto por el resumen (desempata created_at)';
+
+-- Log de migración exitosa
+DO $$
+BEGIN
+  RAISE NOTICE 'Migración completada: tabla conversation_messages creada';
+END $$;